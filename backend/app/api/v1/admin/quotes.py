@@ -3,18 +3,26 @@
 提供完整的数据库管理功能，包括软删除数据的操作
 """
 
+import csv
+import io
+import json
 import logging
-from typing import List, Optional, Union
+from typing import Iterator, List, Optional, Union
 from datetime import datetime
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status, Request, Body
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, validator
 from sqlalchemy import and_, or_, desc
 from sqlalchemy.orm import Session
 
 from ....database import get_db
-from ....models import Quote, QuoteItem, User
+from ....models import Quote, QuoteItem, User, quotes_archive
 from ....schemas import QuoteStatistics
+from ....services.quote_archive import CLOSED_RETENTION_YEARS, DELETED_RETENTION_DAYS, QuoteArchiveService
+from ....services.quote_bulk_operations import QuoteBulkService
+from ....services import quote_rollups
+from ....services.quote_list_projection import fetch_quote_list_page, iter_quote_list_chunks
 from .permissions import require_admin_role, require_super_admin_role
 
 # 数据模型
@@ -33,9 +41,24 @@ router = APIRouter(prefix="/quotes", tags=["管理员-报价单管理"])
 logger = logging.getLogger("app.api.admin.quotes")
 
 
+def _list_filters(columns, include_deleted: bool, status_filter: Optional[str]) -> list:
+    """构建列表过滤条件，columns 为在线表模型或归档表的列集合"""
+    filters = []
+
+    # 软删除过滤
+    if not include_deleted:
+        filters.append(columns.is_deleted == False)
+
+    # 状态过滤
+    if status_filter:
+        filters.append(columns.status == status_filter)
+    return filters
+
+
 @router.get("/all", response_model=dict)
 async def get_all_quotes(
     include_deleted: bool = Query(False, description="是否包含软删除数据"),
+    include_archived: bool = Query(False, description="是否包含归档数据"),
     status_filter: Optional[str] = Query(None, description="状态筛选"),
     page: int = Query(1, ge=1, description="页码"),
     size: int = Query(20, ge=1, le=100, description="每页大小"),
@@ -44,51 +67,39 @@ async def get_all_quotes(
 ):
     """获取所有报价单（管理员专用）"""
     try:
-        # 构建查询
-        query = db.query(Quote)
-
-        # 软删除过滤
-        if not include_deleted:
-            query = query.filter(Quote.is_deleted == False)
-
-        # 状态过滤
-        if status_filter:
-            query = query.filter(Quote.status == status_filter)
-
-        # 计算总数
-        total = query.count()
-
-        # 分页查询
-        quotes = (
-            query.order_by(desc(Quote.created_at))
-            .offset((page - 1) * size)
-            .limit(size)
-            .all()
-        )
+        # 构建过滤条件
+        filters = _list_filters(Quote, include_deleted, status_filter)
+        archive_filters = _list_filters(quotes_archive.c, include_deleted, status_filter) if include_archived else None
+
+        # 分页查询（列表投影，总数与创建人/删除人姓名一次取回）
+        rows, total = fetch_quote_list_page(db, filters, page, size, archive_filters=archive_filters)
 
         # 格式化返回数据
         quote_list = []
-        for quote in quotes:
+        for row in rows:
             quote_data = {
-                "id": quote.id,
-                "quote_number": quote.quote_number,
-                "title": quote.title,
-                "quote_type": quote.quote_type,
-                "customer_name": quote.customer_name,
-                "currency": quote.currency,
-                "total_amount": quote.total_amount,
-                "status": quote.status,
-                "approval_status": quote.approval_status,
-                "created_by": quote.created_by,
-                "creator_name": quote.creator.name if quote.creator else "未知",
-                "created_at": quote.created_at.isoformat() if quote.created_at else None,
-                "updated_at": quote.updated_at.isoformat() if quote.updated_at else None,
+                "id": row.id,
+                "quote_number": row.quote_number,
+                "title": row.title,
+                "quote_type": row.quote_type,
+                "customer_name": row.customer_name,
+                "currency": row.currency,
+                "total_amount": row.total_amount,
+                "status": row.status,
+                "approval_status": row.approval_status,
+                "created_by": row.created_by,
+                "creator_name": row.creator_name or "未知",
+                "created_at": row.created_at.isoformat() if row.created_at else None,
+                "updated_at": row.updated_at.isoformat() if row.updated_at else None,
                 # 软删除相关字段
-                "is_deleted": quote.is_deleted,
-                "deleted_at": quote.deleted_at.isoformat() if quote.deleted_at else None,
-                "deleted_by": quote.deleted_by,
-                "deleter_name": quote.deleter.name if quote.deleter else None
+                "is_deleted": row.is_deleted,
+                "deleted_at": row.deleted_at.isoformat() if row.deleted_at else None,
+                "deleted_by": row.deleted_by,
+                "deleter_name": row.deleter_name
             }
+            if include_archived:
+                quote_data["tier"] = row.tier
+                quote_data["archived_at"] = row.archived_at.isoformat() if row.archived_at else None
             quote_list.append(quote_data)
 
         return {
@@ -97,7 +108,8 @@ async def get_all_quotes(
             "page": page,
             "size": size,
             "pages": (total + size - 1) // size,
-            "include_deleted": include_deleted
+            "include_deleted": include_deleted,
+            "include_archived": include_archived
         }
 
     except Exception as e:
@@ -107,52 +119,56 @@ async def get_all_quotes(
         )
 
 
+@router.post("/archive", response_model=dict)
+async def archive_quotes(
+    deleted_retention_days: int = Query(DELETED_RETENTION_DAYS, ge=1, description="已删除报价单保留天数"),
+    closed_retention_years: int = Query(CLOSED_RETENTION_YEARS, ge=1, description="已结束报价单保留年数"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_super_admin_role)
+):
+    """把超过保留期的已删除报价单和已结束报价单迁入归档表（超级管理员专用）"""
+    try:
+        archived = QuoteArchiveService(db).run(
+            deleted_retention_days=deleted_retention_days,
+            closed_retention_years=closed_retention_years,
+        )
+    except Exception as e:
+        db.rollback()
+        logger.exception("quote_archive_failed")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"归档报价单失败: {str(e)}"
+        )
+
+    logger.info("quotes_archived", extra={"archived": archived, "operator": current_user.name})
+    return {
+        "message": f"已归档 {sum(archived.values())} 个报价单",
+        "archived": archived,
+        "operator": current_user.name
+    }
+
+
 @router.get("/statistics/detailed", response_model=dict)
 async def get_detailed_statistics(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin_role)
 ):
-    """获取详细统计信息（管理员专用）"""
+    """获取详细统计信息（管理员专用）- 从按日汇总表读取，不扫描原始报价表"""
     try:
-        # 全部数据统计
-        total_all = db.query(Quote).count()
-
-        # 正常数据统计
-        normal_query = db.query(Quote).filter(Quote.is_deleted == False)
-        total_normal = normal_query.count()
-        draft_normal = normal_query.filter(Quote.status == 'draft').count()
-        pending_normal = normal_query.filter(Quote.status == 'pending').count()
-        approved_normal = normal_query.filter(Quote.status == 'approved').count()
-        rejected_normal = normal_query.filter(Quote.status == 'rejected').count()
-
-        # 软删除数据统计
-        deleted_query = db.query(Quote).filter(Quote.is_deleted == True)
-        total_deleted = deleted_query.count()
-        draft_deleted = deleted_query.filter(Quote.status == 'draft').count()
-        pending_deleted = deleted_query.filter(Quote.status == 'pending').count()
-        approved_deleted = deleted_query.filter(Quote.status == 'approved').count()
-        rejected_deleted = deleted_query.filter(Quote.status == 'rejected').count()
+        counts = quote_rollups.rollup_status_counts(db, {"is_deleted": None})
+        normal_data = quote_rollups.status_breakdown(counts, is_deleted=False)
+        deleted_data = quote_rollups.status_breakdown(counts, is_deleted=True)
+        total_normal = normal_data["total"]
+        total_deleted = deleted_data["total"]
 
         return {
             "all_data": {
-                "total": total_all,
+                "total": total_normal + total_deleted,
                 "normal": total_normal,
                 "deleted": total_deleted
             },
-            "normal_data": {
-                "total": total_normal,
-                "draft": draft_normal,
-                "pending": pending_normal,
-                "approved": approved_normal,
-                "rejected": rejected_normal
-            },
-            "deleted_data": {
-                "total": total_deleted,
-                "draft": draft_deleted,
-                "pending": pending_deleted,
-                "approved": approved_deleted,
-                "rejected": rejected_deleted
-            }
+            "normal_data": normal_data,
+            "deleted_data": deleted_data
         }
 
     except Exception as e:
@@ -162,64 +178,106 @@ async def get_detailed_statistics(
         )
 
 
-@router.get("/export", response_model=dict)
+EXPORT_FORMATS = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+EXPORT_COLUMNS = [
+    "报价单号", "标题", "报价类型", "客户名称", "币种", "总金额", "状态", "审批状态",
+    "创建人", "创建时间", "更新时间", "是否删除", "删除时间", "删除人",
+]
+EXPORT_CHUNK_SIZE = 500
+
+
+def _export_record(row) -> dict:
+    """将列表投影行转换为导出记录"""
+    return {
+        "报价单号": row.quote_number,
+        "标题": row.title,
+        "报价类型": row.quote_type,
+        "客户名称": row.customer_name,
+        "币种": row.currency,
+        "总金额": row.total_amount,
+        "状态": row.status,
+        "审批状态": row.approval_status,
+        "创建人": row.creator_name or "未知",
+        "创建时间": row.created_at.isoformat() if row.created_at else None,
+        "更新时间": row.updated_at.isoformat() if row.updated_at else None,
+        "是否删除": "是" if row.is_deleted else "否",
+        "删除时间": row.deleted_at.isoformat() if row.deleted_at else None,
+        "删除人": row.deleter_name
+    }
+
+
+def _stream_export(db: Session, filters: list, export_format: str, meta: dict) -> Iterator[bytes]:
+    """按块读取并逐块编码导出数据，客户端无需等待全部数据即可开始接收"""
+    total = 0
+    try:
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_COLUMNS)
+            yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+        elif export_format == "json":
+            header = json.dumps(meta, ensure_ascii=False)
+            yield (header[:-1] + ', "data": [').encode("utf-8")
+
+        for rows in iter_quote_list_chunks(db, filters, EXPORT_CHUNK_SIZE):
+            records = [_export_record(row) for row in rows]
+            if export_format == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerows([record[column] for column in EXPORT_COLUMNS] for record in records)
+                chunk = buffer.getvalue()
+            elif export_format == "ndjson":
+                chunk = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+            else:
+                chunk = ("," if total else "") + ",".join(json.dumps(record, ensure_ascii=False) for record in records)
+            total += len(records)
+            yield chunk.encode("utf-8")
+
+        if export_format == "json":
+            yield f'], "total": {total}}}'.encode("utf-8")
+
+        logger.info(
+            "quotes_exported",
+            extra={"total": total, "format": export_format, "include_deleted": meta["include_deleted"]},
+        )
+    finally:
+        db.close()
+
+
+@router.get("/export")
 async def export_quotes(
     include_deleted: bool = Query(False, description="是否包含软删除数据"),
-    format: str = Query("json", description="导出格式: json, csv"),
+    format: str = Query("json", description="导出格式: json, ndjson, csv"),
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin_role)
 ):
-    """导出报价单数据（管理员专用）"""
-    try:
-        # 构建查询
-        query = db.query(Quote)
-
-        # 软删除过滤
-        if not include_deleted:
-            query = query.filter(Quote.is_deleted == False)
-
-        # 获取所有数据
-        quotes = query.order_by(Quote.created_at.desc()).all()
-
-        # 格式化数据
-        export_data = []
-        for quote in quotes:
-            quote_data = {
-                "报价单号": quote.quote_number,
-                "标题": quote.title,
-                "报价类型": quote.quote_type,
-                "客户名称": quote.customer_name,
-                "币种": quote.currency,
-                "总金额": quote.total_amount,
-                "状态": quote.status,
-                "审批状态": quote.approval_status,
-                "创建人": quote.creator.name if quote.creator else "未知",
-                "创建时间": quote.created_at.isoformat() if quote.created_at else None,
-                "更新时间": quote.updated_at.isoformat() if quote.updated_at else None,
-                "是否删除": "是" if quote.is_deleted else "否",
-                "删除时间": quote.deleted_at.isoformat() if quote.deleted_at else None,
-                "删除人": quote.deleter.name if quote.deleter else None
-            }
-            export_data.append(quote_data)
-
-        # 记录导出操作
-        print(f"📊 导出报价单数据: {len(export_data)} 条记录 (包含删除: {include_deleted}) by {current_user.name}")
-
-        return {
-            "data": export_data,
-            "total": len(export_data),
-            "format": format,
-            "exported_at": datetime.utcnow().isoformat(),
-            "exported_by": current_user.name,
-            "include_deleted": include_deleted
-        }
-
-    except Exception as e:
+    """流式导出报价单数据（管理员专用）"""
+    if format not in EXPORT_FORMATS:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"导出数据失败: {str(e)}"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"不支持的导出格式: {format}"
         )
 
+    # 软删除过滤
+    filters = [] if include_deleted else [Quote.is_deleted == False]
+    meta = {
+        "format": format,
+        "exported_at": datetime.utcnow().isoformat(),
+        "exported_by": current_user.name,
+        "include_deleted": include_deleted
+    }
+    filename = f"quotes_export_{datetime.utcnow().strftime('%Y%m%d')}.{format}"
+
+    return StreamingResponse(
+        _stream_export(db, filters, format, meta),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
 
 def require_admin_or_super_admin_auth(request: Request):
     """检查管理员系统认证或企业微信超级管理员权限"""
@@ -293,64 +351,60 @@ async def hard_delete_quote(
         )
 
 
+def _bulk_summary(results: List[dict], success: str) -> dict:
+    """汇总批量操作的逐条结果"""
+    counts = {}
+    for item in results:
+        counts[item["result"]] = counts.get(item["result"], 0) + 1
+    return {
+        "succeeded": [item for item in results if item["result"] == success],
+        "counts": counts,
+        "results": results,
+    }
+
+
 @router.post("/batch-restore")
 async def batch_restore_quotes(
     quote_ids: List[str],
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin_role)
 ):
-    """批量恢复软删除的报价单"""
-    try:
-        if not quote_ids:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="报价单ID列表不能为空"
-            )
-
-        # 查找软删除的报价单
-        quotes = (
-            db.query(Quote)
-            .filter(Quote.id.in_(quote_ids), Quote.is_deleted == True)
-            .all()
+    """批量恢复软删除（含已归档）的报价单，按块执行集合更新"""
+    if not quote_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="报价单ID列表不能为空"
         )
 
-        if not quotes:
+    try:
+        summary = _bulk_summary(QuoteBulkService(db).restore(quote_ids), "restored")
+        if not summary["succeeded"]:
+            db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="未找到可恢复的报价单"
             )
-
-        restored_count = 0
-        restored_quotes = []
-
-        for quote in quotes:
-            quote.is_deleted = False
-            quote.deleted_at = None
-            quote.deleted_by = None
-            restored_count += 1
-            restored_quotes.append({
-                "id": quote.id,
-                "quote_number": quote.quote_number,
-                "title": quote.title
-            })
-
         db.commit()
-
-        return {
-            "message": f"成功恢复 {restored_count} 个报价单",
-            "restored_count": restored_count,
-            "restored_quotes": restored_quotes,
-            "operator": current_user.name
-        }
-
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
-        logger.exception("batch_restore_failed", extra={"quote_ids": quote_ids if 'quote_ids' in locals() else None})
+        logger.exception("batch_restore_failed", extra={"quote_count": len(quote_ids)})
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"批量恢复失败: {str(e)}"
         )
 
+    restored = summary["succeeded"]
+    return {
+        "message": f"成功恢复 {len(restored)} 个报价单",
+        "restored_count": len(restored),
+        "restored_quotes": [{key: item[key] for key in ("id", "quote_number", "title")} for item in restored],
+        "counts": summary["counts"],
+        "results": summary["results"],
+        "operator": current_user.name
+    }
+
 
 @router.delete("/batch-soft-delete")
 async def batch_soft_delete_quotes(
@@ -358,65 +412,46 @@ async def batch_soft_delete_quotes(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin_role)
 ):
-    """批量软删除报价单 - 兼容两种数据格式"""
-    try:
-        # 处理两种不同的输入格式
-        if isinstance(request_data, list):
-            # 直接数组格式: ["1", "2", "3"] 或 [1, 2, 3]
-            quote_ids = [str(item) for item in request_data]
-        else:
-            # 对象格式: {"quote_ids": ["1", "2", "3"]} 或 {"quote_ids": [1, 2, 3]}
-            quote_ids = request_data.quote_ids  # Pydantic validator已经转换为字符串
-
-        if not quote_ids:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="报价单ID列表不能为空"
-            )
-
-        # 查找正常状态的报价单
-        quotes = (
-            db.query(Quote)
-            .filter(Quote.id.in_(quote_ids), Quote.is_deleted == False)
-            .all()
+    """批量软删除报价单 - 兼容两种数据格式，按块执行集合更新"""
+    # 处理两种不同的输入格式
+    if isinstance(request_data, list):
+        # 直接数组格式: ["1", "2", "3"] 或 [1, 2, 3]
+        quote_ids = [str(item) for item in request_data]
+    else:
+        # 对象格式: {"quote_ids": ["1", "2", "3"]} 或 {"quote_ids": [1, 2, 3]}
+        quote_ids = request_data.quote_ids  # Pydantic validator已经转换为字符串
+
+    if not quote_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="报价单ID列表不能为空"
         )
 
-        if not quotes:
+    try:
+        summary = _bulk_summary(QuoteBulkService(db).soft_delete(quote_ids, current_user.id), "deleted")
+        if not summary["succeeded"]:
+            db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="未找到可删除的报价单"
             )
-
-        deleted_count = 0
-        deleted_quotes = []
-
-        for quote in quotes:
-            quote.is_deleted = True
-            quote.deleted_at = datetime.utcnow()
-            quote.deleted_by = current_user.id
-            deleted_count += 1
-            deleted_quotes.append({
-                "id": quote.id,
-                "quote_number": quote.quote_number,
-                "title": quote.title
-            })
-
         db.commit()
-
-        return {
-            "message": f"成功删除 {deleted_count} 个报价单",
-            "deleted_count": deleted_count,
-            "deleted_quotes": deleted_quotes,
-            "operator": current_user.name
-        }
-
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
-        logger.exception(
-            "batch_soft_delete_failed",
-            extra={"quote_ids": quote_ids if 'quote_ids' in locals() else None}
-        )
+        logger.exception("batch_soft_delete_failed", extra={"quote_count": len(quote_ids)})
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"批量删除失败: {str(e)}"
         )
+
+    deleted = summary["succeeded"]
+    return {
+        "message": f"成功删除 {len(deleted)} 个报价单",
+        "deleted_count": len(deleted),
+        "deleted_quotes": [{key: item[key] for key in ("id", "quote_number", "title")} for item in deleted],
+        "counts": summary["counts"],
+        "results": summary["results"],
+        "operator": current_user.name
+    }
@@ -7,6 +7,9 @@ from .endpoints import (
     personnel,
     quotations,
     hierarchical_data,
+    catalog,
+    bootstrap,
+    exchange_rates,
     suppliers,
     machine_types,
     users,
@@ -37,6 +40,9 @@ api_router.include_router(personnel.router, prefix="", tags=["personnel"])
 api_router.include_router(quotations.router, prefix="", tags=["quotations"])
 api_router.include_router(quotes.router, prefix="", tags=["quotes"])
 api_router.include_router(hierarchical_data.router, prefix="", tags=["hierarchical"])
+api_router.include_router(catalog.router, prefix="", tags=["catalog"])
+api_router.include_router(bootstrap.router, prefix="", tags=["bootstrap"])
+api_router.include_router(exchange_rates.router, prefix="", tags=["exchange-rates"])
 api_router.include_router(users.router, prefix="", tags=["users"])
 api_router.include_router(operation_logs.router, prefix="", tags=["operation-logs"])
 api_router.include_router(statistics.router, prefix="", tags=["statistics"])
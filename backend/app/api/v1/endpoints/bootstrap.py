@@ -0,0 +1,94 @@
+import hashlib
+import json
+
+from fastapi import APIRouter, Depends, Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.api.v1.endpoints.personnel import PERSONNEL_LIST
+from app.auth_routes import build_user_response, get_current_user_strict_multi_source
+from app.database import get_db
+from app.middleware.permissions import ROLE_LEVELS
+from app.models import AuxiliaryEquipment, Configuration, ExchangeRate, User
+from app.services.catalog_cache import (
+    CatalogCacheKey,
+    CatalogSegment,
+    VersionedCatalogCache,
+    catalog_segment,
+    catalog_snapshot_cache,
+)
+from app.services.quote_detail_cache import etag_matches
+
+router = APIRouter(prefix="/bootstrap", tags=["bootstrap"])
+
+
+def role_permissions(role: str) -> dict:
+    """角色等级及其继承的全部角色（高级角色拥有低级角色的权限）"""
+    level = ROLE_LEVELS.get(role, 0)
+    return {
+        "role": role,
+        "level": level,
+        "granted_roles": [name for name, required in ROLE_LEVELS.items() if required <= level],
+    }
+
+
+def _dump_rows(schema, rows) -> bytes:
+    data = [schema.model_validate(row).model_dump(mode="json") for row in rows]
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def build_bootstrap_catalog(db: Session, key: CatalogCacheKey) -> CatalogSegment:
+    """机器类型树（复用目录快照的字节）及配置、辅助设备、人员、汇率，各部分与对应列表接口的输出一致"""
+    snapshot = catalog_snapshot_cache.get(db)
+    sections = (
+        (b"machine_types", snapshot.body),
+        (b"configurations", _dump_rows(
+            schemas.Configuration, db.execute(select(Configuration).order_by(Configuration.id)).scalars()
+        )),
+        (b"auxiliary_equipment", _dump_rows(
+            schemas.AuxiliaryEquipment, db.execute(select(AuxiliaryEquipment).order_by(AuxiliaryEquipment.id)).scalars()
+        )),
+        (b"personnel", _dump_rows(schemas.Personnel, PERSONNEL_LIST)),
+        (b"exchange_rates", _dump_rows(
+            schemas.ExchangeRate,
+            db.execute(select(ExchangeRate).order_by(ExchangeRate.currency, ExchangeRate.effective_date.desc())).scalars(),
+        )),
+    )
+    body = b"{" + b",".join(b'"' + name + b'":' + data for name, data in sections) + b"}"
+    return catalog_segment(body, key.change_version)
+
+
+bootstrap_catalog_cache: VersionedCatalogCache[CatalogSegment] = VersionedCatalogCache(build_bootstrap_catalog)
+
+
+@router.get("")
+def get_bootstrap(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_strict_multi_source),
+):
+    """应用启动数据：用户信息、角色权限、目录版本和完整目录，一次请求返回
+
+    catalog 含机器类型树、配置、辅助设备、人员和汇率，是所有用户共用的预序列化片段
+    （gzip 时复用预压缩段），只有用户部分按请求序列化；
+    catalog_version 可作为 /catalog/changes 的 since 做后续增量同步
+    """
+    catalog = bootstrap_catalog_cache.get(db)
+    head = {
+        "user": jsonable_encoder(build_user_response(current_user)),
+        "permissions": role_permissions(current_user.role),
+        "catalog_version": catalog.change_version,
+    }
+    prefix = json.dumps(head, ensure_ascii=False, separators=(",", ":")).encode("utf-8")[:-1] + b',"catalog":'
+    suffix = b"}"
+
+    etag = f'"{hashlib.sha256(prefix + catalog.etag.encode()).hexdigest()[:32]}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=catalog.gzip_wrapped(prefix, suffix), media_type="application/json", headers=headers)
+    return Response(content=prefix + catalog.body + suffix, media_type="application/json", headers=headers)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
@@ -6,6 +6,7 @@ from app import crud, schemas
 from app.database import get_db
 from app.auth_routes import get_current_user_optional
 from app.models import User
+from app.services.card_config_index import card_config_index_cache
 
 router = APIRouter(prefix="/card-configs", tags=["card-configs"])
 
@@ -21,30 +22,41 @@ def filter_price_data(card_config_data, user: Optional[User]):
     # 所有用户都返回完整数据，前端控制显示
     return card_config_data
 
+def parse_machine_ids(machine_ids: Optional[str]) -> Optional[List[int]]:
+    """解析以逗号分隔的机器ID列表"""
+    if machine_ids is None:
+        return None
+    try:
+        return [int(value) for value in machine_ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="machine_ids 必须是以逗号分隔的整数")
+
 @router.get("/")
 def read_card_configs(
-    skip: int = 0, 
-    limit: int = 100, 
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=0),
+    machine_id: Optional[int] = Query(None, description="只返回该机器的板卡"),
+    machine_ids: Optional[str] = Query(None, description="批量按机器筛选，以逗号分隔，如 1,2,3"),
+    supplier_id: Optional[int] = Query(None, description="只返回该供应商机器的板卡"),
+    part_number: Optional[str] = Query(None, description="料号前缀，不区分大小写"),
     db: Session = Depends(get_db),
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
-    card_configs = crud.get_card_configs(db, skip=skip, limit=limit)
-    # 转换为字典格式以便修改
-    card_configs_dict = [
-        {
-            "id": config.id,
-            "machine_id": config.machine_id,
-            "part_number": config.part_number,
-            "board_name": config.board_name,
-            "unit_price": config.unit_price,
-            "currency": config.currency,
-            "exchange_rate": config.exchange_rate
-        }
-        for config in card_configs
-    ]
+    """板卡列表，从进程内板卡索引筛选分页，不逐次查询板卡表"""
+    selected_machines = parse_machine_ids(machine_ids)
+    if machine_id is not None:
+        # 与其他筛选条件一样取交集：同时给出 machine_ids 时只保留两者共同的机器
+        selected_machines = [machine_id] if selected_machines is None or machine_id in selected_machines else []
+    card_configs = card_config_index_cache.get(db).query(
+        machine_ids=selected_machines,
+        supplier_id=supplier_id,
+        part_number_prefix=part_number,
+        skip=skip,
+        limit=limit,
+    )
     
     # 根据用户权限过滤价格信息
-    filtered_configs = filter_price_data(card_configs_dict, current_user)
+    filtered_configs = filter_price_data(card_configs, current_user)
     return filtered_configs
 
 @router.get("/{card_config_id}")
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.services.catalog_changes import catalog_changes
+
+router = APIRouter(prefix="/catalog", tags=["catalog"])
+
+
+@router.get("/changes")
+def get_catalog_changes(
+    since: int = Query(0, ge=0, description="客户端上次同步到的目录版本号，0 表示全量"),
+    db: Session = Depends(get_db),
+):
+    """返回指定版本之后新增/修改的目录行和被删除的行ID"""
+    return catalog_changes(db, since)
@@ -0,0 +1,42 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.database import get_db
+from app.services.exchange_rates import normalize_currency, set_exchange_rate
+
+router = APIRouter(prefix="/exchange-rates", tags=["exchange-rates"])
+
+
+@router.get("/", response_model=List[schemas.ExchangeRate])
+def read_exchange_rates(
+    currency: Optional[str] = Query(None, description="按币种过滤"),
+    db: Session = Depends(get_db),
+):
+    """汇率历史，按币种和生效日期倒序"""
+    stmt = select(models.ExchangeRate).order_by(
+        models.ExchangeRate.currency, models.ExchangeRate.effective_date.desc()
+    )
+    if currency:
+        stmt = stmt.where(models.ExchangeRate.currency == normalize_currency(currency))
+    return db.execute(stmt).scalars().all()
+
+
+@router.post("/", response_model=schemas.ExchangeRateWriteResult)
+def create_exchange_rate(exchange_rate: schemas.ExchangeRateCreate, db: Session = Depends(get_db)):
+    """写入一条汇率（同币种同生效日期则覆盖），提交后计价目录自动按新汇率重建
+
+    已有草稿报价单不会自动改价，需用 scripts/reprice_draft_quotes.py 按 previous_rate → rate 重算
+    """
+    try:
+        row, previous_rate = set_exchange_rate(
+            db, exchange_rate.currency, exchange_rate.rate, exchange_rate.effective_date
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    db.commit()
+    db.refresh(row)
+    return {"exchange_rate": row, "previous_rate": previous_rate}
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
 
 from app import crud, schemas
 from app.database import get_db
+from app.services.catalog_cache import catalog_snapshot_cache
+from app.services.quote_detail_cache import etag_matches
 
 router = APIRouter(prefix="/hierarchical", tags=["hierarchical"])
 
@@ -33,53 +35,22 @@ class HierarchicalMachineType(schemas.MachineTypeBase):
         from_attributes = True
 
 @router.get("/machine-types", response_model=List[HierarchicalMachineType])
-def get_hierarchical_machine_types(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    machine_types = crud.get_machine_types(db, skip=skip, limit=limit)
-    hierarchical_machine_types = []
-    
-    for machine_type in machine_types:
-        hierarchical_suppliers = []
-        for supplier in machine_type.suppliers:
-            hierarchical_machines = []
-            for machine in supplier.machines:
-                hierarchical_card_configs = []
-                for card_config in machine.card_configs:
-                    hierarchical_card_configs.append(HierarchicalCardConfig(
-                        id=card_config.id,
-                        part_number=card_config.part_number,
-                        board_name=card_config.board_name,
-                        unit_price=card_config.unit_price,
-                        machine_id=card_config.machine_id
-                    ))
-                
-                hierarchical_machines.append(HierarchicalMachine(
-                    id=machine.id,
-                    name=machine.name,
-                    description=machine.description,
-                    active=machine.active,
-                    manufacturer=machine.manufacturer,
-                    discount_rate=machine.discount_rate,
-                    exchange_rate=machine.exchange_rate,
-                    currency=machine.currency,
-                    supplier_id=machine.supplier_id,
-                    card_configs=hierarchical_card_configs
-                ))
-            
-            hierarchical_suppliers.append(HierarchicalSupplier(
-                id=supplier.id,
-                name=supplier.name,
-                machine_type_id=supplier.machine_type_id,
-                machines=hierarchical_machines
-            ))
-        
-        hierarchical_machine_types.append(HierarchicalMachineType(
-            id=machine_type.id,
-            name=machine_type.name,
-            description=machine_type.description,
-            suppliers=hierarchical_suppliers
-        ))
-    
-    return hierarchical_machine_types
+def get_hierarchical_machine_types(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+):
+    """返回预序列化的目录快照；目录未变化时不访问数据库，支持 If-None-Match 与 gzip"""
+    snapshot = catalog_snapshot_cache.get(db)
+    etag, body = snapshot.slice(skip, limit)
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if body is snapshot.body and "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        body = snapshot.gzip_body
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @router.post("/machine-types", response_model=HierarchicalMachineType)
 def create_hierarchical_machine_type(machine_type: schemas.MachineTypeCreate, db: Session = Depends(get_db)):
@@ -2,10 +2,11 @@ from fastapi import APIRouter, HTTPException
 from typing import List
 
 from app import schemas
+from app.services.catalog_cache import bump_catalog_version
 
 router = APIRouter(prefix="/personnel", tags=["personnel"])
 
-# 标准人员列表
+# 标准人员列表（进程内数据，修改后递增目录版本，使 /bootstrap 中的人员列表失效）
 PERSONNEL_LIST = [
     schemas.Personnel(
         id=1,
@@ -102,6 +103,7 @@ def create_personnel(personnel: schemas.PersonnelCreate):
         hourly_rate_usd=personnel.hourly_rate_usd
     )
     PERSONNEL_LIST.append(new_personnel)
+    bump_catalog_version()
     return new_personnel
 
 @router.put("/{personnel_id}", response_model=schemas.Personnel)
@@ -122,6 +124,7 @@ def update_personnel(personnel_id: int, personnel_update: schemas.PersonnelCreat
                 hourly_rate_usd=personnel_update.hourly_rate_usd
             )
             PERSONNEL_LIST[i] = updated_personnel
+            bump_catalog_version()
             return updated_personnel
     raise HTTPException(status_code=404, detail="Personnel not found")
 
@@ -130,5 +133,6 @@ def delete_personnel(personnel_id: int):
     for i, personnel in enumerate(PERSONNEL_LIST):
         if personnel.id == personnel_id:
             deleted_personnel = PERSONNEL_LIST.pop(i)
+            bump_catalog_version()
             return deleted_personnel
     raise HTTPException(status_code=404, detail="Personnel not found")
\ No newline at end of file
@@ -34,7 +34,28 @@ def calculate_quotation(
         )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
-        
+
+
+@router.post("/calculate-batch", response_model=schemas.BatchQuotationResponse)
+def calculate_quotation_batch(
+    batch_request: schemas.BatchQuotationRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """一次请求计算多个报价方案，单个方案出错时在对应结果中返回错误信息"""
+    require_user_permission()(current_user)
+    requests = batch_request.requests
+    results = crud.calculate_quotations(db, requests)
+    return schemas.BatchQuotationResponse(results=[
+        schemas.BatchQuotationResult(
+            machine_id=request.machine_id,
+            test_hours=request.test_hours,
+            total=total,
+            error=error,
+        )
+        for request, (total, error) in zip(requests, results)
+    ])
+
 @router.get("/", response_model=List[schemas.Quotation])
 def read_quotations(
     skip: int = 0, 
@@ -1,14 +1,18 @@
 import json
 import logging
+from datetime import datetime
 from typing import Optional
 
-from fastapi import BackgroundTasks
+from fastapi import BackgroundTasks, Request, Response
+from sqlalchemy import Row
+from sqlalchemy.orm import Session, load_only, selectinload
 
 from ....database import SessionLocal
 from ....models import User, Quote as QuoteModel
-from ....schemas import Quote as QuoteSchema, QuoteList
-from ....services.quote_service import QuoteService
-
+from ....schemas import Quote as QuoteSchema
+from ....services.quote_detail_cache import etag_matches, quote_detail_cache
+from ....services.quote_service import QuoteService, format_hourly_rate
+from .quote_route_helpers import ensure_quote_access, quote_access_scope
 
 def quote_to_schema(service: QuoteService, quote: QuoteModel) -> QuoteSchema:
     pdf_url = service.get_pdf_url(quote)
@@ -18,12 +22,131 @@ def quote_to_schema(service: QuoteService, quote: QuoteModel) -> QuoteSchema:
     return model
 
 
-def list_item_to_dict(service: QuoteService, quote: QuoteModel) -> dict:
-    model = QuoteList.model_validate(quote, from_attributes=True)
-    pdf_url = service.get_pdf_url(quote)
-    if pdf_url:
-        model = model.model_copy(update={"pdf_url": pdf_url})
-    return model.model_dump(mode="json")
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def list_item_to_dict(service: QuoteService, row: Row) -> dict:
+    """将列表投影行转换为 QuoteList 结构的字典（附带创建人姓名）"""
+    return {
+        "id": row.id,
+        "quote_number": row.quote_number,
+        "title": row.title,
+        "quote_type": row.quote_type,
+        "customer_name": row.customer_name,
+        "currency": row.currency,
+        "total_amount": row.total_amount,
+        "status": row.status,
+        "approval_status": row.approval_status,
+        "pdf_url": service.get_pdf_url_from_path(row.pdf_path),
+        "version": row.version,
+        "created_by": row.created_by,
+        "creator_name": row.creator_name,
+        "created_at": _isoformat(row.created_at),
+        "updated_at": _isoformat(row.updated_at),
+        "valid_until": _isoformat(row.valid_until),
+    }
+
+
+def quote_detail_to_dict(quote: QuoteModel) -> dict:
+    """构建报价单详情字典（包含创建者姓名，明细附带写入时解析的UPH和机时费率）"""
+    quote_items = []
+    for item in quote.items:
+        quote_items.append({
+            "id": item.id,
+            "item_name": item.item_name,
+            "item_description": item.item_description,
+            "machine_type": item.machine_type,
+            "supplier": item.supplier,
+            "machine_model": item.machine_model,
+            "configuration": item.configuration,
+            "quantity": item.quantity,
+            "unit": item.unit,
+            "unit_price": item.unit_price,
+            "total_price": item.total_price,
+            "adjusted_price": item.adjusted_price,
+            "adjustment_reason": item.adjustment_reason,
+            "machine_id": item.machine_id,
+            "configuration_id": item.configuration_id,
+            "uph": item.uph,
+            "hourly_rate": format_hourly_rate(item.hourly_rate)
+        })
+
+    return {
+        "id": quote.id,
+        "quote_number": quote.quote_number,
+        "title": quote.title,
+        "quote_type": quote.quote_type,
+        "customer_name": quote.customer_name,
+        "customer_contact": quote.customer_contact,
+        "customer_phone": quote.customer_phone,
+        "customer_email": quote.customer_email,
+        "customer_address": quote.customer_address,
+        "quote_unit": quote.quote_unit,
+        "currency": quote.currency,
+        "subtotal": quote.subtotal,
+        "discount": quote.discount,
+        "tax_rate": quote.tax_rate,
+        "tax_amount": quote.tax_amount,
+        "total_amount": quote.total_amount,
+        "valid_until": _isoformat(quote.valid_until),
+        "payment_terms": quote.payment_terms,
+        "description": quote.description,
+        "notes": quote.notes,
+        "status": quote.status,
+        "approval_status": quote.approval_status,
+        "version": quote.version,
+        "submitted_at": _isoformat(quote.submitted_at),
+        "approved_at": _isoformat(quote.approved_at),
+        "approved_by": quote.approved_by,
+        "rejection_reason": quote.rejection_reason,
+        "wecom_approval_id": quote.wecom_approval_id,
+        "created_by": quote.created_by,
+        "creator_name": quote.creator.name if quote.creator else "未知",
+        "created_at": _isoformat(quote.created_at),
+        "updated_at": _isoformat(quote.updated_at),
+        "items": quote_items
+    }
+
+
+def quote_detail_response(
+    db: Session,
+    request: Optional[Request],
+    current_user: User,
+    condition,
+) -> Response:
+    """返回报价单详情，命中缓存且 If-None-Match 匹配时返回 304
+
+    先只读取权限判断和版本所需的几列；缓存未命中时才加载明细并序列化。
+    """
+    probe = (db.query(QuoteModel)
+             .options(load_only(
+                 QuoteModel.id,
+                 QuoteModel.created_by,
+                 QuoteModel.current_approver_id,
+                 QuoteModel.approval_status,
+                 QuoteModel.updated_at,
+             ))
+             .filter(condition, QuoteModel.is_deleted == False)
+             .first())
+    ensure_quote_access(probe, current_user)
+    scope = quote_access_scope(probe, current_user)
+
+    cached = quote_detail_cache.get(probe.id, scope, _isoformat(probe.updated_at) or "")
+    if cached is None:
+        quote = (db.query(QuoteModel)
+                 .options(selectinload(QuoteModel.items), selectinload(QuoteModel.creator))
+                 .filter(QuoteModel.id == probe.id, QuoteModel.is_deleted == False)
+                 .first())
+        quote = ensure_quote_access(quote, current_user)
+        cached = quote_detail_cache.put(
+            quote.id, scope, _isoformat(quote.updated_at) or "", quote_detail_to_dict(quote)
+        )
+
+    headers = {"ETag": cached.etag, "Cache-Control": "private, no-cache"}
+    if request is not None and etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
 
 
 def generate_pdf_cache_background(
@@ -6,6 +6,23 @@ from sqlalchemy.orm import Session, selectinload
 from ....models import User, Quote as QuoteModel
 
 
+def quote_access_scope(quote: QuoteModel, current_user: User) -> Optional[str]:
+    """返回当前用户访问报价单所依据的权限范围，无权限时返回 None"""
+    if quote.created_by == current_user.id:
+        return "owner"
+    if current_user.role == "super_admin":
+        return "super_admin"
+    if (
+        current_user.role in ["manager", "admin"]
+        and quote.current_approver_id == current_user.id
+        and quote.approval_status in ["pending", "approved", "rejected"]
+    ):
+        return "approver"
+    if current_user.role == "admin" and quote.approval_status in ["approved", "rejected"]:
+        return "reviewer"
+    return None
+
+
 def ensure_quote_access(
     quote: Optional[QuoteModel],
     current_user: User,
@@ -18,19 +35,7 @@ def ensure_quote_access(
             detail="报价单不存在",
         )
 
-    is_owner = quote.created_by == current_user.id
-    is_super_admin = current_user.role == "super_admin"
-    is_current_approver = (
-        current_user.role in ["manager", "admin"]
-        and quote.current_approver_id == current_user.id
-        and quote.approval_status in ["pending", "approved", "rejected"]
-    )
-    is_admin_reviewer = (
-        current_user.role == "admin"
-        and quote.approval_status in ["approved", "rejected"]
-    )
-
-    if not (is_owner or is_super_admin or is_current_approver or is_admin_reviewer):
+    if quote_access_scope(quote, current_user) is None:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=forbidden_detail,
@@ -2,12 +2,13 @@
 报价单相关的API端点
 """
 
+from collections import defaultdict
 from typing import List, Optional
 import json
 import logging
 from pathlib import Path
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session, selectinload
 
 from ....auth_routes import get_current_user, get_current_user_strict_multi_source
@@ -20,10 +21,13 @@ from ....schemas import (
     QuoteFilter,
     QuoteStatusUpdate,
     QuoteStatistics,
+    QuoteScenarioRequest,
+    QuoteScenarioResponse,
 )
-from ....services.quote_service import QuoteService
+from ....services.quote_list_projection import quote_list_select
+from ....services.quote_service import QuoteService, format_hourly_rate
 from .quote_route_helpers import ensure_quote_access, get_quote_by_identifier
-from .quote_endpoint_helpers import list_item_to_dict, quote_to_schema, schedule_pdf_refresh
+from .quote_endpoint_helpers import list_item_to_dict, quote_detail_response, quote_to_schema, schedule_pdf_refresh
 
 router = APIRouter(prefix="/quotes", tags=["报价单管理"])
 
@@ -64,6 +68,8 @@ async def get_quotes(
     status: Optional[str] = Query(None, description="状态筛选"),
     quote_type: Optional[str] = Query(None, description="报价类型筛选"),
     customer_name: Optional[str] = Query(None, description="客户名称筛选"),
+    uph_min: Optional[int] = Query(None, ge=0, description="明细UPH下限"),
+    uph_max: Optional[int] = Query(None, ge=0, description="明细UPH上限"),
     page: int = Query(1, ge=1, description="页码"),
     size: int = Query(20, ge=1, le=100, description="每页大小"),
     db: Session = Depends(get_db),
@@ -77,6 +83,8 @@ async def get_quotes(
             status=status,
             quote_type=quote_type,
             customer_name=customer_name,
+            uph_min=uph_min,
+            uph_max=uph_max,
             page=page,
             size=size
         )
@@ -108,8 +116,7 @@ async def get_quotes_test(
     """测试端点 - 返回报价单列表（带权限过滤）"""
     try:
         from ....models import Quote, User, QuoteItem
-        from sqlalchemy import desc, and_, or_
-        from sqlalchemy.orm import selectinload
+        from sqlalchemy import and_, or_, select
 
         # 基于审批流程的权限控制
         user = db.query(User).filter(User.id == current_user.id).first()
@@ -146,62 +153,62 @@ async def get_quotes_test(
             # 使用OR条件组合所有权限过滤
             base_filters.append(or_(*permission_filters))
 
-        # 获取允许查看的报价单
-        quotes = db.query(Quote).filter(
-            and_(*base_filters)
-        ).options(
-            selectinload(Quote.items)
-        ).join(User, Quote.created_by == User.id, isouter=True).order_by(desc(Quote.created_at)).all()
-        
+        # 获取允许查看的报价单（列表投影），明细按同一过滤条件一次性取回
+        rows = db.execute(quote_list_select(base_filters)).all()
+        item_rows = db.execute(
+            select(
+                QuoteItem.quote_id,
+                QuoteItem.item_name,
+                QuoteItem.item_description,
+                QuoteItem.machine_type,
+                QuoteItem.machine_model,
+                QuoteItem.configuration,
+                QuoteItem.unit_price,
+                QuoteItem.quantity,
+                QuoteItem.unit,
+                QuoteItem.total_price,
+                QuoteItem.adjusted_price,
+                QuoteItem.adjustment_reason,
+                QuoteItem.uph,
+                QuoteItem.hourly_rate,
+            )
+            .join(Quote, Quote.id == QuoteItem.quote_id)
+            .where(and_(*base_filters))
+            .order_by(QuoteItem.id)
+        ).all()
+
+        details_by_quote = defaultdict(list)
+        for item in item_rows:
+            details_by_quote[item.quote_id].append({
+                "item_name": item.item_name,
+                "item_description": item.item_description,
+                "machine_type": item.machine_type,
+                "machine_model": item.machine_model,
+                "configuration": item.configuration,
+                "unit_price": item.unit_price,
+                "quantity": item.quantity,
+                "unit": item.unit,
+                "total_price": item.total_price,
+                "adjusted_price": item.adjusted_price,
+                "adjustment_reason": item.adjustment_reason,
+                "uph": item.uph,
+                "hourly_rate": format_hourly_rate(item.hourly_rate)
+            })
+
         result = []
-        for quote in quotes:
-            # 获取创建者姓名
-            creator_name = "未知"
-            if quote.creator:
-                creator_name = quote.creator.name
-            
-            # 格式化报价明细
-            quote_details = []
-            for item in quote.items:
-                # 从configuration中解析UPH和计算机时费率
-                uph = None
-                hourly_rate = None
-                if item.configuration:
-                    import re
-                    uph_match = re.search(r'UPH:(\d+)', item.configuration)
-                    if uph_match:
-                        uph = int(uph_match.group(1))
-                        hourly_rate = f"¥{(item.unit_price * uph):.2f}/小时" if item.unit_price else "¥0.00/小时"
-                
-                detail = {
-                    "item_name": item.item_name,
-                    "item_description": item.item_description,
-                    "machine_type": item.machine_type,
-                    "machine_model": item.machine_model,
-                    "configuration": item.configuration,
-                    "unit_price": item.unit_price,
-                    "quantity": item.quantity,
-                    "unit": item.unit,
-                    "total_price": item.total_price,
-                    "adjusted_price": item.adjusted_price,
-                    "adjustment_reason": item.adjustment_reason,
-                    "uph": uph,
-                    "hourly_rate": hourly_rate
-                }
-                quote_details.append(detail)
-            
+        for row in rows:
             result.append({
-                "id": quote.id,
-                "quote_number": quote.quote_number,
-                "title": quote.title,
-                "quote_type": quote.quote_type,
-                "customer_name": quote.customer_name,
-                "status": quote.status,
-                "approval_status": quote.approval_status,  # 添加审批状态字段
-                "created_at": quote.created_at.isoformat(),
-                "total_amount": quote.total_amount,
-                "creator_name": creator_name,
-                "quote_details": quote_details
+                "id": row.id,
+                "quote_number": row.quote_number,
+                "title": row.title,
+                "quote_type": row.quote_type,
+                "customer_name": row.customer_name,
+                "status": row.status,
+                "approval_status": row.approval_status,  # 添加审批状态字段
+                "created_at": row.created_at.isoformat(),
+                "total_amount": row.total_amount,
+                "creator_name": row.creator_name or "未知",
+                "quote_details": details_by_quote.get(row.id, [])
             })
         return {
             "items": result,
@@ -242,94 +249,12 @@ async def get_quote_by_uuid(
 async def get_quote_detail_by_id(
     quote_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user_strict_multi_source)
+    current_user: User = Depends(get_current_user_strict_multi_source),
+    request: Request = None,
 ):
-    """按ID获取报价单详情（包含创建者姓名）"""
+    """按ID获取报价单详情（包含创建者姓名），支持 ETag/If-None-Match"""
     try:
-        from ....models import Quote, User, QuoteItem
-        from sqlalchemy.orm import selectinload
-        
-        # 获取报价单详情，关联用户和明细项
-        quote = (db.query(Quote)
-                .options(selectinload(Quote.items), selectinload(Quote.creator))
-                .filter(Quote.id == quote_id, Quote.is_deleted == False)
-                .first())
-
-        quote = ensure_quote_access(quote, current_user)
-        
-        # 获取创建者姓名
-        creator_name = "未知"
-        if quote.creator:
-            creator_name = quote.creator.name
-        
-        # 格式化报价明细
-        quote_items = []
-        for item in quote.items:
-            # 从configuration中解析UPH和计算机时费率
-            uph = None
-            hourly_rate = None
-            if item.configuration:
-                import re
-                uph_match = re.search(r'UPH:(\d+)', item.configuration)
-                if uph_match:
-                    uph = int(uph_match.group(1))
-                    hourly_rate = f"¥{(item.unit_price * uph):.2f}/小时" if item.unit_price else "¥0.00/小时"
-            
-            quote_items.append({
-                "id": item.id,
-                "item_name": item.item_name,
-                "item_description": item.item_description,
-                "machine_type": item.machine_type,
-                "supplier": item.supplier,
-                "machine_model": item.machine_model,
-                "configuration": item.configuration,
-                "quantity": item.quantity,
-                "unit": item.unit,
-                "unit_price": item.unit_price,
-                "total_price": item.total_price,
-                "adjusted_price": item.adjusted_price,
-                "adjustment_reason": item.adjustment_reason,
-                "machine_id": item.machine_id,
-                "configuration_id": item.configuration_id,
-                "uph": uph,
-                "hourly_rate": hourly_rate
-            })
-        
-        return {
-            "id": quote.id,
-            "quote_number": quote.quote_number,
-            "title": quote.title,
-            "quote_type": quote.quote_type,
-            "customer_name": quote.customer_name,
-            "customer_contact": quote.customer_contact,
-            "customer_phone": quote.customer_phone,
-            "customer_email": quote.customer_email,
-            "customer_address": quote.customer_address,
-            "quote_unit": quote.quote_unit,  # 添加报价单位字段
-            "currency": quote.currency,
-            "subtotal": quote.subtotal,
-            "discount": quote.discount,
-            "tax_rate": quote.tax_rate,
-            "tax_amount": quote.tax_amount,
-            "total_amount": quote.total_amount,
-            "valid_until": quote.valid_until.isoformat() if quote.valid_until else None,
-            "payment_terms": quote.payment_terms,
-            "description": quote.description,
-            "notes": quote.notes,
-            "status": quote.status,
-            "approval_status": quote.approval_status,  # 添加审批状态字段
-            "version": quote.version,
-            "submitted_at": quote.submitted_at.isoformat() if quote.submitted_at else None,
-            "approved_at": quote.approved_at.isoformat() if quote.approved_at else None,
-            "approved_by": quote.approved_by,
-            "rejection_reason": quote.rejection_reason,
-            "wecom_approval_id": quote.wecom_approval_id,
-            "created_by": quote.created_by,
-            "creator_name": creator_name,
-            "created_at": quote.created_at.isoformat() if quote.created_at else None,
-            "updated_at": quote.updated_at.isoformat() if quote.updated_at else None,
-            "items": quote_items
-        }
+        return quote_detail_response(db, request, current_user, QuoteModel.id == quote_id)
     except HTTPException:
         raise
     except Exception as exc:
@@ -346,96 +271,12 @@ async def get_quote_detail_by_id(
 async def get_quote_detail_test(
     quote_number: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user_strict_multi_source)
+    current_user: User = Depends(get_current_user_strict_multi_source),
+    request: Request = None,
 ):
-    """测试端点 - 获取报价单详情（包含创建者姓名）"""
+    """按报价单号获取报价单详情（包含创建者姓名），支持 ETag/If-None-Match"""
     try:
-        from ....models import Quote, User, QuoteItem
-        from sqlalchemy.orm import selectinload
-        
-        # 获取报价单详情，关联用户和明细项
-        quote = (db.query(Quote)
-                .options(selectinload(Quote.items), selectinload(Quote.creator))
-                .filter(Quote.quote_number == quote_number, Quote.is_deleted == False)
-                .first())
-
-        quote = ensure_quote_access(quote, current_user)
-        
-        # 获取创建者姓名
-        creator_name = "未知"
-        if quote.creator:
-            creator_name = quote.creator.name
-        
-        # 格式化报价明细
-        quote_items = []
-        for item in quote.items:
-            # 从configuration中解析UPH和计算机时费率
-            uph = None
-            hourly_rate = None
-            if item.configuration:
-                import re
-                uph_match = re.search(r'UPH:(\d+)', item.configuration)
-                if uph_match:
-                    uph = int(uph_match.group(1))
-                    hourly_rate = f"¥{(item.unit_price * uph):.2f}/小时" if item.unit_price else "¥0.00/小时"
-            
-            quote_items.append({
-                "id": item.id,
-                "item_name": item.item_name,
-                "item_description": item.item_description,
-                "machine_type": item.machine_type,
-                "supplier": item.supplier,
-                "machine_model": item.machine_model,
-                "configuration": item.configuration,
-                "quantity": item.quantity,
-                "unit": item.unit,
-                "unit_price": item.unit_price,
-                "total_price": item.total_price,
-                "adjusted_price": item.adjusted_price,
-                "adjustment_reason": item.adjustment_reason,
-                "machine_id": item.machine_id,
-                "configuration_id": item.configuration_id,
-                "uph": uph,
-                "hourly_rate": hourly_rate
-            })
-        
-        result = {
-            "id": quote.id,
-            "quote_number": quote.quote_number,
-            "title": quote.title,
-            "quote_type": quote.quote_type,
-            "customer_name": quote.customer_name,
-            "customer_contact": quote.customer_contact,
-            "customer_phone": quote.customer_phone,
-            "customer_email": quote.customer_email,
-            "customer_address": quote.customer_address,
-            "currency": quote.currency,
-            "subtotal": quote.subtotal,
-            "discount": quote.discount,
-            "tax_rate": quote.tax_rate,
-            "tax_amount": quote.tax_amount,
-            "total_amount": quote.total_amount,
-            "valid_until": quote.valid_until.isoformat() if quote.valid_until else None,
-            "payment_terms": quote.payment_terms,
-            "description": quote.description,
-            "notes": quote.notes,
-            "status": quote.status,
-            "approval_status": quote.approval_status,  # 添加审批状态字段
-            "version": quote.version,
-            "submitted_at": quote.submitted_at.isoformat() if quote.submitted_at else None,
-            "approved_at": quote.approved_at.isoformat() if quote.approved_at else None,
-            "approved_by": quote.approved_by,
-            "rejection_reason": quote.rejection_reason,
-            "wecom_approval_id": quote.wecom_approval_id,
-            "created_by": quote.created_by,
-            "creator_name": creator_name,
-            "created_at": quote.created_at.isoformat(),
-            "updated_at": quote.updated_at.isoformat(),
-            "items": quote_items
-        }
-        
-        return result
-
+        return quote_detail_response(db, request, current_user, QuoteModel.quote_number == quote_number)
     except HTTPException:
         raise
     except Exception as exc:
@@ -555,6 +396,23 @@ async def update_quote(
         )
 
 
+@router.post("/{quote_id}/scenarios", response_model=QuoteScenarioResponse)
+async def evaluate_quote_scenarios(
+    quote_id: str,
+    scenario_request: QuoteScenarioRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_strict_multi_source)
+):
+    """一次试算多组折扣、税率、调整单价和汇率方案，不写入报价单"""
+    service = QuoteService(db)
+    quote = ensure_quote_access(get_quote_by_identifier(service, quote_id), current_user)
+    try:
+        results = service.evaluate_scenarios(quote, scenario_request.scenarios)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    return QuoteScenarioResponse(quote_id=quote.id, currency=quote.currency, results=results)
+
+
 
 @router.delete("/{quote_id}")
 async def delete_quote(
@@ -1,8 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, text
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 
 from app import crud, schemas
 from app.database import get_db
@@ -13,10 +12,30 @@ from app.middleware.permissions import (
     require_manager_permission, 
     require_admin_permission
 )
+from app.services import quotation_statistics as stats
+from app.services import quote_rollups
 
 router = APIRouter(prefix="/statistics", tags=["statistics"])
 
 
+def _statistics_scope(current_user: User) -> Optional[int]:
+    """按角色确定统计范围：一般用户只统计自己的报价，返回需要过滤的创建人ID"""
+    if current_user.role == "user":
+        return current_user.id
+    if current_user.role == "manager":
+        require_manager_permission()(current_user)
+    else:
+        require_admin_permission()(current_user)
+    return None
+
+
+def _resolve_range(period: str, start_date: Optional[str], end_date: Optional[str]):
+    try:
+        return stats.resolve_period_range(period, start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/quotations", response_model=schemas.QuotationStats)
 def get_quotation_statistics(
     period: str = Query("month", description="统计周期: week, month, quarter, year"),
@@ -26,61 +45,95 @@ def get_quotation_statistics(
     db: Session = Depends(get_db)
 ):
     """获取报价统计信息 - 根据角色返回不同范围的统计"""
-    
-    # 构建基础查询
-    if current_user.role == "user":
-        # 一般用户只能查看自己的统计
-        query = db.query(Quotation).filter(Quotation.created_by == current_user.id)
-    elif current_user.role == "manager":
-        # 销售经理查看所有报价统计
-        require_manager_permission()(current_user)
-        query = db.query(Quotation)
-    else:
-        # 管理员及以上查看所有报价统计
-        require_admin_permission()(current_user)
-        query = db.query(Quotation)
-    
-    # 添加时间范围过滤
-    if start_date and end_date:
-        query = query.filter(Quotation.created_at >= start_date, Quotation.created_at <= end_date)
-    else:
-        # 根据周期设置默认时间范围
-        end = datetime.now()
-        if period == "week":
-            start = end - timedelta(weeks=1)
-        elif period == "month":
-            start = end - timedelta(days=30)
-        elif period == "quarter":
-            start = end - timedelta(days=90)
-        elif period == "year":
-            start = end - timedelta(days=365)
-        else:
-            start = end - timedelta(days=30)  # 默认为月
-            
-        query = query.filter(Quotation.created_at >= start)
-    
-    # 获取统计数据
-    quotations = query.all()
-    
-    total_count = len(quotations)
-    pending_count = sum(1 for q in quotations if getattr(q, 'status', 'pending') == 'pending')
-    approved_count = sum(1 for q in quotations if getattr(q, 'status', 'pending') == 'approved')
-    rejected_count = sum(1 for q in quotations if getattr(q, 'status', 'pending') == 'rejected')
-    
-    total_amount = sum(q.total for q in quotations if q.total)
-    avg_amount = total_amount / total_count if total_count > 0 else 0
-    
+    created_by = _statistics_scope(current_user)
+    start, end = _resolve_range(period, start_date, end_date)
+
+    summary = stats.status_summary(db, stats.quotation_filters(start, end, created_by))
+    total_count = summary["total_count"]
+    total_amount = summary["total_amount"]
+
     return schemas.QuotationStats(
         total_count=total_count,
-        pending_count=pending_count,
-        approved_count=approved_count,
-        rejected_count=rejected_count,
+        pending_count=stats.status_count(summary, "pending"),
+        approved_count=stats.status_count(summary, "approved"),
+        rejected_count=stats.status_count(summary, "rejected"),
         total_amount=total_amount,
-        avg_amount=avg_amount,
+        avg_amount=total_amount / total_count if total_count > 0 else 0,
         period=period
     )
 
 
+@router.get("/timeseries")
+def get_quotation_timeseries(
+    bucket: str = Query("day", description="时间粒度: day, week, month"),
+    period: str = Query("month", description="统计周期: week, month, quarter, year"),
+    start_date: Optional[str] = Query(None, description="开始日期 YYYY-MM-DD"),
+    end_date: Optional[str] = Query(None, description="结束日期 YYYY-MM-DD"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """按日/周/月时间桶返回报价数量与金额 - 根据角色返回不同范围的统计"""
+    if bucket not in stats.TIME_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"不支持的时间粒度: {bucket}")
+
+    created_by = _statistics_scope(current_user)
+    start, end = _resolve_range(period, start_date, end_date)
+
+    return {
+        "bucket": bucket,
+        "period": period,
+        "start": start.isoformat(),
+        "end": end.isoformat() if end else None,
+        "series": stats.time_series(db, bucket, stats.quotation_filters(start, end, created_by)),
+    }
+
+
+@router.get("/quotes/rollup")
+def get_quote_rollup_series(
+    bucket: str = Query("day", description="时间粒度: day, week, month"),
+    group_by: Optional[str] = Query(None, description="分组维度，逗号分隔: quote_type, quote_unit, currency, created_by, status"),
+    quote_type: Optional[str] = Query(None, description="报价类型过滤"),
+    status: Optional[str] = Query(None, description="状态过滤"),
+    period: str = Query("month", description="统计周期: week, month, quarter, year"),
+    start_date: Optional[str] = Query(None, description="开始日期 YYYY-MM-DD"),
+    end_date: Optional[str] = Query(None, description="结束日期 YYYY-MM-DD"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """从按日汇总表读取报价单（新报价单系统）分析数据，不扫描原始报价表"""
+    created_by = _statistics_scope(current_user)
+    start, end = _resolve_range(period, start_date, end_date)
+
+    filters = {}
+    if created_by is not None:
+        filters["created_by"] = created_by
+    if quote_type:
+        filters["quote_type"] = quote_type
+    if status:
+        filters["status"] = status
+
+    dimensions = [name.strip() for name in group_by.split(",") if name.strip()] if group_by else []
+    try:
+        series = quote_rollups.rollup_series(
+            db,
+            start.date(),
+            end.date() if end else None,
+            bucket=bucket,
+            group_by=dimensions,
+            filters=filters,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "bucket": bucket,
+        "group_by": dimensions,
+        "start": start.date().isoformat(),
+        "end": end.date().isoformat() if end else None,
+        "series": series,
+    }
+
+
 @router.get("/users", response_model=List[schemas.UserStats])
 def get_user_statistics(
     period: str = Query("month", description="统计周期: week, month, quarter, year"),
@@ -91,40 +144,12 @@ def get_user_statistics(
 ):
     """获取用户统计信息 - 管理员及以上"""
     require_admin_permission()(current_user)
-    
-    # 设置时间范围
-    if start_date and end_date:
-        date_filter = text(f"created_at >= '{start_date}' AND created_at <= '{end_date}'")
-    else:
-        end = datetime.now()
-        if period == "week":
-            start = end - timedelta(weeks=1)
-        elif period == "month":
-            start = end - timedelta(days=30)
-        elif period == "quarter":
-            start = end - timedelta(days=90)
-        elif period == "year":
-            start = end - timedelta(days=365)
-        else:
-            start = end - timedelta(days=30)
-        
-        date_filter = text(f"created_at >= '{start.strftime('%Y-%m-%d')}'")
-    
-    # 查询用户统计
-    user_stats_query = db.query(
-        User.id,
-        User.name,
-        func.count(Quotation.id).label('quotation_count'),
-        func.sum(func.case([(text("status = 'approved'"), 1)], else_=0)).label('approved_count'),
-        func.sum(Quotation.total).label('total_amount')
-    ).outerjoin(
-        Quotation, User.id == Quotation.created_by
-    ).filter(
-        date_filter if start_date and end_date else text(f"quotations.created_at >= '{start.strftime('%Y-%m-%d')}'")
-    ).group_by(User.id, User.name)
-    
+    start, end = _resolve_range(period, start_date, end_date)
+
     user_stats = []
-    for user_id, user_name, quotation_count, approved_count, total_amount in user_stats_query.all():
+    for user_id, user_name, quotation_count, approved_count, total_amount in stats.creator_summary(
+        db, stats.quotation_filters(start, end)
+    ):
         success_rate = (approved_count / quotation_count * 100) if quotation_count > 0 else 0
         user_stats.append(schemas.UserStats(
             user_id=user_id,
@@ -151,19 +176,16 @@ def get_dashboard_data(
     # 根据角色返回不同的仪表盘数据
     if current_user.role == "user":
         # 一般用户：个人数据概览
-        my_quotations = db.query(Quotation).filter(Quotation.created_by == current_user.id).all()
-        total_quotations = len(my_quotations)
-        pending_quotations = sum(1 for q in my_quotations if getattr(q, 'status', 'pending') == 'pending')
-        approved_quotations = sum(1 for q in my_quotations if getattr(q, 'status', 'pending') == 'approved')
+        summary = stats.status_summary(db, [Quotation.created_by == current_user.id])
         
         return {
             "role": current_user.role,
             "user_name": current_user.name,
             "personal_stats": {
-                "total_quotations": total_quotations,
-                "pending_quotations": pending_quotations,
-                "approved_quotations": approved_quotations,
-                "total_amount": sum(q.total for q in my_quotations if q.total)
+                "total_quotations": summary["total_count"],
+                "pending_quotations": stats.status_count(summary, "pending"),
+                "approved_quotations": stats.status_count(summary, "approved"),
+                "total_amount": summary["total_amount"]
             }
         }
     
@@ -171,18 +193,18 @@ def get_dashboard_data(
         # 销售经理：团队数据概览
         require_manager_permission()(current_user)
         
-        all_quotations = db.query(Quotation).all()
-        all_users = db.query(User).filter(User.is_active == True).all()
+        summary = stats.status_summary(db)
+        users = stats.user_counts(db)
         
         return {
             "role": current_user.role,
             "user_name": current_user.name,
             "team_stats": {
-                "total_users": len(all_users),
-                "total_quotations": len(all_quotations),
-                "pending_quotations": sum(1 for q in all_quotations if getattr(q, 'status', 'pending') == 'pending'),
-                "approved_quotations": sum(1 for q in all_quotations if getattr(q, 'status', 'pending') == 'approved'),
-                "total_amount": sum(q.total for q in all_quotations if q.total)
+                "total_users": users["active_users"],
+                "total_quotations": summary["total_count"],
+                "pending_quotations": stats.status_count(summary, "pending"),
+                "approved_quotations": stats.status_count(summary, "approved"),
+                "total_amount": summary["total_amount"]
             }
         }
     
@@ -190,8 +212,8 @@ def get_dashboard_data(
         # 管理员及以上：系统全局数据概览
         require_admin_permission()(current_user)
         
-        all_quotations = db.query(Quotation).all()
-        all_users = db.query(User).all()
+        summary = stats.status_summary(db)
+        users = stats.user_counts(db)
         recent_logs = db.query(OperationLog).order_by(
             OperationLog.created_at.desc()
         ).limit(10).all()
@@ -200,12 +222,12 @@ def get_dashboard_data(
             "role": current_user.role,
             "user_name": current_user.name,
             "system_stats": {
-                "total_users": len(all_users),
-                "active_users": len([u for u in all_users if u.is_active]),
-                "total_quotations": len(all_quotations),
-                "pending_quotations": sum(1 for q in all_quotations if getattr(q, 'status', 'pending') == 'pending'),
-                "approved_quotations": sum(1 for q in all_quotations if getattr(q, 'status', 'pending') == 'approved'),
-                "total_amount": sum(q.total for q in all_quotations if q.total),
+                "total_users": users["total_users"],
+                "active_users": users["active_users"],
+                "total_quotations": summary["total_count"],
+                "pending_quotations": stats.status_count(summary, "pending"),
+                "approved_quotations": stats.status_count(summary, "approved"),
+                "total_amount": summary["total_amount"],
                 "recent_operations": len(recent_logs)
             },
             "recent_logs": [
@@ -232,7 +254,9 @@ def export_statistics(
     require_manager_permission()(current_user)
     
     # 获取统计数据
-    quotation_stats = get_quotation_statistics(period=period, current_user=current_user, db=db)
+    quotation_stats = get_quotation_statistics(
+        period=period, start_date=None, end_date=None, current_user=current_user, db=db
+    )
     
     # 记录导出操作
     crud.log_operation(
@@ -13,6 +13,9 @@ from pydantic import BaseModel, Field
 from ....database import get_db
 from ....auth_routes import get_current_user
 from ....models import User, Quote, ApprovalRecord
+from ....services.approval_record_manager import ApprovalRecordManager
+from ....services.quote_list_projection import fetch_quote_list_page
+from ....services.approval_cycle_analytics import ApprovalCycleAnalytics, SCOPES
 from ....services.approval_engine import (
     UnifiedApprovalEngine,
     ApprovalOperation,
@@ -245,34 +248,24 @@ async def list_approvals(
     支持状态过滤和分页
     """
     try:
-        # 构建查询
-        query = db.query(Quote)
+        # 列表投影只取所需列，总数通过窗口函数随当前页一并返回
+        filters = [Quote.status == status_filter] if status_filter else []
+        quotes, total = fetch_quote_list_page(db, filters, page, page_size)
 
-        # 状态过滤
-        if status_filter:
-            query = query.filter(Quote.status == status_filter)
-
-        # 计算总数
-        total = query.count()
-
-        # 分页查询
-        offset = (page - 1) * page_size
-        quotes = query.offset(offset).limit(page_size).all()
+        # 整页报价单的最近5条审批历史一次查询取回
+        history_by_quote = ApprovalRecordManager(db).get_recent_history_for_quotes(
+            [quote.id for quote in quotes], limit=5
+        )
 
         # 构建响应数据
         items = []
         for quote in quotes:
-            # 简化的审批历史（只取最近5条）
-            recent_history = db.query(ApprovalRecord).filter(
-                ApprovalRecord.quote_id == quote.id
-            ).order_by(ApprovalRecord.created_at.desc()).limit(5).all()
-
             history_data = [{
                 "action": record.action,
                 "status": record.status,
                 "created_at": record.created_at,
                 "comments": record.comments
-            } for record in recent_history]
+            } for record in history_by_quote.get(quote.id, [])]
 
             items.append(ApprovalStatusResponse(
                 quote_id=quote.id,
@@ -302,6 +295,34 @@ async def list_approvals(
 
 # === 便捷操作端点 (向后兼容) ===
 
+@router.get("/analytics")
+async def get_approval_analytics(
+    scope: str = Query("approver", description="统计维度: approver, quote_type"),
+    days: int = Query(30, ge=1, le=365, description="统计最近天数"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    获取审批周期分析
+    返回各审批人/报价类型的待审批数量、决定耗时中位数与P90、每日吞吐量，数据来自增量汇总表
+    """
+    if current_user.role not in ("manager", "admin", "super_admin"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="没有查看审批分析的权限")
+    if scope not in SCOPES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"不支持的统计维度: {scope}")
+
+    items = ApprovalCycleAnalytics(db).get_summary(scope, days)
+
+    if scope == "approver":
+        approver_ids = [int(item["scope_key"]) for item in items if item["scope_key"].isdigit()]
+        names = dict(db.query(User.id, User.name).filter(User.id.in_(approver_ids)).all()) if approver_ids else {}
+        for item in items:
+            key = item["scope_key"]
+            item["approver_name"] = names.get(int(key)) if key.isdigit() else "未指定"
+
+    return {"scope": scope, "days": days, "items": items}
+
+
 @router.post("/{quote_id}/approve", response_model=ApprovalOperationResponse)
 async def approve_quote(
     quote_id: int,
@@ -154,7 +154,11 @@ async def get_current_user_info(
     current_user: User = Depends(get_current_user)
 ):
     """获取当前用户信息"""
-    
+    return build_user_response(current_user)
+
+
+def build_user_response(current_user: User) -> UserResponse:
+    """当前用户信息（/api/me 与启动数据接口共用）"""
     # 解析部门信息
     try:
         department_ids = json.loads(current_user.department_ids or "[]")
@@ -1,6 +1,10 @@
+from typing import List
+
 from sqlalchemy.orm import Session
 from sqlalchemy.orm import joinedload
 from . import models, schemas
+from .services import catalog_changes  # noqa: F401  导入即注册目录变更版本和快照失效的 flush 钩子
+from .services.pricing_catalog import pricing_catalog_cache
 
 # Machine Type CRUD operations
 def get_machine_type(db: Session, machine_type_id: int):
@@ -116,8 +120,9 @@ def delete_machine(db: Session, machine_id: int):
     """级联删除机器及其所有关联数据"""
     db_machine = db.query(models.Machine).filter(models.Machine.id == machine_id).first()
     if db_machine:
-        # 1. 删除该机器下的所有板卡配置
-        db.query(models.CardConfig).filter(models.CardConfig.machine_id == machine_id).delete()
+        # 1. 删除该机器下的所有板卡配置（经 ORM 逐行删除，以便记录目录删除墓碑）
+        for card_config in db_machine.card_configs:
+            db.delete(card_config)
         
         # 2. 在删除前获取相关信息，避免懒加载错误
         machine_data = schemas.Machine.from_orm(db_machine)
@@ -253,61 +258,16 @@ def delete_quotation(db: Session, quotation_id: int):
     return db_quotation
 
 def calculate_quotation(db: Session, quotation_request: schemas.QuotationRequest):
-    from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
-
-    machine = db.query(models.Machine).filter(models.Machine.id == quotation_request.machine_id).first()
-    if not machine:
-        raise ValueError("Machine not found")
-
-    def to_decimal(value, field_name: str) -> Decimal:
-        if value is None:
-            value = 0
-        try:
-            return Decimal(str(value))
-        except (InvalidOperation, TypeError):
-            raise ValueError(f"Invalid numeric value for {field_name}: {value}")
-
-    details = quotation_request.details or {}
-
-    base_rate = to_decimal(machine.base_hourly_rate or 0, "base_hourly_rate")
-    discount_rate = to_decimal(machine.discount_rate or 1, "discount_rate")
-    hourly_total = base_rate * discount_rate
-
-    selected_config_ids = set(details.get('configuration_ids', []) or [])
-    include_all_configs = not selected_config_ids
-    for config in machine.configurations:
-        if include_all_configs or config.id in selected_config_ids:
-            hourly_total += to_decimal(config.additional_rate or 0, f"configuration[{config.id}].additional_rate")
-
-    selected_card_ids = set(details.get('card_config_ids', []) or [])
-    include_all_cards = not selected_card_ids
-    exchange_default = to_decimal(machine.exchange_rate or 1, "exchange_rate")
-    machine_currency = (machine.currency or 'RMB').upper()
-
-    for card in machine.card_configs:
-        if include_all_cards or card.id in selected_card_ids:
-            card_price = to_decimal(card.unit_price or 0, f"card[{card.id}].unit_price")
-            card_currency = (card.currency or machine_currency).upper()
-            if card_currency == 'USD':
-                card_rate = to_decimal(card.exchange_rate or exchange_default, f"card[{card.id}].exchange_rate")
-                card_price *= card_rate
-            hourly_total += card_price
-
-    for extra in details.get('auxiliary_rates', []) or []:
-        hourly_total += to_decimal(extra, "auxiliary_rate")
-
-    hourly_total += to_decimal(details.get('extra_flat_fee') or 0, "extra_flat_fee")
-
-    if machine_currency == 'USD':
-        exchange_override = details.get('exchange_rate_override') or details.get('exchange_rate')
-        hourly_total *= to_decimal(exchange_override or exchange_default, "exchange_rate_override")
-
-    test_hours = to_decimal(quotation_request.test_hours or 0, "test_hours")
-    if test_hours < 0:
-        raise ValueError("Test hours cannot be negative")
-
-    total = (hourly_total * test_hours).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-    return float(total)
+    """按进程内计价目录计算报价，目录未变化时不访问数据库"""
+    catalog = pricing_catalog_cache.get(db)
+    return catalog.price(quotation_request.machine_id, quotation_request.test_hours, quotation_request.details)
+
+def calculate_quotations(db: Session, quotation_requests: List[schemas.QuotationRequest]):
+    """批量计价，按请求顺序返回 (金额, 错误信息)"""
+    catalog = pricing_catalog_cache.get(db)
+    return catalog.price_many(
+        (request.machine_id, request.test_hours, request.details) for request in quotation_requests
+    )
 
 # Enhanced Quotation CRUD operations with permission management
 def create_quotation(db: Session, quotation: dict, user_id: int):
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, Table, DateTime, Text
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, Table, DateTime, Date, Text, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from pathlib import Path
@@ -12,6 +12,7 @@ class MachineType(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True)
     description = Column(String)
+    change_version = Column(Integer, default=0, index=True)  # 目录变更版本号，flush 时分配
     
     # Relationships
     suppliers = relationship("Supplier", back_populates="machine_type")
@@ -22,6 +23,7 @@ class Supplier(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True)
     machine_type_id = Column(Integer, ForeignKey("machine_types.id"))
+    change_version = Column(Integer, default=0, index=True)  # 目录变更版本号，flush 时分配
     
     # Relationships
     machine_type = relationship("MachineType", back_populates="suppliers")
@@ -40,6 +42,7 @@ class Machine(Base):
     exchange_rate = Column(Float, default=1.0)
     currency = Column(String, default="RMB")  # 币种: RMB 或 USD
     supplier_id = Column(Integer, ForeignKey("suppliers.id"))
+    change_version = Column(Integer, default=0, index=True)  # 目录变更版本号，flush 时分配
     
     # Relationships
     supplier = relationship("Supplier", back_populates="machines")
@@ -54,6 +57,7 @@ class Configuration(Base):
     description = Column(String)
     additional_rate = Column(Float, default=0.0)
     machine_id = Column(Integer, ForeignKey("machines.id"))
+    change_version = Column(Integer, default=0, index=True)  # 目录变更版本号，flush 时分配
     
     # Relationships
     machine = relationship("Machine", back_populates="configurations")
@@ -62,12 +66,13 @@ class CardConfig(Base):
     __tablename__ = "card_configs"
     
     id = Column(Integer, primary_key=True, index=True)
-    part_number = Column(String)
+    part_number = Column(String, index=True)
     board_name = Column(String)
     unit_price = Column(Float)
     currency = Column(String, default="RMB")  # 币种: RMB 或 USD
     exchange_rate = Column(Float, default=1.0)  # 汇率 (用于USD转换)
-    machine_id = Column(Integer, ForeignKey("machines.id"))
+    machine_id = Column(Integer, ForeignKey("machines.id"), index=True)
+    change_version = Column(Integer, default=0, index=True)  # 目录变更版本号，flush 时分配
     
     # Relationships
     machine = relationship("Machine", back_populates="card_configs")
@@ -80,6 +85,39 @@ class AuxiliaryEquipment(Base):
     description = Column(String)
     hourly_rate = Column(Float)
     type = Column(String)  # 新增字段，用于区分handler和prober
+    change_version = Column(Integer, default=0, index=True)  # 目录变更版本号，flush 时分配
+
+
+class ExchangeRate(Base):
+    """汇率表 - 外币兑人民币汇率按生效日期记录，计价取不晚于当天的最近一条，优先于机器/板卡上的汇率"""
+    __tablename__ = "exchange_rates"
+    __table_args__ = (UniqueConstraint("currency", "effective_date", name="uq_exchange_rates_currency_date"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    currency = Column(String, nullable=False, index=True)  # 币种: USD 等，统一大写
+    rate = Column(Float, nullable=False)  # 1 单位外币折合人民币
+    effective_date = Column(Date, nullable=False)  # 生效日期（含当天）
+    created_at = Column(DateTime, default=datetime.utcnow)
+    change_version = Column(Integer, default=0, index=True)  # 目录变更版本号，flush 时分配
+
+
+class CatalogChangeSequence(Base):
+    """目录变更版本序列 - 每次 flush 写入目录表时原子递增，版本号全局单调"""
+    __tablename__ = "catalog_change_sequence"
+
+    name = Column(String, primary_key=True)  # 序列名，目前只有 catalog
+    last_value = Column(Integer, nullable=False, default=0)  # 已分配的最大版本号
+
+
+class CatalogTombstone(Base):
+    """目录删除墓碑 - 记录被删除的目录行及删除时的版本号，供客户端增量同步"""
+    __tablename__ = "catalog_tombstones"
+
+    id = Column(Integer, primary_key=True, index=True)
+    table_name = Column(String, nullable=False)  # 目录表名，如 machines
+    row_id = Column(Integer, nullable=False)  # 被删除行的主键
+    change_version = Column(Integer, nullable=False, index=True)
+    deleted_at = Column(DateTime, default=datetime.utcnow)
 
 # 移除Personnel模型，改为使用标准值
 
@@ -164,6 +202,62 @@ class Quote(Base):
         return f"/media/{relative.as_posix()}"
 
 
+class QuoteNumberSequence(Base):
+    """报价单号序列表 - 按 (单位缩写, 日期) 原子递增分配顺序编号"""
+    __tablename__ = "quote_number_sequences"
+
+    unit_code = Column(String, primary_key=True)  # 单位缩写: KS/SZ/SH/ZH
+    date_key = Column(String, primary_key=True)  # 日期: YYYYMMDD
+    last_value = Column(Integer, nullable=False, default=0)  # 已分配的最大序号
+
+
+class QuoteDailyRollup(Base):
+    """报价单按日汇总表 - 按创建日期和维度预聚合，随报价单写入增量维护（软删除报价单单独成行）"""
+    __tablename__ = "quote_daily_rollups"
+
+    day = Column(Date, primary_key=True)  # 报价单创建日期
+    quote_type = Column(String, primary_key=True, default="")  # 维度为空时存空串，保证主键可比较
+    quote_unit = Column(String, primary_key=True, default="")
+    currency = Column(String, primary_key=True, default="")
+    created_by = Column(Integer, primary_key=True, default=0)  # 创建人为空时存0
+    status = Column(String, primary_key=True, default="")
+    is_deleted = Column(Boolean, primary_key=True, default=False)  # 是否软删除
+    quote_count = Column(Integer, nullable=False, default=0)  # 报价单数量
+    total_amount = Column(Float, nullable=False, default=0.0)  # 总金额合计
+    approval_seconds = Column(Float, nullable=False, default=0.0)  # 已批准报价单提交到批准的耗时合计（秒）
+    approval_count = Column(Integer, nullable=False, default=0)  # 计入耗时的报价单数量
+
+
+class ApprovalCycleDaily(Base):
+    """审批周期按日汇总 - 每次审批决定时按 (维度, 日期, 耗时区间) 增量累加"""
+    __tablename__ = "approval_cycle_daily"
+
+    scope = Column(String, primary_key=True)  # 维度: approver / quote_type
+    scope_key = Column(String, primary_key=True)  # 维度取值: 审批人ID / 报价类型
+    day = Column(Date, primary_key=True)  # 决定日期
+    bucket = Column(Integer, primary_key=True)  # 提交到决定耗时所在区间序号
+    decided_count = Column(Integer, nullable=False, default=0)  # 决定数量（批准+拒绝）
+    approved_count = Column(Integer, nullable=False, default=0)  # 批准数量
+    decision_seconds = Column(Float, nullable=False, default=0.0)  # 耗时合计（秒）
+
+
+class ApprovalPendingCount(Base):
+    """待审批数量 - 进入/离开待审批状态时增量维护"""
+    __tablename__ = "approval_pending_counts"
+
+    scope = Column(String, primary_key=True)  # 维度: approver / quote_type
+    scope_key = Column(String, primary_key=True)  # 维度取值，审批人未指定时为空串
+    pending_count = Column(Integer, nullable=False, default=0)
+
+
+class ApprovalPendingAssignment(Base):
+    """待审批报价单计入待审批数量的审批人键 - 进入待审批时记录，离开时按同一键扣减后删除"""
+    __tablename__ = "approval_pending_assignments"
+
+    quote_id = Column(Integer, primary_key=True)
+    approver_key = Column(String, nullable=False, default="")
+
+
 class QuoteItem(Base):
     """报价单明细项目"""
     __tablename__ = "quote_items"
@@ -188,6 +282,11 @@ class QuoteItem(Base):
     # 价格调整
     adjusted_price = Column(Float, nullable=True)  # 调整后单价
     adjustment_reason = Column(Text, nullable=True)  # 调整理由
+
+    # 工序参数（写入时从配置解析）
+    uph = Column(Integer, nullable=True, index=True)  # 每小时产出
+    hourly_rate = Column(Float, nullable=True)  # 机时费率 = 单价 × UPH
+    applied_exchange_rate = Column(Float, nullable=True)  # 汇率重算后单价对应的汇率，为空表示未重算过
     
     # 关联信息
     machine_id = Column(Integer, ForeignKey("machines.id"))
@@ -269,13 +368,20 @@ class ApprovalRecord(Base):
 
 
 class QuoteSnapshot(Base):
-    """报价快照表 - 提交审批时的数据冻结"""
+    """报价快照表 - 提交审批时的数据冻结
+
+    关键帧在 data 中保存完整 JSON；增量快照只在 delta 中保存相对 base_id 的 JSON Patch，
+    需沿 base_id 回溯到关键帧后依次应用补丁还原（见 SnapshotService.get_snapshot_data）
+    """
     __tablename__ = "quote_snapshots"
     
     id = Column(Integer, primary_key=True, index=True)
-    quote_id = Column(Integer, ForeignKey("quotes.id"), nullable=False)
-    data = Column(Text, nullable=False)  # JSON格式的快照数据
-    hash = Column(String(64), nullable=False)  # SHA256哈希
+    quote_id = Column(Integer, ForeignKey("quotes.id"), nullable=False, index=True)
+    data = Column(Text, nullable=True)  # JSON格式的完整快照数据（仅关键帧）
+    delta = Column(Text, nullable=True)  # 相对上一快照的JSON Patch（仅增量快照）
+    base_id = Column(Integer, ForeignKey("quote_snapshots.id"), nullable=True)  # 增量快照的前一快照
+    chain_depth = Column(Integer, nullable=False, default=0)  # 距最近关键帧的增量数，0 为关键帧
+    hash = Column(String(64), nullable=False)  # 完整数据的SHA256哈希（创建时计算）
     template_id = Column(String, nullable=False)  # 使用的审批模板ID
     approvers = Column(Text)  # JSON格式的审批人列表
     created_by = Column(Integer, ForeignKey("users.id"))
@@ -284,18 +390,37 @@ class QuoteSnapshot(Base):
     # Relationships
     quote = relationship("Quote")
     creator = relationship("User")
+
+    @property
+    def is_keyframe(self) -> bool:
+        return self.data is not None
     
     def calc_hash(self) -> str:
-        """计算数据哈希"""
-        # 确保JSON序列化的稳定性
-        data_str = json.dumps(json.loads(self.data), sort_keys=True, separators=(',', ':'))
-        return hashlib.sha256(data_str.encode('utf-8')).hexdigest()
+        """计算关键帧数据哈希（data 写入时已是稳定序列化）"""
+        return self.hash_json(self.data)
+
+    @staticmethod
+    def hash_json(data_json: str) -> str:
+        return hashlib.sha256(data_json.encode('utf-8')).hexdigest()
     
     @classmethod
     def from_quote(cls, quote, template_id: str, approvers: list, creator_id: int = None):
-        """从Quote对象创建快照"""
-        # 序列化Quote数据
-        data = {
+        """从Quote对象创建关键帧快照"""
+        data_json = json.dumps(cls.quote_data(quote), sort_keys=True, separators=(',', ':'))
+        return cls(
+            quote_id=quote.id,
+            data=data_json,
+            chain_depth=0,
+            hash=cls.hash_json(data_json),
+            template_id=template_id,
+            approvers=json.dumps(approvers),
+            created_by=creator_id
+        )
+
+    @staticmethod
+    def quote_data(quote) -> dict:
+        """快照冻结的报价单数据"""
+        return {
             "id": quote.id,
             "quote_number": quote.quote_number,
             "title": quote.title,
@@ -317,17 +442,6 @@ class QuoteSnapshot(Base):
                 for item in quote.items
             ]
         }
-        
-        data_json = json.dumps(data, sort_keys=True, separators=(',', ':'))
-        snapshot = cls(
-            quote_id=quote.id,
-            data=data_json,
-            template_id=template_id,
-            approvers=json.dumps(approvers),
-            created_by=creator_id
-        )
-        snapshot.hash = snapshot.calc_hash()
-        return snapshot
 
 
 class EffectiveQuote(Base):
@@ -528,3 +642,34 @@ class ApprovalTimelineErrors(Base):
     stack_trace = Column(Text)  # 异常栈
     raw_payload = Column(Text)  # 原始回调数据
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+# 归档层：结构与在线表一致（去掉外键和唯一约束），保存超过保留期的已删除报价单
+# 和多年前已结束的报价单，在线表与热点查询只保留活跃数据
+ARCHIVE_INDEXED_COLUMNS = ("quote_id", "quote_number", "created_at")
+
+
+def _archive_table(source: Table, *extra_columns: Column) -> Table:
+    """按在线表生成归档表，主键保持不变以便原样迁回"""
+    columns = [
+        Column(
+            column.name,
+            column.type,
+            primary_key=column.primary_key,
+            autoincrement=False,
+            index=column.name in ARCHIVE_INDEXED_COLUMNS,
+        )
+        for column in source.columns
+    ]
+    return Table(f"{source.name}_archive", Base.metadata, *columns, *extra_columns)
+
+
+quotes_archive = _archive_table(
+    Quote.__table__,
+    Column("archived_at", DateTime, nullable=False, index=True),  # 归档时间
+    Column("archive_reason", String, nullable=False),  # 归档原因: deleted / closed
+)
+quote_items_archive = _archive_table(QuoteItem.__table__)
+approval_records_archive = _archive_table(ApprovalRecord.__table__)
+quote_snapshots_archive = _archive_table(QuoteSnapshot.__table__)
+effective_quotes_archive = _archive_table(EffectiveQuote.__table__)
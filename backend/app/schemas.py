@@ -1,6 +1,6 @@
 from pydantic import BaseModel, validator, Field
-from typing import List, Optional
-from datetime import datetime
+from typing import Dict, List, Optional
+from datetime import date, datetime
 
 # Forward declarations to resolve circular references
 from typing import TYPE_CHECKING
@@ -187,6 +187,26 @@ class AuxiliaryEquipment(AuxiliaryEquipmentBase):
     class Config:
         from_attributes = True
 
+# Exchange Rate schemas
+class ExchangeRateBase(BaseModel):
+    currency: str = Field(..., min_length=3, max_length=10, description="外币币种，如 USD")
+    rate: float = Field(..., gt=0, description="1 单位外币折合人民币")
+    effective_date: date = Field(default_factory=date.today, description="生效日期，默认当天")
+
+class ExchangeRateCreate(ExchangeRateBase):
+    pass
+
+class ExchangeRate(ExchangeRateBase):
+    id: int
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class ExchangeRateWriteResult(BaseModel):
+    exchange_rate: ExchangeRate
+    previous_rate: Optional[float] = Field(None, description="写入前该日期生效的汇率，可用于重算草稿报价单")
+
 # Personnel schemas
 class PersonnelBase(BaseModel):
     name: str
@@ -250,6 +270,18 @@ class QuotationResponse(BaseModel):
     test_hours: Optional[float] = None
     details: Optional[dict] = None
 
+class BatchQuotationRequest(BaseModel):
+    requests: List[QuotationRequest] = Field(..., min_length=1, max_length=2000, description="待计价的方案列表")
+
+class BatchQuotationResult(BaseModel):
+    machine_id: int
+    test_hours: float
+    total: Optional[float] = None  # 计价失败时为空
+    error: Optional[str] = None
+
+class BatchQuotationResponse(BaseModel):
+    results: List[BatchQuotationResult]  # 与请求顺序一一对应
+
 # User schemas
 class UserBase(BaseModel):
     userid: str = Field(..., min_length=1, max_length=64, description="企业微信用户ID")
@@ -396,6 +428,7 @@ class QuoteItemCreate(QuoteItemBase):
 
 class QuoteItemUpdate(QuoteItemBase):
     """更新报价明细项"""
+    id: Optional[int] = Field(None, description="明细ID（为空表示新增）")
     item_name: Optional[str] = None
     quantity: Optional[float] = Field(None, ge=0)
     unit_price: Optional[float] = Field(None, ge=0)
@@ -514,6 +547,39 @@ class QuoteStatusUpdate(BaseModel):
     comments: Optional[str] = Field(None, description="状态更新说明")
 
 
+class QuoteScenario(BaseModel):
+    """报价试算方案，未填写的字段沿用报价单当前值"""
+    name: Optional[str] = Field(None, description="方案名称")
+    discount: Optional[float] = Field(None, ge=0, description="折扣金额")
+    tax_rate: Optional[float] = Field(None, ge=0, le=1, description="税率")
+    adjusted_prices: Dict[int, float] = Field(default_factory=dict, description="明细ID → 调整后单价")
+    exchange_rate: Optional[float] = Field(None, gt=0, description="换算汇率，总金额 × 汇率 = 换算后金额")
+
+
+class QuoteScenarioRequest(BaseModel):
+    """报价试算请求"""
+    scenarios: List[QuoteScenario] = Field(..., min_length=1, max_length=200)
+
+
+class QuoteScenarioResult(BaseModel):
+    """单个试算方案的金额"""
+    name: Optional[str] = None
+    subtotal: float
+    discount: float
+    tax_rate: float
+    tax_amount: float
+    total_amount: float
+    exchange_rate: Optional[float] = None
+    converted_total_amount: Optional[float] = None
+
+
+class QuoteScenarioResponse(BaseModel):
+    """报价试算结果，与请求中的方案一一对应"""
+    quote_id: int
+    currency: Optional[str] = None
+    results: List[QuoteScenarioResult]
+
+
 class ApprovalRecordBase(BaseModel):
     """审批记录基本模型"""
     action: str = Field(..., description="操作")
@@ -557,5 +623,7 @@ class QuoteFilter(BaseModel):
     created_by: Optional[int] = None
     date_from: Optional[datetime] = None
     date_to: Optional[datetime] = None
+    uph_min: Optional[int] = Field(None, ge=0)
+    uph_max: Optional[int] = Field(None, ge=0)
     page: int = Field(1, ge=1)
     size: int = Field(20, ge=1, le=100)
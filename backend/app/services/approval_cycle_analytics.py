@@ -0,0 +1,193 @@
+"""
+审批周期与审批人工作量分析
+UnifiedApprovalEngine 每执行一次审批操作就增量更新两类汇总：
+- 待审批数量：进入待审批 +1，离开待审批 -1，按审批人和报价类型维护；
+  审批人键在进入待审批时记录到 approval_pending_assignments，离开时按同一键扣减，
+  期间审批人被改派或清空（企业微信审批会在决定前清空当前审批人）也不会使计数错位
+- 决定耗时：批准/拒绝时把提交到决定的耗时计入按日、按耗时区间的直方图
+中位数和 P90 由直方图估算（区间内线性插值），每日吞吐量即按日决定数量；
+查询只读取少量汇总行，不需要扫描审批记录
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from ..models import ApprovalCycleDaily, ApprovalPendingAssignment, ApprovalPendingCount, Quote
+from .quote_rollups import upsert_increments
+
+SCOPES = ("approver", "quote_type")
+
+# 耗时区间上界（秒）：5分钟 … 30天，最后一个区间无上界
+CYCLE_TIME_BOUNDS = (
+    300, 900, 1800, 3600, 7200, 14400, 28800, 43200,
+    86400, 172800, 259200, 432000, 604800, 1209600, 2592000,
+)
+
+
+def cycle_time_bucket(seconds: float) -> int:
+    """返回耗时所在区间序号"""
+    return bisect_left(CYCLE_TIME_BOUNDS, seconds)
+
+
+def estimate_quantile(histogram: Dict[int, int], quantile: float) -> Optional[float]:
+    """根据区间直方图估算分位数（秒），在命中区间内按排名线性插值"""
+    total = sum(histogram.values())
+    if total == 0:
+        return None
+
+    target = quantile * total
+    seen = 0
+    for bucket in sorted(histogram):
+        count = histogram[bucket]
+        if count and seen + count >= target:
+            lower = CYCLE_TIME_BOUNDS[bucket - 1] if bucket > 0 else 0
+            if bucket >= len(CYCLE_TIME_BOUNDS):
+                return float(lower)
+            upper = CYCLE_TIME_BOUNDS[bucket]
+            return lower + (upper - lower) * (target - seen) / count
+        seen += count
+    return None
+
+
+class ApprovalCycleAnalytics:
+    """审批周期增量汇总的维护与查询"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def record_transition(
+        self,
+        quote: Quote,
+        previous_status: str,
+        new_status: str,
+        operator_id: int,
+        occurred_at: Optional[datetime] = None,
+    ) -> None:
+        """记录一次审批状态变化，与审批操作在同一事务内写入"""
+        occurred_at = occurred_at or datetime.utcnow()
+        pending_delta = (new_status == "pending") - (previous_status == "pending")
+        pending_keys = {
+            "approver": self._pending_approver_key(quote, pending_delta),
+            "quote_type": quote.quote_type or "",
+        }
+
+        if pending_delta:
+            upsert_increments(
+                self.db.connection(),
+                ApprovalPendingCount,
+                ("scope", "scope_key"),
+                ("pending_count",),
+                [
+                    {"scope": scope, "scope_key": key, "pending_count": pending_delta}
+                    for scope, key in pending_keys.items()
+                ],
+            )
+
+        if previous_status != "pending" or new_status not in ("approved", "rejected") or not quote.submitted_at:
+            return
+
+        seconds = max((occurred_at - quote.submitted_at).total_seconds(), 0.0)
+        decision_keys = {"approver": str(operator_id), "quote_type": pending_keys["quote_type"]}
+        upsert_increments(
+            self.db.connection(),
+            ApprovalCycleDaily,
+            ("scope", "scope_key", "day", "bucket"),
+            ("decided_count", "approved_count", "decision_seconds"),
+            [
+                {
+                    "scope": scope,
+                    "scope_key": key,
+                    "day": occurred_at.date(),
+                    "bucket": cycle_time_bucket(seconds),
+                    "decided_count": 1,
+                    "approved_count": int(new_status == "approved"),
+                    "decision_seconds": seconds,
+                }
+                for scope, key in decision_keys.items()
+            ],
+        )
+
+    def _pending_approver_key(self, quote: Quote, pending_delta: int) -> str:
+        """进入待审批时记录当前审批人键；离开时取回记录的键并删除记录（无记录时按当前审批人）"""
+        connection = self.db.connection()
+        approver_key = str(quote.current_approver_id or "")
+        if pending_delta > 0:
+            connection.execute(delete(ApprovalPendingAssignment).where(ApprovalPendingAssignment.quote_id == quote.id))
+            connection.execute(insert(ApprovalPendingAssignment).values(quote_id=quote.id, approver_key=approver_key))
+        elif pending_delta < 0:
+            recorded = connection.execute(
+                select(ApprovalPendingAssignment.approver_key).where(ApprovalPendingAssignment.quote_id == quote.id)
+            ).scalar()
+            if recorded is not None:
+                approver_key = recorded
+                connection.execute(delete(ApprovalPendingAssignment).where(ApprovalPendingAssignment.quote_id == quote.id))
+        return approver_key
+
+    def get_summary(self, scope: str, days: int = 30, today: Optional[date] = None) -> List[Dict]:
+        """按维度返回待审批数量、近 days 天的决定数、平均/中位/P90 耗时（小时）和每日吞吐量"""
+        if scope not in SCOPES:
+            raise ValueError(f"不支持的统计维度: {scope}")
+
+        today = today or datetime.utcnow().date()
+        start_day = today - timedelta(days=days - 1)
+
+        cycle_rows = self.db.execute(
+            select(
+                ApprovalCycleDaily.scope_key,
+                ApprovalCycleDaily.day,
+                ApprovalCycleDaily.bucket,
+                func.sum(ApprovalCycleDaily.decided_count),
+                func.sum(ApprovalCycleDaily.approved_count),
+                func.sum(ApprovalCycleDaily.decision_seconds),
+            )
+            .where(and_(ApprovalCycleDaily.scope == scope, ApprovalCycleDaily.day >= start_day))
+            .group_by(ApprovalCycleDaily.scope_key, ApprovalCycleDaily.day, ApprovalCycleDaily.bucket)
+        ).all()
+        pending_rows = self.db.execute(
+            select(ApprovalPendingCount.scope_key, ApprovalPendingCount.pending_count)
+            .where(ApprovalPendingCount.scope == scope)
+        ).all()
+
+        summaries = defaultdict(lambda: {
+            "pending_count": 0,
+            "decided_count": 0,
+            "approved_count": 0,
+            "decision_seconds": 0.0,
+            "histogram": defaultdict(int),
+            "throughput": defaultdict(int),
+        })
+        for key, pending_count in pending_rows:
+            summaries[key]["pending_count"] = pending_count
+        for key, day, bucket, decided, approved, seconds in cycle_rows:
+            summary = summaries[key]
+            summary["decided_count"] += decided
+            summary["approved_count"] += approved
+            summary["decision_seconds"] += seconds
+            summary["histogram"][bucket] += decided
+            summary["throughput"][day.isoformat()] += decided
+
+        results = []
+        for key in sorted(summaries):
+            summary = summaries[key]
+            decided = summary["decided_count"]
+            if not decided and not summary["pending_count"]:
+                continue
+            median = estimate_quantile(summary["histogram"], 0.5)
+            p90 = estimate_quantile(summary["histogram"], 0.9)
+            results.append({
+                "scope_key": key,
+                "pending_count": summary["pending_count"],
+                "decided_count": decided,
+                "approved_count": summary["approved_count"],
+                "avg_hours": round(summary["decision_seconds"] / decided / 3600, 2) if decided else None,
+                "median_hours": round(median / 3600, 2) if median is not None else None,
+                "p90_hours": round(p90 / 3600, 2) if p90 is not None else None,
+                "throughput_per_day": round(decided / days, 2),
+                "daily_throughput": dict(sorted(summary["throughput"].items())),
+            })
+        return results
@@ -21,6 +21,7 @@ from sqlalchemy.orm import Session
 # 导入现有组件
 from .approval_status_synchronizer import ApprovalStatusSynchronizer
 from .approval_record_manager import ApprovalRecordManager
+from .approval_cycle_analytics import ApprovalCycleAnalytics
 from .unified_approval_service import ApprovalMethod
 from .wecom_integration import WeComApprovalIntegration
 from ..models import Quote, User
@@ -218,6 +219,7 @@ class UnifiedApprovalEngine:
         self.event_bus = ApprovalEventBus()
         self.status_synchronizer = ApprovalStatusSynchronizer(db)
         self.record_manager = ApprovalRecordManager(db)
+        self.cycle_analytics = ApprovalCycleAnalytics(db)
         self.wecom_integration = WeComApprovalIntegration(db)
 
         # 注册事件处理器
@@ -273,10 +275,23 @@ class UnifiedApprovalEngine:
                     }
                 )
 
-                # 7. 发布事件
+                # 7. 增量更新审批周期汇总（保存点内执行：语句失败只回滚汇总，不中止整个事务）
+                try:
+                    with self.db.begin_nested():
+                        self.cycle_analytics.record_transition(
+                            self._get_quote(operation.quote_id),
+                            current_status.value,
+                            new_status.value,
+                            operation.operator_id,
+                        )
+                except Exception as analytics_error:
+                    # 汇总更新失败不应影响审批结果
+                    self.logger.error(f"审批周期汇总更新失败: {analytics_error}")
+
+                # 8. 发布事件
                 self._publish_operation_event(operation, result)
 
-                # 8. 刷新PDF缓存（批准/拒绝后PDF需要显示最新状态）
+                # 9. 刷新PDF缓存（批准/拒绝后PDF需要显示最新状态）
                 if operation.action in [ApprovalAction.APPROVE, ApprovalAction.REJECT]:
                     try:
                         self._invalidate_pdf_cache(operation.quote_id)
@@ -285,7 +300,7 @@ class UnifiedApprovalEngine:
                         # PDF缓存清除失败不应影响审批结果
                         self.logger.error(f"PDF缓存清除失败: {pdf_error}")
 
-                # 9. 提交所有更改到数据库
+                # 10. 提交所有更改到数据库
                 self.db.commit()
 
             return result
@@ -505,6 +520,7 @@ class UnifiedApprovalEngine:
             success=True,
             message="审批已撤回",
             new_status=ApprovalStatus.WITHDRAWN,
+            approval_method=ApprovalMethod.WECOM if operation.channel == OperationChannel.WECOM else ApprovalMethod.INTERNAL,
             sync_required=(operation.channel != OperationChannel.WECOM),
             need_notification=True
         )
@@ -7,7 +7,9 @@
 import logging
 import json
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from collections import defaultdict
+from typing import Optional, List, Dict, Any, Iterable
+from sqlalchemy import Row, func, select
 from sqlalchemy.orm import Session
 
 from ..models import ApprovalRecord, Quote, User
@@ -139,6 +141,42 @@ class ApprovalRecordManager:
             self.logger.error(f"获取审批历史失败: {e}")
             return []
 
+    def get_recent_history_for_quotes(self, quote_ids: Iterable[int], limit: int = 5) -> Dict[int, List[Row]]:
+        """批量获取多个报价单最近的审批记录（每单最多 limit 条，按时间倒序）
+
+        使用 ROW_NUMBER() OVER (PARTITION BY quote_id ...) 一次查询取回整页数据，
+        再在内存中按报价单分组。
+        """
+        quote_ids = list(quote_ids)
+        history: Dict[int, List[Row]] = defaultdict(list)
+        if not quote_ids:
+            return history
+
+        ranked = (
+            select(
+                ApprovalRecord.quote_id,
+                ApprovalRecord.action,
+                ApprovalRecord.status,
+                ApprovalRecord.comments,
+                ApprovalRecord.created_at,
+                func.row_number().over(
+                    partition_by=ApprovalRecord.quote_id,
+                    order_by=(ApprovalRecord.created_at.desc(), ApprovalRecord.id.desc()),
+                ).label("row_number"),
+            )
+            .where(ApprovalRecord.quote_id.in_(quote_ids))
+            .subquery()
+        )
+        rows = self.db.execute(
+            select(ranked)
+            .where(ranked.c.row_number <= limit)
+            .order_by(ranked.c.quote_id, ranked.c.row_number)
+        ).all()
+
+        for row in rows:
+            history[row.quote_id].append(row)
+        return history
+
     def get_approval_statistics(self) -> Dict[str, Any]:
         """获取审批统计信息"""
         try:
@@ -0,0 +1,75 @@
+"""
+板卡配置查询索引
+板卡列表由 catalog_cache 中的 VersionedCatalogCache 缓存在进程内，并按机器、供应商和料号前缀建立索引：
+按机器/供应商筛选直接取对应的板卡序号列表，料号前缀在排序后的料号上二分查找，
+多个条件取交集后按板卡ID排序分页。目录变化后下一次查询时重建
+"""
+
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models import CardConfig, Machine
+from .catalog_cache import VersionedCatalogCache, card_config_dict
+
+
+class CardConfigIndex:
+    """某一目录版本下的全部板卡，cards 按ID排序，其余索引保存 cards 中的序号"""
+
+    def __init__(self, version: int, cards: List[dict], machine_suppliers: Dict[int, Optional[int]]):
+        self.version = version
+        self.cards = cards
+        self.by_machine: Dict[int, List[int]] = {}
+        self.by_supplier: Dict[int, List[int]] = {}
+        for position, card in enumerate(cards):
+            machine_id = card["machine_id"]
+            self.by_machine.setdefault(machine_id, []).append(position)
+            supplier_id = machine_suppliers.get(machine_id)
+            if supplier_id is not None:
+                self.by_supplier.setdefault(supplier_id, []).append(position)
+        part_numbers = sorted(((card["part_number"] or "").casefold(), position) for position, card in enumerate(cards))
+        self._part_number_keys = [key for key, _ in part_numbers]
+        self._part_number_positions = [position for _, position in part_numbers]
+
+    @classmethod
+    def load(cls, db: Session, version: int) -> "CardConfigIndex":
+        cards = [card_config_dict(card) for card in db.execute(select(CardConfig).order_by(CardConfig.id)).scalars()]
+        machine_suppliers = dict(db.execute(select(Machine.id, Machine.supplier_id)).all())
+        return cls(version, cards, machine_suppliers)
+
+    def _with_prefix(self, prefix: str) -> List[int]:
+        prefix = prefix.casefold()
+        start = bisect_left(self._part_number_keys, prefix)
+        end = bisect_left(self._part_number_keys, prefix + "\U0010ffff", start)
+        return self._part_number_positions[start:end]
+
+    def query(
+        self,
+        machine_ids: Optional[Iterable[int]] = None,
+        supplier_id: Optional[int] = None,
+        part_number_prefix: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> List[dict]:
+        """按条件筛选板卡（条件之间为且），返回缓存中的字典，调用方不应修改"""
+        candidates: List[Set[int]] = []
+        if machine_ids is not None:
+            candidates.append({
+                position for machine_id in machine_ids for position in self.by_machine.get(machine_id, ())
+            })
+        if supplier_id is not None:
+            candidates.append(set(self.by_supplier.get(supplier_id, ())))
+        if part_number_prefix:
+            candidates.append(set(self._with_prefix(part_number_prefix)))
+
+        if not candidates:
+            return self.cards[skip:skip + limit]
+        positions = sorted(set.intersection(*candidates))
+        return [self.cards[position] for position in positions[skip:skip + limit]]
+
+
+card_config_index_cache: VersionedCatalogCache[CardConfigIndex] = VersionedCatalogCache(
+    lambda db, key: CardConfigIndex.load(db, key.change_version)
+)
@@ -0,0 +1,309 @@
+"""
+产品目录快照缓存
+机器类型 → 供应商 → 机器 → 板卡 的层级目录用 selectinload 分层一次性取回，
+序列化为 JSON 字节（及 gzip 压缩版本）缓存在进程内。
+目录派生缓存统一由 VersionedCatalogCache 管理，缓存键包含两部分：
+- 进程内目录版本：本进程目录表（机器类型、供应商、机器、配置、板卡、辅助设备、汇率）的
+  ORM 写入提交后递增，下一次读取立即重建；
+- 持久化目录变更版本（catalog_change_sequence.last_value）：其他 worker/进程的写入、
+  init_data.py、导入脚本或数据库恢复只会改变它，最多每 CATALOG_RECHECK_SECONDS 秒
+  用一次主键查询复核，变化后重建。
+其他目录派生缓存也可通过 on_catalog_change 注册本进程内的失效回调
+"""
+
+import gzip
+import hashlib
+import json
+import struct
+import threading
+import time
+import zlib
+from typing import Callable, Generic, Hashable, List, NamedTuple, Optional, Tuple, TypeVar
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, selectinload
+
+from ..models import (
+    AuxiliaryEquipment,
+    CardConfig,
+    CatalogChangeSequence,
+    Configuration,
+    ExchangeRate,
+    Machine,
+    MachineType,
+    Supplier,
+)
+
+CATALOG_MODELS = (MachineType, Supplier, Machine, Configuration, CardConfig, AuxiliaryEquipment, ExchangeRate)
+SEQUENCE_NAME = "catalog"
+CATALOG_RECHECK_SECONDS = 5.0
+
+_PENDING_KEY = "catalog_written"
+
+T = TypeVar("T")
+
+
+class CatalogVersion:
+    """进程内目录版本号，递增时依次调用已注册的失效回调"""
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[int], None]] = []
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def bump(self) -> int:
+        with self._lock:
+            self._value += 1
+            version = self._value
+        for callback in list(self._callbacks):
+            callback(version)
+        return version
+
+    def subscribe(self, callback: Callable[[int], None]) -> None:
+        self._callbacks.append(callback)
+
+
+_catalog_version = CatalogVersion()
+
+
+def catalog_version() -> int:
+    return _catalog_version.value
+
+
+def bump_catalog_version() -> int:
+    """Core 批量写入目录表时需显式调用"""
+    return _catalog_version.bump()
+
+
+def on_catalog_change(callback: Callable[[int], None]) -> None:
+    """注册目录变化回调，参数为新的目录版本号"""
+    _catalog_version.subscribe(callback)
+
+
+def current_change_version(db: Session) -> int:
+    """持久化的目录变更版本号，所有进程的目录写入都会递增"""
+    value = db.execute(
+        select(CatalogChangeSequence.last_value).where(CatalogChangeSequence.name == SEQUENCE_NAME)
+    ).scalar()
+    return value or 0
+
+
+class CatalogCacheKey(NamedTuple):
+    local_version: int  # 进程内目录版本
+    change_version: int  # 持久化目录变更版本
+    variant: Hashable  # 同一目录下的不同视图，例如计价日期
+
+
+class VersionedCatalogCache(Generic[T]):
+    """目录派生数据的进程内缓存
+
+    本进程提交目录写入后下一次读取立即重建；否则在 recheck_seconds 内直接返回内存中的对象，
+    超过后读取一次持久化变更版本，与缓存键不同（其他进程写入或数据库被恢复）时重建。
+    loader(db, key) 负责构建，key.variant 由调用方传入
+    """
+
+    def __init__(self, loader: Callable[[Session, CatalogCacheKey], T], recheck_seconds: float = CATALOG_RECHECK_SECONDS):
+        self._loader = loader
+        self.recheck_seconds = recheck_seconds
+        self._entry: Optional[Tuple[T, CatalogCacheKey, float]] = None
+        self._lock = threading.Lock()
+
+    def _fresh(self, entry, local_version: int, variant: Hashable) -> bool:
+        if entry is None:
+            return False
+        _, key, checked_at = entry
+        return (
+            key.local_version == local_version
+            and key.variant == variant
+            and time.monotonic() - checked_at < self.recheck_seconds
+        )
+
+    def get(self, db: Session, variant: Hashable = None) -> T:
+        entry = self._entry
+        local_version = catalog_version()
+        if self._fresh(entry, local_version, variant):
+            return entry[0]
+
+        with self._lock:
+            entry = self._entry
+            if self._fresh(entry, local_version, variant):
+                return entry[0]
+            # 先取版本号再读库：构建期间有写入提交时，下次复核会再次重建
+            key = CatalogCacheKey(local_version, current_change_version(db), variant)
+            if entry is not None and entry[1] == key:
+                value = entry[0]
+            else:
+                value = self._loader(db, key)
+            self._entry = (value, key, time.monotonic())
+            return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entry = None
+
+
+def card_config_dict(card: CardConfig) -> dict:
+    return {
+        "part_number": card.part_number,
+        "board_name": card.board_name,
+        "unit_price": card.unit_price,
+        "currency": card.currency,
+        "exchange_rate": card.exchange_rate,
+        "machine_id": card.machine_id,
+        "id": card.id,
+    }
+
+
+def machine_dict(machine: Machine) -> dict:
+    return {
+        "name": machine.name,
+        "description": machine.description,
+        "active": machine.active,
+        "manufacturer": machine.manufacturer,
+        "base_hourly_rate": machine.base_hourly_rate,
+        "discount_rate": machine.discount_rate,
+        "exchange_rate": machine.exchange_rate,
+        "currency": machine.currency,
+        "supplier_id": machine.supplier_id,
+        "id": machine.id,
+    }
+
+
+def _by_id(objects):
+    return sorted(objects, key=lambda obj: obj.id)
+
+
+def build_catalog_tree(db: Session) -> List[dict]:
+    """分层 selectinload 取回整棵目录树（每层一条查询），按ID排序保证输出稳定"""
+    machine_types = (
+        db.query(MachineType)
+        .options(
+            selectinload(MachineType.suppliers)
+            .selectinload(Supplier.machines)
+            .selectinload(Machine.card_configs)
+        )
+        .order_by(MachineType.id)
+        .all()
+    )
+    return [
+        {
+            "name": machine_type.name,
+            "description": machine_type.description,
+            "id": machine_type.id,
+            "suppliers": [
+                {
+                    "name": supplier.name,
+                    "machine_type_id": supplier.machine_type_id,
+                    "id": supplier.id,
+                    "machines": [
+                        dict(
+                            machine_dict(machine),
+                            card_configs=[card_config_dict(card) for card in _by_id(machine.card_configs)],
+                        )
+                        for machine in _by_id(supplier.machines)
+                    ],
+                }
+                for supplier in _by_id(machine_type.suppliers)
+            ],
+        }
+        for machine_type in machine_types
+    ]
+
+
+def _dump(data) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+# gzip 头：无文件名、mtime 为 0、操作系统未知
+GZIP_HEADER = b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff"
+
+
+def _raw_deflate(data: bytes, final: bool) -> bytes:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CatalogSnapshot(NamedTuple):
+    version: int
+    etag: str
+    body: bytes
+    gzip_body: bytes
+    fragments: List[bytes]  # 每个机器类型节点的序列化结果，用于分页切片
+    change_version: int  # 构建前读取的持久化目录变更版本号，可作为 /catalog/changes 的 since
+
+    def slice(self, skip: int, limit: int):
+        """返回 (ETag, 正文)；整棵树时直接返回预序列化的正文"""
+        if skip <= 0 and limit >= len(self.fragments):
+            return self.etag, self.body
+        body = b"[" + b",".join(self.fragments[skip:skip + limit]) + b"]"
+        return f'{self.etag[:-1]}-{skip}-{limit}"', body
+
+
+class CatalogSegment(NamedTuple):
+    """所有用户共用的预序列化目录片段，可原样拼接进更大的 JSON 响应"""
+    etag: str
+    body: bytes
+    deflate_body: bytes  # 正文的独立 deflate 段（同步刷新、非结束块）
+    change_version: int
+
+    def gzip_wrapped(self, prefix: bytes, suffix: bytes) -> bytes:
+        """返回 prefix + 正文 + suffix 的 gzip 字节
+
+        只压缩前后缀，正文直接拼接预先压缩好的 deflate 段：deflate 块可顺序拼接，
+        正文段不引用之前的数据；整体只需重新计算 CRC32
+        """
+        crc = zlib.crc32(suffix, zlib.crc32(self.body, zlib.crc32(prefix)))
+        size = len(prefix) + len(self.body) + len(suffix)
+        return b"".join((
+            GZIP_HEADER,
+            _raw_deflate(prefix, final=False),
+            self.deflate_body,
+            _raw_deflate(suffix, final=True),
+            struct.pack("<II", crc, size & 0xFFFFFFFF),
+        ))
+
+
+def catalog_segment(body: bytes, change_version: int) -> CatalogSegment:
+    return CatalogSegment(
+        etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+        body=body,
+        deflate_body=_raw_deflate(body, final=False),
+        change_version=change_version,
+    )
+
+
+def build_catalog_snapshot(db: Session, key: CatalogCacheKey) -> CatalogSnapshot:
+    fragments = [_dump(node) for node in build_catalog_tree(db)]
+    body = b"[" + b",".join(fragments) + b"]"
+    return CatalogSnapshot(
+        version=key.local_version,
+        etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+        body=body,
+        gzip_body=gzip.compress(body, mtime=0),
+        fragments=fragments,
+        change_version=key.change_version,
+    )
+
+
+catalog_snapshot_cache: VersionedCatalogCache[CatalogSnapshot] = VersionedCatalogCache(build_catalog_snapshot)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_catalog_writes(session, flush_context) -> None:
+    if any(isinstance(obj, CATALOG_MODELS) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info[_PENDING_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_after_catalog_commit(session) -> None:
+    if session.info.pop(_PENDING_KEY, False):
+        bump_catalog_version()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_catalog_writes(session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,101 @@
+"""
+目录变更版本与增量同步
+目录表每行带 change_version，经 ORM 写入目录表的每次 flush 从 catalog_change_sequence
+原子分配一个新版本号，写给本次新增/修改的行；删除的行写入 catalog_tombstones。
+客户端记住上次同步的版本号，只拉取之后新增/修改的行和被删除的行ID
+"""
+
+from typing import Dict, List
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ..models import CatalogChangeSequence, CatalogTombstone
+from .catalog_cache import CATALOG_MODELS, SEQUENCE_NAME, current_change_version
+CATALOG_TABLES = {model.__tablename__: model for model in CATALOG_MODELS}
+
+
+def next_change_version(connection) -> int:
+    """在当前事务内原子递增目录版本序列并返回新版本号，并发写入会在序列行上排队"""
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        upsert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = upsert(CatalogChangeSequence).values(name=SEQUENCE_NAME, last_value=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CatalogChangeSequence.name],
+            set_={"last_value": CatalogChangeSequence.last_value + 1},
+        ).returning(CatalogChangeSequence.last_value)
+        return connection.execute(stmt).scalar_one()
+
+    # 其他数据库：先原子递增，序列不存在时再插入首行
+    filters = CatalogChangeSequence.name == SEQUENCE_NAME
+    result = connection.execute(
+        update(CatalogChangeSequence).where(filters).values(last_value=CatalogChangeSequence.last_value + 1)
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(CatalogChangeSequence).values(name=SEQUENCE_NAME, last_value=1))
+        return 1
+    return connection.execute(select(CatalogChangeSequence.last_value).where(filters)).scalar_one()
+
+
+def catalog_row_dict(obj) -> Dict:
+    return {attr.key: getattr(obj, attr.key) for attr in obj.__mapper__.column_attrs}
+
+
+def catalog_changes(db: Session, since: int = 0) -> Dict:
+    """返回 since 之后的目录变化
+
+    since 为 0 或大于当前版本（例如数据库被恢复到旧备份）时返回全量数据并置 reset，
+    客户端应整体替换本地缓存；否则客户端先应用 deleted 再应用 upserted。
+    先读版本号再读数据：同一事务提交的序列与目录行要么都可见要么都不可见，
+    版本号之后才提交的行会在下一次同步中再次返回，按主键覆盖即可
+    """
+    version = current_change_version(db)
+    reset = since <= 0 or since > version
+
+    upserted: Dict[str, List[Dict]] = {}
+    for table_name, model in CATALOG_TABLES.items():
+        query = db.query(model)
+        if not reset:
+            query = query.filter(model.change_version > since)
+        upserted[table_name] = [catalog_row_dict(obj) for obj in query.order_by(model.id)]
+
+    deleted = {table_name: {} for table_name in CATALOG_TABLES}  # dict 去重并保持删除顺序
+    if not reset:
+        rows = db.execute(
+            select(CatalogTombstone.table_name, CatalogTombstone.row_id)
+            .where(CatalogTombstone.change_version > since)
+            .order_by(CatalogTombstone.change_version, CatalogTombstone.id)
+        )
+        for table_name, row_id in rows:
+            if table_name in deleted:
+                deleted[table_name][row_id] = None
+
+    return {
+        "version": version,
+        "since": since,
+        "reset": reset,
+        "upserted": upserted,
+        "deleted": {table_name: list(row_ids) for table_name, row_ids in deleted.items()},
+    }
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_catalog_changes(session, flush_context, instances) -> None:
+    changed = [obj for obj in session.new if isinstance(obj, CATALOG_MODELS)]
+    changed.extend(
+        obj for obj in session.dirty
+        if isinstance(obj, CATALOG_MODELS) and session.is_modified(obj, include_collections=False)
+    )
+    removed = [obj for obj in session.deleted if isinstance(obj, CATALOG_MODELS) and obj.id is not None]
+    if not changed and not removed:
+        return
+
+    version = next_change_version(session.connection())
+    for obj in changed:
+        obj.change_version = version
+    session.add_all(
+        CatalogTombstone(table_name=obj.__tablename__, row_id=obj.id, change_version=version)
+        for obj in removed
+    )
@@ -0,0 +1,72 @@
+"""
+集中汇率表
+外币兑人民币汇率按 (币种, 生效日期) 存一行，计价取不晚于计价日的最近一条；
+调整汇率只需写入一行，不再逐台修改机器和板卡上的汇率字段（这些字段仅在汇率表
+没有该币种时作为回退）。汇率表属于目录表，写入提交后目录版本递增，
+计价目录缓存随之重建
+"""
+
+from bisect import bisect_right
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models import ExchangeRate
+
+BASE_CURRENCIES = frozenset({"RMB", "CNY"})
+
+
+def normalize_currency(currency: Optional[str]) -> str:
+    return (currency or "RMB").strip().upper()
+
+
+class ExchangeRateTable:
+    """各币种按生效日期升序排列的汇率，按日期二分查找"""
+
+    def __init__(self, rates: Dict[str, Tuple[List[date], List[Decimal]]]):
+        self.rates = rates
+
+    @classmethod
+    def load(cls, db: Session) -> "ExchangeRateTable":
+        rates: Dict[str, Tuple[List[date], List[Decimal]]] = {}
+        rows = db.execute(
+            select(ExchangeRate.currency, ExchangeRate.effective_date, ExchangeRate.rate)
+            .order_by(ExchangeRate.currency, ExchangeRate.effective_date)
+        )
+        for currency, effective_date, rate in rows:
+            days, values = rates.setdefault(normalize_currency(currency), ([], []))
+            days.append(effective_date)
+            values.append(Decimal(str(rate)))
+        return cls(rates)
+
+    def rate_on(self, currency: Optional[str], day: date) -> Optional[Decimal]:
+        """返回 day 当天生效的汇率；人民币、汇率表中没有该币种或尚未生效时返回 None"""
+        entry = self.rates.get(normalize_currency(currency))
+        if entry is None:
+            return None
+        days, values = entry
+        index = bisect_right(days, day)
+        return values[index - 1] if index else None
+
+
+def set_exchange_rate(db: Session, currency: str, rate: float, effective_date: date) -> Tuple[ExchangeRate, Optional[float]]:
+    """写入（或覆盖同一生效日期的）汇率，返回 (汇率行, 该日期原先生效的汇率)；不提交"""
+    currency = normalize_currency(currency)
+    if currency in BASE_CURRENCIES:
+        raise ValueError("人民币无需设置汇率")
+    if rate is None or rate <= 0:
+        raise ValueError("汇率必须大于0")
+
+    previous = ExchangeRateTable.load(db).rate_on(currency, effective_date)
+    row = db.execute(
+        select(ExchangeRate).where(ExchangeRate.currency == currency, ExchangeRate.effective_date == effective_date)
+    ).scalar_one_or_none()
+    if row is None:
+        row = ExchangeRate(currency=currency, effective_date=effective_date, rate=rate)
+        db.add(row)
+    else:
+        row.rate = rate
+    return row, float(previous) if previous is not None else None
@@ -6,8 +6,9 @@
 
 import io
 import os
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator
 from datetime import datetime
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from fastapi.responses import StreamingResponse
@@ -24,16 +25,11 @@ try:
 except ImportError:
     REPORTLAB_AVAILABLE = False
 
-try:
-    import pandas as pd
-    import openpyxl
-    from openpyxl.styles import Font, Alignment, PatternFill
-    PANDAS_AVAILABLE = True
-except ImportError:
-    PANDAS_AVAILABLE = False
-
-from ..models import Quote
+from ..models import Quote, QuoteItem
 from ..schemas import Quote as QuoteSchema
+from .xlsx_stream_export import OPENPYXL_AVAILABLE, StreamingXlsxWriter
+
+EXPORT_CHUNK_SIZE = 1000
 
 
 class ExportService:
@@ -224,188 +220,162 @@ class ExportService:
         )
 
     def export_quote_excel(self, quote_id: int) -> StreamingResponse:
-        """导出报价单为Excel格式"""
-        if not PANDAS_AVAILABLE:
+        """导出报价单为Excel格式（write-only 模式，明细分块读取）"""
+        if not OPENPYXL_AVAILABLE:
             raise HTTPException(
                 status_code=500,
-                detail="Excel导出功能不可用，请安装pandas和openpyxl库: pip install pandas openpyxl"
+                detail="Excel导出功能不可用，请安装openpyxl库: pip install openpyxl"
             )
 
         quote = self.db.query(Quote).filter(Quote.id == quote_id, Quote.is_deleted == False).first()
         if not quote:
             raise HTTPException(status_code=404, detail="报价单不存在")
 
-        # 创建Excel缓冲区
-        buffer = io.BytesIO()
-        
-        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-            # 基本信息工作表
-            basic_data = {
-                '项目': [
-                    '报价单号', '标题', '客户名称', '报价类型', 
-                    '联系人', '联系电话', '邮箱', '地址',
-                    '创建时间', '状态', '币种'
-                ],
-                '内容': [
-                    quote.quote_number,
-                    quote.title,
-                    quote.customer_name,
-                    self._get_quote_type_display(quote.quote_type),
-                    quote.customer_contact or '',
-                    quote.customer_phone or '',
-                    quote.customer_email or '',
-                    quote.customer_address or '',
-                    quote.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                    self._get_status_display(quote.status),
-                    quote.currency
-                ]
-            }
-            
-            basic_df = pd.DataFrame(basic_data)
-            basic_df.to_excel(writer, sheet_name='基本信息', index=False)
-            
-            # 报价明细工作表
-            if quote.items:
-                items_data = []
-                for i, item in enumerate(quote.items, 1):
-                    display_unit_price = item.adjusted_price if item.adjusted_price is not None else item.unit_price
-                    items_data.append({
-                        '序号': i,
-                        '项目名称': item.item_name,
-                        '项目描述': item.item_description or '',
-                        '设备类型': item.machine_type or '',
-                        '供应商': item.supplier or '',
-                        '设备型号': item.machine_model or '',
-                        '配置': item.configuration or '',
-                        '数量': item.quantity,
-                        '单位': item.unit,
-                        '单价': display_unit_price,
-                        '小计': item.total_price
-                    })
-                
-                items_df = pd.DataFrame(items_data)
-                items_df.to_excel(writer, sheet_name='报价明细', index=False)
-            
-            # 金额汇总工作表
-            amount_data = {
-                '项目': ['小计', '折扣', '税率(%)', '税额', '总金额'],
-                '金额': [
-                    quote.subtotal,
-                    quote.discount,
-                    quote.tax_rate * 100,
-                    quote.tax_amount,
-                    quote.total_amount
-                ]
-            }
-            
-            amount_df = pd.DataFrame(amount_data)
-            amount_df.to_excel(writer, sheet_name='金额汇总', index=False)
-            
-            # 格式化工作表
-            workbook = writer.book
-            
-            # 设置基本信息表格式
-            basic_sheet = workbook['基本信息']
-            basic_sheet.column_dimensions['A'].width = 15
-            basic_sheet.column_dimensions['B'].width = 30
-            
-            # 设置明细表格式
-            if quote.items:
-                items_sheet = workbook['报价明细']
-                for col in items_sheet.columns:
-                    max_length = 0
-                    column = col[0].column_letter
-                    for cell in col:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    adjusted_width = min(max_length + 2, 20)
-                    items_sheet.column_dimensions[column].width = adjusted_width
-            
-            # 设置金额汇总表格式
-            amount_sheet = workbook['金额汇总']
-            amount_sheet.column_dimensions['A'].width = 15
-            amount_sheet.column_dimensions['B'].width = 15
+        writer = StreamingXlsxWriter()
 
-        buffer.seek(0)
-        
-        # 返回Excel响应
-        return StreamingResponse(
-            io.BytesIO(buffer.read()),
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename=quote_{quote.quote_number}.xlsx"}
+        # 基本信息工作表
+        writer.add_sheet(
+            '基本信息',
+            ['项目', '内容'],
+            [
+                ['报价单号', quote.quote_number],
+                ['标题', quote.title],
+                ['客户名称', quote.customer_name],
+                ['报价类型', self._get_quote_type_display(quote.quote_type)],
+                ['联系人', quote.customer_contact or ''],
+                ['联系电话', quote.customer_phone or ''],
+                ['邮箱', quote.customer_email or ''],
+                ['地址', quote.customer_address or ''],
+                ['创建时间', quote.created_at.strftime('%Y-%m-%d %H:%M:%S')],
+                ['状态', self._get_status_display(quote.status)],
+                ['币种', quote.currency],
+            ],
+            widths=[15, 30],
+        )
+
+        # 报价明细工作表
+        writer.add_sheet(
+            '报价明细',
+            ['序号', '项目名称', '项目描述', '设备类型', '供应商', '设备型号', '配置', '数量', '单位', '单价', '小计'],
+            self._iter_item_rows(quote.id),
+            max_width=20,
+            skip_if_empty=True,
         )
 
+        # 金额汇总工作表
+        writer.add_sheet(
+            '金额汇总',
+            ['项目', '金额'],
+            [
+                ['小计', quote.subtotal],
+                ['折扣', quote.discount],
+                ['税率(%)', quote.tax_rate * 100],
+                ['税额', quote.tax_amount],
+                ['总金额', quote.total_amount],
+            ],
+            widths=[15, 15],
+        )
+
+        return writer.to_response(f"quote_{quote.quote_number}.xlsx")
+
     def export_quotes_summary_excel(self, quote_ids: list = None, status: str = None) -> StreamingResponse:
-        """导出报价单汇总表"""
-        if not PANDAS_AVAILABLE:
+        """导出报价单汇总表（write-only 模式，报价单分块读取）"""
+        if not OPENPYXL_AVAILABLE:
             raise HTTPException(
                 status_code=500,
-                detail="Excel导出功能不可用，请安装pandas和openpyxl库"
+                detail="Excel导出功能不可用，请安装openpyxl库"
             )
 
-        # 构建查询条件
-        query = self.db.query(Quote)
-        
-        if quote_ids:
-            query = query.filter(Quote.id.in_(quote_ids))
-        elif status:
-            query = query.filter(Quote.status == status)
-        
-        quotes = query.order_by(Quote.created_at.desc()).all()
-        
-        if not quotes:
+        writer = StreamingXlsxWriter()
+        written = writer.add_sheet(
+            '报价单汇总',
+            ['报价单号', '标题', '客户名称', '报价类型', '状态', '总金额', '币种', '创建时间', '提交时间', '审批时间'],
+            self._iter_summary_rows(quote_ids, status),
+            max_width=25,
+            skip_if_empty=True,
+        )
+        if not written:
             raise HTTPException(status_code=404, detail="没有找到符合条件的报价单")
 
-        # 准备数据
-        summary_data = []
-        for quote in quotes:
-            summary_data.append({
-                '报价单号': quote.quote_number,
-                '标题': quote.title,
-                '客户名称': quote.customer_name,
-                '报价类型': self._get_quote_type_display(quote.quote_type),
-                '状态': self._get_status_display(quote.status),
-                '总金额': quote.total_amount,
-                '币种': quote.currency,
-                '创建时间': quote.created_at.strftime('%Y-%m-%d'),
-                '提交时间': quote.submitted_at.strftime('%Y-%m-%d') if quote.submitted_at else '',
-                '审批时间': quote.approved_at.strftime('%Y-%m-%d') if quote.approved_at else ''
-            })
+        return writer.to_response(f"quotes_summary_{datetime.now().strftime('%Y%m%d')}.xlsx")
 
-        # 创建Excel
-        buffer = io.BytesIO()
-        df = pd.DataFrame(summary_data)
-        
-        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='报价单汇总', index=False)
-            
-            # 格式化
-            workbook = writer.book
-            sheet = workbook['报价单汇总']
-            
-            # 自动调整列宽
-            for col in sheet.columns:
-                max_length = 0
-                column = col[0].column_letter
-                for cell in col:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 25)
-                sheet.column_dimensions[column].width = adjusted_width
+    def _iter_item_rows(self, quote_id: int) -> Iterator[list]:
+        """分块读取报价明细并转换为Excel行"""
+        result = self.db.execute(
+            select(
+                QuoteItem.item_name,
+                QuoteItem.item_description,
+                QuoteItem.machine_type,
+                QuoteItem.supplier,
+                QuoteItem.machine_model,
+                QuoteItem.configuration,
+                QuoteItem.quantity,
+                QuoteItem.unit,
+                QuoteItem.unit_price,
+                QuoteItem.adjusted_price,
+                QuoteItem.total_price,
+            )
+            .where(QuoteItem.quote_id == quote_id)
+            .order_by(QuoteItem.id)
+            .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+        )
+        try:
+            for index, item in enumerate(result, 1):
+                display_unit_price = item.adjusted_price if item.adjusted_price is not None else item.unit_price
+                yield [
+                    index,
+                    item.item_name,
+                    item.item_description or '',
+                    item.machine_type or '',
+                    item.supplier or '',
+                    item.machine_model or '',
+                    item.configuration or '',
+                    item.quantity,
+                    item.unit,
+                    display_unit_price,
+                    item.total_price,
+                ]
+        finally:
+            result.close()
 
-        buffer.seek(0)
-        
-        return StreamingResponse(
-            io.BytesIO(buffer.read()),
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename=quotes_summary_{datetime.now().strftime('%Y%m%d')}.xlsx"}
+    def _iter_summary_rows(self, quote_ids: list = None, status: str = None) -> Iterator[list]:
+        """分块读取报价单汇总列并转换为Excel行"""
+        stmt = select(
+            Quote.quote_number,
+            Quote.title,
+            Quote.customer_name,
+            Quote.quote_type,
+            Quote.status,
+            Quote.total_amount,
+            Quote.currency,
+            Quote.created_at,
+            Quote.submitted_at,
+            Quote.approved_at,
         )
+        if quote_ids:
+            stmt = stmt.where(Quote.id.in_(quote_ids))
+        elif status:
+            stmt = stmt.where(Quote.status == status)
+
+        result = self.db.execute(
+            stmt.order_by(Quote.created_at.desc()).execution_options(yield_per=EXPORT_CHUNK_SIZE)
+        )
+        try:
+            for quote in result:
+                yield [
+                    quote.quote_number,
+                    quote.title,
+                    quote.customer_name,
+                    self._get_quote_type_display(quote.quote_type),
+                    self._get_status_display(quote.status),
+                    quote.total_amount,
+                    quote.currency,
+                    quote.created_at.strftime('%Y-%m-%d'),
+                    quote.submitted_at.strftime('%Y-%m-%d') if quote.submitted_at else '',
+                    quote.approved_at.strftime('%Y-%m-%d') if quote.approved_at else '',
+                ]
+        finally:
+            result.close()
 
     def _get_quote_type_display(self, quote_type: str) -> str:
         """获取报价类型显示名称"""
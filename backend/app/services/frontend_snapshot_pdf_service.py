@@ -308,7 +308,10 @@ class FrontendSnapshotPDFService:
         return path if path.exists() else None
 
     def build_public_url_from_cache(self, cache: QuotePDFCache) -> str:
-        path = Path(cache.pdf_path)
+        return self.build_public_url_from_path(cache.pdf_path)
+
+    def build_public_url_from_path(self, pdf_path: str) -> str:
+        path = Path(pdf_path)
         if path.is_absolute():
             try:
                 relative = path.relative_to(Path("media"))
@@ -0,0 +1,212 @@
+"""
+机器与供应商名称搜索索引
+名称统一规范化（全角转半角、忽略大小写、去掉空格和连字符等符号）后建立前缀树和二元组倒排表：
+完全匹配、前缀匹配（整名或名称中任一单词）、包含匹配依次排序，其余按二元组 Dice 相似度
+给出模糊结果，查询只访问命中的条目，不扫描全部名称。
+索引由 catalog_cache 中的 VersionedCatalogCache 缓存在进程内，目录变化后下一次查询时重建
+"""
+
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Generic, Iterable, List, Optional, Set, Tuple, TypeVar
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+
+from ..models import Machine, Supplier
+from .catalog_cache import VersionedCatalogCache
+
+FUZZY_MIN_SIMILARITY = 0.4
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+T = TypeVar("T")
+
+
+def normalize_name(text: Optional[str]) -> str:
+    """ETS-88、ets 88、ＥＴＳ８８ 规范化后均为 ets88"""
+    return "".join(TOKEN_PATTERN.findall(unicodedata.normalize("NFKC", text or "").casefold()))
+
+
+def name_tokens(text: Optional[str]) -> List[str]:
+    return TOKEN_PATTERN.findall(unicodedata.normalize("NFKC", text or "").casefold())
+
+
+def bigrams(key: str) -> Set[str]:
+    return {key[index:index + 2] for index in range(len(key) - 1)}
+
+
+@dataclass(frozen=True)
+class MachineRecord:
+    """机器人回复所需的机器信息"""
+    id: int
+    name: str
+    supplier_name: Optional[str]
+    machine_type_name: Optional[str]
+    base_hourly_rate: Optional[float]
+    currency: Optional[str]
+    discount_rate: Optional[float]
+    exchange_rate: Optional[float]
+    active: Optional[bool]
+    description: Optional[str]
+
+
+@dataclass(frozen=True)
+class SupplierRecord:
+    id: int
+    name: str
+    machine_type_name: Optional[str]
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.ids: Set[int] = set()
+
+
+class PrefixTrie:
+    """前缀树，每个节点保存经过该节点的条目序号，前缀查询只需走 len(prefix) 步"""
+
+    def __init__(self):
+        self._root = _TrieNode()
+
+    def insert(self, key: str, entry_id: int) -> None:
+        node = self._root
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+            node.ids.add(entry_id)
+
+    def prefixed(self, prefix: str) -> Set[int]:
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return set()
+        return node.ids
+
+
+class NameIndex(Generic[T]):
+    """按名称检索记录的索引"""
+
+    def __init__(self, entries: Iterable[Tuple[str, T]]):
+        self.records: List[T] = []
+        self.keys: List[str] = []
+        self._bigram_counts: List[int] = []
+        self._exact: Dict[str, List[int]] = {}
+        self._trie = PrefixTrie()
+        self._chars: Dict[str, Set[int]] = {}
+        self._bigrams: Dict[str, Set[int]] = {}
+
+        for entry_id, (name, record) in enumerate(entries):
+            key = normalize_name(name)
+            grams = bigrams(key)
+            self.records.append(record)
+            self.keys.append(key)
+            self._bigram_counts.append(len(grams))
+            self._exact.setdefault(key, []).append(entry_id)
+            self._trie.insert(key, entry_id)
+            for token in name_tokens(name)[1:]:
+                self._trie.insert(token, entry_id)
+            for char in set(key):
+                self._chars.setdefault(char, set()).add(entry_id)
+            for gram in grams:
+                self._bigrams.setdefault(gram, set()).add(entry_id)
+
+    def lookup(self, name: str) -> Optional[T]:
+        """规范化后完全相同的第一条记录"""
+        entry_ids = self._exact.get(normalize_name(name))
+        return self.records[entry_ids[0]] if entry_ids else None
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[T]:
+        """按 完全匹配 → 前缀匹配 → 包含匹配 → 模糊匹配 排序，同级按相似度、名称长度、名称排序"""
+        key = normalize_name(query)
+        if not key:
+            return []
+
+        query_grams = bigrams(key)
+        shared = Counter(entry_id for gram in query_grams for entry_id in self._bigrams.get(gram, ()))
+        prefixed = self._trie.prefixed(key)
+        if query_grams:
+            # 包含查询的名称必然包含查询的全部二元组
+            contains = set.intersection(*(self._bigrams.get(gram, set()) for gram in query_grams))
+        else:
+            contains = self._chars.get(key, set())
+
+        ranked = []
+        for entry_id in prefixed | contains | shared.keys():
+            name_key = self.keys[entry_id]
+            grams = len(query_grams) + self._bigram_counts[entry_id]
+            similarity = 2 * shared[entry_id] / grams if grams else 0.0
+            if name_key == key:
+                tier = 0
+            elif entry_id in prefixed:
+                tier = 1
+            elif key in name_key:
+                tier = 2
+            elif similarity >= FUZZY_MIN_SIMILARITY:
+                tier = 3
+            else:
+                continue
+            ranked.append((tier, -similarity, len(name_key), name_key, entry_id))
+
+        ranked.sort()
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [self.records[entry[-1]] for entry in ranked]
+
+
+class CatalogSearchIndex:
+    """某一目录版本下的机器和供应商搜索索引"""
+
+    def __init__(self, version: int, machines: List[MachineRecord], suppliers: List[SupplierRecord]):
+        self.version = version
+        self.machines = NameIndex((machine.name, machine) for machine in machines)
+        self.suppliers = NameIndex((supplier.name, supplier) for supplier in suppliers)
+        self.supplier_list = suppliers
+
+    @classmethod
+    def load(cls, db: Session, version: int) -> "CatalogSearchIndex":
+        machines = db.execute(
+            select(Machine)
+            .options(selectinload(Machine.supplier).selectinload(Supplier.machine_type))
+            .order_by(Machine.id)
+        ).scalars()
+        machine_records = [
+            MachineRecord(
+                id=machine.id,
+                name=machine.name or "",
+                supplier_name=machine.supplier.name if machine.supplier else None,
+                machine_type_name=(
+                    machine.supplier.machine_type.name
+                    if machine.supplier and machine.supplier.machine_type else None
+                ),
+                base_hourly_rate=machine.base_hourly_rate,
+                currency=machine.currency,
+                discount_rate=machine.discount_rate,
+                exchange_rate=machine.exchange_rate,
+                active=machine.active,
+                description=machine.description,
+            )
+            for machine in machines
+        ]
+
+        suppliers = db.execute(
+            select(Supplier).options(selectinload(Supplier.machine_type)).order_by(Supplier.id)
+        ).scalars()
+        supplier_records = [
+            SupplierRecord(
+                id=supplier.id,
+                name=supplier.name or "",
+                machine_type_name=supplier.machine_type.name if supplier.machine_type else None,
+            )
+            for supplier in suppliers
+        ]
+        return cls(version, machine_records, supplier_records)
+
+
+catalog_search_cache: VersionedCatalogCache[CatalogSearchIndex] = VersionedCatalogCache(
+    lambda db, key: CatalogSearchIndex.load(db, key.change_version)
+)
@@ -0,0 +1,97 @@
+"""
+报价金额定点计算引擎
+把数量、单价、折扣、税率转换为按 10 的幂缩放的 int64 数组，一次性计算整单明细金额、
+折扣截断、税额和总额，四舍五入规则与 Decimal ROUND_HALF_UP 逐分一致。
+
+浮点输入只有在能被精确还原为不超过 MAX_PLACES 位小数的十进制数时才走定点路径，
+此时缩放后的整数与 Decimal(str(value)) 完全相等；含非数值、负数、超出范围或
+乘积可能溢出时返回 None，由调用方回退到 Decimal 逐行计算并给出原有的错误信息
+"""
+
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+MAX_PLACES = 6
+# 该量级以下 float64 相邻值间距小于 10^-MAX_PLACES，至多一个 MAX_PLACES 位小数落在同一舍入区间
+MAX_MAGNITUDE = 1e9
+INT64_LIMIT = 2 ** 63 - 1
+RATE_PLACES = 4  # 税率保留四位小数
+
+
+def as_amounts(values: Iterable) -> Optional[np.ndarray]:
+    """数值列表转 float64 数组，None 视为 0；含非 int/float 值（字符串、布尔等）或负数时返回 None"""
+    values = [0 if value is None else value for value in values]
+    if any(type(value) is not float and type(value) is not int for value in values):
+        return None
+    array = np.asarray(values, dtype=np.float64)
+    if array.size and not (np.all(np.isfinite(array)) and array.min() >= 0 and array.max() < MAX_MAGNITUDE):
+        return None
+    return array
+
+
+def to_scaled(array: np.ndarray) -> Optional[Tuple[np.ndarray, int]]:
+    """返回 (缩放后的 int64 数组, 小数位数)，使 scaled / 10**places 与 Decimal(str(value)) 逐个相等"""
+    for places in range(MAX_PLACES + 1):
+        scale = 10.0 ** places
+        scaled = np.rint(array * scale)
+        if np.array_equal(scaled / scale, array):
+            return scaled.astype(np.int64), places
+    return None
+
+
+def rescale(values: np.ndarray, places: int, target_places: int) -> np.ndarray:
+    """把 places 位小数的非负定点数按 ROUND_HALF_UP 调整为 target_places 位"""
+    if places <= target_places:
+        return values * 10 ** (target_places - places)
+    divisor = 10 ** (places - target_places)
+    return (values + divisor // 2) // divisor
+
+
+def _fits(*factors: np.ndarray) -> bool:
+    product = 1
+    for factor in factors:
+        product *= int(factor.max()) if factor.size else 0
+    return product <= INT64_LIMIT // 2
+
+
+def line_totals_cents(quantities: np.ndarray, prices: np.ndarray) -> Optional[np.ndarray]:
+    """逐行 数量 × 单价 四舍五入到分，返回以分为单位的 int64 数组"""
+    scaled_quantities = to_scaled(quantities)
+    scaled_prices = to_scaled(prices)
+    if scaled_quantities is None or scaled_prices is None:
+        return None
+    (quantity_values, quantity_places), (price_values, price_places) = scaled_quantities, scaled_prices
+    if not _fits(quantity_values, price_values):
+        return None
+    return rescale(quantity_values * price_values, quantity_places + price_places, 2)
+
+
+def totals_cents(subtotal_cents, discounts: np.ndarray, tax_rates: np.ndarray) -> Optional[Dict[str, np.ndarray]]:
+    """按场景向量化计算折扣（不超过小计）、税额和总额
+
+    discounts / tax_rates 应来自 as_amounts（已排除负数和非数值）；subtotal_cents 可为标量或与场景
+    等长的数组。返回各金额以分为单位、税率以万分之一为单位的数组；税率大于 1 时返回 None
+    """
+    subtotal_cents = np.broadcast_to(np.asarray(subtotal_cents, dtype=np.int64), discounts.shape)
+    scaled_discounts = to_scaled(discounts)
+    scaled_rates = to_scaled(tax_rates)
+    if scaled_discounts is None or scaled_rates is None or (tax_rates.size and tax_rates.max() > 1):
+        return None
+
+    discount_values, discount_places = scaled_discounts
+    places = max(discount_places, 2)
+    subtotal_scaled = rescale(subtotal_cents, 2, places)
+    discount_scaled = np.minimum(rescale(discount_values, discount_places, places), subtotal_scaled)
+    discount = rescale(discount_scaled, places, 2)
+
+    rate = rescale(*scaled_rates, RATE_PLACES)
+    taxable = subtotal_cents - discount
+    tax = rescale(taxable * rate, 2 + RATE_PLACES, 2)
+    return {
+        "subtotal": subtotal_cents,
+        "discount": discount,
+        "tax_rate": rate,
+        "tax_amount": tax,
+        "total_amount": taxable + tax,
+    }
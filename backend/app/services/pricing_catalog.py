@@ -0,0 +1,211 @@
+"""
+报价计价目录缓存
+计价所需的机器费率、配置附加费率和板卡单价在进程内保存为不可变记录，
+所有数值在构建时一次性转换为 Decimal，USD 板卡单价按汇率预先折算。
+汇率优先取汇率表（见 exchange_rates）中计价日生效的汇率，没有时回退到机器/板卡上的汇率。
+目录变化（见 catalog_cache 中的 VersionedCatalogCache）或跨日后下一次计价时整体重建，否则计价不访问数据库
+"""
+
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models import CardConfig, Configuration, Machine
+from .catalog_cache import VersionedCatalogCache
+from .exchange_rates import ExchangeRateTable
+
+CENT = Decimal("0.01")
+
+
+def to_decimal(value, field_name: str) -> Decimal:
+    if value is None:
+        value = 0
+    try:
+        return Decimal(str(value))
+    except (InvalidOperation, TypeError):
+        raise ValueError(f"Invalid numeric value for {field_name}: {value}")
+
+
+@dataclass(frozen=True)
+class MachinePricing:
+    """单台机器的计价记录，(ID, 费率) 按ID排序"""
+    machine_id: int
+    currency: str
+    hourly_rate: Decimal  # 基础小时费率 × 折扣率
+    exchange_rate: Decimal
+    configurations: Tuple[Tuple[int, Decimal], ...]
+    card_prices: Tuple[Tuple[int, Decimal], ...]  # 已按板卡汇率折算的板卡单价
+    all_configurations: Decimal  # 未指定配置时的附加费率合计
+    all_cards: Decimal  # 未指定板卡时的板卡单价合计
+
+    def hourly_total(self, details: Optional[dict]) -> Decimal:
+        """按请求明细计算每小时费用（USD 机器已乘汇率）"""
+        details = details or {}
+        hourly_total = self.hourly_rate
+
+        selected_config_ids = set(details.get('configuration_ids', []) or [])
+        if selected_config_ids:
+            hourly_total += sum((rate for config_id, rate in self.configurations if config_id in selected_config_ids), Decimal(0))
+        else:
+            hourly_total += self.all_configurations
+
+        selected_card_ids = set(details.get('card_config_ids', []) or [])
+        if selected_card_ids:
+            hourly_total += sum((price for card_id, price in self.card_prices if card_id in selected_card_ids), Decimal(0))
+        else:
+            hourly_total += self.all_cards
+
+        for extra in details.get('auxiliary_rates', []) or []:
+            hourly_total += to_decimal(extra, "auxiliary_rate")
+
+        hourly_total += to_decimal(details.get('extra_flat_fee') or 0, "extra_flat_fee")
+
+        if self.currency == 'USD':
+            exchange_override = details.get('exchange_rate_override') or details.get('exchange_rate')
+            if exchange_override:
+                hourly_total *= to_decimal(exchange_override, "exchange_rate_override")
+            else:
+                hourly_total *= self.exchange_rate
+        return hourly_total
+
+
+def total_for_hours(hourly_total: Decimal, test_hours) -> float:
+    test_hours = to_decimal(test_hours or 0, "test_hours")
+    if test_hours < 0:
+        raise ValueError("Test hours cannot be negative")
+    return float((hourly_total * test_hours).quantize(CENT, rounding=ROUND_HALF_UP))
+
+
+def _machine_pricing(machine, configurations: Iterable, cards: Iterable, rates: ExchangeRateTable, day: date) -> MachinePricing:
+    machine_currency = (machine.currency or 'RMB').upper()
+    exchange_default = rates.rate_on(machine_currency, day) or to_decimal(machine.exchange_rate or 1, "exchange_rate")
+
+    config_rates = tuple(
+        (config.id, to_decimal(config.additional_rate or 0, f"configuration[{config.id}].additional_rate"))
+        for config in configurations
+    )
+    card_prices = []
+    for card in cards:
+        card_price = to_decimal(card.unit_price or 0, f"card[{card.id}].unit_price")
+        card_currency = (card.currency or machine_currency).upper()
+        if card_currency == 'USD':
+            card_rate = rates.rate_on(card_currency, day)
+            if card_rate is None:
+                card_rate = to_decimal(card.exchange_rate or exchange_default, f"card[{card.id}].exchange_rate")
+            card_price *= card_rate
+        card_prices.append((card.id, card_price))
+
+    return MachinePricing(
+        machine_id=machine.id,
+        currency=machine_currency,
+        hourly_rate=(
+            to_decimal(machine.base_hourly_rate or 0, "base_hourly_rate")
+            * to_decimal(machine.discount_rate or 1, "discount_rate")
+        ),
+        exchange_rate=exchange_default,
+        configurations=config_rates,
+        card_prices=tuple(card_prices),
+        all_configurations=sum((rate for _, rate in config_rates), Decimal(0)),
+        all_cards=sum((price for _, price in card_prices), Decimal(0)),
+    )
+
+
+class PricingCatalog:
+    """某一目录版本、某一计价日下全部机器的计价记录"""
+
+    def __init__(self, version: int, machines: Dict[int, MachinePricing], day: Optional[date] = None):
+        self.version = version
+        self.machines = machines
+        self.day = day
+
+    @classmethod
+    def load(cls, db: Session, version: int, day: Optional[date] = None) -> "PricingCatalog":
+        """按表各查询一次构建计价目录，day 为汇率生效的计价日，默认当天"""
+        day = day or date.today()
+        rates = ExchangeRateTable.load(db)
+        configurations, cards = {}, {}
+        for config in db.execute(select(Configuration).order_by(Configuration.id)).scalars():
+            configurations.setdefault(config.machine_id, []).append(config)
+        for card in db.execute(select(CardConfig).order_by(CardConfig.id)).scalars():
+            cards.setdefault(card.machine_id, []).append(card)
+
+        machines = {
+            machine.id: _machine_pricing(
+                machine, configurations.get(machine.id, ()), cards.get(machine.id, ()), rates, day
+            )
+            for machine in db.execute(select(Machine)).scalars()
+        }
+        return cls(version, machines, day)
+
+    def machine(self, machine_id: int) -> MachinePricing:
+        pricing = self.machines.get(machine_id)
+        if pricing is None:
+            raise ValueError("Machine not found")
+        return pricing
+
+    def price(self, machine_id: int, test_hours, details: Optional[dict] = None) -> float:
+        return total_for_hours(self.machine(machine_id).hourly_total(details), test_hours)
+
+    def price_many(self, requests: Iterable[Tuple[int, object, Optional[dict]]]) -> List[Tuple[Optional[float], Optional[str]]]:
+        """批量计价，按请求顺序返回 (金额, 错误信息)
+
+        每小时费用只取决于机器和明细，相同 (机器, 配置集合, 板卡集合, 附加费用) 的方案只计算一次，
+        再分别乘以各自的测试小时数，结果与逐个调用 price 完全一致；单个方案出错不影响其他方案
+        """
+        hourly_totals: Dict[Hashable, Decimal] = {}
+        results = []
+        for machine_id, test_hours, details in requests:
+            try:
+                key = _hourly_key(machine_id, details)
+                hourly = hourly_totals.get(key) if key is not None else None
+                if hourly is None:
+                    hourly = self.machine(machine_id).hourly_total(details)
+                    if key is not None:
+                        hourly_totals[key] = hourly
+                results.append((total_for_hours(hourly, test_hours), None))
+            except (ValueError, TypeError) as exc:
+                results.append((None, str(exc)))
+            except ArithmeticError:
+                # 例如测试小时数过大，金额超出 Decimal 精度无法舍入到分
+                results.append((None, "Numeric value out of range"))
+        return results
+
+
+def _typed(value) -> Tuple[type, object]:
+    # 1、1.0、True 哈希相同但转换为 Decimal 的结果不同（True 会报错），需连同类型区分
+    return type(value), value
+
+
+def _hourly_key(machine_id: int, details: Optional[dict]) -> Optional[Hashable]:
+    """每小时费用的去重键；明细含不可哈希的值时返回 None，该方案单独计算"""
+    details = details or {}
+    try:
+        key = (
+            machine_id,
+            frozenset(details.get('configuration_ids', []) or ()),
+            frozenset(details.get('card_config_ids', []) or ()),
+            tuple(_typed(value) for value in details.get('auxiliary_rates', []) or ()),
+            _typed(details.get('extra_flat_fee') or 0),
+            _typed(details.get('exchange_rate_override') or details.get('exchange_rate')),
+        )
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+class PricingCatalogCache(VersionedCatalogCache[PricingCatalog]):
+    """进程内计价目录缓存，计价日作为缓存变体：跨日（新汇率生效）后下一次读取时重建"""
+
+    def __init__(self):
+        super().__init__(lambda db, key: PricingCatalog.load(db, key.change_version, key.variant))
+
+    def get(self, db: Session, day: Optional[date] = None) -> PricingCatalog:
+        return super().get(db, day or date.today())
+
+
+pricing_catalog_cache = PricingCatalogCache()
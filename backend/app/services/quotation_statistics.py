@@ -0,0 +1,156 @@
+"""
+报价统计查询
+所有聚合都在数据库中完成：按状态、创建人、日/周/月时间桶 GROUP BY，
+时间范围通过绑定参数传入，接口只接收少量聚合行而不是整张报价表
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.orm import Session
+
+from ..models import Quotation, User
+
+PERIOD_DAYS = {
+    "week": 7,
+    "month": 30,
+    "quarter": 90,
+    "year": 365,
+}
+
+TIME_BUCKETS = ("day", "week", "month")
+
+
+def resolve_period_range(
+    period: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    now: Optional[datetime] = None,
+) -> Tuple[datetime, Optional[datetime]]:
+    """解析统计时间范围，返回 [start, end) 区间；显式日期的结束日包含当天"""
+    if start_date and end_date:
+        try:
+            start = datetime.strptime(start_date, "%Y-%m-%d")
+            end = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)
+        except ValueError:
+            raise ValueError("日期格式应为 YYYY-MM-DD")
+        return start, end
+
+    now = now or datetime.now()
+    return now - timedelta(days=PERIOD_DAYS.get(period, PERIOD_DAYS["month"])), None
+
+
+def quotation_filters(
+    start: datetime,
+    end: Optional[datetime] = None,
+    created_by: Optional[int] = None,
+) -> List:
+    """构建报价统计通用过滤条件"""
+    filters = [Quotation.created_at >= start]
+    if end is not None:
+        filters.append(Quotation.created_at < end)
+    if created_by is not None:
+        filters.append(Quotation.created_by == created_by)
+    return filters
+
+
+def status_summary(db: Session, filters: Sequence = ()) -> Dict:
+    """按状态分组统计数量与金额，一条 GROUP BY 查询"""
+    stmt = select(
+        Quotation.status,
+        func.count(Quotation.id).label("count"),
+        func.coalesce(func.sum(Quotation.total), 0).label("amount"),
+    ).group_by(Quotation.status)
+    if filters:
+        stmt = stmt.where(and_(*filters))
+
+    by_status = {}
+    total_count = 0
+    total_amount = 0.0
+    for status, count, amount in db.execute(stmt):
+        by_status[status] = {"count": count, "amount": float(amount or 0)}
+        total_count += count
+        total_amount += float(amount or 0)
+
+    return {
+        "total_count": total_count,
+        "total_amount": total_amount,
+        "by_status": by_status,
+    }
+
+
+def status_count(summary: Dict, status: str) -> int:
+    return summary["by_status"].get(status, {}).get("count", 0)
+
+
+def creator_summary(db: Session, filters: Sequence = ()) -> List:
+    """按创建人分组统计报价数量、批准数量和金额；没有报价的用户也会返回"""
+    join_condition = and_(User.id == Quotation.created_by, *filters)
+    stmt = (
+        select(
+            User.id,
+            User.name,
+            func.count(Quotation.id).label("quotation_count"),
+            func.coalesce(func.sum(case((Quotation.status == "approved", 1), else_=0)), 0).label("approved_count"),
+            func.coalesce(func.sum(Quotation.total), 0).label("total_amount"),
+        )
+        .outerjoin(Quotation, join_condition)
+        .group_by(User.id, User.name)
+        .order_by(User.id)
+    )
+    return db.execute(stmt).all()
+
+
+def bucket_expression(db: Session, column, bucket: str):
+    """返回把时间列截断到桶起点的表达式，结果统一为 YYYY-MM-DD 字符串"""
+    if bucket not in TIME_BUCKETS:
+        raise ValueError(f"不支持的时间粒度: {bucket}")
+
+    if db.get_bind().dialect.name == "postgresql":
+        return func.to_char(func.date_trunc(bucket, column), "YYYY-MM-DD")
+
+    # SQLite：周从周一开始
+    if bucket == "day":
+        return func.date(column)
+    if bucket == "week":
+        return func.date(column, "-6 days", "weekday 1")
+    return func.strftime("%Y-%m-01", column)
+
+
+def time_series(db: Session, bucket: str, filters: Sequence = ()) -> List[Dict]:
+    """按时间桶分组统计数量、批准数量和金额"""
+    bucket_column = bucket_expression(db, Quotation.created_at, bucket).label("bucket")
+    stmt = (
+        select(
+            bucket_column,
+            func.count(Quotation.id).label("count"),
+            func.coalesce(func.sum(case((Quotation.status == "approved", 1), else_=0)), 0).label("approved_count"),
+            func.coalesce(func.sum(Quotation.total), 0).label("total_amount"),
+        )
+        .group_by(bucket_column)
+        .order_by(bucket_column)
+    )
+    if filters:
+        stmt = stmt.where(and_(*filters))
+
+    return [
+        {
+            "bucket": row.bucket,
+            "count": row.count,
+            "approved_count": row.approved_count,
+            "total_amount": float(row.total_amount or 0),
+        }
+        for row in db.execute(stmt)
+    ]
+
+
+def user_counts(db: Session) -> Dict[str, int]:
+    """一条查询统计用户总数与激活用户数"""
+    total, active = db.execute(
+        select(
+            func.count(User.id),
+            func.coalesce(func.sum(case((User.is_active == True, 1), else_=0)), 0),
+        )
+    ).one()
+    return {"total_users": total, "active_users": active}
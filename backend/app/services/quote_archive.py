@@ -0,0 +1,146 @@
+"""
+报价单归档
+超过保留期的已删除报价单、以及多年前已结束（批准/拒绝）的报价单，连同明细、审批记录、
+快照和生效版本按批整体迁入 *_archive 表，在线表只保留活跃数据。每批用
+INSERT ... SELECT 和 DELETE 完成，不逐行水合 ORM 对象；恢复时按相同方式原样迁回。
+按日汇总表保留已归档的报价单（软删除的计入 is_deleted 维度），历史统计不受归档影响
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, delete, insert, literal, select
+from sqlalchemy.orm import Session
+
+from ..models import (
+    ApprovalRecord,
+    EffectiveQuote,
+    Quote,
+    QuoteItem,
+    QuotePDFCache,
+    QuoteSnapshot,
+    approval_records_archive,
+    effective_quotes_archive,
+    quote_items_archive,
+    quote_snapshots_archive,
+    quotes_archive,
+)
+from .quote_detail_cache import invalidate_on_commit
+
+ARCHIVE_BATCH_SIZE = 200
+DELETED_RETENTION_DAYS = 90
+CLOSED_RETENTION_YEARS = 3
+CLOSED_STATUSES = ("approved", "rejected")
+
+# (在线表, 归档表, 关联报价单的列)；子表在报价单之后插入、之前删除
+ARCHIVE_TABLES = (
+    (Quote.__table__, quotes_archive, "id"),
+    (QuoteItem.__table__, quote_items_archive, "quote_id"),
+    (ApprovalRecord.__table__, approval_records_archive, "quote_id"),
+    (QuoteSnapshot.__table__, quote_snapshots_archive, "quote_id"),
+    (EffectiveQuote.__table__, effective_quotes_archive, "quote_id"),
+)
+
+
+def _copy_rows(db: Session, source, target, key: str, quote_ids: List[int], **extra_values) -> None:
+    """INSERT INTO target SELECT ... FROM source WHERE key IN quote_ids，extra_values 作为常量列追加"""
+    names = [column.name for column in source.columns if column.name in target.c]
+    columns = [source.c[name] for name in names]
+    columns.extend(literal(value).label(name) for name, value in extra_values.items())
+    db.execute(
+        insert(target).from_select(
+            names + list(extra_values),
+            select(*columns).where(source.c[key].in_(quote_ids)),
+        )
+    )
+
+
+class QuoteArchiveService:
+    """报价单归档与恢复"""
+
+    def __init__(self, db: Session, batch_size: int = ARCHIVE_BATCH_SIZE):
+        self.db = db
+        self.batch_size = batch_size
+
+    @staticmethod
+    def archive_conditions(
+        now: datetime,
+        deleted_retention_days: int = DELETED_RETENTION_DAYS,
+        closed_retention_years: int = CLOSED_RETENTION_YEARS,
+    ) -> Dict[str, object]:
+        """返回各归档原因对应的在线表过滤条件"""
+        return {
+            "deleted": and_(
+                Quote.is_deleted == True,
+                Quote.deleted_at < now - timedelta(days=deleted_retention_days),
+            ),
+            "closed": and_(
+                Quote.is_deleted == False,
+                Quote.status.in_(CLOSED_STATUSES),
+                Quote.updated_at < now - timedelta(days=365 * closed_retention_years),
+            ),
+        }
+
+    def run(
+        self,
+        now: Optional[datetime] = None,
+        deleted_retention_days: int = DELETED_RETENTION_DAYS,
+        closed_retention_years: int = CLOSED_RETENTION_YEARS,
+    ) -> Dict[str, int]:
+        """按批归档所有满足条件的报价单，每批单独提交，返回各原因的归档数量"""
+        now = now or datetime.utcnow()
+        conditions = self.archive_conditions(now, deleted_retention_days, closed_retention_years)
+        archived = {}
+        for reason, condition in conditions.items():
+            archived[reason] = 0
+            while True:
+                quote_ids = self.db.execute(
+                    select(Quote.id).where(condition).order_by(Quote.id).limit(self.batch_size)
+                ).scalars().all()
+                if not quote_ids:
+                    break
+                self.archive_quotes(quote_ids, reason, archived_at=now)
+                self.db.commit()
+                archived[reason] += len(quote_ids)
+        return archived
+
+    def archive_quotes(self, quote_ids: Iterable[int], reason: str, archived_at: Optional[datetime] = None) -> None:
+        """把一批报价单及其关联数据迁入归档表（不提交）"""
+        quote_ids = list(quote_ids)
+        if not quote_ids:
+            return
+
+        archived_at = archived_at or datetime.utcnow()
+        for source, target, key in ARCHIVE_TABLES:
+            if target is quotes_archive:
+                _copy_rows(self.db, source, target, key, quote_ids, archived_at=archived_at, archive_reason=reason)
+            else:
+                _copy_rows(self.db, source, target, key, quote_ids)
+
+        # PDF 缓存可按需重新生成，不归档
+        self.db.execute(delete(QuotePDFCache).where(QuotePDFCache.quote_id.in_(quote_ids)))
+        for source, _, key in reversed(ARCHIVE_TABLES):
+            self.db.execute(delete(source).where(source.c[key].in_(quote_ids)))
+        invalidate_on_commit(self.db, quote_ids)
+
+    def restore_quotes(self, quote_ids: Iterable[int]) -> List[int]:
+        """把已归档的报价单原样迁回在线表（不提交），返回实际迁回的报价单ID"""
+        quote_ids = self.db.execute(
+            select(quotes_archive.c.id).where(quotes_archive.c.id.in_([int(quote_id) for quote_id in quote_ids]))
+        ).scalars().all()
+        if not quote_ids:
+            return []
+
+        for live, archive, key in ARCHIVE_TABLES:
+            _copy_rows(self.db, archive, live, key, quote_ids)
+        for _, archive, key in reversed(ARCHIVE_TABLES):
+            self.db.execute(delete(archive).where(archive.c[key].in_(quote_ids)))
+        invalidate_on_commit(self.db, quote_ids)
+        return list(quote_ids)
+
+    def is_archived(self, quote_id) -> bool:
+        if not str(quote_id).isdigit():
+            return False
+        return self.db.execute(
+            select(quotes_archive.c.id).where(quotes_archive.c.id == int(quote_id))
+        ).first() is not None
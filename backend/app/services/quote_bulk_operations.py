@@ -0,0 +1,95 @@
+"""
+报价单批量软删除与恢复
+按块执行：一条查询取回整块报价单的状态列并逐个判定结果，再用一条
+UPDATE ... WHERE id IN (...) 完成整块写入，不水合 ORM 对象。Core 写入不经过 flush 钩子，
+按日汇总增量和详情缓存失效在这里按块显式处理
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from ..models import Quote
+from .quote_archive import QuoteArchiveService
+from .quote_detail_cache import invalidate_on_commit
+from .quote_rollups import TRACKED_FIELDS, apply_rollup_deltas, bulk_update_deltas
+
+BULK_CHUNK_SIZE = 500
+
+
+def normalize_quote_ids(quote_ids: Iterable) -> Tuple[List[int], List[Dict]]:
+    """去重并转换为整数ID，返回 (有效ID, 无效ID的结果项)"""
+    valid, invalid, seen = [], [], set()
+    for raw in quote_ids:
+        text = str(raw).strip()
+        if not text.isdigit():
+            invalid.append({"id": raw, "result": "invalid_id"})
+            continue
+        quote_id = int(text)
+        if quote_id not in seen:
+            seen.add(quote_id)
+            valid.append(quote_id)
+    return valid, invalid
+
+
+class QuoteBulkService:
+    """报价单批量软删除/恢复（不提交，由调用方提交事务）"""
+
+    def __init__(self, db: Session, chunk_size: int = BULK_CHUNK_SIZE):
+        self.db = db
+        self.chunk_size = chunk_size
+
+    def soft_delete(self, quote_ids: Iterable, operator_id: int, now: Optional[datetime] = None) -> List[Dict]:
+        """批量软删除，返回每个ID的结果: deleted / already_deleted / not_found / invalid_id"""
+        values = {"is_deleted": True, "deleted_at": now or datetime.utcnow(), "deleted_by": operator_id}
+        return self._apply(quote_ids, values, "deleted", "already_deleted", eligible=lambda row: not row["is_deleted"])
+
+    def restore(self, quote_ids: Iterable) -> List[Dict]:
+        """批量恢复，已归档的报价单先迁回在线表；返回 restored / not_deleted / not_found / invalid_id"""
+        valid, _ = normalize_quote_ids(quote_ids)
+        unarchived = set(QuoteArchiveService(self.db).restore_quotes(valid)) if valid else set()
+        values = {"is_deleted": False, "deleted_at": None, "deleted_by": None}
+        return self._apply(
+            quote_ids, values, "restored", "not_deleted",
+            eligible=lambda row: row["is_deleted"] or row["id"] in unarchived,
+        )
+
+    def _apply(self, quote_ids: Iterable, values: Dict, success: str, skipped: str, eligible) -> List[Dict]:
+        valid, results = normalize_quote_ids(quote_ids)
+        columns = [Quote.id, Quote.quote_number, Quote.title] + [getattr(Quote, name) for name in TRACKED_FIELDS]
+
+        for start in range(0, len(valid), self.chunk_size):
+            chunk = valid[start:start + self.chunk_size]
+            rows = {
+                row["id"]: row
+                for row in self.db.execute(select(*columns).where(Quote.id.in_(chunk))).mappings()
+            }
+
+            targets = []
+            for quote_id in chunk:
+                row = rows.get(quote_id)
+                if row is None:
+                    results.append({"id": quote_id, "result": "not_found"})
+                elif eligible(row):
+                    targets.append(row)
+                    results.append({
+                        "id": quote_id,
+                        "quote_number": row["quote_number"],
+                        "title": row["title"],
+                        "result": success,
+                    })
+                else:
+                    results.append({"id": quote_id, "quote_number": row["quote_number"], "result": skipped})
+
+            if not targets:
+                continue
+            target_ids = [row["id"] for row in targets]
+            self.db.execute(
+                update(Quote).where(Quote.id.in_(target_ids)).values(**values),
+                execution_options={"synchronize_session": False},
+            )
+            apply_rollup_deltas(self.db.connection(), bulk_update_deltas(targets, values))
+            invalidate_on_commit(self.db, target_ids)
+        return results
@@ -0,0 +1,103 @@
+"""
+报价单详情响应缓存
+按 (报价单ID, 访问权限范围) 缓存已序列化的详情响应和强 ETag，条目以 updated_at
+作为版本号，版本不一致即视为未命中。报价单或明细在任意 ORM 会话中写入并提交后，
+对应条目被主动清除；审批操作同样经 ORM 更新报价单，因此也会触发清除
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Iterable, NamedTuple, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..models import Quote, QuoteItem
+
+_PENDING_KEY = "quote_detail_cache_pending"
+
+
+class CachedDetail(NamedTuple):
+    version: str
+    etag: str
+    body: bytes
+
+
+class QuoteDetailCache:
+    """进程内 LRU 缓存，线程安全"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, quote_id: int, scope: str, version: str) -> Optional[CachedDetail]:
+        with self._lock:
+            entry = self._entries.get((quote_id, scope))
+            if entry is None or entry.version != version:
+                return None
+            self._entries.move_to_end((quote_id, scope))
+            return entry
+
+    def put(self, quote_id: int, scope: str, version: str, payload: dict) -> CachedDetail:
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        entry = CachedDetail(version, f'"{hashlib.sha256(body).hexdigest()[:32]}"', body)
+        with self._lock:
+            self._entries[(quote_id, scope)] = entry
+            self._entries.move_to_end((quote_id, scope))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, quote_ids: Iterable[int]) -> None:
+        quote_ids = set(quote_ids)
+        if not quote_ids:
+            return
+        with self._lock:
+            for key in [key for key in self._entries if key[0] in quote_ids]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+quote_detail_cache = QuoteDetailCache()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """判断 If-None-Match 是否命中当前 ETag（按弱比较，支持列表和 *）"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def invalidate_on_commit(session: Session, quote_ids: Iterable[int]) -> None:
+    """Core 批量写入不经过 ORM flush，需显式登记受影响的报价单，提交后统一清除"""
+    session.info.setdefault(_PENDING_KEY, set()).update(quote_ids)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_written_quotes(session, flush_context) -> None:
+    quote_ids = session.info.setdefault(_PENDING_KEY, set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Quote) and obj.id is not None:
+            quote_ids.add(obj.id)
+        elif isinstance(obj, QuoteItem) and obj.quote_id is not None:
+            quote_ids.add(obj.quote_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_written_quotes(session) -> None:
+    quote_detail_cache.invalidate(session.info.pop(_PENDING_KEY, ()))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_written_quotes(session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,132 @@
+"""
+报价单列表投影
+列表类接口只展示十几个列，这里直接做 Core 列查询并联表取创建人/删除人姓名，
+返回轻量的 Row 元组，避免为每行水合完整的 Quote ORM 对象及其懒加载关系
+"""
+
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Row, Select, and_, desc, func, literal, null, select, union_all
+from sqlalchemy.orm import Session, aliased
+
+from ..models import Quote, QuotePDFCache, User, quotes_archive
+
+Creator = aliased(User, name="creator")
+Deleter = aliased(User, name="deleter")
+
+QUOTE_LIST_COLUMNS = (
+    Quote.id,
+    Quote.quote_number,
+    Quote.title,
+    Quote.quote_type,
+    Quote.customer_name,
+    Quote.currency,
+    Quote.total_amount,
+    Quote.status,
+    Quote.approval_status,
+    Quote.version,
+    Quote.created_by,
+    Quote.created_at,
+    Quote.updated_at,
+    Quote.valid_until,
+    Quote.is_deleted,
+    Quote.deleted_at,
+    Quote.deleted_by,
+    Quote.wecom_approval_id,
+    Creator.name.label("creator_name"),
+    Deleter.name.label("deleter_name"),
+    QuotePDFCache.pdf_path.label("pdf_path"),
+)
+
+
+def quote_list_select(filters: Sequence = (), with_total: bool = False) -> Select:
+    """构建列表投影查询，按创建时间倒序；with_total 时附带窗口函数统计的总行数"""
+    columns = list(QUOTE_LIST_COLUMNS)
+    if with_total:
+        columns.append(func.count().over().label("total_count"))
+
+    stmt = (
+        select(*columns)
+        .select_from(Quote)
+        .outerjoin(Creator, Creator.id == Quote.created_by)
+        .outerjoin(Deleter, Deleter.id == Quote.deleted_by)
+        .outerjoin(QuotePDFCache, QuotePDFCache.quote_id == Quote.id)
+    )
+    if filters:
+        stmt = stmt.where(and_(*filters))
+    return stmt.order_by(desc(Quote.created_at), desc(Quote.id))
+
+
+def tiered_quote_list_select(live_filters: Sequence = (), archive_filters: Sequence = (), with_total: bool = False) -> Select:
+    """在线表与归档表合并的列表投影，附带 tier（live/archive）和 archived_at 列"""
+    live = (
+        select(*QUOTE_LIST_COLUMNS, literal("live").label("tier"), null().label("archived_at"))
+        .select_from(Quote)
+        .outerjoin(Creator, Creator.id == Quote.created_by)
+        .outerjoin(Deleter, Deleter.id == Quote.deleted_by)
+        .outerjoin(QuotePDFCache, QuotePDFCache.quote_id == Quote.id)
+    )
+    archive = (
+        select(
+            *(quotes_archive.c[column.key] for column in QUOTE_LIST_COLUMNS[:-3]),
+            Creator.name.label("creator_name"),
+            Deleter.name.label("deleter_name"),
+            null().label("pdf_path"),
+            literal("archive").label("tier"),
+            quotes_archive.c.archived_at,
+        )
+        .select_from(quotes_archive)
+        .outerjoin(Creator, Creator.id == quotes_archive.c.created_by)
+        .outerjoin(Deleter, Deleter.id == quotes_archive.c.deleted_by)
+    )
+    if live_filters:
+        live = live.where(and_(*live_filters))
+    if archive_filters:
+        archive = archive.where(and_(*archive_filters))
+
+    combined = union_all(live, archive).subquery("tiers")
+    columns = list(combined.c)
+    if with_total:
+        columns.append(func.count().over().label("total_count"))
+    return select(*columns).order_by(desc(combined.c.created_at), desc(combined.c.id))
+
+
+def fetch_quote_list_page(
+    db: Session,
+    filters: Sequence,
+    page: int,
+    size: int,
+    archive_filters: Optional[Sequence] = None,
+) -> Tuple[List[Row], int]:
+    """分页获取列表投影，总数与当前页在同一条查询中返回；传入 archive_filters 时同时覆盖归档层"""
+    if archive_filters is None:
+        stmt = quote_list_select(filters, with_total=True)
+    else:
+        stmt = tiered_quote_list_select(filters, archive_filters, with_total=True)
+    rows = db.execute(stmt.offset((page - 1) * size).limit(size)).all()
+    if rows:
+        return rows, rows[0].total_count
+    if page == 1:
+        return [], 0
+
+    # 页码越界时当前页为空，只能单独统计总数
+    count_stmt = select(func.count()).select_from(Quote)
+    if filters:
+        count_stmt = count_stmt.where(and_(*filters))
+    total = db.execute(count_stmt).scalar_one()
+    if archive_filters is not None:
+        archive_count = select(func.count()).select_from(quotes_archive)
+        if archive_filters:
+            archive_count = archive_count.where(and_(*archive_filters))
+        total += db.execute(archive_count).scalar_one()
+    return [], total
+
+
+def iter_quote_list_chunks(db: Session, filters: Sequence = (), chunk_size: int = 500) -> Iterator[List[Row]]:
+    """以 yield_per 分块流式读取列表投影，每次产出一块 Row，内存占用与总行数无关"""
+    result = db.execute(quote_list_select(filters).execution_options(yield_per=chunk_size))
+    try:
+        for partition in result.partitions():
+            yield partition
+    finally:
+        result.close()
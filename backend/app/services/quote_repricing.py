@@ -0,0 +1,172 @@
+"""
+汇率调整后的草稿报价单重算
+人民币报价单中外币机器的明细单价是按旧汇率折算的，汇率从 old_rate 调整为 new_rate 后
+按 new_rate / old_rate 等比例调整这些明细的单价（保留四位小数）并重算明细金额和整单金额。
+调整后单价是人工议定的价格，保持不变。
+
+重算后的明细记录 applied_exchange_rate = new_rate：已处于 new_rate 的明细不再调整，
+之前重算过的明细以记录的汇率代替 old_rate，因此中途失败后可直接按相同参数重跑，
+已提交的报价单不会被重复调整。
+
+按报价单ID分块：每块一条查询取回明细及机器币种，一次 executemany 按主键更新明细和报价单，
+不水合 ORM 对象；Core 写入不经过 flush 钩子，按日汇总增量和详情缓存失效在这里按块显式处理。
+每块单独提交并回调进度
+"""
+
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import and_, exists, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from ..models import Machine, Quote, QuoteItem
+from .exchange_rates import BASE_CURRENCIES, normalize_currency
+from .quote_detail_cache import invalidate_on_commit
+from .quote_rollups import TRACKED_FIELDS, apply_rollup_deltas, row_update_deltas
+from .quote_service import QuoteService, item_hourly_rate
+
+REPRICE_CHUNK_SIZE = 200
+UNIT_PRICE_QUANTIZE = Decimal("0.0001")
+
+ProgressCallback = Callable[[int, int], None]
+
+
+class DraftQuoteRepricer:
+    """按汇率变化重算草稿报价单，每块提交一次"""
+
+    def __init__(self, db: Session, chunk_size: int = REPRICE_CHUNK_SIZE):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.quote_service = QuoteService(db)
+
+    def affected_condition(self, currency: str, new_rate: Optional[float] = None):
+        """未删除的人民币草稿报价单，且至少有一条明细关联该币种的机器（给出 new_rate 时不计已按其重算的明细）"""
+        item_filters = [
+            QuoteItem.quote_id == Quote.id,
+            QuoteItem.machine_id == Machine.id,
+            func.upper(Machine.currency) == currency,
+        ]
+        if new_rate is not None:
+            item_filters.append(
+                or_(QuoteItem.applied_exchange_rate.is_(None), QuoteItem.applied_exchange_rate != new_rate)
+            )
+        item_in_currency = exists().where(*item_filters)
+        return and_(
+            Quote.status == "draft",
+            Quote.is_deleted.is_not(True),
+            or_(Quote.currency.is_(None), func.upper(Quote.currency).in_(sorted(BASE_CURRENCIES))),
+            item_in_currency,
+        )
+
+    def run(
+        self,
+        currency: str,
+        old_rate: float,
+        new_rate: float,
+        progress: Optional[ProgressCallback] = None,
+    ) -> Dict[str, int]:
+        """重算全部受影响的草稿报价单，返回 {quotes, items, failed}；progress(已处理, 总数) 每块回调一次
+
+        可重复执行：已按 new_rate 重算的明细会被跳过
+        """
+        currency = normalize_currency(currency)
+        if currency in BASE_CURRENCIES:
+            raise ValueError("人民币无需按汇率重算")
+        if not old_rate or old_rate <= 0 or not new_rate or new_rate <= 0:
+            raise ValueError("汇率必须大于0")
+
+        condition = self.affected_condition(currency, new_rate)
+        total = self.db.execute(select(func.count()).select_from(Quote).where(condition)).scalar_one()
+        summary = {"quotes": 0, "items": 0, "failed": 0}
+        processed, last_id = 0, 0
+        while True:
+            quote_ids = self.db.execute(
+                select(Quote.id).where(condition, Quote.id > last_id).order_by(Quote.id).limit(self.chunk_size)
+            ).scalars().all()
+            if not quote_ids:
+                break
+            last_id = quote_ids[-1]
+            repriced, items, failed = self.reprice_quotes(quote_ids, currency, old_rate, new_rate)
+            self.db.commit()
+            summary["quotes"] += repriced
+            summary["items"] += items
+            summary["failed"] += failed
+            processed += len(quote_ids)
+            if progress is not None:
+                progress(processed, total)
+        return summary
+
+    def reprice_quotes(self, quote_ids: List[int], currency: str, old_rate: float, new_rate: float):
+        """重算一块报价单（不提交），返回 (重算的报价单数, 调整单价的明细数, 数据无效而跳过的报价单数)"""
+        item_rows = self.db.execute(
+            select(
+                QuoteItem.id, QuoteItem.quote_id, QuoteItem.quantity, QuoteItem.unit_price,
+                QuoteItem.adjusted_price, QuoteItem.uph, QuoteItem.applied_exchange_rate,
+                Machine.currency.label("machine_currency"),
+            )
+            .outerjoin(Machine, QuoteItem.machine_id == Machine.id)
+            .where(QuoteItem.quote_id.in_(quote_ids))
+            .order_by(QuoteItem.quote_id, QuoteItem.id)
+        ).mappings().all()
+        items_by_quote: Dict[int, List] = {}
+        for row in item_rows:
+            items_by_quote.setdefault(row["quote_id"], []).append(row)
+
+        quote_columns = [Quote.id, Quote.discount, Quote.tax_rate] + [getattr(Quote, name) for name in TRACKED_FIELDS]
+        quote_rows = self.db.execute(select(*quote_columns).where(Quote.id.in_(quote_ids))).mappings().all()
+
+        now = datetime.utcnow()
+        item_updates, quote_updates, rollup_changes = [], [], []
+        failed = 0
+        for quote in quote_rows:
+            rows = items_by_quote.get(quote["id"], [])
+            try:
+                updates, payload = self._reprice_items(rows, currency, old_rate, new_rate)
+                totals = self.quote_service._calculate_totals(payload["subtotal"], quote["discount"], quote["tax_rate"])
+            except ValueError:
+                failed += 1
+                continue
+            if not any(updates):
+                continue
+
+            for update_values, item in zip(updates, payload["items"]):
+                if update_values is not None:
+                    update_values["total_price"] = item["total_price"]
+                    item_updates.append(update_values)
+            quote_updates.append({"id": quote["id"], "updated_at": now, **totals})
+            rollup_changes.append((quote, totals))
+
+        if item_updates:
+            self.db.execute(update(QuoteItem), item_updates)
+        if quote_updates:
+            self.db.execute(update(Quote), quote_updates)
+            apply_rollup_deltas(self.db.connection(), row_update_deltas(rollup_changes))
+            invalidate_on_commit(self.db, [values["id"] for values in quote_updates])
+        return len(quote_updates), len(item_updates), failed
+
+    def _reprice_items(self, rows, currency: str, old_rate: float, new_rate: float):
+        """返回 (各明细的更新值，未调整的明细为 None, 按新单价计算的明细金额)"""
+        updates, payload_items = [], []
+        for row in rows:
+            unit_price = row["unit_price"]
+            applied_rate = row["applied_exchange_rate"]
+            if normalize_currency(row["machine_currency"]) == currency and applied_rate != new_rate:
+                ratio = Decimal(str(new_rate)) / Decimal(str(applied_rate or old_rate))
+                unit_price = float(
+                    (Decimal(str(unit_price or 0)) * ratio).quantize(UNIT_PRICE_QUANTIZE, rounding=ROUND_HALF_UP)
+                )
+                updates.append({
+                    "id": row["id"],
+                    "unit_price": unit_price,
+                    "hourly_rate": item_hourly_rate(unit_price, row["uph"]),
+                    "applied_exchange_rate": new_rate,
+                })
+            else:
+                updates.append(None)
+            payload_items.append({
+                "quantity": row["quantity"],
+                "unit_price": unit_price,
+                "adjusted_price": row["adjusted_price"],
+            })
+        return updates, self.quote_service._prepare_items_payload(payload_items)
@@ -0,0 +1,249 @@
+"""
+报价单按日汇总维护与查询
+每个报价单对汇总表贡献一行增量：(创建日, 报价类型, 报价单位, 币种, 创建人, 状态, 是否删除)
+维度下计数 1、金额和审批耗时。Session flush 时比较报价单写入前后的贡献，
+对旧维度行减、对新维度行加，所有经 ORM 的写路径都会自动维护汇总；
+分析查询只需读取按日汇总行，一年约 365 × 维度组合行，而不是扫描原始报价表
+"""
+
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, event, func, insert, inspect, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ..models import Quote, QuoteDailyRollup
+from .quotation_statistics import TIME_BUCKETS, bucket_expression
+
+ROLLUP_DIMENSIONS = ("quote_type", "quote_unit", "currency", "created_by", "status", "is_deleted")
+ROLLUP_MEASURES = ("quote_count", "total_amount", "approval_seconds", "approval_count")
+TRACKED_FIELDS = (
+    "created_at", "quote_type", "quote_unit", "currency", "created_by", "status",
+    "total_amount", "is_deleted", "submitted_at", "approved_at",
+)
+
+STATISTICS_STATUSES = ("draft", "pending", "approved", "rejected")
+
+_PENDING_KEY = "quote_rollup_pending"
+
+RollupKey = Tuple[date, str, str, str, int, str, bool]
+Contribution = Tuple[RollupKey, Tuple[int, float, float, int]]
+
+
+def quote_contribution(values) -> Optional[Contribution]:
+    """计算单个报价单对汇总表的贡献；缺少创建时间的报价单不计入"""
+    if values["created_at"] is None:
+        return None
+
+    key = (
+        values["created_at"].date(),
+        values["quote_type"] or "",
+        values["quote_unit"] or "",
+        values["currency"] or "",
+        values["created_by"] or 0,
+        values["status"] or "",
+        bool(values["is_deleted"]),
+    )
+    approval_seconds, approval_count = 0.0, 0
+    submitted_at, approved_at = values["submitted_at"], values["approved_at"]
+    if values["status"] == "approved" and submitted_at and approved_at and approved_at >= submitted_at:
+        approval_seconds, approval_count = (approved_at - submitted_at).total_seconds(), 1
+    return key, (1, float(values["total_amount"] or 0), approval_seconds, approval_count)
+
+
+def upsert_increments(connection, model, key_names: Sequence[str], measure_names: Sequence[str], rows: List[Dict]) -> None:
+    """按主键把度量值累加到汇总表，主键行不存在时直接插入"""
+    if not rows:
+        return
+
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        upsert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = upsert(model)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[getattr(model, name) for name in key_names],
+            set_={name: getattr(model, name) + getattr(stmt.excluded, name) for name in measure_names},
+        )
+        connection.execute(stmt, rows)
+        return
+
+    # 其他数据库：先逐行累加，主键行不存在时再插入
+    for row in rows:
+        filters = and_(*(getattr(model, name) == row[name] for name in key_names))
+        result = connection.execute(
+            update(model)
+            .where(filters)
+            .values({name: getattr(model, name) + row[name] for name in measure_names})
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(model).values(**row))
+
+
+def apply_rollup_deltas(connection, deltas: Dict[RollupKey, List]) -> None:
+    """把增量累加到按日汇总表"""
+    key_names = ("day",) + ROLLUP_DIMENSIONS
+    rows = [
+        dict(zip(key_names, key), **dict(zip(ROLLUP_MEASURES, measures)))
+        for key, measures in deltas.items()
+        if any(measures)
+    ]
+    upsert_increments(connection, QuoteDailyRollup, key_names, ROLLUP_MEASURES, rows)
+
+
+def _accumulate(deltas: Dict, contribution: Optional[Contribution], sign: int) -> None:
+    if contribution is None:
+        return
+    key, measures = contribution
+    entry = deltas[key]
+    for index, value in enumerate(measures):
+        entry[index] += sign * value
+
+
+def bulk_update_deltas(rows, values: Dict[str, object]) -> Dict[RollupKey, List]:
+    """Core 批量 UPDATE 不触发 flush 钩子，按写入前的行和更新值计算汇总增量"""
+    return row_update_deltas((row, values) for row in rows)
+
+
+def row_update_deltas(changes: Iterable[Tuple[Dict, Dict[str, object]]]) -> Dict[RollupKey, List]:
+    """同 bulk_update_deltas，但每行有各自的更新值：changes 为 (写入前的行, 更新值)"""
+    deltas = defaultdict(lambda: [0, 0.0, 0.0, 0])
+    for row, values in changes:
+        _accumulate(deltas, quote_contribution(row), -1)
+        _accumulate(deltas, quote_contribution({**row, **values}), 1)
+    return deltas
+
+
+def _has_tracked_changes(quote: Quote) -> bool:
+    attrs = inspect(quote).attrs
+    return any(attrs[name].history.has_changes() for name in TRACKED_FIELDS)
+
+
+@event.listens_for(Session, "before_flush")
+def _capture_previous_contributions(session, flush_context, instances) -> None:
+    """flush 前从数据库读取待更新/删除报价单的原值，此时数据库仍是写入前的状态"""
+    changed = [
+        obj for obj in session.dirty
+        if isinstance(obj, Quote) and obj.id is not None and _has_tracked_changes(obj)
+    ]
+    changed.extend(obj for obj in session.deleted if isinstance(obj, Quote) and obj.id is not None)
+    new = [obj for obj in session.new if isinstance(obj, Quote)]
+    if not changed and not new:
+        return
+
+    previous = {}
+    if changed:
+        columns = [Quote.id] + [getattr(Quote, name) for name in TRACKED_FIELDS]
+        rows = session.connection().execute(
+            select(*columns).where(Quote.id.in_({obj.id for obj in changed}))
+        ).mappings()
+        previous = {row["id"]: quote_contribution(row) for row in rows}
+
+    pending = session.info.setdefault(_PENDING_KEY, [])
+    pending.extend((obj, previous.get(obj.id)) for obj in changed)
+    pending.extend((obj, None) for obj in new)
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_contribution_deltas(session, flush_context) -> None:
+    """flush 后按写入结果计算新贡献（默认值已填充），与原贡献求差写入汇总表"""
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+
+    deltas = defaultdict(lambda: [0, 0.0, 0.0, 0])
+    for obj, previous in pending:
+        _accumulate(deltas, previous, -1)
+        if obj not in session.deleted:
+            current = {name: getattr(obj, name) for name in TRACKED_FIELDS}
+            _accumulate(deltas, quote_contribution(current), 1)
+    apply_rollup_deltas(session.connection(), deltas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_contributions(session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _filter_conditions(filters: Optional[Dict[str, object]]) -> List:
+    filters = dict(filters or {})
+    filters.setdefault("is_deleted", False)
+    return [getattr(QuoteDailyRollup, name) == value for name, value in filters.items() if value is not None]
+
+
+def rollup_series(
+    db: Session,
+    start_day: date,
+    end_day: Optional[date] = None,
+    bucket: str = "day",
+    group_by: Sequence[str] = (),
+    filters: Optional[Dict[str, object]] = None,
+) -> List[Dict]:
+    """从按日汇总表读取分桶统计；end_day 不含当天，group_by 为维度名列表，
+    filters 未指定 is_deleted 时只统计未删除的报价单，取值为 None 的过滤项不生效"""
+    if bucket not in TIME_BUCKETS:
+        raise ValueError(f"不支持的时间粒度: {bucket}")
+    unknown = [name for name in group_by if name not in ROLLUP_DIMENSIONS]
+    if unknown:
+        raise ValueError(f"不支持的分组维度: {', '.join(unknown)}")
+
+    bucket_column = bucket_expression(db, QuoteDailyRollup.day, bucket).label("bucket")
+    dimension_columns = [getattr(QuoteDailyRollup, name) for name in group_by]
+    conditions = [QuoteDailyRollup.day >= start_day, QuoteDailyRollup.quote_count > 0]
+    if end_day is not None:
+        conditions.append(QuoteDailyRollup.day < end_day)
+    conditions.extend(_filter_conditions(filters))
+
+    stmt = (
+        select(
+            bucket_column,
+            *dimension_columns,
+            func.sum(QuoteDailyRollup.quote_count).label("quote_count"),
+            func.sum(QuoteDailyRollup.total_amount).label("total_amount"),
+            func.sum(QuoteDailyRollup.approval_seconds).label("approval_seconds"),
+            func.sum(QuoteDailyRollup.approval_count).label("approval_count"),
+        )
+        .where(and_(*conditions))
+        .group_by(bucket_column, *dimension_columns)
+        .order_by(bucket_column, *dimension_columns)
+    )
+
+    series = []
+    for row in db.execute(stmt).mappings():
+        approval_count = row["approval_count"] or 0
+        entry = {"bucket": row["bucket"]}
+        entry.update({name: row[name] for name in group_by})
+        entry.update({
+            "quote_count": row["quote_count"] or 0,
+            "total_amount": float(row["total_amount"] or 0),
+            "approval_count": approval_count,
+            "avg_approval_hours": (
+                round(row["approval_seconds"] / approval_count / 3600, 2) if approval_count else None
+            ),
+        })
+        series.append(entry)
+    return series
+
+
+def rollup_status_counts(db: Session, filters: Optional[Dict[str, object]] = None) -> Dict[Tuple[bool, str], int]:
+    """从按日汇总表读取各 (是否删除, 状态) 的报价单数量；filters 规则同 rollup_series"""
+    conditions = [QuoteDailyRollup.quote_count > 0]
+    conditions.extend(_filter_conditions(filters))
+    rows = db.execute(
+        select(
+            QuoteDailyRollup.is_deleted,
+            QuoteDailyRollup.status,
+            func.sum(QuoteDailyRollup.quote_count),
+        )
+        .where(and_(*conditions))
+        .group_by(QuoteDailyRollup.is_deleted, QuoteDailyRollup.status)
+    ).all()
+    return {(bool(is_deleted), status): count or 0 for is_deleted, status, count in rows}
+
+
+def status_breakdown(counts: Dict[Tuple[bool, str], int], is_deleted: bool = False) -> Dict[str, int]:
+    """把 rollup_status_counts 的结果整理为 {total, draft, pending, approved, rejected}"""
+    breakdown = {"total": sum(count for (deleted, _), count in counts.items() if deleted == is_deleted)}
+    breakdown.update({name: counts.get((is_deleted, name), 0) for name in STATISTICS_STATUSES})
+    return breakdown
@@ -4,15 +4,16 @@
 """
 
 import logging
+import re
 from threading import Thread
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
 from sqlalchemy.orm import Session, selectinload
-from sqlalchemy import and_, or_, desc, asc, func
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import and_, or_, desc, asc, func, select, insert, update, delete
+from sqlalchemy.dialects import postgresql, sqlite
 
-from ..models import Quote, QuoteItem, ApprovalRecord, User, QuotePDFCache
+from ..models import Quote, QuoteItem, ApprovalRecord, User, QuotePDFCache, QuoteNumberSequence
 from ..schemas import (
     QuoteCreate, QuoteUpdate, QuoteFilter,
     QuoteStatusUpdate, ApprovalRecordCreate,
@@ -22,9 +23,34 @@ from .frontend_snapshot_pdf_service import (
     get_frontend_snapshot_pdf_service,
     upsert_pdf_cache,
 )
+from .quote_archive import QuoteArchiveService
+from .quote_list_projection import fetch_quote_list_page
+from . import money_engine
+from . import quote_rollups  # 导入即注册按日汇总的 flush 维护钩子
 
 logger = logging.getLogger(__name__)
 
+UPH_PATTERN = re.compile(r'UPH:(\d+)')
+
+
+def parse_item_uph(configuration: Optional[str]) -> Optional[int]:
+    """从明细配置字符串中解析 UPH，未配置时返回 None"""
+    if not configuration:
+        return None
+    match = UPH_PATTERN.search(configuration)
+    return int(match.group(1)) if match else None
+
+
+def item_hourly_rate(unit_price: Optional[float], uph: Optional[int]) -> Optional[float]:
+    """机时费率 = 单价 × UPH；没有 UPH 的明细不计算"""
+    if uph is None:
+        return None
+    return (unit_price or 0) * uph
+
+
+def format_hourly_rate(hourly_rate: Optional[float]) -> Optional[str]:
+    return f"¥{hourly_rate:.2f}/小时" if hourly_rate is not None else None
+
 
 class PDFGenerationInProgress(Exception):
     """Raised when a PDF generation task is already in progress."""
@@ -35,6 +61,7 @@ class QuoteService:
 
     MONEY_QUANTIZE = Decimal("0.01")
     RATE_QUANTIZE = Decimal("0.0001")
+    VECTORIZE_MIN_ITEMS = 64  # 明细行数达到该值时改用定点引擎整单计算
     STATUS_TO_APPROVAL = {
         "draft": "not_submitted",
         "pending": "pending",
@@ -109,9 +136,32 @@ class QuoteService:
             raise ValueError("税率必须在0到1之间")
         return tax_rate.quantize(self.RATE_QUANTIZE, rounding=ROUND_HALF_UP)
 
+    def _vectorized_line_totals(self, quantities: List[Any], prices: List[Any]) -> Optional[List[int]]:
+        """明细较多时用定点引擎整单计算行金额（分），不适用时返回 None 走逐行 Decimal 计算"""
+        if len(quantities) < self.VECTORIZE_MIN_ITEMS:
+            return None
+        quantity_array = money_engine.as_amounts(quantities)
+        price_array = money_engine.as_amounts(prices)
+        if quantity_array is None or price_array is None:
+            return None
+        cents = money_engine.line_totals_cents(quantity_array, price_array)
+        return None if cents is None else cents.tolist()
+
     def _prepare_items(self, quote: Quote, discount=None, tax_rate=None):
         """根据现有 QuoteItem 重新计算金额字段"""
         items = quote.items
+        discount_source = discount if discount is not None else quote.discount
+        tax_rate_source = tax_rate if tax_rate is not None else quote.tax_rate
+
+        cents = self._vectorized_line_totals(
+            [item.quantity for item in items],
+            [item.adjusted_price if item.adjusted_price is not None else item.unit_price for item in items],
+        )
+        if cents is not None:
+            for item, line_cents in zip(items, cents):
+                item.total_price = line_cents / 100
+            return self._calculate_totals(Decimal(sum(cents)).scaleb(-2), discount_source, tax_rate_source)
+
         subtotal = Decimal("0")
         for index, item in enumerate(items, start=1):
             quantity = self._to_decimal(item.quantity, f"items[{index}].quantity")
@@ -122,10 +172,12 @@ class QuoteService:
             item.total_price = float(total_price)
             subtotal += total_price
 
-        discount_source = discount if discount is not None else quote.discount
-        tax_rate_source = tax_rate if tax_rate is not None else quote.tax_rate
-        discount_decimal = self._normalize_discount(subtotal, discount_source)
-        tax_rate_decimal = self._normalize_tax_rate(tax_rate_source)
+        return self._calculate_totals(subtotal, discount_source, tax_rate_source)
+
+    def _calculate_totals(self, subtotal: Decimal, discount_value, tax_rate_value) -> Dict[str, float]:
+        """根据明细小计计算折扣、税额与总金额"""
+        discount_decimal = self._normalize_discount(subtotal, discount_value)
+        tax_rate_decimal = self._normalize_tax_rate(tax_rate_value)
         taxable_base = self._quantize_money(subtotal - discount_decimal)
         tax_amount = self._quantize_money(taxable_base * tax_rate_decimal)
         total_amount = taxable_base + tax_amount
@@ -139,13 +191,30 @@ class QuoteService:
         }
 
     def _prepare_items_payload(self, item_models: List[Any]) -> Dict[str, Any]:
-        prepared_items = []
+        item_dicts = [
+            item_data.model_dump(exclude_unset=True) if hasattr(item_data, "model_dump") else dict(item_data)
+            for item_data in item_models
+        ]
+        unit_prices = [item_dict.get("unit_price", 0) for item_dict in item_dicts]
+        cents = None
+        if money_engine.as_amounts(unit_prices) is not None:
+            cents = self._vectorized_line_totals(
+                [item_dict.get("quantity", 0) for item_dict in item_dicts],
+                [
+                    item_dict["adjusted_price"] if item_dict.get("adjusted_price") is not None else unit_price
+                    for item_dict, unit_price in zip(item_dicts, unit_prices)
+                ],
+            )
+        if cents is not None:
+            for item_dict, line_cents in zip(item_dicts, cents):
+                item_dict["quantity"] = float(item_dict.get("quantity") or 0)
+                item_dict["unit_price"] = float(item_dict.get("unit_price") or 0)
+                item_dict["total_price"] = line_cents / 100
+                self._finish_item_payload(item_dict)
+            return {"items": item_dicts, "subtotal": Decimal(sum(cents)).scaleb(-2)}
+
         subtotal = Decimal("0")
-        for index, item_data in enumerate(item_models, start=1):
-            if hasattr(item_data, "model_dump"):
-                item_dict = item_data.model_dump(exclude_unset=True)
-            else:
-                item_dict = dict(item_data)
+        for index, item_dict in enumerate(item_dicts, start=1):
             quantity = self._to_decimal(item_dict.get("quantity", 0), f"items[{index}].quantity")
             if quantity < 0:
                 raise ValueError("数量不能为负数")
@@ -160,19 +229,180 @@ class QuoteService:
             item_dict["quantity"] = float(quantity)
             item_dict["unit_price"] = float(unit_price)
             item_dict["total_price"] = float(total_price)
+            self._finish_item_payload(item_dict)
+            subtotal += total_price
 
-            # 明确包含调整价格和调整理由
-            item_dict["adjusted_price"] = item_dict.get("adjusted_price")
-            item_dict["adjustment_reason"] = item_dict.get("adjustment_reason")
+        return {"items": item_dicts, "subtotal": subtotal}
+
+    def _finish_item_payload(self, item_dict: Dict[str, Any]) -> None:
+        # 明确包含调整价格和调整理由
+        item_dict["adjusted_price"] = item_dict.get("adjusted_price")
+        item_dict["adjustment_reason"] = item_dict.get("adjustment_reason")
+
+        # 工序参数在写入时解析落库，读取路径不再逐条解析配置
+        if "configuration" in item_dict:
+            item_dict["uph"] = parse_item_uph(item_dict["configuration"])
+            item_dict["hourly_rate"] = item_hourly_rate(item_dict["unit_price"], item_dict["uph"])
+
+    def evaluate_scenarios(self, quote: Quote, scenarios: List[Any]) -> List[Dict[str, Any]]:
+        """只读试算多组折扣/税率/调整单价/汇率方案，不修改报价单和明细
+
+        明细行金额只计算一次，各方案只重算被调整单价的行并按差额修正小计；
+        折扣、税额和总额对全部方案向量化计算，结果与保存报价单时的计算逐分一致
+        """
+        items = list(quote.items)
+        index_by_id = {item.id: index for index, item in enumerate(items)}
+        for scenario in scenarios:
+            unknown = sorted(set(scenario.adjusted_prices or {}) - index_by_id.keys())
+            if unknown:
+                raise ValueError(f"明细不存在: {unknown}")
+
+        quantities = money_engine.as_amounts([item.quantity for item in items])
+        base_prices = money_engine.as_amounts(
+            [item.adjusted_price if item.adjusted_price is not None else item.unit_price for item in items]
+        )
+        base_cents = None
+        if quantities is not None and base_prices is not None:
+            base_cents = money_engine.line_totals_cents(quantities, base_prices)
+
+        subtotals = [
+            self._scenario_subtotal_cents(items, index_by_id, quantities, base_cents, scenario.adjusted_prices or {})
+            for scenario in scenarios
+        ]
+        discounts = [scenario.discount if scenario.discount is not None else quote.discount for scenario in scenarios]
+        tax_rates = [scenario.tax_rate if scenario.tax_rate is not None else quote.tax_rate for scenario in scenarios]
+
+        totals = None
+        discount_array = money_engine.as_amounts(discounts)
+        tax_rate_array = money_engine.as_amounts(tax_rates)
+        if discount_array is not None and tax_rate_array is not None:
+            totals = money_engine.totals_cents(subtotals, discount_array, tax_rate_array)
+
+        results = []
+        for index, scenario in enumerate(scenarios):
+            if totals is not None:
+                result = {
+                    "subtotal": int(totals["subtotal"][index]) / 100,
+                    "discount": int(totals["discount"][index]) / 100,
+                    "tax_rate": int(totals["tax_rate"][index]) / 10000,
+                    "tax_amount": int(totals["tax_amount"][index]) / 100,
+                    "total_amount": int(totals["total_amount"][index]) / 100,
+                }
+            else:
+                result = self._calculate_totals(Decimal(subtotals[index]).scaleb(-2), discounts[index], tax_rates[index])
+
+            converted = None
+            if scenario.exchange_rate is not None:
+                converted = float(self._quantize_money(
+                    Decimal(str(result["total_amount"])) * self._to_decimal(scenario.exchange_rate, "exchange_rate")
+                ))
+            results.append({
+                "name": scenario.name,
+                **result,
+                "exchange_rate": scenario.exchange_rate,
+                "converted_total_amount": converted,
+            })
+        return results
+
+    def _scenario_subtotal_cents(self, items, index_by_id, quantities, base_cents, adjusted_prices: Dict[int, Any]) -> int:
+        """按方案的调整单价计算明细小计（分）；定点引擎不适用时逐行 Decimal 计算"""
+        if base_cents is not None:
+            if not adjusted_prices:
+                return int(base_cents.sum())
+            indexes = [index_by_id[item_id] for item_id in adjusted_prices]
+            prices = money_engine.as_amounts(adjusted_prices.values())
+            if prices is not None:
+                changed = money_engine.line_totals_cents(quantities[indexes], prices)
+                if changed is not None:
+                    return int(base_cents.sum() - base_cents[indexes].sum() + changed.sum())
 
-            prepared_items.append(item_dict)
-            subtotal += total_price
+        subtotal = Decimal("0")
+        for index, item in enumerate(items, start=1):
+            quantity = self._to_decimal(item.quantity, f"items[{index}].quantity")
+            if quantity < 0:
+                raise ValueError("数量不能为负数")
+            if item.id in adjusted_prices:
+                price = self._to_decimal(adjusted_prices[item.id], f"items[{index}].adjusted_price")
+                if price < 0:
+                    raise ValueError("调整后单价不能为负数")
+            else:
+                price = self._get_effective_unit_price(item, f"items[{index}]")
+            subtotal += self._quantize_money(quantity * price)
+        return int(subtotal * 100)
+
+    def _load_quote_items(self, quote_id: int) -> Dict[int, Any]:
+        """按明细ID取回报价单现有明细的全部列"""
+        return {
+            row["id"]: row
+            for row in self.db.execute(
+                select(QuoteItem.__table__).where(QuoteItem.quote_id == quote_id)
+            ).mappings()
+        }
 
-        return {"items": prepared_items, "subtotal": subtotal}
+    def _merge_item_updates(self, item_models: List[Any], existing: Dict[int, Any]) -> List[Dict[str, Any]]:
+        """部分更新的明细以提交的字段覆盖库中原值，未提交的单价、调整价等保持不变"""
+        merged, seen_ids = [], set()
+        for item_data in item_models:
+            item_dict = item_data.model_dump(exclude_unset=True) if hasattr(item_data, "model_dump") else dict(item_data)
+            item_id = item_dict.get("id")
+            current = existing.get(item_id) if item_id is not None else None
+            if current is not None and item_id not in seen_ids:
+                seen_ids.add(item_id)
+                base = {key: value for key, value in current.items() if key not in ("quote_id", "total_price")}
+                item_dict = {**base, **item_dict}
+            merged.append(item_dict)
+        return merged
+
+    def _sync_quote_items(self, quote_id: int, prepared_items: List[Dict[str, Any]], existing: Dict[int, Any]) -> None:
+        """按明细ID差量同步报价明细：变更行批量更新，新增行批量插入，移除行批量删除
+
+        existing 为 _load_quote_items 的结果，prepared_items 中已有明细应是与原值合并后的完整数据
+        """
+        columns = [column for column in QuoteItem.__table__.columns.keys() if column not in ("id", "quote_id")]
+
+        updates = []
+        inserts = []
+        kept_ids = set()
+        for item_dict in prepared_items:
+            values = {key: item_dict[key] for key in columns if key in item_dict}
+            item_id = item_dict.get("id")
+            current = existing.get(item_id) if item_id is not None else None
+            if current is None or item_id in kept_ids:
+                # 未知或重复的ID一律视为新增，避免跨报价单篡改明细
+                inserts.append({**values, "quote_id": quote_id})
+                continue
+            kept_ids.add(item_id)
+            changes = {key: value for key, value in values.items() if current[key] != value}
+            if changes:
+                updates.append({"id": item_id, **changes})
+
+        removed_ids = [item_id for item_id in existing if item_id not in kept_ids]
+        if removed_ids:
+            self.db.execute(
+                delete(QuoteItem).where(QuoteItem.id.in_(removed_ids)),
+                execution_options={"synchronize_session": False},
+            )
+        if updates:
+            self.db.execute(update(QuoteItem), updates)
+        if inserts:
+            self.db.execute(insert(QuoteItem), inserts)
 
-    def _apply_financials_to_quote(self, quote: Quote, discount_override=None, tax_rate_override=None):
-        """重新计算并回写报价单金额字段"""
-        totals = self._prepare_items(quote, discount_override, tax_rate_override)
+    def _apply_financials_to_quote(
+        self,
+        quote: Quote,
+        discount_override=None,
+        tax_rate_override=None,
+        subtotal: Optional[Decimal] = None,
+    ):
+        """重新计算并回写报价单金额字段；传入 subtotal 时直接使用，无需重新加载明细"""
+        if subtotal is None:
+            totals = self._prepare_items(quote, discount_override, tax_rate_override)
+        else:
+            totals = self._calculate_totals(
+                subtotal,
+                discount_override if discount_override is not None else quote.discount,
+                tax_rate_override if tax_rate_override is not None else quote.tax_rate,
+            )
         quote.subtotal = totals["subtotal"]
         quote.discount = totals["discount"]
         quote.tax_rate = totals["tax_rate"]
@@ -361,6 +591,12 @@ class QuoteService:
             return service.build_public_url_from_cache(quote.pdf_cache)
         return getattr(quote, "pdf_url", None)
 
+    def get_pdf_url_from_path(self, pdf_path: Optional[str]) -> Optional[str]:
+        """根据列表投影中的 pdf_path 生成公开链接"""
+        if not pdf_path:
+            return None
+        return get_frontend_snapshot_pdf_service().build_public_url_from_path(pdf_path)
+
     def get_quote_unit_abbreviation(self, quote_unit: str) -> str:
         """获取报价单位缩写"""
         unit_mapping = {
@@ -371,6 +607,35 @@ class QuoteService:
         }
         return unit_mapping.get(quote_unit, "KS")  # 默认返回KS
 
+    def _next_quote_sequence(self, unit_code: str, date_key: str) -> int:
+        """在当前事务内原子递增 (单位, 日期) 序列并返回新序号
+
+        序列行在事务提交前保持行锁，并发创建会排队而不是撞号；
+        事务回滚时序号一并回滚，不会产生空号。
+        """
+        dialect = self.db.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            upsert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            stmt = upsert(QuoteNumberSequence).values(unit_code=unit_code, date_key=date_key, last_value=1)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[QuoteNumberSequence.unit_code, QuoteNumberSequence.date_key],
+                set_={"last_value": QuoteNumberSequence.last_value + 1},
+            ).returning(QuoteNumberSequence.last_value)
+            return self.db.execute(stmt).scalar_one()
+
+        # 其他数据库：先原子递增，序列不存在时再插入首行
+        filters = and_(QuoteNumberSequence.unit_code == unit_code, QuoteNumberSequence.date_key == date_key)
+        result = self.db.execute(
+            update(QuoteNumberSequence)
+            .where(filters)
+            .values(last_value=QuoteNumberSequence.last_value + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            self.db.execute(insert(QuoteNumberSequence).values(unit_code=unit_code, date_key=date_key, last_value=1))
+            return 1
+        return self.db.execute(select(QuoteNumberSequence.last_value).where(filters)).scalar_one()
+
     def generate_quote_number(self, quote_unit: str = "昆山芯信安") -> str:
         """生成报价单号: CIS-{单位缩写}{年月日}{顺序编号}"""
         # 获取单位缩写
@@ -380,26 +645,10 @@ class QuoteService:
         now = datetime.now()
         date_str = now.strftime("%Y%m%d")
 
-        # 查找当日该单位的最大编号（包括所有记录以避免编号冲突）
-        prefix = f"CIS-{unit_abbr}{date_str}"
-        latest_quote = (
-            self.db.query(Quote)
-            .filter(Quote.quote_number.like(f"{prefix}%"))
-            # 不过滤软删除记录，避免编号冲突
-            .order_by(desc(Quote.quote_number))
-            .first()
-        )
+        # 从序列表分配当日该单位的下一个编号（与报价单插入处于同一事务）
+        seq = self._next_quote_sequence(unit_abbr, date_str)
 
-        if latest_quote:
-            # 提取序号并加1
-            try:
-                seq = int(latest_quote.quote_number[-3:]) + 1
-            except ValueError:
-                seq = 1
-        else:
-            seq = 1
-
-        return f"{prefix}{seq:03d}"
+        return f"CIS-{unit_abbr}{date_str}{seq:03d}"
 
     def create_quote(self, quote_data: QuoteCreate, user_id: int) -> Quote:
         """创建报价单"""
@@ -437,57 +686,45 @@ class QuoteService:
         }
         financial_payload.update(self._status_payload(initial_status))
 
-        max_attempts = 5
-        last_exception = None
-
-        for attempt in range(max_attempts):
-            current_quote_number = self.generate_quote_number(quote_data.quote_unit)
-            quote_payload = {
-                **base_data,
-                **financial_payload,
-                'quote_number': current_quote_number,
-            }
-
-            quote = Quote(**quote_payload)
-            self.db.add(quote)
-            self.db.flush()
-
-            # 创建报价明细
-            for item_template in prepared["items"]:
-                item_dict = {**item_template, 'quote_id': quote.id}
-                self.db.add(QuoteItem(**item_dict))
-
-            # 如果是询价报价，创建审批记录表示自动批准
-            if quote_data.quote_type == 'inquiry':
-                approval_record = ApprovalRecord(
-                    quote_id=quote.id,
-                    action='auto_approve_inquiry',
-                    status='approved',
-                    approver_id=user_id,
-                    comments='询价报价自动批准，无需审批流程',
-                    processed_at=datetime.now()
-                )
-                self.db.add(approval_record)
+        quote_payload = {
+            **base_data,
+            **financial_payload,
+            'quote_number': self.generate_quote_number(quote_data.quote_unit),
+        }
 
-            try:
-                self.db.commit()
-                self.db.refresh(quote)
-                from sqlalchemy.orm import selectinload
-                created_quote = (
-                    self.db.query(Quote)
-                    .options(selectinload(Quote.items))
-                    .filter(Quote.id == quote.id)
-                    .first()
-                )
-                return created_quote
-            except IntegrityError as exc:
-                self.db.rollback()
-                last_exception = exc
-                if 'quote_number' in str(exc).lower() and attempt < max_attempts - 1:
-                    continue
-                raise
+        quote = Quote(**quote_payload)
+        self.db.add(quote)
+        self.db.flush()
+
+        # 创建报价明细
+        for item_template in prepared["items"]:
+            item_dict = {**item_template, 'quote_id': quote.id}
+            self.db.add(QuoteItem(**item_dict))
+
+        # 如果是询价报价，创建审批记录表示自动批准
+        if quote_data.quote_type == 'inquiry':
+            approval_record = ApprovalRecord(
+                quote_id=quote.id,
+                action='auto_approve_inquiry',
+                status='approved',
+                approver_id=user_id,
+                comments='询价报价自动批准，无需审批流程',
+                processed_at=datetime.now()
+            )
+            self.db.add(approval_record)
 
-        raise last_exception or ValueError("生成报价单号失败")
+        try:
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        return (
+            self.db.query(Quote)
+            .options(selectinload(Quote.items))
+            .filter(Quote.id == quote.id)
+            .first()
+        )
 
     def get_quote_by_id(self, quote_id: int) -> Optional[Quote]:
         """根据ID获取报价单"""
@@ -525,7 +762,7 @@ class QuoteService:
         )
 
     def get_quotes(self, filter_params: QuoteFilter, user_id: Optional[int] = None):
-        """获取报价单列表"""
+        """获取报价单列表（返回列表投影 Row 元组及总数）"""
         # 构建基础查询
         base_filters = [Quote.is_deleted == False]  # 默认过滤软删除数据
 
@@ -577,28 +814,17 @@ class QuoteService:
         
         if filter_params.date_to:
             base_filters.append(Quote.created_at <= filter_params.date_to)
+
+        if filter_params.uph_min is not None or filter_params.uph_max is not None:
+            uph_filters = [QuoteItem.uph.isnot(None)]
+            if filter_params.uph_min is not None:
+                uph_filters.append(QuoteItem.uph >= filter_params.uph_min)
+            if filter_params.uph_max is not None:
+                uph_filters.append(QuoteItem.uph <= filter_params.uph_max)
+            base_filters.append(Quote.items.any(and_(*uph_filters)))
         
-        # 计算总数
-        count_query = self.db.query(Quote)
-        if base_filters:
-            count_query = count_query.filter(and_(*base_filters))
-        total = count_query.count()
-
-        # 获取分页数据
-        data_query = self.db.query(Quote).options(
-            selectinload(Quote.pdf_cache)
-        )
-        if base_filters:
-            data_query = data_query.filter(and_(*base_filters))
-            
-        quotes = (
-            data_query.order_by(desc(Quote.created_at))
-            .offset((filter_params.page - 1) * filter_params.size)
-            .limit(filter_params.size)
-            .all()
-        )
-        
-        return quotes, total
+        # 分页数据与总数在同一条投影查询中获取
+        return fetch_quote_list_page(self.db, base_filters, filter_params.page, filter_params.size)
 
     def update_quote(self, quote_id: int, quote_data: QuoteUpdate, user_id: int) -> Optional[Quote]:
         """更新报价单"""
@@ -630,26 +856,18 @@ class QuoteService:
         for field, value in payload.items():
             setattr(quote, field, value)
 
-        # 更新报价明细
+        # 更新报价明细（按明细ID差量更新，金额基于合并后的明细集合计算）
+        subtotal = None
         if items_payload is not None:
-            # 删除旧的明细项
-            self.db.query(QuoteItem).filter(QuoteItem.quote_id == quote_id).delete()
-
-            # 添加新的明细项
-            prepared = self._prepare_items_payload(items_payload)
-            for item_dict in prepared["items"]:
-                item_dict['quote_id'] = quote_id
-                item = QuoteItem(**item_dict)
-                self.db.add(item)
-            self.db.flush()
-        
-        # 重新加载明细（确保关系可用）
-        self.db.refresh(quote)
-        self._apply_financials_to_quote(quote, discount_override, tax_rate_override)
+            existing = self._load_quote_items(quote.id)
+            prepared = self._prepare_items_payload(self._merge_item_updates(items_payload, existing))
+            self._sync_quote_items(quote.id, prepared["items"], existing)
+            subtotal = prepared["subtotal"]
+
+        self._apply_financials_to_quote(quote, discount_override, tax_rate_override, subtotal=subtotal)
 
         quote.updated_at = datetime.now()
         self.db.commit()
-        self.db.refresh(quote)
         return quote
 
     def delete_quote(self, quote_id: int, user_id: int) -> bool:
@@ -683,10 +901,12 @@ class QuoteService:
         return True
 
     def restore_quote(self, quote_id: int, user_id: int) -> bool:
-        """恢复删除的报价单"""
+        """恢复删除的报价单（已归档的报价单先迁回在线表）"""
         # 查询包括软删除的报价单
         quote = self.db.query(Quote).filter(Quote.id == quote_id).first()
-        if not quote or not quote.is_deleted:
+        archive = QuoteArchiveService(self.db)
+        archived = quote is None and archive.is_archived(quote_id)
+        if not archived and (not quote or not quote.is_deleted):
             return False
 
         # 检查权限：只有管理员可以恢复
@@ -694,6 +914,10 @@ class QuoteService:
         if not user or user.role not in ['admin', 'super_admin']:
             raise PermissionError("只有管理员可以恢复已删除的报价单")
 
+        if archived:
+            archive.restore_quotes([quote_id])
+            quote = self.db.query(Quote).filter(Quote.id == quote_id).one()
+
         # 恢复报价单
         quote.is_deleted = False
         quote.deleted_at = None
@@ -755,59 +979,48 @@ class QuoteService:
         return quote
 
     def get_quote_statistics(self, user_id: Optional[int] = None) -> QuoteStatistics:
-        """获取报价单统计信息（基于审批流程的权限控制）"""
-        from sqlalchemy import and_, or_
-
-        base_filters = [Quote.is_deleted == False]
+        """获取报价单统计信息（基于审批流程的权限控制）
 
+        统计范围能用按日汇总表的维度表达时（全部报价单、只看自己创建的）直接读汇总表；
+        manager/admin 还能看到按当前审批人和审批状态筛选的报价单，这两列不是汇总维度，
+        退回对 quotes 做一次按状态分组的聚合
+        """
+        permission_filters = []
         if user_id:
             # 基于审批流程的权限控制
             user = self.db.query(User).filter(User.id == user_id).first()
-            if user:
-                # 超级管理员可以看到所有报价单
-                if user.role == 'super_admin':
-                    pass  # 不添加额外过滤条件
-                else:
-                    # 构建权限过滤条件（使用OR逻辑）
-                    permission_filters = [
-                        Quote.created_by == user_id,  # 1. 自己创建的所有报价单
-                    ]
-
-                    # manager和admin可以看到指定自己为审批人且已提交审批的报价单
-                    if user.role in ['manager', 'admin']:
-                        permission_filters.append(
-                            and_(
-                                Quote.current_approver_id == user_id,
-                                Quote.approval_status.in_(['pending', 'approved', 'rejected'])
-                            )
-                        )
-
-                    # admin还可以看到所有已完成审批的报价单（用于统计）
-                    if user.role == 'admin':
-                        permission_filters.append(
-                            Quote.approval_status.in_(['approved', 'rejected'])
+            # 超级管理员可以看到所有报价单，不添加额外过滤条件
+            if user and user.role != 'super_admin':
+                # 构建权限过滤条件（使用OR逻辑）
+                permission_filters.append(Quote.created_by == user_id)  # 1. 自己创建的所有报价单
+
+                # manager和admin可以看到指定自己为审批人且已提交审批的报价单
+                if user.role in ['manager', 'admin']:
+                    permission_filters.append(
+                        and_(
+                            Quote.current_approver_id == user_id,
+                            Quote.approval_status.in_(['pending', 'approved', 'rejected'])
                         )
+                    )
 
-                    # 使用OR条件组合所有权限过滤
-                    base_filters.append(or_(*permission_filters))
+                # admin还可以看到所有已完成审批的报价单（用于统计）
+                if user.role == 'admin':
+                    permission_filters.append(
+                        Quote.approval_status.in_(['approved', 'rejected'])
+                    )
 
-        # 应用权限过滤构建查询
-        query = self.db.query(Quote).filter(and_(*base_filters))
-
-        # 统计各状态数量
-        total = query.count()
-        draft = query.filter(Quote.status == 'draft').count()
-        pending = query.filter(Quote.status == 'pending').count()
-        approved = query.filter(Quote.status == 'approved').count()
-        rejected = query.filter(Quote.status == 'rejected').count()
-
-        return QuoteStatistics(
-            total=total,
-            draft=draft,
-            pending=pending,
-            approved=approved,
-            rejected=rejected
-        )
+        if len(permission_filters) <= 1:
+            filters = {"created_by": user_id} if permission_filters else {}
+            counts = quote_rollups.rollup_status_counts(self.db, filters)
+        else:
+            rows = self.db.execute(
+                select(Quote.status, func.count())
+                .where(Quote.is_deleted == False, or_(*permission_filters))
+                .group_by(Quote.status)
+            ).all()
+            counts = {(False, status): count for status, count in rows}
+
+        return QuoteStatistics(**quote_rollups.status_breakdown(counts))
 
     def get_approval_records(self, quote_id: int) -> List[ApprovalRecord]:
         """获取报价单审批记录"""
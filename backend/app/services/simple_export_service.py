@@ -7,13 +7,38 @@
 import io
 import json
 import csv
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable, Iterator
 from datetime import datetime
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from fastapi.responses import StreamingResponse, Response
 
-from ..models import Quote
+from ..models import Quote, QuoteItem
+
+CSV_CHUNK_SIZE = 500
+CSV_BOM = "\ufeff"
+
+
+class CsvChunkWriter:
+    """按块写出CSV：行先写入可复用的小缓冲区，flush 时编码为UTF-8字节并清空缓冲区"""
+
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        self._buffer.write(CSV_BOM)
+
+    def writerow(self, row: Iterable[Any]) -> None:
+        self._writer.writerow(row)
+
+    def writerows(self, rows: Iterable[Iterable[Any]]) -> None:
+        self._writer.writerows(rows)
+
+    def flush(self) -> bytes:
+        data = self._buffer.getvalue().encode("utf-8")
+        self._buffer.seek(0)
+        self._buffer.truncate(0)
+        return data
 
 
 class SimpleExportService:
@@ -92,14 +117,19 @@ class SimpleExportService:
         )
 
     def export_quote_csv(self, quote_id: int) -> StreamingResponse:
-        """导出报价单为CSV格式"""
+        """导出报价单为CSV格式（明细分块读取，边查边写）"""
         quote = self.db.query(Quote).filter(Quote.id == quote_id, Quote.is_deleted == False).first()
         if not quote:
             raise HTTPException(status_code=404, detail="报价单不存在")
 
-        # 创建CSV缓冲区
-        output = io.StringIO()
-        writer = csv.writer(output)
+        return StreamingResponse(
+            self._iter_quote_csv(quote),
+            media_type="text/csv",
+            headers={"Content-Disposition": f"attachment; filename=quote_{quote.quote_number}.csv"}
+        )
+
+    def _iter_quote_csv(self, quote: Quote) -> Iterator[bytes]:
+        writer = CsvChunkWriter()
 
         # 写入基本信息
         writer.writerow(["基本信息"])
@@ -124,25 +154,29 @@ class SimpleExportService:
             if quote.customer_address:
                 writer.writerow(["地址", quote.customer_address])
             writer.writerow([])
-
-        # 写入报价明细
-        if quote.items:
-            writer.writerow(["报价明细"])
-            writer.writerow(["序号", "项目名称", "设备类型", "供应商", "设备型号", "数量", "单位", "单价", "小计"])
-            
-            for i, item in enumerate(quote.items, 1):
-                display_unit_price = item.adjusted_price if item.adjusted_price is not None else item.unit_price
+        yield writer.flush()
+
+        # 写入报价明细，每读取一块明细输出一次
+        index = 0
+        for partition in self._iter_item_partitions(QuoteItem.quote_id == quote.id):
+            if index == 0:
+                writer.writerow(["报价明细"])
+                writer.writerow(["序号", "项目名称", "设备类型", "供应商", "设备型号", "数量", "单位", "单价", "小计"])
+            for item in partition:
+                index += 1
                 writer.writerow([
-                    i,
+                    index,
                     item.item_name,
                     item.machine_type or '',
                     item.supplier or '',
                     item.machine_model or '',
                     item.quantity,
                     item.unit,
-                    display_unit_price,
+                    self._display_unit_price(item),
                     item.total_price
                 ])
+            yield writer.flush()
+        if index:
             writer.writerow([])
 
         # 写入金额汇总
@@ -163,18 +197,7 @@ class SimpleExportService:
                 writer.writerow(["付款条件", quote.payment_terms])
             if quote.notes:
                 writer.writerow(["备注", quote.notes])
-
-        # 准备下载
-        output.seek(0)
-        csv_content = output.getvalue()
-        output.close()
-
-        # 返回CSV响应
-        return StreamingResponse(
-            io.StringIO(csv_content),
-            media_type="text/csv",
-            headers={"Content-Disposition": f"attachment; filename=quote_{quote.quote_number}.csv"}
-        )
+        yield writer.flush()
 
     def export_quote_html(self, quote_id: int) -> Response:
         """导出报价单为HTML格式"""
@@ -344,56 +367,152 @@ class SimpleExportService:
         )
 
     def export_quotes_summary_csv(self, quote_ids: list = None, status: str = None) -> StreamingResponse:
-        """导出报价单汇总为CSV格式"""
-        # 构建查询条件
-        query = self.db.query(Quote)
-        
+        """导出报价单汇总为CSV格式（报价单分块读取，边查边写）"""
+        filters = self._summary_filters(quote_ids, status)
+        self._ensure_quotes_exist(filters)
+
+        return StreamingResponse(
+            self._iter_summary_csv(filters),
+            media_type="text/csv",
+            headers={"Content-Disposition": f"attachment; filename=quotes_summary_{datetime.now().strftime('%Y%m%d')}.csv"}
+        )
+
+    def export_quotes_items_csv(self, quote_ids: list = None, status: str = None) -> StreamingResponse:
+        """导出多个报价单的明细为CSV格式，每行一条明细并附带所属报价单信息"""
+        filters = self._summary_filters(quote_ids, status)
+        self._ensure_quotes_exist(filters)
+
+        return StreamingResponse(
+            self._iter_items_csv(filters),
+            media_type="text/csv",
+            headers={"Content-Disposition": f"attachment; filename=quotes_items_{datetime.now().strftime('%Y%m%d')}.csv"}
+        )
+
+    def _summary_filters(self, quote_ids: list = None, status: str = None) -> list:
         if quote_ids:
-            query = query.filter(Quote.id.in_(quote_ids))
-        elif status:
-            query = query.filter(Quote.status == status)
-        
-        quotes = query.order_by(Quote.created_at.desc()).all()
-        
-        if not quotes:
+            return [Quote.id.in_(quote_ids)]
+        if status:
+            return [Quote.status == status]
+        return []
+
+    def _ensure_quotes_exist(self, filters: list) -> None:
+        """流式响应开始后无法再返回404，因此先做一次存在性检查"""
+        exists = self.db.execute(select(Quote.id).where(*filters).limit(1)).first()
+        if exists is None:
             raise HTTPException(status_code=404, detail="没有找到符合条件的报价单")
 
-        # 创建CSV缓冲区
-        output = io.StringIO()
-        writer = csv.writer(output)
-
-        # 写入标题行
+    def _iter_summary_csv(self, filters: list) -> Iterator[bytes]:
+        writer = CsvChunkWriter()
         writer.writerow([
             "报价单号", "标题", "客户名称", "报价类型", "状态", "总金额", "币种",
             "创建时间", "提交时间", "审批时间", "创建人"
         ])
-
-        # 写入数据行
-        for quote in quotes:
-            writer.writerow([
-                quote.quote_number,
-                quote.title,
-                quote.customer_name,
-                self._get_quote_type_display(quote.quote_type),
-                self._get_status_display(quote.status),
-                quote.total_amount,
-                quote.currency,
-                quote.created_at.strftime('%Y-%m-%d'),
-                quote.submitted_at.strftime('%Y-%m-%d') if quote.submitted_at else '',
-                quote.approved_at.strftime('%Y-%m-%d') if quote.approved_at else '',
-                f"用户{quote.created_by}"
-            ])
-
-        # 准备下载
-        output.seek(0)
-        csv_content = output.getvalue()
-        output.close()
-
-        return StreamingResponse(
-            io.StringIO(csv_content),
-            media_type="text/csv",
-            headers={"Content-Disposition": f"attachment; filename=quotes_summary_{datetime.now().strftime('%Y%m%d')}.csv"}
+        yield writer.flush()
+
+        stmt = (
+            select(
+                Quote.quote_number,
+                Quote.title,
+                Quote.customer_name,
+                Quote.quote_type,
+                Quote.status,
+                Quote.total_amount,
+                Quote.currency,
+                Quote.created_at,
+                Quote.submitted_at,
+                Quote.approved_at,
+                Quote.created_by,
+            )
+            .where(*filters)
+            .order_by(Quote.created_at.desc())
+            .execution_options(yield_per=CSV_CHUNK_SIZE)
         )
+        result = self.db.execute(stmt)
+        try:
+            for partition in result.partitions():
+                writer.writerows([
+                    quote.quote_number,
+                    quote.title,
+                    quote.customer_name,
+                    self._get_quote_type_display(quote.quote_type),
+                    self._get_status_display(quote.status),
+                    quote.total_amount,
+                    quote.currency,
+                    quote.created_at.strftime('%Y-%m-%d'),
+                    quote.submitted_at.strftime('%Y-%m-%d') if quote.submitted_at else '',
+                    quote.approved_at.strftime('%Y-%m-%d') if quote.approved_at else '',
+                    f"用户{quote.created_by}"
+                ] for quote in partition)
+                yield writer.flush()
+        finally:
+            result.close()
+
+    def _iter_items_csv(self, filters: list) -> Iterator[bytes]:
+        writer = CsvChunkWriter()
+        writer.writerow([
+            "报价单号", "客户名称", "报价类型", "状态", "币种",
+            "项目名称", "设备类型", "供应商", "设备型号", "配置", "数量", "单位", "单价", "小计"
+        ])
+        yield writer.flush()
+
+        for partition in self._iter_item_partitions(*filters, with_quote=True):
+            writer.writerows([
+                item.quote_number,
+                item.customer_name,
+                self._get_quote_type_display(item.quote_type),
+                self._get_status_display(item.status),
+                item.currency,
+                item.item_name,
+                item.machine_type or '',
+                item.supplier or '',
+                item.machine_model or '',
+                item.configuration or '',
+                item.quantity,
+                item.unit,
+                self._display_unit_price(item),
+                item.total_price
+            ] for item in partition)
+            yield writer.flush()
+
+    def _iter_item_partitions(self, *filters, with_quote: bool = False) -> Iterator[list]:
+        """以 yield_per 分块读取明细列；with_quote 时联表带出报价单列并按报价单分组排序"""
+        columns = [
+            QuoteItem.item_name,
+            QuoteItem.machine_type,
+            QuoteItem.supplier,
+            QuoteItem.machine_model,
+            QuoteItem.configuration,
+            QuoteItem.quantity,
+            QuoteItem.unit,
+            QuoteItem.unit_price,
+            QuoteItem.adjusted_price,
+            QuoteItem.total_price,
+        ]
+        stmt = select(*columns)
+        if with_quote:
+            stmt = (
+                stmt.add_columns(
+                    Quote.quote_number,
+                    Quote.customer_name,
+                    Quote.quote_type,
+                    Quote.status,
+                    Quote.currency,
+                )
+                .join(Quote, Quote.id == QuoteItem.quote_id)
+                .order_by(Quote.created_at.desc(), Quote.id.desc())
+            )
+        stmt = stmt.where(*filters).order_by(QuoteItem.id).execution_options(yield_per=CSV_CHUNK_SIZE)
+
+        result = self.db.execute(stmt)
+        try:
+            for partition in result.partitions():
+                yield partition
+        finally:
+            result.close()
+
+    @staticmethod
+    def _display_unit_price(item) -> float:
+        return item.adjusted_price if item.adjusted_price is not None else item.unit_price
 
     def _get_quote_type_display(self, quote_type: str) -> str:
         """获取报价类型显示名称"""
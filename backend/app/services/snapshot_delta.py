@@ -0,0 +1,86 @@
+"""
+快照增量编码
+在两个 JSON 文档之间生成 RFC 6902 JSON Patch（只包含 add / remove / replace），
+并把补丁按顺序应用回文档。对象按键递归比较，数组按下标逐项比较、尾部追加或截断，
+报价明细只改一两行时补丁只包含这几行的变化字段
+"""
+
+import json
+from typing import Any, Dict, List
+
+
+def canonical_json(data: Any) -> str:
+    """稳定序列化：键排序、紧凑分隔符，哈希与存储共用"""
+    return json.dumps(data, sort_keys=True, separators=(",", ":"))
+
+
+def _escape(token) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def json_diff(old: Any, new: Any, path: str = "") -> List[Dict]:
+    """生成把 old 变为 new 的补丁操作列表"""
+    if type(old) is not type(new):
+        return [{"op": "replace", "path": path, "value": new}]
+
+    if isinstance(old, dict):
+        ops = []
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in old:
+                ops.append({"op": "add", "path": child, "value": value})
+            else:
+                ops.extend(json_diff(old[key], value, child))
+        return ops
+
+    if isinstance(old, list):
+        ops = []
+        common = min(len(old), len(new))
+        for index in range(common):
+            ops.extend(json_diff(old[index], new[index], f"{path}/{index}"))
+        for index in range(len(old) - 1, common - 1, -1):
+            ops.append({"op": "remove", "path": f"{path}/{index}"})
+        for value in new[common:]:
+            ops.append({"op": "add", "path": f"{path}/-", "value": value})
+        return ops
+
+    if old != new:
+        return [{"op": "replace", "path": path, "value": new}]
+    return []
+
+
+def apply_patch(document: Any, ops: List[Dict]) -> Any:
+    """按顺序应用补丁，原地修改并返回文档（根路径替换时返回新值）"""
+    for op in ops:
+        path = op["path"]
+        if not path:
+            document = op["value"]
+            continue
+
+        tokens = [_unescape(token) for token in path[1:].split("/")]
+        parent = document
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        last = tokens[-1]
+
+        if isinstance(parent, list):
+            if op["op"] == "remove":
+                del parent[int(last)]
+            elif last == "-":
+                parent.append(op["value"])
+            elif op["op"] == "add":
+                parent.insert(int(last), op["value"])
+            else:
+                parent[int(last)] = op["value"]
+        elif op["op"] == "remove":
+            del parent[last]
+        else:
+            parent[last] = op["value"]
+    return document
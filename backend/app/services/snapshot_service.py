@@ -1,13 +1,18 @@
+import json
 from typing import List, Optional
 from sqlalchemy.orm import Session
 from datetime import datetime
 
 from ..models import Quote, QuoteSnapshot, EffectiveQuote
 from .rules_loader import get_rules
+from .snapshot_delta import apply_patch, canonical_json, json_diff
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 每隔若干个增量快照写入一个完整关键帧，还原时最多应用 KEYFRAME_INTERVAL - 1 个补丁
+KEYFRAME_INTERVAL = 8
+
 class SnapshotService:
     """报价单快照服务"""
     
@@ -35,13 +40,42 @@ class SnapshotService:
             QuoteSnapshot: 创建的快照对象
         """
         try:
-            # 使用模型的类方法创建快照
-            snapshot = QuoteSnapshot.from_quote(
-                quote=quote,
+            data = QuoteSnapshot.quote_data(quote)
+            data_json = canonical_json(data)
+            data_hash = QuoteSnapshot.hash_json(data_json)
+            approvers_json = json.dumps(approvers)
+
+            latest = self.db.query(QuoteSnapshot).filter(
+                QuoteSnapshot.quote_id == quote.id
+            ).order_by(QuoteSnapshot.id.desc()).first()
+
+            # 与上一快照完全相同的重复提交直接复用
+            if (
+                latest is not None
+                and latest.hash == data_hash
+                and latest.template_id == template_id
+                and latest.approvers == approvers_json
+            ):
+                logger.info(f"快照未变化，复用: quote_id={quote.id}, snapshot_id={latest.id}")
+                return latest
+
+            snapshot = QuoteSnapshot(
+                quote_id=quote.id,
+                hash=data_hash,
                 template_id=template_id,
-                approvers=approvers,
-                creator_id=creator_id
+                approvers=approvers_json,
+                created_by=creator_id,
             )
+            delta_json = None
+            if latest is not None and latest.chain_depth + 1 < KEYFRAME_INTERVAL:
+                delta_json = canonical_json(json_diff(self.get_snapshot_data(latest), data))
+            if delta_json is not None and len(delta_json) < len(data_json):
+                snapshot.delta = delta_json
+                snapshot.base_id = latest.id
+                snapshot.chain_depth = latest.chain_depth + 1
+            else:
+                snapshot.data = data_json
+                snapshot.chain_depth = 0
             
             # 保存到数据库
             self.db.add(snapshot)
@@ -62,6 +96,30 @@ class SnapshotService:
             QuoteSnapshot.id == snapshot_id
         ).first()
     
+    def get_snapshot_data(self, snapshot: QuoteSnapshot) -> dict:
+        """还原快照的完整数据：一次查询取回到最近关键帧为止的链，再依次应用补丁"""
+        if snapshot.is_keyframe:
+            return json.loads(snapshot.data)
+
+        chain = self.db.query(QuoteSnapshot).filter(
+            QuoteSnapshot.quote_id == snapshot.quote_id,
+            QuoteSnapshot.id <= snapshot.id,
+        ).order_by(QuoteSnapshot.id.desc()).limit(snapshot.chain_depth + 1).all()
+        by_id = {item.id: item for item in chain}
+
+        deltas = []
+        current = snapshot
+        while not current.is_keyframe:
+            deltas.append(current.delta)
+            current = by_id.get(current.base_id) or self.get_snapshot(current.base_id)
+            if current is None:
+                raise ValueError(f"快照链断裂: snapshot_id={snapshot.id}")
+
+        data = json.loads(current.data)
+        for delta in reversed(deltas):
+            data = apply_patch(data, json.loads(delta))
+        return data
+
     def get_snapshots_by_quote(self, quote_id: int) -> List[QuoteSnapshot]:
         """获取报价单的所有快照"""
         return self.db.query(QuoteSnapshot).filter(
@@ -75,8 +133,8 @@ class SnapshotService:
             return False
         
         try:
-            # 重新计算哈希值并对比
-            calculated_hash = snapshot.calc_hash()
+            # 还原完整数据后重新计算哈希值并对比
+            calculated_hash = QuoteSnapshot.hash_json(canonical_json(self.get_snapshot_data(snapshot)))
             return calculated_hash == snapshot.hash
         except Exception as e:
             logger.error(f"验证快照完整性失败: snapshot_id={snapshot_id}, error={e}")
@@ -168,17 +226,26 @@ class SnapshotService:
             if len(snapshots) <= keep_count:
                 return 0
             
+            # 生效报价单引用的快照同样保留
+            referenced = {
+                snapshot_id for (snapshot_id,) in self.db.query(EffectiveQuote.snapshot_id).filter(
+                    EffectiveQuote.quote_id == quote_id
+                )
+            }
+            kept = snapshots[:keep_count] + [snapshot for snapshot in snapshots[keep_count:] if snapshot.id in referenced]
+
+            # 保留快照还原时依赖的增量链上的快照不能删除
+            by_id = {snapshot.id: snapshot for snapshot in snapshots}
+            required = set()
+            for snapshot in kept:
+                while snapshot is not None and snapshot.id not in required:
+                    required.add(snapshot.id)
+                    snapshot = by_id.get(snapshot.base_id)
+
             # 删除超出保留数量的快照
-            snapshots_to_delete = snapshots[keep_count:]
             deleted_count = 0
-            
-            for snapshot in snapshots_to_delete:
-                # 检查是否有生效报价单引用此快照
-                effective_count = self.db.query(EffectiveQuote).filter(
-                    EffectiveQuote.snapshot_id == snapshot.id
-                ).count()
-                
-                if effective_count == 0:
+            for snapshot in snapshots[keep_count:]:
+                if snapshot.id not in required:
                     self.db.delete(snapshot)
                     deleted_count += 1
             
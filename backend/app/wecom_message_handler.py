@@ -6,11 +6,15 @@
 import xml.etree.ElementTree as ET
 import time
 import hashlib
-import requests
 import json
-from typing import Dict, Optional, Any, List
+from typing import Callable, Dict, Optional, Any, List
 from datetime import datetime
 
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.services.machine_search import CatalogSearchIndex, catalog_search_cache
+
 class WeComMessage:
     """企业微信消息类"""
     
@@ -43,8 +47,9 @@ class WeComMessage:
 class MessageHandler:
     """消息处理器"""
     
-    def __init__(self, corp_id: str):
+    def __init__(self, corp_id: str, session_factory: Callable[[], Session] = SessionLocal):
         self.corp_id = corp_id
+        self.session_factory = session_factory
         self.commands = {
             '/help': self.handle_help,
             '/帮助': self.handle_help,
@@ -118,7 +123,7 @@ class MessageHandler:
 • /帮助 或 /help - 显示此帮助信息
 • /查询 [关键词] - 查询设备信息
 • /设备 [名称] - 查看设备详情
-• /供应商 - 查看所有供应商列表
+• /供应商 [关键词] - 查看供应商列表，可按名称筛选
 
 示例：
 • /查询 J750
@@ -128,38 +133,32 @@ class MessageHandler:
 💡 提示：直接输入设备名称也可以进行查询"""
         return help_text
     
+    def _search_index(self) -> CatalogSearchIndex:
+        """进程内机器/供应商索引，目录未变化时不访问数据库"""
+        db = self.session_factory()
+        try:
+            return catalog_search_cache.get(db)
+        finally:
+            db.close()
+
     def handle_search(self, params: str) -> str:
         """处理查询命令"""
         if not params:
             return "请提供查询关键词。例如：/查询 J750"
         
         try:
-            # 调用API查询设备
-            from app.config import settings
-            api_base_url = settings.API_BASE_URL if hasattr(settings, 'API_BASE_URL') else "http://localhost:8000"
-            response = requests.get(f'{api_base_url}/api/v1/machines/')
-            if response.status_code == 200:
-                machines = response.json()
-                
-                # 过滤匹配的设备
-                matched = [m for m in machines if params.lower() in m['name'].lower()]
+            matched = self._search_index().machines.search(params)
+            if matched:
+                result = f"🔍 找到 {len(matched)} 个匹配的设备：\n\n"
+                for m in matched[:5]:  # 最多显示5个
+                    result += f"• {m.name} - {m.supplier_name or '未知'}\n"
+                    result += f"  价格: {m.base_hourly_rate or 0} {m.currency or 'RMB'}/小时\n\n"
                 
-                if matched:
-                    result = f"🔍 找到 {len(matched)} 个匹配的设备：\n\n"
-                    for m in matched[:5]:  # 最多显示5个
-                        supplier = m.get('supplier', {}).get('name', '未知')
-                        rate = m.get('base_hourly_rate', 0)
-                        currency = m.get('currency', 'RMB')
-                        result += f"• {m['name']} - {supplier}\n"
-                        result += f"  价格: {rate} {currency}/小时\n\n"
-                    
-                    if len(matched) > 5:
-                        result += f"... 还有 {len(matched) - 5} 个结果"
-                    return result
-                else:
-                    return f"未找到包含 \"{params}\" 的设备"
+                if len(matched) > 5:
+                    result += f"... 还有 {len(matched) - 5} 个结果"
+                return result
             else:
-                return "查询失败，请稍后重试"
+                return f"未找到包含 \"{params}\" 的设备"
         except Exception as e:
             print(f"查询出错: {e}")
             return "查询服务暂时不可用"
@@ -170,65 +169,47 @@ class MessageHandler:
             return "请提供设备名称。例如：/设备 J750"
         
         try:
-            # 调用API查询设备
-            from app.config import settings
-            api_base_url = settings.API_BASE_URL if hasattr(settings, 'API_BASE_URL') else "http://localhost:8000"
-            response = requests.get(f'{api_base_url}/api/v1/machines/')
-            if response.status_code == 200:
-                machines = response.json()
+            machines = self._search_index().machines
+            device = machines.lookup(params)
+            
+            if device:
+                result = f"📋 设备详情：{device.name}\n\n"
+                result += f"• 供应商: {device.supplier_name or '未知'}\n"
+                result += f"• 类型: {device.machine_type_name or '未知'}\n"
+                result += f"• 基础价格: {device.base_hourly_rate or 0} {device.currency or 'RMB'}/小时\n"
+                result += f"• 折扣率: {device.discount_rate if device.discount_rate is not None else 1.0}\n"
+                result += f"• 汇率: {device.exchange_rate if device.exchange_rate is not None else 1.0}\n"
+                result += f"• 状态: {'激活' if device.active else '未激活'}\n"
                 
-                # 查找完全匹配的设备
-                device = next((m for m in machines if m['name'].lower() == params.lower()), None)
+                if device.description:
+                    result += f"• 描述: {device.description}\n"
                 
-                if device:
-                    supplier = device.get('supplier', {})
-                    supplier_name = supplier.get('name', '未知')
-                    machine_type = supplier.get('machine_type', {}).get('name', '未知')
-                    
-                    result = f"📋 设备详情：{device['name']}\n\n"
-                    result += f"• 供应商: {supplier_name}\n"
-                    result += f"• 类型: {machine_type}\n"
-                    result += f"• 基础价格: {device.get('base_hourly_rate', 0)} {device.get('currency', 'RMB')}/小时\n"
-                    result += f"• 折扣率: {device.get('discount_rate', 1.0)}\n"
-                    result += f"• 汇率: {device.get('exchange_rate', 1.0)}\n"
-                    result += f"• 状态: {'激活' if device.get('active', False) else '未激活'}\n"
-                    
-                    if device.get('description'):
-                        result += f"• 描述: {device['description']}\n"
-                    
-                    return result
-                else:
-                    # 模糊匹配
-                    matched = [m for m in machines if params.lower() in m['name'].lower()]
-                    if matched:
-                        return f"未找到完全匹配的设备。\n\n您是否要查找：\n" + \
-                               "\n".join([f"• {m['name']}" for m in matched[:3]])
-                    else:
-                        return f"未找到设备 \"{params}\""
+                return result
             else:
-                return "查询失败，请稍后重试"
+                # 模糊匹配
+                matched = machines.search(params, limit=3)
+                if matched:
+                    return f"未找到完全匹配的设备。\n\n您是否要查找：\n" + \
+                           "\n".join([f"• {m.name}" for m in matched])
+                else:
+                    return f"未找到设备 \"{params}\""
         except Exception as e:
             print(f"查询出错: {e}")
             return "查询服务暂时不可用"
     
     def handle_supplier(self, params: str) -> str:
-        """处理供应商查询命令"""
+        """处理供应商查询命令，带关键词时只列出匹配的供应商"""
         try:
-            # 调用API获取供应商列表
-            from app.config import settings
-            api_base_url = settings.API_BASE_URL if hasattr(settings, 'API_BASE_URL') else "http://localhost:8000"
-            response = requests.get(f'{api_base_url}/api/v1/suppliers/')
-            if response.status_code == 200:
-                suppliers = response.json()
-                
-                result = "📦 供应商列表：\n\n"
-                for idx, s in enumerate(suppliers, 1):
-                    machine_type = s.get('machine_type', {}).get('name', '未知')
-                    result += f"{idx}. {s['name']} - {machine_type}\n"
-                
-                return result
-            else:
-                return "获取供应商列表失败，请稍后重试"
+            index = self._search_index()
+            suppliers = index.suppliers.search(params) if params else index.supplier_list
+            if params and not suppliers:
+                return f"未找到供应商 \"{params}\""
+            
+            result = "📦 供应商列表：\n\n"
+            for idx, s in enumerate(suppliers, 1):
+                result += f"{idx}. {s.name} - {s.machine_type_name or '未知'}\n"
+            
+            return result
         except Exception as e:
             print(f"查询出错: {e}")
             return "查询服务暂时不可用"
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+批量计价基准
+
+构造若干机器及其配置、板卡，生成 N 个报价方案（少量机器/配置/板卡组合 × 多个测试小时数），
+对比逐个调用 calculate_quotation 与一次 calculate_quotations 的耗时，并核对两者结果逐分一致。
+用法: python benchmarks/bench_batch_pricing.py [方案数] [机器数]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, schemas
+from app.database import Base
+from app.models import CardConfig, Configuration, Machine
+
+
+def seed_catalog(db, machine_count: int, rng: random.Random) -> list:
+    machines = []
+    for index in range(machine_count):
+        machine = Machine(
+            name=f"BENCH-{index}",
+            base_hourly_rate=round(rng.uniform(50, 300), 2),
+            discount_rate=rng.choice([1.0, 0.9]),
+            exchange_rate=7.2,
+            currency=rng.choice(["RMB", "USD"]),
+        )
+        machine.configurations = [Configuration(name=f"C{n}", additional_rate=10.0 * n) for n in range(4)]
+        machine.card_configs = [
+            CardConfig(part_number=f"PN{n}", unit_price=round(rng.uniform(1, 30), 2), currency=rng.choice(["RMB", "USD"]))
+            for n in range(12)
+        ]
+        machines.append(machine)
+    db.add_all(machines)
+    db.commit()
+    return machines
+
+
+def build_requests(machines: list, count: int, rng: random.Random) -> list:
+    """每 10 个方案共用一组 (机器, 配置, 板卡)，只改变测试小时数"""
+    requests = []
+    while len(requests) < count:
+        machine = rng.choice(machines)
+        details = {
+            "configuration_ids": [config.id for config in machine.configurations if rng.random() < 0.5],
+            "card_config_ids": [card.id for card in machine.card_configs if rng.random() < 0.5],
+        }
+        for hours in range(10):
+            requests.append(schemas.QuotationRequest(machine_id=machine.id, test_hours=8 + hours * 4, details=details))
+    return requests[:count]
+
+
+def main() -> int:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    machine_count = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    rng = random.Random(44)
+    requests = build_requests(seed_catalog(db, machine_count, rng), count, rng)
+
+    crud.calculate_quotation(db, requests[0])  # 预热计价目录
+
+    rounds = 20
+    started = time.perf_counter()
+    for _ in range(rounds):
+        singles = [crud.calculate_quotation(db, request) for request in requests]
+    single_elapsed = (time.perf_counter() - started) / rounds
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        batch = crud.calculate_quotations(db, requests)
+    batch_elapsed = (time.perf_counter() - started) / rounds
+
+    mismatches = sum(1 for single, (total, _) in zip(singles, batch) if single != total)
+    print(f"📊 批量计价基准: {count} 个方案，{machine_count} 台机器")
+    print(f"逐个计价={single_elapsed * 1000:8.2f}ms 批量计价={batch_elapsed * 1000:8.2f}ms")
+    print(f"结果不一致的方案数={mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
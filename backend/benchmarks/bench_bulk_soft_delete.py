@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+批量软删除性能基准：逐个 ORM 对象修改 vs 按块集合更新
+
+在内存 SQLite 中生成报价单，分别用旧写法（加载完整 Quote 后逐行赋值再 flush）和
+QuoteBulkService（每块一条查询 + 一条 UPDATE）删除全部报价单，对比耗时与 SQL 条数。
+用法: python benchmarks/bench_bulk_soft_delete.py [报价单数量]
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Quote, User
+from app.services.quote_bulk_operations import QuoteBulkService
+
+
+def build_session(quote_count: int):
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+
+    user = User(userid="admin", name="管理员", role="admin")
+    session.add(user)
+    session.commit()
+
+    session.execute(
+        insert(Quote),
+        [
+            {
+                "quote_number": f"CIS-KS{i:09d}",
+                "title": f"报价单 {i}",
+                "quote_type": "tooling",
+                "customer_name": f"客户{i % 100}",
+                "status": "draft",
+                "total_amount": 100.0,
+                "created_by": user.id,
+                "created_at": datetime(2026, 1, 1),
+                "is_deleted": False,
+            }
+            for i in range(quote_count)
+        ],
+    )
+    session.commit()
+    return engine, session, user.id
+
+
+def legacy(session, quote_ids, operator_id):
+    quotes = session.query(Quote).filter(Quote.id.in_(quote_ids), Quote.is_deleted == False).all()
+    for quote in quotes:
+        quote.is_deleted = True
+        quote.deleted_at = datetime.utcnow()
+        quote.deleted_by = operator_id
+    session.commit()
+    return len(quotes)
+
+
+def bulk(session, quote_ids, operator_id):
+    results = QuoteBulkService(session).soft_delete(quote_ids, operator_id)
+    session.commit()
+    return sum(item["result"] == "deleted" for item in results)
+
+
+def measure(name: str, func, quote_count: int) -> None:
+    engine, session, operator_id = build_session(quote_count)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    quote_ids = [str(i) for i in range(1, quote_count + 1)]
+
+    started = time.perf_counter()
+    deleted = func(session, quote_ids, operator_id)
+    elapsed = time.perf_counter() - started
+    print(f"{name:<8} 删除={deleted:6d} 耗时={elapsed:7.3f}s SQL 条数={len(statements):6d}")
+    session.close()
+    engine.dispose()
+
+
+def main() -> int:
+    quote_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    print(f"📊 批量软删除基准: {quote_count} 个报价单")
+    measure("ORM逐行", legacy, quote_count)
+    measure("集合更新", bulk, quote_count)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
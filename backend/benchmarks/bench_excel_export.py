@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Excel 导出性能基准：pandas DataFrame 写入 vs openpyxl write-only 流式写入
+
+生成指定行数的报价明细行，对比两种写法的耗时和峰值内存。
+用法: python benchmarks/bench_excel_export.py [行数]
+"""
+
+import asyncio
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.xlsx_stream_export import StreamingXlsxWriter
+
+HEADERS = ['序号', '项目名称', '项目描述', '设备类型', '供应商', '设备型号', '配置', '数量', '单位', '单价', '小计']
+
+
+def iter_rows(row_count: int):
+    for i in range(row_count):
+        yield [i + 1, f'项目{i}', f'描述{i}', '测试机', f'供应商{i % 20}', f'M{i % 50}', '标准配置', 1, '小时', 100.0 + i % 7, 100.0]
+
+
+def legacy_pandas(row_count: int) -> int:
+    import pandas as pd
+
+    buffer = io.BytesIO()
+    frame = pd.DataFrame([dict(zip(HEADERS, row)) for row in iter_rows(row_count)])
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        frame.to_excel(writer, sheet_name='报价明细', index=False)
+        sheet = writer.book['报价明细']
+        for column in sheet.columns:
+            longest = max(len(str(cell.value)) for cell in column if cell.value is not None)
+            sheet.column_dimensions[column[0].column_letter].width = min(longest + 2, 20)
+    return len(buffer.getvalue())
+
+
+def streaming(row_count: int) -> int:
+    writer = StreamingXlsxWriter()
+    writer.add_sheet('报价明细', HEADERS, iter_rows(row_count), max_width=20)
+    response = writer.to_response('bench.xlsx')
+
+    async def consume() -> int:
+        return sum([len(chunk) async for chunk in response.body_iterator])
+
+    return asyncio.run(consume())
+
+
+def measure(name: str, func, row_count: int) -> None:
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = func(row_count)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<14} 文件大小={size / 1024:9.1f}KB 耗时={elapsed:7.2f}s 峰值内存={peak / 1024 / 1024:8.1f}MB")
+
+
+def main() -> int:
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    print(f"📊 Excel 导出基准: {row_count} 行明细")
+    try:
+        measure("pandas", legacy_pandas, row_count)
+    except ImportError:
+        print("⚠️ 未安装 pandas，跳过旧实现对比")
+    measure("write-only", streaming, row_count)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+报价金额定点引擎基准
+
+生成 N 行明细（默认 1 万行），分别用逐行 Decimal 与定点引擎计算整单明细金额和合计，
+对比耗时并核对两者结果完全一致。
+用法: python benchmarks/bench_money_engine.py [明细行数]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.quote_service import QuoteService
+
+
+def build_items(count: int, rng: random.Random) -> list:
+    return [
+        {
+            "item_name": f"工序{i}",
+            "quantity": rng.choice([1, 2, 4, 0.5, 1000]),
+            "unit_price": round(rng.uniform(0, 500), rng.randrange(0, 5)),
+            "adjusted_price": rng.choice([None, None, None, round(rng.uniform(0, 500), 2)]),
+        }
+        for i in range(count)
+    ]
+
+
+def timed(function, rounds: int):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        result = function()
+    return result, (time.perf_counter() - started) / rounds
+
+
+def main() -> int:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    items = build_items(count, random.Random(45))
+    service = QuoteService(db=None)
+    rounds = 10
+
+    vectorized, vectorized_elapsed = timed(lambda: service._prepare_items_payload([dict(item) for item in items]), rounds)
+    service.VECTORIZE_MIN_ITEMS = count + 1
+    looped, looped_elapsed = timed(lambda: service._prepare_items_payload([dict(item) for item in items]), rounds)
+
+    engine_service = QuoteService(db=None)
+    cents, engine_elapsed = timed(
+        lambda: engine_service._vectorized_line_totals(
+            [item["quantity"] for item in items],
+            [item["adjusted_price"] if item["adjusted_price"] is not None else item["unit_price"] for item in items],
+        ),
+        rounds,
+    )
+
+    print(f"📊 金额计算基准: {count} 行明细")
+    print(f"逐行 Decimal={looped_elapsed * 1000:8.2f}ms 定点引擎={vectorized_elapsed * 1000:8.2f}ms（含明细字典处理）")
+    print(f"仅行金额计算（定点引擎）={engine_elapsed * 1000:8.2f}ms")
+    same = vectorized == looped and cents is not None
+    print(f"结果一致={same}")
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
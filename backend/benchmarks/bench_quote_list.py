@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+报价单列表性能基准：ORM 对象加懒加载姓名 vs 列表投影
+
+在内存 SQLite 中生成报价单，对比两种分页取数方式每页的 SQL 条数、耗时和每行内存。
+用法: python benchmarks/bench_quote_list.py [报价单数量] [每页大小]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, desc, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Quote, User
+from app.services.quote_list_projection import fetch_quote_list_page
+
+
+def build_session(quote_count: int):
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+
+    users = [User(userid=f"user{i}", name=f"用户{i}", role="user") for i in range(50)]
+    session.add_all(users)
+    session.commit()
+
+    base_time = datetime(2026, 1, 1)
+    session.execute(
+        insert(Quote),
+        [
+            {
+                "quote_number": f"CIS-KS{i:09d}",
+                "title": f"报价单 {i}",
+                "quote_type": "mass_production",
+                "customer_name": f"客户{i % 200}",
+                "currency": "CNY",
+                "total_amount": float(i),
+                "status": "draft",
+                "approval_status": "not_submitted",
+                "version": "V1.0",
+                "description": "x" * 500,
+                "notes": "y" * 500,
+                "created_by": users[i % len(users)].id,
+                "created_at": base_time + timedelta(minutes=i),
+                "updated_at": base_time + timedelta(minutes=i),
+                "is_deleted": i % 10 == 0,
+                "deleted_by": users[(i + 1) % len(users)].id if i % 10 == 0 else None,
+            }
+            for i in range(quote_count)
+        ],
+    )
+    session.commit()
+    return engine, session
+
+
+def orm_page(session, size: int):
+    quotes = session.query(Quote).order_by(desc(Quote.created_at)).limit(size).all()
+    total = session.query(Quote).count()
+    return [
+        (q.id, q.quote_number, q.creator.name if q.creator else None, q.deleter.name if q.deleter else None)
+        for q in quotes
+    ], total
+
+
+def projection_page(session, size: int):
+    rows, total = fetch_quote_list_page(session, [], 1, size)
+    return [(row.id, row.quote_number, row.creator_name, row.deleter_name) for row in rows], total
+
+
+def measure(name: str, engine, session, func, size: int) -> None:
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    session.expunge_all()
+    event.listen(engine, "before_cursor_execute", record)
+    tracemalloc.start()
+    started = time.perf_counter()
+    rows, total = func(session, size)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    event.remove(engine, "before_cursor_execute", record)
+
+    print(
+        f"{name:<12} 行数={len(rows):<5} 总数={total:<7} SQL条数={len(statements):<4} "
+        f"耗时={elapsed * 1000:8.2f}ms 每行峰值内存={peak / max(len(rows), 1):8.0f}B"
+    )
+
+
+def main() -> int:
+    quote_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    print(f"📊 报价单列表基准: {quote_count} 条报价单, 每页 {size} 条")
+    engine, session = build_session(quote_count)
+    measure("ORM+懒加载", engine, session, orm_page, size)
+    measure("列表投影", engine, session, projection_page, size)
+    session.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
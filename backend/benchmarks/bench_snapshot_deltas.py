@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+报价快照增量存储基准
+
+对一个多明细报价单反复修改一行后重新提交，对比全量存储与增量存储的字节数，
+并测量还原最长增量链（不含数据库读取）的耗时。
+用法: python benchmarks/bench_snapshot_deltas.py [明细行数] [提交次数]
+"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Quote, QuoteItem, QuoteSnapshot, User
+from app.services.snapshot_delta import apply_patch
+from app.services.snapshot_service import SnapshotService
+
+
+def main() -> int:
+    item_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    submissions = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    user = User(userid="bench", name="基准", role="user")
+    db.add(user)
+    db.commit()
+    quote = Quote(quote_number="BENCH-1", title="基准报价", quote_type="mass_production", customer_name="客户", created_by=user.id)
+    quote.items = [
+        QuoteItem(item_name=f"工序{i}", quantity=1, unit_price=10.0 + i, total_price=10.0 + i)
+        for i in range(item_count)
+    ]
+    db.add(quote)
+    db.commit()
+
+    service = SnapshotService(db)
+    full_bytes = 0
+    for index in range(submissions):
+        quote.items[index % item_count].unit_price += 1
+        db.commit()
+        service.create_snapshot(quote, "tpl", ["approver"], user.id)
+        full_bytes += len(json.dumps(QuoteSnapshot.quote_data(quote), sort_keys=True, separators=(",", ":")))
+
+    snapshots = db.query(QuoteSnapshot).order_by(QuoteSnapshot.id).all()
+    stored_bytes = sum(len(snapshot.data or snapshot.delta) for snapshot in snapshots)
+    deepest = max(snapshots, key=lambda snapshot: snapshot.chain_depth)
+    chain, current = [], deepest
+    while not current.is_keyframe:
+        chain.append(json.loads(current.delta))
+        current = db.get(QuoteSnapshot, current.base_id)
+
+    rounds = 1000
+    started = time.perf_counter()
+    for _ in range(rounds):
+        data = json.loads(current.data)
+        for ops in reversed(chain):
+            data = apply_patch(data, ops)
+    elapsed = (time.perf_counter() - started) / rounds
+
+    print(f"📊 快照基准: {item_count} 行明细，提交 {submissions} 次")
+    print(f"全量存储={full_bytes / 1024:8.1f}KB 增量存储={stored_bytes / 1024:8.1f}KB")
+    print(f"还原深度 {deepest.chain_depth} 的快照平均耗时={elapsed * 1000:6.3f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
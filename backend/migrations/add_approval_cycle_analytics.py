@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+数据库迁移：新增审批周期汇总表 approval_cycle_daily / approval_pending_counts /
+approval_pending_assignments
+
+上线后由审批引擎在每次审批操作时增量维护。当前处于待审批的报价单需要先计入
+待审批数量，否则它们被批准/拒绝时计数会变成负数；已完成审批的历史报价单按
+submitted_at / approved_at 回填决定耗时；approval_pending_assignments 记录每个待审批
+报价单计入的审批人键，离开待审批时按同一键扣减。脚本会先清空这些表，可重复执行。
+执行前建议备份数据库文件。
+"""
+
+import os
+import sqlite3
+import sys
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(BASE_DIR, "app", "test.db")
+
+# 与 app/services/approval_cycle_analytics.py 保持一致
+CYCLE_TIME_BOUNDS = (
+    300, 900, 1800, 3600, 7200, 14400, 28800, 43200,
+    86400, 172800, 259200, 432000, 604800, 1209600, 2592000,
+)
+
+
+def parse_datetime(value):
+    if not value:
+        return None
+    for fmt in ("%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S"):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def create_tables(cursor) -> None:
+    """创建审批周期汇总表"""
+    print("🛠️  确保表 approval_cycle_daily / approval_pending_counts / approval_pending_assignments 存在 ...")
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS approval_cycle_daily (
+            scope TEXT NOT NULL,
+            scope_key TEXT NOT NULL,
+            day DATE NOT NULL,
+            bucket INTEGER NOT NULL,
+            decided_count INTEGER NOT NULL DEFAULT 0,
+            approved_count INTEGER NOT NULL DEFAULT 0,
+            decision_seconds FLOAT NOT NULL DEFAULT 0,
+            PRIMARY KEY (scope, scope_key, day, bucket)
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS approval_pending_counts (
+            scope TEXT NOT NULL,
+            scope_key TEXT NOT NULL,
+            pending_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (scope, scope_key)
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS approval_pending_assignments (
+            quote_id INTEGER NOT NULL PRIMARY KEY,
+            approver_key VARCHAR NOT NULL DEFAULT ''
+        )
+        """
+    )
+
+
+def seed_pending_counts(cursor) -> int:
+    """按当前待审批报价单初始化待审批数量，并记录各报价单计入的审批人键"""
+    cursor.execute("DELETE FROM approval_pending_assignments")
+    cursor.execute(
+        """
+        INSERT INTO approval_pending_assignments (quote_id, approver_key)
+        SELECT id, COALESCE(CAST(current_approver_id AS TEXT), '')
+        FROM quotes
+        WHERE approval_status = 'pending' AND COALESCE(is_deleted, 0) = 0
+        """
+    )
+    cursor.execute("DELETE FROM approval_pending_counts")
+    cursor.execute(
+        """
+        INSERT INTO approval_pending_counts (scope, scope_key, pending_count)
+        SELECT 'approver', COALESCE(CAST(current_approver_id AS TEXT), ''), COUNT(*)
+        FROM quotes
+        WHERE approval_status = 'pending' AND COALESCE(is_deleted, 0) = 0
+        GROUP BY 2
+        UNION ALL
+        SELECT 'quote_type', COALESCE(quote_type, ''), COUNT(*)
+        FROM quotes
+        WHERE approval_status = 'pending' AND COALESCE(is_deleted, 0) = 0
+        GROUP BY 2
+        """
+    )
+    return cursor.rowcount
+
+
+def backfill_cycle_daily(cursor) -> int:
+    """按已完成审批的报价单回填决定耗时直方图"""
+    cursor.execute("DELETE FROM approval_cycle_daily")
+    cursor.execute(
+        """
+        SELECT approved_by, quote_type, approval_status, submitted_at, approved_at
+        FROM quotes
+        WHERE approval_status IN ('approved', 'rejected')
+          AND submitted_at IS NOT NULL AND approved_at IS NOT NULL
+          AND COALESCE(is_deleted, 0) = 0
+        """
+    )
+
+    totals = defaultdict(lambda: [0, 0, 0.0])
+    for approved_by, quote_type, approval_status, submitted_at, approved_at in cursor.fetchall():
+        submitted, decided = parse_datetime(submitted_at), parse_datetime(approved_at)
+        if not submitted or not decided:
+            continue
+        seconds = max((decided - submitted).total_seconds(), 0.0)
+        bucket = bisect_left(CYCLE_TIME_BOUNDS, seconds)
+        day = decided.date().isoformat()
+        for scope, key in (("approver", str(approved_by or "")), ("quote_type", quote_type or "")):
+            entry = totals[(scope, key, day, bucket)]
+            entry[0] += 1
+            entry[1] += int(approval_status == "approved")
+            entry[2] += seconds
+
+    cursor.executemany(
+        """
+        INSERT INTO approval_cycle_daily
+            (scope, scope_key, day, bucket, decided_count, approved_count, decision_seconds)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        [key + tuple(values) for key, values in totals.items()],
+    )
+    return len(totals)
+
+
+def main() -> int:
+    if not os.path.exists(DB_PATH):
+        print(f"❌ 数据库文件不存在: {DB_PATH}")
+        return 1
+
+    print("🔄 开始执行审批周期汇总数据库迁移")
+    print(f"📅 执行时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("📂 目标数据库:", DB_PATH)
+
+    try:
+        connection = sqlite3.connect(DB_PATH)
+        cursor = connection.cursor()
+
+        create_tables(cursor)
+        pending = seed_pending_counts(cursor)
+        cycles = backfill_cycle_daily(cursor)
+
+        connection.commit()
+        print(f"✅  已初始化 {pending} 行待审批数量，回填 {cycles} 行决定耗时汇总")
+        print("🎉  数据库迁移完成")
+        return 0
+    except sqlite3.Error as exc:
+        print(f"❌ 迁移失败: {exc}")
+        return 1
+    finally:
+        if 'connection' in locals():
+            connection.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+数据库迁移：为 card_configs.machine_id 和 card_configs.part_number 添加索引
+
+按机器加载板卡（目录树、计价目录、删除机器）和按料号查找不再全表扫描。
+脚本可重复执行。执行前建议备份数据库文件。
+"""
+
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(BASE_DIR, "app", "test.db")
+
+INDEXES = (
+    ("ix_card_configs_machine_id", "card_configs", "machine_id"),
+    ("ix_card_configs_part_number", "card_configs", "part_number"),
+)
+
+
+def create_indexes(cursor) -> None:
+    for index_name, table_name, column_name in INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name}({column_name})")
+        print(f"  ✅ 确保索引存在: {index_name}")
+
+
+def main() -> int:
+    if not os.path.exists(DB_PATH):
+        print(f"❌ 数据库文件不存在: {DB_PATH}")
+        return 1
+
+    print("🔄 开始执行板卡索引数据库迁移")
+    print(f"📅 执行时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("📂 目标数据库:", DB_PATH)
+
+    try:
+        connection = sqlite3.connect(DB_PATH)
+        cursor = connection.cursor()
+
+        create_indexes(cursor)
+
+        connection.commit()
+        print("🎉  数据库迁移完成")
+        return 0
+    except sqlite3.Error as exc:
+        print(f"❌ 迁移失败: {exc}")
+        return 1
+    finally:
+        if 'connection' in locals():
+            connection.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
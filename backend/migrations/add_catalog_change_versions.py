@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+数据库迁移：目录表新增 change_version 字段，新增目录版本序列表和删除墓碑表
+
+上线后目录表每次经 ORM 写入都会分配新的版本号，客户端按版本号增量同步。
+历史行统一回填为版本 1，序列初始化为 1，已同步到版本 1 的客户端即持有全量数据。
+脚本可重复执行。执行前建议备份数据库文件。
+"""
+
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(BASE_DIR, "app", "test.db")
+
+# 与 app/services/catalog_cache.py 中 CATALOG_MODELS 保持一致
+CATALOG_TABLES = (
+    "machine_types",
+    "suppliers",
+    "machines",
+    "configurations",
+    "card_configs",
+    "auxiliary_equipment",
+)
+
+
+def add_change_version_columns(cursor) -> None:
+    """为各目录表添加 change_version 字段和索引，并回填历史行"""
+    for table_name in CATALOG_TABLES:
+        cursor.execute(f"PRAGMA table_info({table_name})")
+        existing_columns = [column[1] for column in cursor.fetchall()]
+        if not existing_columns:
+            print(f"  ⚠️ 表不存在，跳过: {table_name}")
+            continue
+
+        if "change_version" not in existing_columns:
+            cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN change_version INTEGER DEFAULT 0")
+            print(f"  ✅ 添加字段: {table_name}.change_version")
+        else:
+            print(f"  ⏭️ 字段已存在: {table_name}.change_version")
+
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS ix_{table_name}_change_version ON {table_name}(change_version)"
+        )
+        cursor.execute(
+            f"UPDATE {table_name} SET change_version = 1 WHERE change_version IS NULL OR change_version = 0"
+        )
+
+
+def create_catalog_change_tables(cursor) -> None:
+    """创建目录版本序列表和删除墓碑表，序列初始化为 1"""
+    print("🛠️  确保表 catalog_change_sequence / catalog_tombstones 存在 ...")
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS catalog_change_sequence (
+            name VARCHAR NOT NULL PRIMARY KEY,
+            last_value INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS catalog_tombstones (
+            id INTEGER NOT NULL PRIMARY KEY,
+            table_name VARCHAR NOT NULL,
+            row_id INTEGER NOT NULL,
+            change_version INTEGER NOT NULL,
+            deleted_at DATETIME
+        )
+        """
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_catalog_tombstones_id ON catalog_tombstones(id)")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS ix_catalog_tombstones_change_version ON catalog_tombstones(change_version)"
+    )
+    cursor.execute(
+        """
+        INSERT INTO catalog_change_sequence (name, last_value) VALUES ('catalog', 1)
+        ON CONFLICT (name) DO NOTHING
+        """
+    )
+
+
+def main() -> int:
+    if not os.path.exists(DB_PATH):
+        print(f"❌ 数据库文件不存在: {DB_PATH}")
+        return 1
+
+    print("🔄 开始执行目录变更版本数据库迁移")
+    print(f"📅 执行时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("📂 目标数据库:", DB_PATH)
+
+    try:
+        connection = sqlite3.connect(DB_PATH)
+        cursor = connection.cursor()
+
+        create_catalog_change_tables(cursor)
+        add_change_version_columns(cursor)
+
+        connection.commit()
+        print("🎉  数据库迁移完成")
+        return 0
+    except sqlite3.Error as exc:
+        print(f"❌ 迁移失败: {exc}")
+        return 1
+    finally:
+        if 'connection' in locals():
+            connection.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
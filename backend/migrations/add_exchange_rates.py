@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+数据库迁移：新增集中汇率表 exchange_rates
+
+汇率表为空时计价仍使用机器/板卡上的汇率，行为不变；写入某币种的第一条汇率后，
+该币种的计价统一改用汇率表。脚本可重复执行。执行前建议备份数据库文件。
+"""
+
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(BASE_DIR, "app", "test.db")
+
+
+def create_exchange_rates_table(cursor) -> None:
+    print("🛠️  确保表 exchange_rates 存在 ...")
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS exchange_rates (
+            id INTEGER NOT NULL PRIMARY KEY,
+            currency VARCHAR NOT NULL,
+            rate FLOAT NOT NULL,
+            effective_date DATE NOT NULL,
+            created_at DATETIME,
+            change_version INTEGER DEFAULT 0,
+            CONSTRAINT uq_exchange_rates_currency_date UNIQUE (currency, effective_date)
+        )
+        """
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_exchange_rates_id ON exchange_rates(id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_exchange_rates_currency ON exchange_rates(currency)")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS ix_exchange_rates_change_version ON exchange_rates(change_version)"
+    )
+
+
+def main() -> int:
+    if not os.path.exists(DB_PATH):
+        print(f"❌ 数据库文件不存在: {DB_PATH}")
+        return 1
+
+    print("🔄 开始执行汇率表数据库迁移")
+    print(f"📅 执行时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("📂 目标数据库:", DB_PATH)
+
+    try:
+        connection = sqlite3.connect(DB_PATH)
+        cursor = connection.cursor()
+
+        create_exchange_rates_table(cursor)
+
+        connection.commit()
+        print("🎉  数据库迁移完成")
+        return 0
+    except sqlite3.Error as exc:
+        print(f"❌ 迁移失败: {exc}")
+        return 1
+    finally:
+        if 'connection' in locals():
+            connection.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
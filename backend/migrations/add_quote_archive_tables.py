@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+数据库迁移：新增报价单归档表 quotes_archive / quote_items_archive /
+approval_records_archive / quote_snapshots_archive / effective_quotes_archive
+
+归档表的列与在线表一致（按在线表当前结构生成，不带外键和唯一约束），
+quotes_archive 额外记录归档时间和原因。在线表新增字段后重新执行本脚本即可
+为归档表补齐缺失的列。归档本身由 scripts/archive_quotes.py 或管理员接口执行。
+"""
+
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(BASE_DIR, "app", "test.db")
+
+ARCHIVED_TABLES = ("quotes", "quote_items", "approval_records", "quote_snapshots", "effective_quotes")
+EXTRA_COLUMNS = {
+    "quotes": (("archived_at", "DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP"), ("archive_reason", "VARCHAR NOT NULL DEFAULT ''")),
+}
+INDEXED_COLUMNS = ("quote_id", "quote_number", "created_at", "archived_at")
+
+
+def table_columns(cursor, table: str):
+    cursor.execute(f"PRAGMA table_info({table})")
+    return [(row[1], row[2] or "") for row in cursor.fetchall()]
+
+
+def create_archive_table(cursor, source: str) -> None:
+    """按在线表结构创建归档表，已存在时补齐缺失的列"""
+    target = f"{source}_archive"
+    columns = table_columns(cursor, source) + list(EXTRA_COLUMNS.get(source, ()))
+    if not columns:
+        print(f"  ⏭️ 在线表不存在: {source}")
+        return
+
+    existing = {name for name, _ in table_columns(cursor, target)}
+    if not existing:
+        definitions = ", ".join(f"{name} {column_type}" for name, column_type in columns)
+        cursor.execute(f"CREATE TABLE {target} ({definitions}, PRIMARY KEY (id))")
+        print(f"  ✅ 创建归档表: {target}")
+    else:
+        for name, column_type in columns:
+            if name not in existing:
+                cursor.execute(f"ALTER TABLE {target} ADD COLUMN {name} {column_type}")
+                print(f"  ✅ 归档表 {target} 添加字段: {name}")
+
+    for name, _ in columns:
+        if name in INDEXED_COLUMNS:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS ix_{target}_{name} ON {target}({name})")
+
+
+def main() -> int:
+    if not os.path.exists(DB_PATH):
+        print(f"❌ 数据库文件不存在: {DB_PATH}")
+        return 1
+
+    print("🔄 开始执行报价单归档表迁移")
+    print(f"📅 执行时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("📂 目标数据库:", DB_PATH)
+
+    try:
+        connection = sqlite3.connect(DB_PATH)
+        cursor = connection.cursor()
+
+        for source in ARCHIVED_TABLES:
+            create_archive_table(cursor, source)
+
+        connection.commit()
+        print("🎉  数据库迁移完成")
+        return 0
+    except sqlite3.Error as exc:
+        print(f"❌ 迁移失败: {exc}")
+        return 1
+    finally:
+        if 'connection' in locals():
+            connection.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
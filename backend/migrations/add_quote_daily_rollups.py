@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+数据库迁移：新增报价单按日汇总表 quote_daily_rollups，并从 quotes 回填
+
+汇总表上线后由应用在每次写入报价单时增量维护；本脚本负责建表和回填历史数据，
+也可在汇总与原始数据不一致时重建。脚本可重复执行，回填前会先清空目标日期范围。
+旧版汇总表没有 is_deleted 维度（不含软删除报价单），检测到时删表重建并全量回填。
+执行前建议备份数据库文件。
+
+用法: python migrations/add_quote_daily_rollups.py [--since YYYY-MM-DD]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(BASE_DIR, "app", "test.db")
+
+# 与 app/services/quote_rollups.py 中 quote_contribution 的口径保持一致
+BACKFILL_SQL = """
+    INSERT INTO quote_daily_rollups (
+        day, quote_type, quote_unit, currency, created_by, status, is_deleted,
+        quote_count, total_amount, approval_seconds, approval_count
+    )
+    SELECT
+        date(created_at),
+        COALESCE(quote_type, ''),
+        COALESCE(quote_unit, ''),
+        COALESCE(currency, ''),
+        COALESCE(created_by, 0),
+        COALESCE(status, ''),
+        COALESCE(is_deleted, 0),
+        COUNT(*),
+        COALESCE(SUM(total_amount), 0),
+        COALESCE(SUM(CASE WHEN {approved} THEN (julianday(approved_at) - julianday(submitted_at)) * 86400 END), 0),
+        SUM(CASE WHEN {approved} THEN 1 ELSE 0 END)
+    FROM quotes
+    WHERE created_at IS NOT NULL
+      AND date(created_at) >= ?
+    GROUP BY 1, 2, 3, 4, 5, 6, 7
+""".format(
+    approved="status = 'approved' AND submitted_at IS NOT NULL AND approved_at IS NOT NULL AND approved_at >= submitted_at"
+)
+
+
+def create_quote_daily_rollups_table(cursor) -> bool:
+    """创建 quote_daily_rollups 表；旧版表缺少 is_deleted 维度时删表重建，返回是否需要全量回填"""
+    print("🛠️  确保表 quote_daily_rollups 存在 ...")
+    cursor.execute("PRAGMA table_info(quote_daily_rollups)")
+    columns = [row[1] for row in cursor.fetchall()]
+    rebuild = bool(columns) and "is_deleted" not in columns
+    if rebuild:
+        print("   ↻ 旧版汇总表缺少 is_deleted 维度，删表重建")
+        cursor.execute("DROP TABLE quote_daily_rollups")
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS quote_daily_rollups (
+            day DATE NOT NULL,
+            quote_type TEXT NOT NULL DEFAULT '',
+            quote_unit TEXT NOT NULL DEFAULT '',
+            currency TEXT NOT NULL DEFAULT '',
+            created_by INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT '',
+            is_deleted BOOLEAN NOT NULL DEFAULT 0,
+            quote_count INTEGER NOT NULL DEFAULT 0,
+            total_amount FLOAT NOT NULL DEFAULT 0,
+            approval_seconds FLOAT NOT NULL DEFAULT 0,
+            approval_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, quote_type, quote_unit, currency, created_by, status, is_deleted)
+        )
+        """
+    )
+    return rebuild
+
+
+def backfill_quote_daily_rollups(cursor, since: str = "0000-01-01") -> int:
+    """清空 since 之后的汇总行并按原始报价单重新聚合，返回写入的汇总行数"""
+    cursor.execute("DELETE FROM quote_daily_rollups WHERE day >= ?", (since,))
+    cursor.execute(BACKFILL_SQL, (since,))
+    return cursor.rowcount
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="创建并回填报价单按日汇总表")
+    parser.add_argument("--since", default="0000-01-01", help="只重建该日期(YYYY-MM-DD)及之后的汇总")
+    args = parser.parse_args()
+
+    if not os.path.exists(DB_PATH):
+        print(f"❌ 数据库文件不存在: {DB_PATH}")
+        return 1
+
+    print("🔄 开始执行 quote_daily_rollups 数据库迁移")
+    print(f"📅 执行时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("📂 目标数据库:", DB_PATH)
+
+    try:
+        connection = sqlite3.connect(DB_PATH)
+        cursor = connection.cursor()
+
+        since = "0000-01-01" if create_quote_daily_rollups_table(cursor) else args.since
+        written = backfill_quote_daily_rollups(cursor, since)
+
+        connection.commit()
+        print(f"✅  已回填 {written} 行按日汇总（起始日期 {since}）")
+        print("🎉  数据库迁移完成")
+        return 0
+    except sqlite3.Error as exc:
+        print(f"❌ 迁移失败: {exc}")
+        return 1
+    finally:
+        if 'connection' in locals():
+            connection.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+数据库迁移：quote_items 新增 applied_exchange_rate 字段
+
+汇率调整后的草稿报价单重算（scripts/reprice_draft_quotes.py）在该字段记录明细单价对应的新汇率，
+重跑时跳过已按新汇率重算的明细。历史明细保持为空，表示未重算过，无需回填。
+归档表 quote_items_archive 已存在时同步添加该字段（归档/恢复按在线表的列复制明细）。
+脚本可重复执行。执行前建议备份数据库文件。
+"""
+
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(BASE_DIR, "app", "test.db")
+
+
+def add_column(cursor, table: str) -> None:
+    cursor.execute(f"PRAGMA table_info({table})")
+    existing_columns = [column[1] for column in cursor.fetchall()]
+
+    if not existing_columns:
+        print(f"  ⏭️ 表不存在: {table}")
+    elif "applied_exchange_rate" not in existing_columns:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN applied_exchange_rate FLOAT")
+        print(f"  ✅ {table} 添加字段: applied_exchange_rate")
+    else:
+        print(f"  ⏭️ {table} 字段已存在: applied_exchange_rate")
+
+
+def main() -> int:
+    if not os.path.exists(DB_PATH):
+        print(f"❌ 数据库文件不存在: {DB_PATH}")
+        return 1
+
+    print("🔄 开始执行 quote_items 汇率记录字段迁移")
+    print(f"📅 执行时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("📂 目标数据库:", DB_PATH)
+
+    try:
+        connection = sqlite3.connect(DB_PATH)
+        cursor = connection.cursor()
+
+        add_column(cursor, "quote_items")
+        add_column(cursor, "quote_items_archive")
+
+        connection.commit()
+        print("🎉  数据库迁移完成")
+        return 0
+    except sqlite3.Error as exc:
+        print(f"❌ 迁移失败: {exc}")
+        return 1
+    finally:
+        if 'connection' in locals():
+            connection.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+数据库迁移：quote_items 新增 uph / hourly_rate 字段并回填
+
+上线后由 QuoteService 在写入明细时从配置解析 UPH 并计算机时费率；本脚本负责
+加列、建索引，并按主键分块回填历史明细（每块单独提交，避免长事务锁表）。
+脚本可重复执行，只回填 uph 为空且配置中含 UPH 的明细。执行前建议备份数据库文件。
+
+用法: python migrations/add_quote_item_uph.py [--chunk-size 1000]
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(BASE_DIR, "app", "test.db")
+
+# 与 app/services/quote_service.py 中 parse_item_uph / item_hourly_rate 保持一致
+UPH_PATTERN = re.compile(r'UPH:(\d+)')
+
+
+def add_columns(cursor) -> None:
+    """为 quote_items 添加 uph / hourly_rate 字段和 uph 索引"""
+    cursor.execute("PRAGMA table_info(quote_items)")
+    existing_columns = [column[1] for column in cursor.fetchall()]
+
+    for column_name, column_definition in (("uph", "INTEGER"), ("hourly_rate", "FLOAT")):
+        if column_name not in existing_columns:
+            cursor.execute(f"ALTER TABLE quote_items ADD COLUMN {column_name} {column_definition}")
+            print(f"  ✅ 添加字段: {column_name}")
+        else:
+            print(f"  ⏭️ 字段已存在: {column_name}")
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_quote_items_uph ON quote_items(uph)")
+
+
+def backfill_chunk(cursor, after_id: int, chunk_size: int):
+    """回填 id > after_id 的一块明细，返回 (本块最大 id, 更新行数)；没有更多数据时 id 为 None"""
+    cursor.execute(
+        """
+        SELECT id, configuration, unit_price
+        FROM quote_items
+        WHERE id > ? AND uph IS NULL AND configuration LIKE '%UPH:%'
+        ORDER BY id
+        LIMIT ?
+        """,
+        (after_id, chunk_size),
+    )
+    rows = cursor.fetchall()
+    if not rows:
+        return None, 0
+
+    updates = []
+    for item_id, configuration, unit_price in rows:
+        match = UPH_PATTERN.search(configuration)
+        if match:
+            uph = int(match.group(1))
+            updates.append((uph, (unit_price or 0) * uph, item_id))
+    cursor.executemany("UPDATE quote_items SET uph = ?, hourly_rate = ? WHERE id = ?", updates)
+    return rows[-1][0], len(updates)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="为报价明细添加并回填 UPH / 机时费率")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="每批回填的明细行数")
+    args = parser.parse_args()
+
+    if not os.path.exists(DB_PATH):
+        print(f"❌ 数据库文件不存在: {DB_PATH}")
+        return 1
+
+    print("🔄 开始执行 quote_items UPH 字段迁移")
+    print(f"📅 执行时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("📂 目标数据库:", DB_PATH)
+
+    try:
+        connection = sqlite3.connect(DB_PATH)
+        cursor = connection.cursor()
+
+        add_columns(cursor)
+        connection.commit()
+
+        after_id, total = 0, 0
+        while True:
+            after_id, updated = backfill_chunk(cursor, after_id, args.chunk_size)
+            if after_id is None:
+                break
+            connection.commit()
+            total += updated
+            print(f"  🔁 已回填至明细 #{after_id}，累计 {total} 行")
+
+        print(f"✅  已回填 {total} 行明细的 UPH / 机时费率")
+        print("🎉  数据库迁移完成")
+        return 0
+    except sqlite3.Error as exc:
+        print(f"❌ 迁移失败: {exc}")
+        return 1
+    finally:
+        if 'connection' in locals():
+            connection.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+数据库迁移：新增报价单号序列表 quote_number_sequences
+
+报价单号改为从序列表原子分配后，需要用现有报价单号初始化各 (单位, 日期)
+的最大序号，否则当天已存在的编号会被重复分配。脚本可重复执行。
+执行前建议备份数据库文件。
+"""
+
+import os
+import re
+import sqlite3
+import sys
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(BASE_DIR, "app", "test.db")
+
+QUOTE_NUMBER_PATTERN = re.compile(r"^CIS-([A-Z]+)(\d{8})(\d{3})$")
+
+
+def create_quote_number_sequences_table(cursor) -> None:
+    """创建 quote_number_sequences 表"""
+    print("🛠️  确保表 quote_number_sequences 存在 ...")
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS quote_number_sequences (
+            unit_code TEXT NOT NULL,
+            date_key TEXT NOT NULL,
+            last_value INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (unit_code, date_key)
+        )
+        """
+    )
+
+
+def seed_sequences_from_quotes(cursor) -> int:
+    """按现有报价单号（含软删除记录）回填各序列的最大序号"""
+    cursor.execute("SELECT quote_number FROM quotes WHERE quote_number LIKE 'CIS-%'")
+    maxima = {}
+    for (quote_number,) in cursor.fetchall():
+        match = QUOTE_NUMBER_PATTERN.match(quote_number or "")
+        if not match:
+            continue
+        key = (match.group(1), match.group(2))
+        maxima[key] = max(maxima.get(key, 0), int(match.group(3)))
+
+    for (unit_code, date_key), last_value in maxima.items():
+        cursor.execute(
+            """
+            INSERT INTO quote_number_sequences (unit_code, date_key, last_value)
+            VALUES (?, ?, ?)
+            ON CONFLICT (unit_code, date_key)
+            DO UPDATE SET last_value = MAX(last_value, excluded.last_value)
+            """,
+            (unit_code, date_key, last_value),
+        )
+    return len(maxima)
+
+
+def main() -> int:
+    if not os.path.exists(DB_PATH):
+        print(f"❌ 数据库文件不存在: {DB_PATH}")
+        return 1
+
+    print("🔄 开始执行 quote_number_sequences 数据库迁移")
+    print(f"📅 执行时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("📂 目标数据库:", DB_PATH)
+
+    try:
+        connection = sqlite3.connect(DB_PATH)
+        cursor = connection.cursor()
+
+        create_quote_number_sequences_table(cursor)
+        seeded = seed_sequences_from_quotes(cursor)
+
+        connection.commit()
+        print(f"✅  已回填 {seeded} 个报价单号序列")
+        print("🎉  数据库迁移完成")
+        return 0
+    except sqlite3.Error as exc:
+        print(f"❌ 迁移失败: {exc}")
+        return 1
+    finally:
+        if 'connection' in locals():
+            connection.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
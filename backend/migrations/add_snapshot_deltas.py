@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+数据库迁移：quote_snapshots 支持增量存储
+
+新增 delta / base_id / chain_depth 字段并把 data 改为可空（增量快照不保存完整数据）。
+SQLite 不能直接修改列约束，这里按标准方式重建表：建新表、复制数据、替换旧表。
+已有快照全部作为关键帧保留（chain_depth = 0），之后的提交按增量写入。
+脚本可重复执行，执行前建议备份数据库文件。
+"""
+
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(BASE_DIR, "app", "test.db")
+
+LEGACY_COLUMNS = ("id", "quote_id", "data", "hash", "template_id", "approvers", "created_by", "created_at")
+
+
+def rebuild_quote_snapshots(cursor) -> bool:
+    """重建 quote_snapshots 表，已迁移时返回 False"""
+    cursor.execute("PRAGMA table_info(quote_snapshots)")
+    existing_columns = [column[1] for column in cursor.fetchall()]
+    if "chain_depth" in existing_columns:
+        print("  ⏭️ quote_snapshots 已支持增量存储")
+        return False
+
+    cursor.execute(
+        """
+        CREATE TABLE quote_snapshots_new (
+            id INTEGER NOT NULL PRIMARY KEY,
+            quote_id INTEGER NOT NULL REFERENCES quotes (id),
+            data TEXT,
+            delta TEXT,
+            base_id INTEGER REFERENCES quote_snapshots (id),
+            chain_depth INTEGER NOT NULL DEFAULT 0,
+            hash VARCHAR(64) NOT NULL,
+            template_id VARCHAR NOT NULL,
+            approvers TEXT,
+            created_by INTEGER REFERENCES users (id),
+            created_at DATETIME
+        )
+        """
+    )
+    columns = ", ".join(LEGACY_COLUMNS)
+    cursor.execute(f"INSERT INTO quote_snapshots_new ({columns}) SELECT {columns} FROM quote_snapshots")
+    cursor.execute("DROP TABLE quote_snapshots")
+    cursor.execute("ALTER TABLE quote_snapshots_new RENAME TO quote_snapshots")
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_quote_snapshots_id ON quote_snapshots(id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_quote_snapshots_quote_id ON quote_snapshots(quote_id)")
+    print("  ✅ 已重建 quote_snapshots 表")
+    return True
+
+
+def main() -> int:
+    if not os.path.exists(DB_PATH):
+        print(f"❌ 数据库文件不存在: {DB_PATH}")
+        return 1
+
+    print("🔄 开始执行快照增量存储迁移")
+    print(f"📅 执行时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("📂 目标数据库:", DB_PATH)
+
+    try:
+        connection = sqlite3.connect(DB_PATH)
+        cursor = connection.cursor()
+
+        rebuild_quote_snapshots(cursor)
+
+        connection.commit()
+        print("💡 若已创建归档表，请重新执行 migrations/add_quote_archive_tables.py 补齐新增字段")
+        print("🎉  数据库迁移完成")
+        return 0
+    except sqlite3.Error as exc:
+        print(f"❌ 迁移失败: {exc}")
+        return 1
+    finally:
+        if 'connection' in locals():
+            connection.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
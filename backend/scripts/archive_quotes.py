@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+报价单归档任务
+把超过保留期的已删除报价单和已结束报价单按批迁入归档表，适合由 cron 定期执行。
+
+用法: python scripts/archive_quotes.py [--deleted-days 90] [--closed-years 3] [--batch-size 200]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.services.quote_archive import (
+    ARCHIVE_BATCH_SIZE,
+    CLOSED_RETENTION_YEARS,
+    DELETED_RETENTION_DAYS,
+    QuoteArchiveService,
+)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="归档过期报价单")
+    parser.add_argument("--deleted-days", type=int, default=DELETED_RETENTION_DAYS, help="已删除报价单保留天数")
+    parser.add_argument("--closed-years", type=int, default=CLOSED_RETENTION_YEARS, help="已结束报价单保留年数")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE, help="每批归档的报价单数量")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        archived = QuoteArchiveService(db, batch_size=args.batch_size).run(
+            deleted_retention_days=args.deleted_days,
+            closed_retention_years=args.closed_years,
+        )
+        print(f"✅  已归档 {archived['deleted']} 个已删除报价单，{archived['closed']} 个已结束报价单")
+        return 0
+    except Exception as exc:
+        db.rollback()
+        print(f"❌ 归档失败: {exc}")
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+汇率调整后重算草稿报价单
+把人民币草稿报价单中该币种机器的明细单价按 新汇率 / 旧汇率 等比例调整，并重算整单金额。
+旧汇率可取 POST /api/v1/exchange-rates 返回的 previous_rate。
+每块单独提交；中途失败时按相同参数重新执行即可，已重算的明细会被跳过，不会重复调整。
+
+用法: python scripts/reprice_draft_quotes.py --currency USD --from-rate 7.10 --to-rate 7.25 [--chunk-size 200]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.services.quote_repricing import REPRICE_CHUNK_SIZE, DraftQuoteRepricer
+
+
+def print_progress(processed: int, total: int) -> None:
+    print(f"  ⏳ 已处理 {processed}/{total} 个报价单")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="按汇率变化重算草稿报价单")
+    parser.add_argument("--currency", required=True, help="调整汇率的外币币种，如 USD")
+    parser.add_argument("--from-rate", type=float, required=True, help="调整前的汇率")
+    parser.add_argument("--to-rate", type=float, required=True, help="调整后的汇率")
+    parser.add_argument("--chunk-size", type=int, default=REPRICE_CHUNK_SIZE, help="每批重算的报价单数量")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        summary = DraftQuoteRepricer(db, chunk_size=args.chunk_size).run(
+            args.currency, args.from_rate, args.to_rate, progress=print_progress
+        )
+        print(f"✅  已重算 {summary['quotes']} 个草稿报价单，调整 {summary['items']} 条明细单价")
+        if summary["failed"]:
+            print(f"⚠️  {summary['failed']} 个报价单数据无效，已跳过")
+        return 0
+    except Exception as exc:
+        db.rollback()
+        print(f"❌ 重算失败: {exc}")
+        print("   已提交的报价单不会重复调整，修复问题后按相同参数重新执行即可")
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+import asyncio
+import csv
+import io
+import json
+import unittest
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import Quote, User
+from app.api.v1.admin import quotes as admin_quotes
+
+
+class AdminQuoteExportTests(unittest.TestCase):
+    def setUp(self):
+        # 流式响应在线程池中迭代，内存库需要跨线程共享同一连接
+        self.engine = create_engine(
+            'sqlite:///:memory:',
+            connect_args={'check_same_thread': False},
+            poolclass=StaticPool,
+        )
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = self.SessionLocal()
+
+        self.admin = User(userid='admin', name='Admin', role='admin')
+        self.db.add(self.admin)
+        self.db.commit()
+
+        base_time = datetime(2026, 1, 1)
+        for index in range(7):
+            self.db.add(Quote(
+                quote_number=f'CIS-KS20260101{index + 1:03d}',
+                title=f'Quote, "{index}"',
+                quote_type='tooling',
+                customer_name='客户',
+                currency='CNY',
+                total_amount=float(index),
+                status='draft',
+                approval_status='not_submitted',
+                created_by=self.admin.id,
+                created_at=base_time + timedelta(days=index),
+                updated_at=base_time + timedelta(days=index),
+                is_deleted=index == 0,
+                deleted_by=self.admin.id if index == 0 else None,
+            ))
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+        self.engine.dispose()
+
+    def export(self, export_format, include_deleted=False):
+        with patch.object(admin_quotes, 'EXPORT_CHUNK_SIZE', 3):
+            response = asyncio.run(admin_quotes.export_quotes(
+                include_deleted=include_deleted,
+                format=export_format,
+                db=self.SessionLocal(),
+                current_user=SimpleNamespace(name='Admin'),
+            ))
+
+            async def collect():
+                return [chunk async for chunk in response.body_iterator]
+
+            chunks = asyncio.run(collect())
+        return response, chunks
+
+    def test_json_export_keeps_data_and_total_shape(self):
+        response, chunks = self.export('json')
+
+        payload = json.loads(b''.join(chunks).decode('utf-8'))
+        self.assertEqual(response.media_type, 'application/json')
+        self.assertEqual(payload['total'], 6)
+        self.assertEqual(payload['exported_by'], 'Admin')
+        self.assertEqual(payload['data'][0]['报价单号'], 'CIS-KS20260101007')
+        self.assertEqual(payload['data'][0]['创建人'], 'Admin')
+
+    def test_ndjson_export_streams_in_chunks(self):
+        _, chunks = self.export('ndjson', include_deleted=True)
+
+        lines = b''.join(chunks).decode('utf-8').splitlines()
+        self.assertEqual(len(lines), 7)
+        self.assertGreaterEqual(len(chunks), 3)
+        self.assertEqual(json.loads(lines[-1])['删除人'], 'Admin')
+
+    def test_csv_export_has_bom_header_and_escaped_rows(self):
+        response, chunks = self.export('csv')
+
+        text = b''.join(chunks).decode('utf-8')
+        self.assertTrue(text.startswith('﻿'))
+        rows = list(csv.reader(io.StringIO(text.lstrip('﻿'))))
+        self.assertEqual(rows[0], admin_quotes.EXPORT_COLUMNS)
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(rows[1][1], 'Quote, "6"')
+        self.assertIn('attachment', response.headers['content-disposition'])
+
+    def test_unknown_format_is_rejected(self):
+        with self.assertRaises(HTTPException) as ctx:
+            asyncio.run(admin_quotes.export_quotes(
+                include_deleted=False,
+                format='xml',
+                db=self.db,
+                current_user=SimpleNamespace(name='Admin'),
+            ))
+        self.assertEqual(ctx.exception.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
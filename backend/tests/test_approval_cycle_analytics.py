@@ -0,0 +1,189 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import asyncio
+import unittest
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import ApprovalCycleDaily, ApprovalPendingAssignment, ApprovalPendingCount, Quote, User
+from app.services.approval_cycle_analytics import (
+    ApprovalCycleAnalytics,
+    CYCLE_TIME_BOUNDS,
+    cycle_time_bucket,
+    estimate_quantile,
+)
+from app.services.approval_engine import (
+    ApprovalAction,
+    ApprovalOperation,
+    OperationChannel,
+    UnifiedApprovalEngine,
+)
+from app.api.v2.endpoints.approval_v2 import get_approval_analytics
+
+
+class CycleTimeHistogramTests(unittest.TestCase):
+    def test_bucket_boundaries(self):
+        self.assertEqual(cycle_time_bucket(0), 0)
+        self.assertEqual(cycle_time_bucket(300), 0)
+        self.assertEqual(cycle_time_bucket(301), 1)
+        self.assertEqual(cycle_time_bucket(10 ** 9), len(CYCLE_TIME_BOUNDS))
+
+    def test_quantile_interpolates_within_bucket(self):
+        # 3600-7200 秒区间内 4 个样本，中位数落在区间中点
+        self.assertEqual(estimate_quantile({4: 4}, 0.5), 5400)
+        self.assertEqual(estimate_quantile({0: 9, 8: 1}, 0.9), 300)
+        self.assertEqual(estimate_quantile({len(CYCLE_TIME_BOUNDS): 2}, 0.5), CYCLE_TIME_BOUNDS[-1])
+        self.assertIsNone(estimate_quantile({}, 0.5))
+
+
+class ApprovalCycleAnalyticsTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:', connect_args={'check_same_thread': False})
+        TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = TestingSessionLocal()
+
+        self.creator = User(userid='creator', name='Creator', role='user')
+        self.approver = User(userid='approver', name='Approver', role='admin')
+        self.db.add_all([self.creator, self.approver])
+        self.db.commit()
+
+        self.quotes = []
+        for index, quote_type in enumerate(['tooling', 'tooling', 'engineering', 'engineering']):
+            quote = Quote(
+                quote_number=f'CIS-KS20260101{index + 1:03d}',
+                title=f'Quote {index}',
+                quote_type=quote_type,
+                customer_name='Customer',
+                status='draft',
+                approval_status='not_submitted',
+                created_by=self.creator.id,
+            )
+            self.db.add(quote)
+            self.quotes.append(quote)
+        self.db.commit()
+
+        self.approval_engine = UnifiedApprovalEngine(self.db)
+
+    def tearDown(self):
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+        self.engine.dispose()
+
+    def operate(self, action, quote, operator, **kwargs):
+        result = self.approval_engine.execute_operation(ApprovalOperation(
+            action=action,
+            quote_id=quote.id,
+            operator_id=operator.id,
+            channel=OperationChannel.API,
+            **kwargs,
+        ))
+        self.assertTrue(result.success, result.message)
+
+    def submit_all_and_decide(self):
+        for quote in self.quotes:
+            self.operate(ApprovalAction.SUBMIT, quote, self.creator)
+
+        # 把提交时间回拨，构造不同的决定耗时
+        for quote, hours in zip(self.quotes, [1.5, 3, 30]):
+            quote.submitted_at = datetime.utcnow() - timedelta(hours=hours)
+        self.db.commit()
+
+        self.operate(ApprovalAction.APPROVE, self.quotes[0], self.approver)
+        self.operate(ApprovalAction.APPROVE, self.quotes[1], self.approver)
+        self.operate(ApprovalAction.REJECT, self.quotes[2], self.approver, reason='价格过高')
+
+    def test_engine_operations_update_pending_and_cycle_summaries(self):
+        self.submit_all_and_decide()
+
+        analytics = ApprovalCycleAnalytics(self.db)
+        by_type = {row['scope_key']: row for row in analytics.get_summary('quote_type')}
+        self.assertEqual(by_type['tooling']['pending_count'], 0)
+        self.assertEqual(by_type['tooling']['decided_count'], 2)
+        self.assertEqual(by_type['tooling']['approved_count'], 2)
+        self.assertAlmostEqual(by_type['tooling']['avg_hours'], 2.25, places=1)
+        self.assertEqual(by_type['engineering']['pending_count'], 1)
+        self.assertEqual(by_type['engineering']['decided_count'], 1)
+        self.assertEqual(by_type['engineering']['approved_count'], 0)
+
+        approver = {row['scope_key']: row for row in analytics.get_summary('approver')}
+        decided = approver[str(self.approver.id)]
+        self.assertEqual(decided['decided_count'], 3)
+        self.assertEqual(decided['daily_throughput'], {datetime.utcnow().date().isoformat(): 3})
+        self.assertTrue(1 <= decided['median_hours'] <= 4)
+        self.assertTrue(24 <= decided['p90_hours'] <= 48)
+        # 引擎路径不指定审批人，待审批数量记在未指定审批人下
+        self.assertEqual(approver['']['pending_count'], 1)
+
+        # 汇总为按日按区间的紧凑行：审批人 3 个区间 + 报价类型 3 个区间
+        self.assertEqual(self.db.query(ApprovalCycleDaily).count(), 6)
+
+    def test_withdraw_and_resubmit_keep_pending_balanced(self):
+        quote = self.quotes[0]
+        self.operate(ApprovalAction.SUBMIT, quote, self.creator)
+        self.operate(ApprovalAction.WITHDRAW, quote, self.creator)
+        self.operate(ApprovalAction.SUBMIT, quote, self.creator)
+
+        summary = {row['scope_key']: row for row in ApprovalCycleAnalytics(self.db).get_summary('quote_type')}
+        self.assertEqual(summary['tooling']['pending_count'], 1)
+        self.assertEqual(summary['tooling']['decided_count'], 0)
+
+    def test_pending_count_leaves_the_approver_it_was_recorded_under(self):
+        quote = self.quotes[0]
+        quote.current_approver_id = self.approver.id
+        self.db.commit()
+        self.operate(ApprovalAction.SUBMIT, quote, self.creator)
+
+        def pending_by_approver():
+            return {row['scope_key']: row['pending_count'] for row in ApprovalCycleAnalytics(self.db).get_summary('approver')}
+
+        self.assertEqual(pending_by_approver(), {str(self.approver.id): 1})
+
+        # 企业微信审批在决定前清空当前审批人，扣减仍记在提交时的审批人下
+        quote.current_approver_id = None
+        self.db.commit()
+        self.operate(ApprovalAction.APPROVE, quote, self.approver)
+        counts = {
+            row.scope_key: row.pending_count
+            for row in self.db.query(ApprovalPendingCount).filter(ApprovalPendingCount.scope == 'approver')
+        }
+        self.assertEqual(counts, {str(self.approver.id): 0})
+        self.assertEqual(self.db.query(ApprovalPendingAssignment).count(), 0)
+
+    def test_analytics_failure_rolls_back_to_savepoint_and_keeps_approval(self):
+        original = self.approval_engine.cycle_analytics.record_transition
+
+        def failing_record_transition(*args, **kwargs):
+            original(*args, **kwargs)
+            raise RuntimeError('汇总写入失败')
+
+        self.approval_engine.cycle_analytics.record_transition = failing_record_transition
+        self.operate(ApprovalAction.SUBMIT, self.quotes[0], self.creator)
+
+        self.db.expire_all()
+        self.assertEqual(self.db.get(Quote, self.quotes[0].id).approval_status, 'pending')
+        self.assertEqual(self.db.query(ApprovalPendingCount).count(), 0)
+        self.assertEqual(self.db.query(ApprovalPendingAssignment).count(), 0)
+
+    def test_analytics_endpoint_names_approvers_and_checks_role(self):
+        self.submit_all_and_decide()
+
+        response = asyncio.run(get_approval_analytics(
+            scope='approver', days=7, db=self.db, current_user=SimpleNamespace(role='admin')
+        ))
+        names = {item['scope_key']: item['approver_name'] for item in response['items']}
+        self.assertEqual(names[str(self.approver.id)], 'Approver')
+        self.assertEqual(names[''], '未指定')
+
+        with self.assertRaises(HTTPException) as ctx:
+            asyncio.run(get_approval_analytics(
+                scope='approver', days=7, db=self.db, current_user=SimpleNamespace(role='user')
+            ))
+        self.assertEqual(ctx.exception.status_code, 403)
+
+
+if __name__ == '__main__':
+    unittest.main()
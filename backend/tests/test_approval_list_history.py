@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import asyncio
+import unittest
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import ApprovalRecord, Quote, User
+from app.api.v2.endpoints.approval_v2 import list_approvals
+
+
+class ApprovalListHistoryTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:', connect_args={'check_same_thread': False})
+        TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = TestingSessionLocal()
+
+        owner = User(userid='owner', name='Owner', role='user')
+        self.db.add(owner)
+        self.db.commit()
+
+        base_time = datetime(2026, 1, 1)
+        for index in range(3):
+            quote = Quote(
+                quote_number=f'CIS-KS20260101{index + 1:03d}',
+                title=f'Quote {index}',
+                quote_type='tooling',
+                customer_name='Customer',
+                status='pending',
+                approval_status='pending',
+                created_by=owner.id,
+            )
+            self.db.add(quote)
+            self.db.flush()
+            for step in range(index * 4):
+                self.db.add(ApprovalRecord(
+                    quote_id=quote.id,
+                    action=f'step{step}',
+                    status='completed',
+                    created_at=base_time + timedelta(hours=step),
+                ))
+        self.db.commit()
+        self.db.expunge_all()
+
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._record_statement)
+
+    def _record_statement(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def tearDown(self):
+        event.remove(self.engine, 'before_cursor_execute', self._record_statement)
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+        self.engine.dispose()
+
+    def test_page_history_is_loaded_in_two_queries(self):
+        response = asyncio.run(list_approvals(
+            status_filter=None, page=1, page_size=20, db=self.db, current_user=SimpleNamespace(id=1)
+        ))
+
+        self.assertEqual(len(self.statements), 2)
+        self.assertEqual(response.total, 3)
+        # 列表走投影查询，不水合 Quote ORM 对象
+        self.assertFalse([obj for obj in self.db.identity_map.values() if isinstance(obj, Quote)])
+        history = {item.quote_number: item.approval_history for item in response.items}
+        self.assertEqual(history['CIS-KS20260101001'], [])
+        self.assertEqual([h['action'] for h in history['CIS-KS20260101002']], ['step3', 'step2', 'step1', 'step0'])
+        self.assertEqual(
+            [h['action'] for h in history['CIS-KS20260101003']],
+            ['step7', 'step6', 'step5', 'step4', 'step3'],
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
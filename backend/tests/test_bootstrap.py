@@ -0,0 +1,140 @@
+from datetime import date
+import gzip
+import unittest
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.auth_routes import get_current_user_strict_multi_source
+from app.database import Base, get_db
+from app.main import app
+from app.api.v1.endpoints.bootstrap import bootstrap_catalog_cache
+from app.models import AuxiliaryEquipment, CardConfig, Configuration, ExchangeRate, Machine, MachineType, Supplier, User
+from app.services.catalog_cache import catalog_snapshot_cache
+from app.services.catalog_changes import current_change_version
+
+
+class BootstrapTests(unittest.TestCase):
+    url = '/api/v1/bootstrap'
+
+    def setUp(self):
+        self.engine = create_engine(
+            'sqlite:///:memory:',
+            connect_args={'check_same_thread': False},
+            poolclass=StaticPool,
+        )
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        db = self.SessionLocal()
+        for type_index in range(3):
+            supplier = Supplier(name=f'供应商-{type_index}', machine_type=MachineType(name=f'测试机-{type_index}'))
+            machine = Machine(name=f'J750-{type_index}', supplier=supplier, base_hourly_rate=120.0, currency='USD')
+            machine.card_configs = [CardConfig(part_number=f'PN-{type_index}-{n}', unit_price=10.0 + n) for n in range(40)]
+            machine.configurations = [Configuration(name=f'CFG-{type_index}', additional_rate=5.0)]
+            db.add(machine)
+        db.add_all([
+            AuxiliaryEquipment(name='HT-1028', hourly_rate=30.0, type='handler'),
+            ExchangeRate(currency='USD', rate=7.2, effective_date=date(2026, 1, 1)),
+        ])
+        self.manager = User(userid='manager', name='经理', role='manager', department_ids='[2]')
+        self.admin = User(userid='admin', name='管理员', role='admin')
+        db.add_all([self.manager, self.admin])
+        db.commit()
+        db.refresh(self.manager)
+        db.refresh(self.admin)
+        db.close()
+        catalog_snapshot_cache.clear()
+        bootstrap_catalog_cache.clear()
+
+        def override_db():
+            db = self.SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        self.viewer = self.manager
+        app.dependency_overrides[get_db] = override_db
+        app.dependency_overrides[get_current_user_strict_multi_source] = lambda: self.viewer
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        app.dependency_overrides.clear()
+        catalog_snapshot_cache.clear()
+        bootstrap_catalog_cache.clear()
+        Base.metadata.drop_all(bind=self.engine)
+        self.engine.dispose()
+
+    def test_returns_user_permissions_and_catalog_in_one_response(self):
+        response = self.client.get(self.url, headers={'Accept-Encoding': 'identity'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['cache-control'], 'private, no-cache')
+        data = response.json()
+        self.assertEqual((data['user']['userid'], data['user']['department_ids']), ('manager', [2]))
+        self.assertEqual(data['permissions'], {'role': 'manager', 'level': 2, 'granted_roles': ['user', 'manager']})
+        db = self.SessionLocal()
+        self.assertEqual(data['catalog_version'], current_change_version(db))
+        db.close()
+        self.assertEqual(data['catalog']['machine_types'], self.client.get('/api/v1/hierarchical/machine-types').json())
+
+    def test_catalog_contains_every_section_of_its_list_endpoint(self):
+        catalog = self.client.get(self.url).json()['catalog']
+        self.assertEqual(
+            list(catalog), ['machine_types', 'configurations', 'auxiliary_equipment', 'personnel', 'exchange_rates']
+        )
+        self.assertEqual(catalog['configurations'], self.client.get('/api/v1/configurations/').json())
+        self.assertEqual(catalog['auxiliary_equipment'], self.client.get('/api/v1/auxiliary-equipment/').json())
+        self.assertEqual(catalog['personnel'], self.client.get('/api/v1/personnel/').json())
+        self.assertEqual(catalog['exchange_rates'], self.client.get('/api/v1/exchange-rates/').json())
+        self.assertTrue(all(catalog[name] for name in catalog))
+
+        etag = self.client.get(self.url).headers['etag']
+        db = self.SessionLocal()
+        db.add(ExchangeRate(currency='USD', rate=7.3, effective_date=date(2026, 3, 1)))
+        db.commit()
+        db.close()
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([rate['rate'] for rate in response.json()['catalog']['exchange_rates']], [7.3, 7.2])
+
+    def test_gzip_reuses_shared_catalog_segment(self):
+        plain = self.client.get(self.url, headers={'Accept-Encoding': 'identity'}).content
+        db = self.SessionLocal()
+        catalog = bootstrap_catalog_cache.get(db)
+        db.close()
+        prefix, suffix = plain.split(catalog.body)
+        compressed = catalog.gzip_wrapped(prefix, suffix)
+        self.assertEqual(gzip.decompress(compressed), plain)
+        self.assertLess(len(compressed), len(plain) // 4)
+
+        response = self.client.get(self.url, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['content-encoding'], 'gzip')
+        self.assertEqual(response.content, plain)
+
+    def test_etag_is_per_user_and_catalog_is_shared(self):
+        first = self.client.get(self.url)
+        etag = first.headers['etag']
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 304)
+
+        statements = []
+        event.listen(self.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+        self.viewer = self.admin
+        second = self.client.get(self.url)
+        self.assertNotEqual(second.headers['etag'], etag)
+        self.assertEqual(second.json()['catalog'], first.json()['catalog'])
+        self.assertFalse([sql for sql in statements if 'machine_types' in sql or 'configurations' in sql or 'exchange_rates' in sql])
+
+        db = self.SessionLocal()
+        db.add(MachineType(name='分选机'))
+        db.commit()
+        db.close()
+        self.viewer = self.manager
+        third = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(third.status_code, 200)
+        self.assertGreater(third.json()['catalog_version'], first.json()['catalog_version'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.auth_routes import get_current_user_optional
+from app.database import Base, get_db
+from app.main import app
+from app.models import CardConfig, Machine, Supplier
+from app.services.card_config_index import card_config_index_cache
+
+
+class CardConfigQueryTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            'sqlite:///:memory:',
+            connect_args={'check_same_thread': False},
+            poolclass=StaticPool,
+        )
+        Base.metadata.create_all(bind=self.engine)
+        self.SessionLocal = sessionmaker(bind=self.engine)
+        db = self.SessionLocal()
+        teradyne, advantest = Supplier(name='Teradyne'), Supplier(name='Advantest')
+        machines = [
+            Machine(name='J750', supplier=teradyne),
+            Machine(name='UltraFLEX', supplier=teradyne),
+            Machine(name='V93000', supplier=advantest),
+        ]
+        db.add_all(machines)
+        db.flush()
+        for index in range(30):
+            machine = machines[index % 3]
+            db.add(CardConfig(
+                part_number=f"{machine.name[:2]}-{index:03d}",
+                board_name=f'Board {index}',
+                unit_price=index,
+                machine_id=machine.id,
+            ))
+        db.add(CardConfig(part_number=None, board_name='Unassigned', machine_id=None))
+        db.commit()
+        self.machine_ids = [machine.id for machine in machines]
+        self.supplier_ids = (teradyne.id, advantest.id)
+        db.close()
+
+        def override_db():
+            db = self.SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_db
+        app.dependency_overrides[get_current_user_optional] = lambda: None
+        card_config_index_cache.clear()
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        app.dependency_overrides.clear()
+        card_config_index_cache.clear()
+        Base.metadata.drop_all(bind=self.engine)
+        self.engine.dispose()
+
+    def _get(self, **params):
+        response = self.client.get('/api/v1/card-configs/', params=params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def _reference(self, predicate, skip=0, limit=100):
+        db = self.SessionLocal()
+        try:
+            cards = [card for card in db.query(CardConfig).order_by(CardConfig.id) if predicate(card)]
+            return [card.id for card in cards][skip:skip + limit]
+        finally:
+            db.close()
+
+    def test_filters_match_table_scan(self):
+        j750, ultraflex, v93000 = self.machine_ids
+        teradyne, advantest = self.supplier_ids
+
+        cards = self._get(machine_id=j750)
+        self.assertEqual([card['id'] for card in cards], self._reference(lambda card: card.machine_id == j750))
+        self.assertEqual(set(cards[0]), {'id', 'machine_id', 'part_number', 'board_name', 'unit_price', 'currency', 'exchange_rate'})
+
+        self.assertEqual(
+            [card['id'] for card in self._get(machine_ids=f'{v93000},{j750}', skip=2, limit=5)],
+            self._reference(lambda card: card.machine_id in (v93000, j750), skip=2, limit=5),
+        )
+        self.assertEqual(
+            [card['id'] for card in self._get(supplier_id=teradyne)],
+            self._reference(lambda card: card.machine_id in (j750, ultraflex)),
+        )
+        self.assertEqual(
+            [card['id'] for card in self._get(supplier_id=teradyne, part_number='ul-01')],
+            self._reference(lambda card: card.machine_id == ultraflex and card.part_number.startswith('Ul-01')),
+        )
+        self.assertEqual(self._get(supplier_id=advantest, machine_id=j750), [])
+        self.assertEqual(
+            [card['id'] for card in self._get(machine_ids=f'{v93000},{j750}', machine_id=j750)],
+            self._reference(lambda card: card.machine_id == j750),
+        )
+        self.assertEqual(self._get(machine_ids=str(v93000), machine_id=j750), [])
+        self.assertEqual(len(self._get()), 31)
+        self.assertEqual(len(self._get(limit=10, skip=25)), 6)
+        self.assertEqual(self.client.get('/api/v1/card-configs/', params={'machine_ids': '1,x'}).status_code, 400)
+
+    def test_served_from_cache_until_catalog_write(self):
+        j750 = self.machine_ids[0]
+        self._get(machine_id=j750)
+
+        statements = []
+        event.listen(self.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+        for _ in range(5):
+            self._get(machine_id=j750, part_number='J7')
+        self.assertFalse([sql for sql in statements if 'card_configs' in sql])
+
+        db = self.SessionLocal()
+        db.add(CardConfig(part_number='J7-NEW', machine_id=j750))
+        db.commit()
+        db.close()
+        self.assertIn('J7-NEW', [card['part_number'] for card in self._get(machine_id=j750)])
+
+
+if __name__ == '__main__':
+    unittest.main()
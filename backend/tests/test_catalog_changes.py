@@ -0,0 +1,100 @@
+import unittest
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import crud, schemas
+from app.database import Base, get_db
+from app.main import app
+from app.models import CardConfig, Machine, MachineType, Supplier
+
+
+class CatalogChangesTests(unittest.TestCase):
+    url = '/api/v1/catalog/changes'
+
+    def setUp(self):
+        self.engine = create_engine(
+            'sqlite:///:memory:',
+            connect_args={'check_same_thread': False},
+            poolclass=StaticPool,
+        )
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = self.SessionLocal()
+
+        machine_type = MachineType(name='测试机')
+        supplier = Supplier(name='Teradyne', machine_type=machine_type)
+        self.machine = Machine(name='J750', supplier=supplier, base_hourly_rate=100.0)
+        self.machine.card_configs = [
+            CardConfig(part_number='PN-1', board_name='DPS', unit_price=10.0),
+            CardConfig(part_number='PN-2', board_name='PE', unit_price=20.0),
+        ]
+        self.db.add(self.machine)
+        self.db.commit()
+
+        def override_db():
+            db = self.SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_db
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        app.dependency_overrides.clear()
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+        self.engine.dispose()
+
+    def test_full_sync_then_only_deltas(self):
+        full = self.client.get(self.url).json()
+        self.assertTrue(full['reset'])
+        self.assertEqual(full['version'], 1)
+        self.assertEqual(len(full['upserted']['card_configs']), 2)
+        self.assertEqual(full['upserted']['machines'][0]['base_hourly_rate'], 100.0)
+
+        card = self.machine.card_configs[0]
+        crud.update_card_config(self.db, card.id, schemas.CardConfigUpdate(unit_price=12.5))
+        crud.create_auxiliary_equipment(self.db, schemas.AuxiliaryEquipmentCreate(name='Handler', hourly_rate=30.0, type='handler'))
+
+        delta = self.client.get(self.url, params={'since': full['version']}).json()
+        self.assertFalse(delta['reset'])
+        self.assertEqual(delta['version'], 3)
+        self.assertEqual([row['unit_price'] for row in delta['upserted']['card_configs']], [12.5])
+        self.assertEqual([row['name'] for row in delta['upserted']['auxiliary_equipment']], ['Handler'])
+        self.assertEqual(delta['upserted']['machines'], [])
+        self.assertEqual(self.client.get(self.url, params={'since': 3}).json()['upserted']['card_configs'], [])
+
+    def test_deletes_are_reported_as_tombstones(self):
+        card_ids = sorted(card.id for card in self.machine.card_configs)
+        machine_id = self.machine.id
+
+        crud.delete_machine(self.db, machine_id)
+        delta = self.client.get(self.url, params={'since': 1}).json()
+        self.assertEqual(delta['deleted']['machines'], [machine_id])
+        self.assertEqual(sorted(delta['deleted']['card_configs']), card_ids)
+        self.assertEqual(delta['upserted']['machines'], [])
+
+        full = self.client.get(self.url).json()
+        self.assertEqual(full['upserted']['machines'], [])
+        self.assertEqual(full['deleted']['machines'], [])
+
+    def test_since_ahead_of_server_forces_reset(self):
+        response = self.client.get(self.url, params={'since': 99})
+        self.assertTrue(response.json()['reset'])
+        self.assertEqual(len(response.json()['upserted']['machines']), 1)
+        self.assertEqual(self.client.get(self.url, params={'since': -1}).status_code, 422)
+
+    def test_rolled_back_write_allocates_no_version(self):
+        self.db.add(MachineType(name='临时'))
+        self.db.flush()
+        self.db.rollback()
+        self.assertEqual(self.client.get(self.url).json()['version'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+import gzip
+import json
+import unittest
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import crud, schemas
+from app.database import Base, get_db
+from app.main import app
+from app.models import CardConfig, Machine, MachineType, Supplier
+from app.services.catalog_cache import (
+    CATALOG_RECHECK_SECONDS,
+    catalog_snapshot_cache,
+    catalog_version,
+    on_catalog_change,
+)
+
+
+class CatalogSnapshotTests(unittest.TestCase):
+    url = '/api/v1/hierarchical/machine-types'
+
+    def setUp(self):
+        self.engine = create_engine(
+            'sqlite:///:memory:',
+            connect_args={'check_same_thread': False},
+            poolclass=StaticPool,
+        )
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = self.SessionLocal()
+
+        for type_index in range(3):
+            machine_type = MachineType(name=f'测试机-{type_index}', description='ATE')
+            self.db.add(machine_type)
+            self.db.flush()
+            for supplier_index in range(2):
+                supplier = Supplier(name=f'供应商-{type_index}-{supplier_index}', machine_type_id=machine_type.id)
+                self.db.add(supplier)
+                self.db.flush()
+                for machine_index in range(2):
+                    machine = Machine(
+                        name=f'J750-{type_index}{supplier_index}{machine_index}',
+                        supplier_id=supplier.id,
+                        base_hourly_rate=120.0,
+                        currency='USD',
+                        exchange_rate=7.2,
+                    )
+                    self.db.add(machine)
+                    self.db.flush()
+                    self.db.add_all([
+                        CardConfig(part_number=f'PN-{machine.id}-{n}', board_name='DPS', unit_price=10.0 + n,
+                                   currency='USD', exchange_rate=7.2, machine_id=machine.id)
+                        for n in range(2)
+                    ])
+        self.db.commit()
+        catalog_snapshot_cache.clear()
+
+        def override_db():
+            db = self.SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_db
+        self.client = TestClient(app)
+
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._count_statement)
+
+    def _count_statement(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            self.statements.append(statement)
+
+    def tearDown(self):
+        event.remove(self.engine, 'before_cursor_execute', self._count_statement)
+        app.dependency_overrides.clear()
+        catalog_snapshot_cache.clear()
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+        self.engine.dispose()
+
+    def test_snapshot_contains_full_tree_with_stored_values(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+
+        self.assertEqual([node['name'] for node in data], ['测试机-0', '测试机-1', '测试机-2'])
+        machine = data[0]['suppliers'][0]['machines'][0]
+        self.assertEqual(machine['base_hourly_rate'], 120.0)
+        self.assertEqual(machine['currency'], 'USD')
+        card = machine['card_configs'][0]
+        self.assertEqual(set(card), {'id', 'part_number', 'board_name', 'unit_price', 'currency', 'exchange_rate', 'machine_id'})
+        self.assertEqual(card['exchange_rate'], 7.2)
+
+        paged = self.client.get(self.url, params={'skip': 1, 'limit': 1})
+        self.assertEqual([node['name'] for node in paged.json()], ['测试机-1'])
+        self.assertNotEqual(paged.headers['etag'], response.headers['etag'])
+
+    def test_build_uses_one_query_per_level_and_reads_hit_memory(self):
+        self.client.get(self.url)
+        self.assertEqual(len(self.statements), 5)  # 变更版本号 + 目录树每层一次
+
+        self.statements.clear()
+        self.client.get(self.url)
+        self.client.get(self.url, params={'limit': 2})
+        self.assertEqual(self.statements, [])
+
+    def test_etag_and_gzip(self):
+        first = self.client.get(self.url)
+        etag = first.headers['etag']
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 304)
+
+        raw = self.client.get(self.url, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(raw.headers['content-encoding'], 'gzip')
+        self.assertEqual(raw.headers['etag'], etag)
+        self.assertEqual(raw.json(), first.json())
+        self.assertEqual(gzip.decompress(catalog_snapshot_cache.get(self.db).gzip_body), first.content)
+
+    def test_committed_catalog_write_bumps_version_and_etag(self):
+        etag = self.client.get(self.url).headers['etag']
+        changes = []
+        on_catalog_change(changes.append)
+        version = catalog_version()
+
+        crud.create_machine_type(self.db, schemas.MachineTypeCreate(name='分选机', description='Handler'))
+        self.assertEqual(catalog_version(), version + 1)
+        self.assertIn(version + 1, changes)
+
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('分选机', [node['name'] for node in json.loads(response.content)])
+
+    def test_write_from_another_process_is_picked_up_after_recheck(self):
+        etag = self.client.get(self.url).headers['etag']
+        version = catalog_version()
+
+        # 其他进程的写入：不经过本进程的 ORM 会话，只递增持久化变更版本
+        with self.engine.begin() as conn:
+            conn.execute(text("INSERT INTO machine_types (name, description) VALUES ('外部导入', 'ATE')"))
+            conn.execute(text("UPDATE catalog_change_sequence SET last_value = last_value + 1 WHERE name = 'catalog'"))
+        self.assertEqual(catalog_version(), version)
+
+        # 复核间隔内直接使用内存快照
+        self.statements.clear()
+        self.assertEqual(self.client.get(self.url).headers['etag'], etag)
+        self.assertEqual(self.statements, [])
+
+        catalog_snapshot_cache.recheck_seconds = 0
+        try:
+            response = self.client.get(self.url)
+            self.assertNotEqual(response.headers['etag'], etag)
+            self.assertIn('外部导入', [node['name'] for node in response.json()])
+
+            # 持久化版本未变时只复核一次序列，不重建
+            self.statements.clear()
+            self.client.get(self.url)
+            self.assertEqual(len(self.statements), 1)
+        finally:
+            catalog_snapshot_cache.recheck_seconds = CATALOG_RECHECK_SECONDS
+
+    def test_rolled_back_write_keeps_version(self):
+        version = catalog_version()
+        self.db.add(MachineType(name='临时'))
+        self.db.flush()
+        self.db.rollback()
+        self.assertEqual(catalog_version(), version)
+
+
+if __name__ == '__main__':
+    unittest.main()
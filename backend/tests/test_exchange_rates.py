@@ -0,0 +1,197 @@
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+import unittest
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base, get_db
+from app.main import app
+from app.models import CardConfig, Machine, Quote, QuoteDailyRollup, QuoteItem, User
+from app.services.exchange_rates import set_exchange_rate
+from app.services.pricing_catalog import pricing_catalog_cache
+from app.services.quote_repricing import DraftQuoteRepricer
+from app.services.quote_service import QuoteService
+
+RATE_DAY = date(2026, 3, 1)
+
+
+class ExchangeRateTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            'sqlite:///:memory:',
+            connect_args={'check_same_thread': False},
+            poolclass=StaticPool,
+        )
+        Base.metadata.create_all(bind=self.engine)
+        self.SessionLocal = sessionmaker(bind=self.engine)
+        self.db = self.SessionLocal()
+
+        self.usd_machine = Machine(name='J750', base_hourly_rate=40, exchange_rate=7.1, currency='USD')
+        self.usd_machine.card_configs = [CardConfig(part_number='USD', unit_price=2.5, currency='USD', exchange_rate=6.9)]
+        self.rmb_machine = Machine(name='ST', base_hourly_rate=100, currency='RMB')
+        self.rmb_machine.card_configs = [
+            CardConfig(part_number='RMB', unit_price=10, currency='RMB'),
+            CardConfig(part_number='USD', unit_price=3, currency='USD', exchange_rate=None),
+        ]
+        self.owner = User(userid='owner', name='Owner', role='user')
+        self.db.add_all([self.usd_machine, self.rmb_machine, self.owner])
+        self.db.commit()
+        pricing_catalog_cache.clear()
+
+    def tearDown(self):
+        app.dependency_overrides.clear()
+        pricing_catalog_cache.clear()
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+        self.engine.dispose()
+
+    def _hourly(self, machine, day):
+        return pricing_catalog_cache.get(self.db, day).machine(machine.id).hourly_total({})
+
+    def test_pricing_uses_rate_effective_on_pricing_day(self):
+        # 汇率表为空时沿用机器/板卡上的汇率
+        self.assertEqual(self._hourly(self.usd_machine, RATE_DAY), (Decimal('40') + Decimal('2.5') * Decimal('6.9')) * Decimal('7.1'))
+        self.assertEqual(self._hourly(self.rmb_machine, RATE_DAY), Decimal('100') + Decimal('10') + Decimal('3'))
+
+        set_exchange_rate(self.db, 'usd', 7.3, RATE_DAY)
+        self.db.commit()
+
+        rate = Decimal('7.3')
+        self.assertEqual(self._hourly(self.usd_machine, RATE_DAY), (Decimal('40') + Decimal('2.5') * rate) * rate)
+        self.assertEqual(self._hourly(self.rmb_machine, RATE_DAY), Decimal('100') + Decimal('10') + Decimal('3') * rate)
+        # 生效日之前仍按原汇率
+        self.assertEqual(self._hourly(self.rmb_machine, date(2026, 2, 28)), Decimal('113'))
+
+        statements = []
+        event.listen(self.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+        pricing_catalog_cache.get(self.db, date(2026, 2, 28)).price(self.usd_machine.id, 2)
+        self.assertEqual(statements, [])
+
+    def test_set_exchange_rate_overwrites_same_day_and_reports_previous(self):
+        _, previous = set_exchange_rate(self.db, 'USD', 7.2, date(2026, 1, 1))
+        self.assertIsNone(previous)
+        self.db.commit()
+        _, previous = set_exchange_rate(self.db, 'USD', 7.25, RATE_DAY)
+        self.assertEqual(previous, 7.2)
+        self.db.commit()
+        row, previous = set_exchange_rate(self.db, 'USD', 7.3, RATE_DAY)
+        self.db.commit()
+        self.assertEqual((row.rate, previous), (7.3, 7.25))
+        self.assertEqual(self.db.execute(select(func.count()).select_from(row.__class__)).scalar_one(), 2)
+        with self.assertRaises(ValueError):
+            set_exchange_rate(self.db, 'CNY', 1, RATE_DAY)
+
+    def _quote(self, number, status='draft', currency='CNY', is_deleted=False):
+        quote = Quote(
+            quote_number=number, title=number, quote_type='engineering', currency=currency,
+            status=status, is_deleted=is_deleted, discount=5, tax_rate=0.13, created_by=self.owner.id,
+        )
+        quote.items = [
+            QuoteItem(item_name='USD 机时', quantity=3, unit_price=284.0, uph=1000, machine_id=self.usd_machine.id),
+            QuoteItem(item_name='USD 议价', quantity=1, unit_price=71.0, adjusted_price=80, machine_id=self.usd_machine.id),
+            QuoteItem(item_name='RMB 机时', quantity=2.5, unit_price=113.0, machine_id=self.rmb_machine.id),
+            QuoteItem(item_name='人工', quantity=1, unit_price=50.0),
+        ]
+        service = QuoteService(self.db)
+        for key, value in service._prepare_items(quote).items():
+            setattr(quote, key, value)
+        self.db.add(quote)
+        return quote
+
+    def test_repricer_updates_draft_quotes_in_chunks(self):
+        drafts = [self._quote(f'D{index}') for index in range(5)]
+        others = [
+            self._quote('APPROVED', status='approved'),
+            self._quote('DELETED', is_deleted=True),
+            self._quote('USD', currency='USD'),
+        ]
+        self.db.commit()
+        untouched = {quote.id: quote.total_amount for quote in others}
+
+        progress = []
+        summary = DraftQuoteRepricer(self.db, chunk_size=2).run('usd', 7.1, 7.3, progress=lambda *args: progress.append(args))
+
+        self.assertEqual(summary, {'quotes': 5, 'items': 10, 'failed': 0})
+        self.assertEqual(progress, [(2, 5), (4, 5), (5, 5)])
+
+        self.db.expire_all()
+        service = QuoteService(self.db)
+        ratio = Decimal('7.3') / Decimal('7.1')
+        for quote in drafts:
+            items = sorted(quote.items, key=lambda item: item.id)
+            expected_price = float((Decimal('284') * ratio).quantize(Decimal('0.0001'), rounding=ROUND_HALF_UP))
+            self.assertEqual([item.unit_price for item in items], [expected_price, 73.0, 113.0, 50.0])
+            self.assertEqual(items[0].hourly_rate, expected_price * 1000)
+            stored = {key: getattr(quote, key) for key in ('subtotal', 'discount', 'tax_rate', 'tax_amount', 'total_amount')}
+            stored_lines = [item.total_price for item in items]
+            self.assertEqual(service._prepare_items(quote), stored)
+            self.assertEqual([item.total_price for item in items], stored_lines)
+        for quote in others:
+            self.assertEqual(quote.total_amount, untouched[quote.id])
+
+        rollup_total = self.db.execute(
+            select(func.sum(QuoteDailyRollup.total_amount)).where(QuoteDailyRollup.is_deleted.is_(False))
+        ).scalar_one()
+        live_total = self.db.execute(select(func.sum(Quote.total_amount)).where(Quote.is_deleted.is_(False))).scalar_one()
+        self.assertAlmostEqual(rollup_total, live_total, places=6)
+
+    def test_rerun_after_partial_failure_does_not_reprice_twice(self):
+        drafts = [self._quote(f'D{index}') for index in range(5)]
+        self.db.commit()
+
+        def fail_after_first_chunk(processed, total):
+            raise RuntimeError('中断')
+
+        repricer = DraftQuoteRepricer(self.db, chunk_size=2)
+        with self.assertRaises(RuntimeError):
+            repricer.run('USD', 7.1, 7.3, progress=fail_after_first_chunk)
+
+        progress = []
+        summary = repricer.run('USD', 7.1, 7.3, progress=lambda *args: progress.append(args))
+        self.assertEqual(summary, {'quotes': 3, 'items': 6, 'failed': 0})
+        self.assertEqual(progress, [(2, 3), (3, 3)])
+        self.assertEqual(repricer.run('USD', 7.1, 7.3), {'quotes': 0, 'items': 0, 'failed': 0})
+
+        self.db.expire_all()
+        expected_price = float((Decimal('284') * Decimal('7.3') / Decimal('7.1')).quantize(Decimal('0.0001'), rounding=ROUND_HALF_UP))
+        for quote in drafts:
+            items = sorted(quote.items, key=lambda item: item.id)
+            self.assertEqual([item.unit_price for item in items], [expected_price, 73.0, 113.0, 50.0])
+            self.assertEqual([item.applied_exchange_rate for item in items], [7.3, 7.3, None, None])
+
+        # 再次调整汇率时以记录的汇率为基准
+        repricer.run('USD', 7.1, 7.0)
+        self.db.expire_all()
+        expected_price = float((Decimal(str(expected_price)) * Decimal('7.0') / Decimal('7.3')).quantize(Decimal('0.0001'), rounding=ROUND_HALF_UP))
+        self.assertEqual(sorted(drafts[0].items, key=lambda item: item.id)[0].unit_price, expected_price)
+
+    def test_endpoint_writes_one_row_and_reports_previous_rate(self):
+        def override_db():
+            db = self.SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_db
+        client = TestClient(app)
+
+        response = client.post('/api/v1/exchange-rates/', json={'currency': 'usd', 'rate': 7.2, 'effective_date': '2026-01-01'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['exchange_rate']['currency'], 'USD')
+        self.assertIsNone(response.json()['previous_rate'])
+
+        response = client.post('/api/v1/exchange-rates/', json={'currency': 'USD', 'rate': 7.3, 'effective_date': '2026-03-01'})
+        self.assertEqual(response.json()['previous_rate'], 7.2)
+        self.assertEqual(client.post('/api/v1/exchange-rates/', json={'currency': 'RMB', 'rate': 1}).status_code, 400)
+        self.assertEqual(client.post('/api/v1/exchange-rates/', json={'currency': 'USD', 'rate': 0}).status_code, 422)
+
+        rates = client.get('/api/v1/exchange-rates/', params={'currency': 'usd'}).json()
+        self.assertEqual([rate['rate'] for rate in rates], [7.3, 7.2])
+
+
+if __name__ == '__main__':
+    unittest.main()
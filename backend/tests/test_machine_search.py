@@ -0,0 +1,93 @@
+import unittest
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import Machine, MachineType, Supplier
+from app.services.machine_search import NameIndex, catalog_search_cache, normalize_name
+from app.wecom_message_handler import MessageHandler
+
+
+class NameIndexTests(unittest.TestCase):
+    def setUp(self):
+        names = ['J750', 'J750EX-HD', 'ETS-88', 'ETS-364', 'UltraFLEX Plus', 'Advantest V93000', 'IP750 Ex', 'Chroma 3380P']
+        self.index = NameIndex((name, name) for name in names)
+
+    def test_normalization(self):
+        self.assertEqual(normalize_name(' ＥＴＳ－８８ '), 'ets88')
+        self.assertEqual(normalize_name('UltraFLEX Plus'), 'ultraflexplus')
+        self.assertEqual(self.index.lookup('ets 88'), 'ETS-88')
+        self.assertIsNone(self.index.lookup('ets'))
+
+    def test_ranking_exact_prefix_contains_fuzzy(self):
+        self.assertEqual(self.index.search('j750'), ['J750', 'J750EX-HD', 'IP750 Ex'])
+        self.assertEqual(self.index.search('ets'), ['ETS-88', 'ETS-364'])
+        # 名称中任一单词的前缀
+        self.assertEqual(self.index.search('v93'), ['Advantest V93000'])
+        self.assertEqual(self.index.search('plus'), ['UltraFLEX Plus'])
+        # 拼写错误按相似度给出模糊结果
+        self.assertEqual(self.index.search('ultraflx')[:1], ['UltraFLEX Plus'])
+        self.assertEqual(self.index.search('3380'), ['Chroma 3380P'])
+        self.assertEqual(self.index.search('7'), ['J750', 'IP750 Ex', 'J750EX-HD'])
+        self.assertEqual(self.index.search('zzz'), [])
+        self.assertEqual(self.index.search(' - '), [])
+        self.assertEqual(self.index.search('j750', limit=1), ['J750'])
+
+
+class MessageHandlerSearchTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            'sqlite:///:memory:',
+            connect_args={'check_same_thread': False},
+            poolclass=StaticPool,
+        )
+        Base.metadata.create_all(bind=self.engine)
+        self.SessionLocal = sessionmaker(bind=self.engine)
+        db = self.SessionLocal()
+        tester = MachineType(name='测试机')
+        teradyne = Supplier(name='Teradyne', machine_type=tester)
+        db.add_all([
+            Machine(name='J750', base_hourly_rate=120, currency='USD', exchange_rate=7.1, supplier=teradyne, active=True),
+            Machine(name='J750EX-HD', base_hourly_rate=150, currency='USD', supplier=teradyne),
+            Supplier(name='Advantest', machine_type=tester),
+        ])
+        db.commit()
+        db.close()
+        catalog_search_cache.clear()
+        self.handler = MessageHandler('corp', session_factory=self.SessionLocal)
+
+    def tearDown(self):
+        catalog_search_cache.clear()
+        Base.metadata.drop_all(bind=self.engine)
+        self.engine.dispose()
+
+    def test_commands_are_served_from_index(self):
+        self.assertIn('找到 2 个匹配的设备', self.handler.handle_search('j750'))
+        detail = self.handler.handle_device('j 750')
+        self.assertIn('设备详情：J750', detail)
+        self.assertIn('供应商: Teradyne', detail)
+        self.assertIn('类型: 测试机', detail)
+        self.assertIn('汇率: 7.1', detail)
+        self.assertIn('您是否要查找', self.handler.handle_device('J75'))
+        self.assertIn('1. Teradyne - 测试机\n2. Advantest - 测试机', self.handler.handle_supplier(''))
+        self.assertIn('1. Advantest', self.handler.handle_supplier('adv'))
+
+        statements = []
+        event.listen(self.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+        for _ in range(10):
+            self.handler.handle_search('750')
+        self.assertEqual(statements, [])
+
+    def test_catalog_write_rebuilds_index(self):
+        self.assertIn('未找到', self.handler.handle_search('ETS-88'))
+        db = self.SessionLocal()
+        db.add(Machine(name='ETS-88', base_hourly_rate=90))
+        db.commit()
+        db.close()
+        self.assertIn('• ETS-88', self.handler.handle_search('ets88'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+from decimal import Decimal, ROUND_HALF_UP
+from types import SimpleNamespace
+import random
+import unittest
+
+import numpy as np
+
+from app.services import money_engine
+from app.services.quote_service import QuoteService
+
+CENT = Decimal('0.01')
+
+
+def random_amount(rng):
+    """生成容易触发舍入边界的金额：半分、多位小数、整数、二进制不可精确表示的值"""
+    if rng.random() < 0.005:
+        return rng.uniform(0, 500)  # 17 位有效数字，整单应回退到 Decimal
+    kind = rng.randrange(5)
+    if kind == 0:
+        return round(rng.uniform(0, 1000), 2) + 0.005
+    if kind == 1:
+        return round(rng.uniform(0, 10000), rng.randrange(0, 7))
+    if kind == 2:
+        return rng.randrange(0, 100000)
+    if kind == 3:
+        return rng.choice([0.1, 0.2, 0.3, 1.005, 2.675, 0.125, 0.145, 1.115, 0.0])
+    return None
+
+
+def decimal_line_total(quantity, price):
+    quantity = Decimal(str(quantity if quantity is not None else 0))
+    price = Decimal(str(price if price is not None else 0))
+    return (quantity * price).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+class MoneyEngineTests(unittest.TestCase):
+    def setUp(self):
+        self.service = QuoteService(db=None)
+
+    def test_line_totals_match_decimal_half_up(self):
+        rng = random.Random(45)
+        vectorized_cases = 0
+        for _ in range(400):
+            size = rng.randrange(1, 40)
+            quantities = [random_amount(rng) for _ in range(size)]
+            prices = [random_amount(rng) for _ in range(size)]
+            cents = money_engine.line_totals_cents(
+                money_engine.as_amounts(quantities), money_engine.as_amounts(prices)
+            )
+            if cents is None:
+                continue
+            vectorized_cases += 1
+            expected = [decimal_line_total(q, p) for q, p in zip(quantities, prices)]
+            self.assertEqual([Decimal(value).scaleb(-2) for value in cents.tolist()], expected)
+            self.assertEqual([value / 100 for value in cents.tolist()], [float(value) for value in expected])
+        self.assertGreater(vectorized_cases, 50)
+
+    def test_half_cent_boundaries_round_up(self):
+        quantities = money_engine.as_amounts([1, 1, 3, 1, 2])
+        prices = money_engine.as_amounts([1.005, 2.675, 0.335, 0.125, 0.0025])
+        self.assertEqual(money_engine.line_totals_cents(quantities, prices).tolist(), [101, 268, 101, 13, 1])
+
+    def test_totals_match_calculate_totals(self):
+        rng = random.Random(4545)
+        for _ in range(2000):
+            subtotal_cents = rng.randrange(0, 10 ** 9)
+            discount = rng.choice([None, 0, round(rng.uniform(0, 2e6), rng.randrange(0, 5)), subtotal_cents / 100 + 1])
+            tax_rate = rng.choice([None, 0.13, 0.06, round(rng.random(), rng.randrange(1, 7)), 1])
+            result = money_engine.totals_cents(
+                subtotal_cents,
+                money_engine.as_amounts([discount]),
+                money_engine.as_amounts([tax_rate]),
+            )
+            expected = self.service._calculate_totals(Decimal(subtotal_cents).scaleb(-2), discount, tax_rate)
+            self.assertEqual(
+                {
+                    'subtotal': result['subtotal'][0] / 100,
+                    'discount': result['discount'][0] / 100,
+                    'tax_rate': result['tax_rate'][0] / 10000,
+                    'tax_amount': result['tax_amount'][0] / 100,
+                    'total_amount': result['total_amount'][0] / 100,
+                },
+                expected,
+            )
+
+    def test_invalid_inputs_fall_back(self):
+        self.assertIsNone(money_engine.as_amounts([1.0, -0.01]))
+        self.assertIsNone(money_engine.as_amounts([1.0, '2']))
+        self.assertIsNone(money_engine.as_amounts([True]))
+        self.assertIsNone(money_engine.as_amounts([float('nan')]))
+        self.assertIsNone(money_engine.to_scaled(np.array([1 / 3])))
+        self.assertIsNone(money_engine.totals_cents(100, np.array([0.0]), np.array([1.5])))
+
+    def test_quote_service_vectorized_and_decimal_paths_agree(self):
+        rng = random.Random(450)
+        for size in (QuoteService.VECTORIZE_MIN_ITEMS, 500):
+            items = [
+                {
+                    'item_name': f'工序{i}',
+                    'quantity': rng.choice([1, 2, 3.5, 1000, 0.25]),
+                    'unit_price': round(rng.uniform(0, 200), rng.randrange(0, 5)),
+                    'adjusted_price': rng.choice([None, None, round(rng.uniform(0, 200), 3)]),
+                    'configuration': 'UPH:1200',
+                }
+                for i in range(size)
+            ]
+            vectorized = self.service._prepare_items_payload([dict(item) for item in items])
+            self.service.VECTORIZE_MIN_ITEMS = 10 ** 9
+            try:
+                looped = self.service._prepare_items_payload([dict(item) for item in items])
+            finally:
+                del self.service.VECTORIZE_MIN_ITEMS
+            self.assertEqual(vectorized, looped)
+
+            quote = SimpleNamespace(
+                items=[SimpleNamespace(total_price=None, **item) for item in items],
+                discount=123.455,
+                tax_rate=0.13,
+            )
+            totals = self.service._prepare_items(quote)
+            self.assertEqual(totals, self.service._calculate_totals(looped['subtotal'], 123.455, 0.13))
+            self.assertEqual([item.total_price for item in quote.items], [item['total_price'] for item in looped['items']])
+
+    def test_negative_values_keep_decimal_error_messages(self):
+        items = [{'quantity': 1, 'unit_price': 1.0}] * QuoteService.VECTORIZE_MIN_ITEMS
+        items = items + [{'quantity': 1, 'unit_price': 1.0, 'adjusted_price': -1}]
+        with self.assertRaisesRegex(ValueError, '调整后单价不能为负数'):
+            self.service._prepare_items_payload(items)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+from decimal import Decimal, ROUND_HALF_UP
+import random
+import unittest
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import crud, schemas
+from app.auth_routes import get_current_user
+from app.database import Base, get_db
+from app.main import app
+from app.models import CardConfig, Configuration, Machine, User
+from app.services.pricing_catalog import pricing_catalog_cache
+
+
+def reference_price(machine, test_hours, details):
+    """逐行读取 ORM 对象的原始计价算法，用于核对缓存计价结果"""
+    details = details or {}
+    hourly_total = Decimal(str(machine.base_hourly_rate or 0)) * Decimal(str(machine.discount_rate or 1))
+    selected_configs = set(details.get('configuration_ids', []) or [])
+    for config in machine.configurations:
+        if not selected_configs or config.id in selected_configs:
+            hourly_total += Decimal(str(config.additional_rate or 0))
+    selected_cards = set(details.get('card_config_ids', []) or [])
+    exchange_default = Decimal(str(machine.exchange_rate or 1))
+    machine_currency = (machine.currency or 'RMB').upper()
+    for card in machine.card_configs:
+        if not selected_cards or card.id in selected_cards:
+            card_price = Decimal(str(card.unit_price or 0))
+            if (card.currency or machine_currency).upper() == 'USD':
+                card_price *= Decimal(str(card.exchange_rate or exchange_default))
+            hourly_total += card_price
+    for extra in details.get('auxiliary_rates', []) or []:
+        hourly_total += Decimal(str(extra))
+    hourly_total += Decimal(str(details.get('extra_flat_fee') or 0))
+    if machine_currency == 'USD':
+        override = details.get('exchange_rate_override') or details.get('exchange_rate')
+        hourly_total *= Decimal(str(override or exchange_default))
+    total = hourly_total * Decimal(str(test_hours))
+    return float(total.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
+
+
+class PricingCatalogTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            'sqlite:///:memory:',
+            connect_args={'check_same_thread': False},
+            poolclass=StaticPool,
+        )
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+
+        rng = random.Random(43)
+        for index in range(6):
+            machine = Machine(
+                name=f'M{index}',
+                base_hourly_rate=round(rng.uniform(50, 300), 2),
+                discount_rate=rng.choice([1.0, 0.9, 0.85, None]),
+                exchange_rate=rng.choice([7.1, 7.25, None]),
+                currency=rng.choice(['RMB', 'USD', 'usd', None]),
+            )
+            machine.configurations = [
+                Configuration(name=f'C{index}-{n}', additional_rate=round(rng.uniform(0, 80), 2)) for n in range(3)
+            ]
+            machine.card_configs = [
+                CardConfig(
+                    part_number=f'PN{index}-{n}',
+                    unit_price=round(rng.uniform(0.1, 40), 3),
+                    currency=rng.choice(['RMB', 'USD', None]),
+                    exchange_rate=rng.choice([6.9, None]),
+                )
+                for n in range(4)
+            ]
+            self.db.add(machine)
+        self.db.commit()
+        pricing_catalog_cache.clear()
+
+    def tearDown(self):
+        pricing_catalog_cache.clear()
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+        self.engine.dispose()
+
+    def _requests(self, count, seed=7):
+        rng = random.Random(seed)
+        machines = self.db.query(Machine).all()
+        for _ in range(count):
+            machine = rng.choice(machines)
+            details = {}
+            if rng.random() < 0.6:
+                details['configuration_ids'] = [c.id for c in machine.configurations if rng.random() < 0.5]
+            if rng.random() < 0.6:
+                details['card_config_ids'] = [c.id for c in machine.card_configs if rng.random() < 0.5]
+            if rng.random() < 0.3:
+                details['auxiliary_rates'] = [round(rng.uniform(0, 50), 2)]
+            if rng.random() < 0.2:
+                details['exchange_rate_override'] = 7.3
+            yield machine, round(rng.uniform(0, 200), 2), details
+
+    def test_matches_reference_pricing_to_the_cent(self):
+        for machine, hours, details in self._requests(300):
+            request = schemas.QuotationRequest(machine_id=machine.id, test_hours=hours, details=details)
+            self.assertEqual(crud.calculate_quotation(self.db, request), reference_price(machine, hours, details))
+
+    def test_repeated_pricing_does_no_database_io(self):
+        statements = []
+        event.listen(self.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+        request = schemas.QuotationRequest(machine_id=1, test_hours=10)
+        crud.calculate_quotation(self.db, request)
+        self.assertEqual(len(statements), 5)  # 变更版本号 + 配置、板卡、机器、汇率各一次
+
+        statements.clear()
+        for _ in range(20):
+            crud.calculate_quotation(self.db, request)
+        self.assertEqual(statements, [])
+
+    def test_catalog_write_invalidates_cached_prices(self):
+        machine = self.db.get(Machine, 1)
+        request = schemas.QuotationRequest(machine_id=1, test_hours=2, details={'configuration_ids': [-1], 'card_config_ids': [-1]})
+        before = crud.calculate_quotation(self.db, request)
+
+        crud.update_machine(self.db, 1, schemas.MachineUpdate(base_hourly_rate=(machine.base_hourly_rate or 0) + 10))
+        self.assertNotEqual(crud.calculate_quotation(self.db, request), before)
+        self.assertEqual(crud.calculate_quotation(self.db, request), reference_price(machine, 2, request.details))
+
+    def test_unknown_machine_and_negative_hours_raise(self):
+        with self.assertRaisesRegex(ValueError, 'Machine not found'):
+            crud.calculate_quotation(self.db, schemas.QuotationRequest(machine_id=999))
+        with self.assertRaisesRegex(ValueError, 'negative'):
+            crud.calculate_quotation(self.db, schemas.QuotationRequest(machine_id=1, test_hours=-1))
+
+    def test_batch_matches_single_calls_and_isolates_errors(self):
+        scenarios = list(self._requests(60))
+        requests = [
+            schemas.QuotationRequest(machine_id=machine.id, test_hours=hours + extra, details=details)
+            for machine, hours, details in scenarios
+            for extra in (0, 1.5, 40)
+        ]
+        requests.insert(5, schemas.QuotationRequest(machine_id=999, test_hours=1))
+        requests.insert(9, schemas.QuotationRequest(machine_id=1, test_hours=1, details={'auxiliary_rates': ['x']}))
+
+        results = crud.calculate_quotations(self.db, requests)
+        self.assertEqual(len(results), len(requests))
+        self.assertEqual(results[5], (None, 'Machine not found'))
+        self.assertIn('auxiliary_rate', results[9][1])
+        for request, (total, error) in zip(requests, results):
+            if error is None:
+                self.assertEqual(total, crud.calculate_quotation(self.db, request))
+
+    def test_batch_isolates_arithmetic_errors(self):
+        results = crud.calculate_quotations(self.db, [
+            schemas.QuotationRequest(machine_id=1, test_hours=1e30),
+            schemas.QuotationRequest(machine_id=1, test_hours=2),
+        ])
+        self.assertEqual(results[0], (None, 'Numeric value out of range'))
+        self.assertEqual(results[1], (crud.calculate_quotation(self.db, schemas.QuotationRequest(machine_id=1, test_hours=2)), None))
+
+    def test_batch_endpoint_is_one_round_trip(self):
+        user = User(userid='pricing', name='Pricing', role='user', is_active=True)
+        app.dependency_overrides[get_db] = lambda: self.db
+        app.dependency_overrides[get_current_user] = lambda: user
+        try:
+            payload = {'requests': [
+                {'machine_id': machine.id, 'test_hours': hours, 'details': details}
+                for machine, hours, details in self._requests(500)
+            ]}
+            response = TestClient(app).post('/api/v1/quotations/calculate-batch', json=payload)
+        finally:
+            app.dependency_overrides.clear()
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual(len(results), 500)
+        for (machine, hours, details), result in zip(self._requests(500), results):
+            self.assertEqual(result['total'], reference_price(machine, hours, details))
+
+
+if __name__ == '__main__':
+    unittest.main()
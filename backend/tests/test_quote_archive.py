@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta
+import unittest
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import (
+    ApprovalRecord,
+    Quote,
+    QuoteDailyRollup,
+    QuoteItem,
+    QuoteSnapshot,
+    User,
+    approval_records_archive,
+    quote_items_archive,
+    quote_snapshots_archive,
+    quotes_archive,
+)
+from app.services.quote_archive import QuoteArchiveService
+from app.services.quote_list_projection import fetch_quote_list_page
+from app.services.quote_service import QuoteService
+
+NOW = datetime(2026, 6, 1)
+
+
+class QuoteArchiveTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:', connect_args={'check_same_thread': False})
+        TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = TestingSessionLocal()
+
+        self.admin = User(userid='admin', name='Admin', role='admin')
+        self.db.add(self.admin)
+        self.db.commit()
+
+        self.old_deleted = self._quote('old-deleted', 'draft', is_deleted=True, deleted_at=NOW - timedelta(days=200))
+        self.new_deleted = self._quote('new-deleted', 'draft', is_deleted=True, deleted_at=NOW - timedelta(days=10))
+        self.old_closed = self._quote('old-closed', 'approved', updated_at=NOW - timedelta(days=365 * 4))
+        self.old_draft = self._quote('old-draft', 'draft', updated_at=NOW - timedelta(days=365 * 4))
+        self.db.commit()
+        self.old_deleted_id = self.old_deleted.id
+        self.old_closed_id = self.old_closed.id
+
+    def tearDown(self):
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+        self.engine.dispose()
+
+    def _quote(self, number, status, **values):
+        quote = Quote(
+            quote_number=number,
+            title=number,
+            quote_type='tooling',
+            customer_name='Archive Co',
+            status=status,
+            total_amount=100,
+            created_by=self.admin.id,
+            created_at=NOW - timedelta(days=365 * 5),
+            **values,
+        )
+        quote.items = [QuoteItem(item_name=f'{number}-item', quantity=1, unit_price=100, total_price=100)]
+        quote.approval_records = [ApprovalRecord(action='submit', status='completed', approver_id=self.admin.id)]
+        self.db.add(quote)
+        self.db.flush()
+        self.db.add(QuoteSnapshot(quote_id=quote.id, data='{}', hash='h', template_id='t'))
+        return quote
+
+    def _count(self, table, *conditions):
+        return self.db.execute(select(func.count()).select_from(table).where(*conditions)).scalar_one()
+
+    def test_run_moves_aged_quotes_with_related_rows(self):
+        rollup_before = self.db.execute(select(func.sum(QuoteDailyRollup.quote_count))).scalar_one()
+
+        archived = QuoteArchiveService(self.db, batch_size=1).run(now=NOW)
+
+        self.assertEqual(archived, {'deleted': 1, 'closed': 1})
+        live_numbers = set(self.db.execute(select(Quote.quote_number)).scalars())
+        self.assertEqual(live_numbers, {'new-deleted', 'old-draft'})
+        reasons = dict(self.db.execute(select(quotes_archive.c.quote_number, quotes_archive.c.archive_reason)).all())
+        self.assertEqual(reasons, {'old-deleted': 'deleted', 'old-closed': 'closed'})
+
+        archived_ids = [self.old_deleted_id, self.old_closed_id]
+        self.assertEqual(self._count(QuoteItem.__table__, QuoteItem.quote_id.in_(archived_ids)), 0)
+        self.assertEqual(self._count(quote_items_archive), 2)
+        self.assertEqual(self._count(approval_records_archive), 2)
+        self.assertEqual(self._count(quote_snapshots_archive), 2)
+
+        # 已结束报价单归档后仍计入按日汇总
+        rollup_after = self.db.execute(select(func.sum(QuoteDailyRollup.quote_count))).scalar_one()
+        self.assertEqual(rollup_after, rollup_before)
+
+    def test_restore_quote_brings_archived_quote_back(self):
+        QuoteArchiveService(self.db).run(now=NOW)
+        service = QuoteService(self.db)
+
+        self.assertTrue(service.restore_quote(self.old_deleted_id, self.admin.id))
+        self.assertTrue(service.restore_quote(str(self.old_closed_id), self.admin.id))
+
+        restored = self.db.query(Quote).filter(Quote.id == self.old_deleted_id).one()
+        self.assertFalse(restored.is_deleted)
+        self.assertEqual([item.item_name for item in restored.items], ['old-deleted-item'])
+        self.assertEqual(len(restored.approval_records), 1)
+        self.assertEqual(self._count(QuoteSnapshot.__table__, QuoteSnapshot.quote_id == self.old_deleted_id), 1)
+        self.assertEqual(self._count(quotes_archive), 0)
+        self.assertEqual(self._count(quote_items_archive), 0)
+        self.assertFalse(service.restore_quote(999, self.admin.id))
+
+    def test_admin_listing_covers_both_tiers(self):
+        QuoteArchiveService(self.db).run(now=NOW)
+
+        rows, total = fetch_quote_list_page(self.db, [], 1, 10, archive_filters=[])
+        self.assertEqual(total, 4)
+        tiers = {row.quote_number: row.tier for row in rows}
+        self.assertEqual(tiers['old-closed'], 'archive')
+        self.assertEqual(tiers['old-draft'], 'live')
+        self.assertEqual({row.creator_name for row in rows}, {'Admin'})
+
+        rows, total = fetch_quote_list_page(
+            self.db,
+            [Quote.is_deleted == False],
+            1,
+            10,
+            archive_filters=[quotes_archive.c.is_deleted == False],
+        )
+        self.assertEqual(sorted(row.quote_number for row in rows), ['old-closed', 'old-draft'])
+        self.assertEqual(fetch_quote_list_page(self.db, [], 5, 10, archive_filters=[])[1], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import asyncio
+from datetime import datetime
+import unittest
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1.admin.quotes import batch_restore_quotes, batch_soft_delete_quotes
+from app.database import Base
+from app.models import Quote, QuoteDailyRollup, User
+from app.services.quote_archive import QuoteArchiveService
+from app.services.quote_bulk_operations import QuoteBulkService
+from app.services.quote_detail_cache import quote_detail_cache
+
+
+class QuoteBulkOperationTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:', connect_args={'check_same_thread': False})
+        TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = TestingSessionLocal()
+
+        self.admin = User(userid='admin', name='Admin', role='admin')
+        self.db.add(self.admin)
+        self.db.commit()
+        self.db.refresh(self.admin)
+
+        self.quotes = [
+            Quote(
+                quote_number=f'Q{index:03d}',
+                title=f'Quote {index}',
+                quote_type='tooling',
+                customer_name='Bulk Co',
+                status='draft',
+                total_amount=10,
+                created_by=self.admin.id,
+                created_at=datetime(2026, 3, 1),
+            )
+            for index in range(6)
+        ]
+        self.db.add_all(self.quotes)
+        self.db.commit()
+        self.ids = [quote.id for quote in self.quotes]
+        quote_detail_cache.clear()
+
+    def tearDown(self):
+        quote_detail_cache.clear()
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+        self.engine.dispose()
+
+    def _rollup_count(self):
+        return self.db.execute(
+            select(func.sum(QuoteDailyRollup.quote_count)).where(QuoteDailyRollup.is_deleted == False)
+        ).scalar_one()
+
+    def test_soft_delete_returns_per_id_results_and_keeps_rollups(self):
+        self.db.execute(Quote.__table__.update().where(Quote.id == self.ids[1]).values(is_deleted=True))
+        self.db.commit()
+        quote_detail_cache.put(self.ids[0], 'owner', 'v1', {'id': self.ids[0]})
+
+        statements = []
+        event.listen(self.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+        results = QuoteBulkService(self.db, chunk_size=3).soft_delete(
+            [self.ids[0], str(self.ids[1]), self.ids[2], self.ids[0], 9999, 'abc'],
+            self.admin.id,
+        )
+        self.db.commit()
+
+        self.assertEqual(
+            [(item['id'], item['result']) for item in results],
+            [('abc', 'invalid_id'), (self.ids[0], 'deleted'), (self.ids[1], 'already_deleted'),
+             (self.ids[2], 'deleted'), (9999, 'not_found')],
+        )
+        updates = [sql for sql in statements if sql.startswith('UPDATE quotes')]
+        self.assertEqual(len(updates), 1)
+
+        deleted = set(self.db.execute(select(Quote.id).where(Quote.is_deleted == True)).scalars())
+        self.assertEqual(deleted, {self.ids[0], self.ids[1], self.ids[2]})
+        # 汇总表仍与原始数据一致：id[1] 是直接改库删除的，不经过汇总维护
+        self.assertEqual(self._rollup_count(), 4)
+        self.assertIsNone(quote_detail_cache.get(self.ids[0], 'owner', 'v1'))
+
+    def test_restore_covers_deleted_and_archived_quotes(self):
+        service = QuoteBulkService(self.db)
+        service.soft_delete(self.ids[:3], self.admin.id)
+        self.db.commit()
+        QuoteArchiveService(self.db).archive_quotes([self.ids[2]], 'deleted')
+        self.db.commit()
+
+        results = service.restore([self.ids[0], self.ids[2], self.ids[3]])
+        self.db.commit()
+
+        self.assertEqual(
+            [item['result'] for item in results],
+            ['restored', 'restored', 'not_deleted'],
+        )
+        self.assertEqual(self.db.execute(select(func.count()).where(Quote.is_deleted == True)).scalar_one(), 1)
+        self.assertEqual(self._rollup_count(), 5)
+
+    def test_endpoints_return_summary_and_404_when_nothing_matches(self):
+        response = asyncio.run(batch_soft_delete_quotes([str(self.ids[0]), '9999'], self.db, self.admin))
+        self.assertEqual(response['deleted_count'], 1)
+        self.assertEqual(response['deleted_quotes'][0]['quote_number'], 'Q000')
+        self.assertEqual(response['counts'], {'deleted': 1, 'not_found': 1})
+
+        with self.assertRaises(HTTPException) as ctx:
+            asyncio.run(batch_soft_delete_quotes([str(self.ids[0])], self.db, self.admin))
+        self.assertEqual(ctx.exception.status_code, 404)
+
+        response = asyncio.run(batch_restore_quotes([str(self.ids[0])], self.db, self.admin))
+        self.assertEqual(response['restored_count'], 1)
+        self.assertFalse(self.db.get(Quote, self.ids[0]).is_deleted)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,8 +8,8 @@ from sqlalchemy.orm import sessionmaker
 sys.path.insert(0, '/home/qixin/projects/chip-quotation-system/backend')
 
 from app.database import Base
-from app.models import Quote, QuoteItem, User
-from app.schemas import QuoteCreate, QuoteItemCreate, QuoteUpdate, QuoteItemUpdate
+from app.models import Quote, QuoteItem, QuoteNumberSequence, User
+from app.schemas import QuoteCreate, QuoteFilter, QuoteItemCreate, QuoteUpdate, QuoteItemUpdate
 from app.services.quote_service import QuoteService
 
 
@@ -92,6 +92,33 @@ class QuoteCreateUpdatePayloadTests(unittest.TestCase):
         self.assertEqual(quote.approved_by, self.owner.id)
         self.assertIsNotNone(quote.approved_at)
 
+    def test_quote_numbers_are_allocated_from_sequence_table(self):
+        date_key = datetime.now().strftime('%Y%m%d')
+        self.db.add(QuoteNumberSequence(unit_code='SZ', date_key=date_key, last_value=7))
+        self.db.commit()
+
+        def make(unit):
+            return self.service.create_quote(
+                QuoteCreate(
+                    title='Seq Quote',
+                    quote_type='tooling',
+                    customer_name='Seq Co',
+                    quote_unit=unit,
+                    items=[QuoteItemCreate(item_name='loadboard', quantity=1, unit='件', unit_price=1, total_price=1)]
+                ),
+                self.owner.id,
+            )
+
+        first = make('昆山芯信安')
+        second = make('昆山芯信安')
+        seeded = make('苏州芯昱安')
+
+        self.assertEqual(first.quote_number, f'CIS-KS{date_key}001')
+        self.assertEqual(second.quote_number, f'CIS-KS{date_key}002')
+        self.assertEqual(seeded.quote_number, f'CIS-SZ{date_key}008')
+        sequence = self.db.get(QuoteNumberSequence, ('KS', date_key))
+        self.assertEqual(sequence.last_value, 2)
+
     def test_update_quote_rewrites_items_and_recalculates_totals(self):
         created = self.service.create_quote(
             QuoteCreate(
@@ -183,6 +210,155 @@ class QuoteCreateUpdatePayloadTests(unittest.TestCase):
         self.assertEqual(updated.subtotal, 8.0)
         self.assertEqual(updated.total_amount, 9.04)
 
+    def test_update_quote_diffs_items_by_id(self):
+        created = self.service.create_quote(
+            QuoteCreate(
+                title='Diff Quote',
+                quote_type='mass_production',
+                customer_name='Diff Co',
+                customer_contact='Dan',
+                quote_unit='昆山芯信安',
+                currency='CNY',
+                items=[
+                    QuoteItemCreate(item_name='keep', quantity=1, unit='小时', unit_price=10, total_price=10),
+                    QuoteItemCreate(item_name='change', quantity=1, unit='小时', unit_price=20, total_price=20),
+                    QuoteItemCreate(item_name='drop', quantity=1, unit='小时', unit_price=30, total_price=30),
+                ]
+            ),
+            self.owner.id,
+        )
+        ids = {item.item_name: item.id for item in created.items}
+
+        updated = self.service.update_quote(
+            created.id,
+            QuoteUpdate(
+                items=[
+                    QuoteItemUpdate(id=ids['keep'], item_name='keep', quantity=1, unit='小时', unit_price=10),
+                    QuoteItemUpdate(id=ids['change'], item_name='change', quantity=3, unit='小时', unit_price=20),
+                    QuoteItemUpdate(item_name='new', quantity=2, unit='小时', unit_price=5),
+                ]
+            ),
+            self.owner.id,
+        )
+
+        items = {item.item_name: item for item in updated.items}
+        self.assertEqual(set(items), {'keep', 'change', 'new'})
+        self.assertEqual(items['keep'].id, ids['keep'])
+        self.assertEqual(items['change'].id, ids['change'])
+        self.assertEqual(items['change'].total_price, 60.0)
+        self.assertEqual(items['new'].total_price, 10.0)
+        self.assertIsNone(self.db.query(QuoteItem).filter(QuoteItem.item_name == 'drop').first())
+        self.assertEqual(updated.subtotal, 80.0)
+        self.assertEqual(updated.total_amount, 90.4)
+
+    def test_partial_item_update_keeps_stored_prices(self):
+        created = self.service.create_quote(
+            QuoteCreate(
+                title='Partial Quote',
+                quote_type='engineering',
+                customer_name='Partial Co',
+                quote_unit='昆山芯信安',
+                items=[
+                    QuoteItemCreate(
+                        item_name='J750', configuration='UPH:100', quantity=1, unit='小时',
+                        unit_price=100, adjusted_price=90, adjustment_reason='r',
+                    ),
+                    QuoteItemCreate(item_name='other', quantity=1, unit='小时', unit_price=10),
+                ]
+            ),
+            self.owner.id,
+        )
+        ids = {item.item_name: item.id for item in created.items}
+
+        updated = self.service.update_quote(
+            created.id,
+            QuoteUpdate(items=[QuoteItemUpdate(id=ids['J750'], quantity=2), QuoteItemUpdate(id=ids['other'])]),
+            self.owner.id,
+        )
+
+        self.db.expire_all()
+        items = {item.item_name: item for item in updated.items}
+        item = items['J750']
+        self.assertEqual(
+            (item.quantity, item.unit_price, item.adjusted_price, item.adjustment_reason, item.total_price),
+            (2.0, 100.0, 90.0, 'r', 180.0),
+        )
+        self.assertEqual((item.uph, item.hourly_rate), (100, 10000.0))
+        self.assertEqual(items['other'].total_price, 10.0)
+        self.assertEqual(updated.subtotal, 190.0)
+        self.assertEqual(updated.total_amount, 214.7)
+
+    def test_update_quote_treats_foreign_item_id_as_new_item(self):
+        other = self.service.create_quote(
+            QuoteCreate(
+                title='Other Quote',
+                quote_type='tooling',
+                customer_name='Other Co',
+                quote_unit='昆山芯信安',
+                items=[QuoteItemCreate(item_name='foreign', quantity=1, unit='件', unit_price=7, total_price=7)]
+            ),
+            self.owner.id,
+        )
+        target = self.service.create_quote(
+            QuoteCreate(
+                title='Target Quote',
+                quote_type='tooling',
+                customer_name='Target Co',
+                quote_unit='昆山芯信安',
+                items=[QuoteItemCreate(item_name='own', quantity=1, unit='件', unit_price=5, total_price=5)]
+            ),
+            self.owner.id,
+        )
+        foreign_id = other.items[0].id
+
+        self.service.update_quote(
+            target.id,
+            QuoteUpdate(items=[QuoteItemUpdate(id=foreign_id, item_name='hijack', quantity=1, unit='件', unit_price=1)]),
+            self.owner.id,
+        )
+
+        foreign = self.db.query(QuoteItem).filter(QuoteItem.id == foreign_id).one()
+        self.assertEqual(foreign.item_name, 'foreign')
+        self.assertEqual(foreign.quote_id, other.id)
+        target_items = self.db.query(QuoteItem).filter(QuoteItem.quote_id == target.id).all()
+        self.assertEqual([item.item_name for item in target_items], ['hijack'])
+
+    def test_item_uph_and_hourly_rate_are_stored_on_write(self):
+        created = self.service.create_quote(
+            QuoteCreate(
+                title='UPH Quote',
+                quote_type='process',
+                customer_name='UPH Co',
+                quote_unit='昆山芯信安',
+                items=[
+                    QuoteItemCreate(item_name='FT', configuration='UPH:1200, 温度:25', quantity=1, unit='颗', unit_price=0.5),
+                    QuoteItemCreate(item_name='CP', configuration='温度:25', quantity=1, unit='颗', unit_price=0.2),
+                ]
+            ),
+            self.owner.id,
+        )
+        items = {item.item_name: item for item in created.items}
+        self.assertEqual((items['FT'].uph, items['FT'].hourly_rate), (1200, 600.0))
+        self.assertEqual((items['CP'].uph, items['CP'].hourly_rate), (None, None))
+
+        # 仅修改单价时沿用原 UPH 并重算机时费率
+        updated = self.service.update_quote(
+            created.id,
+            QuoteUpdate(items=[
+                QuoteItemUpdate(id=items['FT'].id, item_name='FT', quantity=1, unit='颗', unit_price=0.4),
+                QuoteItemUpdate(id=items['CP'].id, item_name='CP', configuration='UPH:800', quantity=1, unit='颗', unit_price=0.2),
+            ]),
+            self.owner.id,
+        )
+        items = {item.item_name: item for item in updated.items}
+        self.assertEqual((items['FT'].uph, items['FT'].hourly_rate), (1200, 480.0))
+        self.assertEqual((items['CP'].uph, items['CP'].hourly_rate), (800, 160.0))
+
+        rows, total = self.service.get_quotes(QuoteFilter(uph_min=1000), self.owner.id)
+        self.assertEqual((total, [row.id for row in rows]), (1, [created.id]))
+        rows, total = self.service.get_quotes(QuoteFilter(uph_max=500), self.owner.id)
+        self.assertEqual(total, 0)
+
     def test_update_quote_rejects_non_draft_status(self):
         created = self.service.create_quote(
             QuoteCreate(
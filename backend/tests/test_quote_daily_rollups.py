@@ -0,0 +1,215 @@
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+import asyncio
+import importlib.util
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Quote, QuoteDailyRollup, User
+from app.services import quote_rollups
+from app.services.quote_service import QuoteService
+from app.api.v1.admin.quotes import get_detailed_statistics
+from app.api.v1.endpoints import statistics
+
+MIGRATION_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations', 'add_quote_daily_rollups.py'
+)
+
+
+def load_migration():
+    spec = importlib.util.spec_from_file_location('add_quote_daily_rollups', MIGRATION_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class QuoteDailyRollupTests(unittest.TestCase):
+    def setUp(self):
+        # 使用文件库，便于用 sqlite3 执行回填脚本与增量结果对比
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, 'rollups.db')
+        self.engine = create_engine(f'sqlite:///{self.db_path}', connect_args={'check_same_thread': False})
+        TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = TestingSessionLocal()
+
+        self.owner = User(userid='owner', name='Owner', role='user')
+        self.db.add(self.owner)
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+        self.engine.dispose()
+        self.tmpdir.cleanup()
+
+    def add_quote(self, number, created_at, quote_type='tooling', total_amount=100.0, status='draft'):
+        quote = Quote(
+            quote_number=number,
+            title=number,
+            quote_type=quote_type,
+            customer_name='Customer',
+            total_amount=total_amount,
+            status=status,
+            created_by=self.owner.id,
+            created_at=created_at,
+        )
+        self.db.add(quote)
+        return quote
+
+    def rollup_rows(self):
+        rows = self.db.execute(
+            select(QuoteDailyRollup).where(QuoteDailyRollup.quote_count != 0)
+            .order_by(QuoteDailyRollup.day, QuoteDailyRollup.quote_type, QuoteDailyRollup.status)
+        ).scalars().all()
+        return [
+            (row.day, row.quote_type, row.quote_unit, row.currency, row.created_by, row.status, row.is_deleted,
+             row.quote_count, round(row.total_amount, 6), round(row.approval_seconds, 3), row.approval_count)
+            for row in rows
+        ]
+
+    def test_write_paths_maintain_rollups_incrementally(self):
+        first = self.add_quote('Q1', datetime(2026, 1, 5, 9))
+        second = self.add_quote('Q2', datetime(2026, 1, 5, 18), total_amount=50.0)
+        third = self.add_quote('Q3', datetime(2026, 1, 6, 8), quote_type='engineering')
+        self.db.commit()
+
+        self.assertEqual(self.rollup_rows(), [
+            (date(2026, 1, 5), 'tooling', '昆山芯信安', 'CNY', self.owner.id, 'draft', False, 2, 150.0, 0.0, 0),
+            (date(2026, 1, 6), 'engineering', '昆山芯信安', 'CNY', self.owner.id, 'draft', False, 1, 100.0, 0.0, 0),
+        ])
+
+        # 提交后对象已过期，直接赋值也能正确扣减旧维度
+        first.status = 'approved'
+        first.submitted_at = datetime(2026, 1, 5, 10)
+        first.approved_at = datetime(2026, 1, 5, 12)
+        first.total_amount = 120.0
+        second.is_deleted = True
+        third.quote_type = 'tooling'
+        self.db.commit()
+
+        self.assertEqual(self.rollup_rows(), [
+            (date(2026, 1, 5), 'tooling', '昆山芯信安', 'CNY', self.owner.id, 'approved', False, 1, 120.0, 7200.0, 1),
+            (date(2026, 1, 5), 'tooling', '昆山芯信安', 'CNY', self.owner.id, 'draft', True, 1, 50.0, 0.0, 0),
+            (date(2026, 1, 6), 'tooling', '昆山芯信安', 'CNY', self.owner.id, 'draft', False, 1, 100.0, 0.0, 0),
+        ])
+
+        self.db.delete(third)
+        self.db.commit()
+        self.assertEqual(len(self.rollup_rows()), 2)
+
+    def test_rollback_discards_rollup_changes(self):
+        quote = self.add_quote('Q1', datetime(2026, 1, 5, 9))
+        self.db.commit()
+
+        quote.status = 'pending'
+        self.db.flush()
+        self.db.rollback()
+        self.assertEqual([row[5] for row in self.rollup_rows()], ['draft'])
+
+    def test_backfill_matches_incremental_rollups(self):
+        for index in range(6):
+            quote = self.add_quote(
+                f'Q{index}',
+                datetime(2026, 1, 1, 8) + timedelta(days=index % 3, hours=index),
+                quote_type=['tooling', 'engineering'][index % 2],
+                total_amount=10.0 * (index + 1),
+            )
+            if index % 3 == 0:
+                quote.status = 'approved'
+                quote.submitted_at = quote.created_at
+                quote.approved_at = quote.created_at + timedelta(hours=index + 1)
+        self.db.commit()
+        self.db.query(Quote).filter(Quote.quote_number == 'Q1').one().is_deleted = True
+        self.db.commit()
+        incremental = self.rollup_rows()
+
+        migration = load_migration()
+        connection = sqlite3.connect(self.db_path)
+        migration.backfill_quote_daily_rollups(connection.cursor())
+        connection.commit()
+        connection.close()
+        self.db.expire_all()
+
+        self.assertEqual(self.rollup_rows(), incremental)
+
+    def test_rollup_series_and_endpoint(self):
+        approved = self.add_quote('Q1', datetime(2026, 1, 5, 9), status='approved')
+        approved.submitted_at = datetime(2026, 1, 5, 9)
+        approved.approved_at = datetime(2026, 1, 5, 12)
+        self.add_quote('Q2', datetime(2026, 1, 7, 9))
+        self.add_quote('Q3', datetime(2026, 2, 2, 9), quote_type='engineering')
+        self.db.commit()
+
+        series = quote_rollups.rollup_series(self.db, date(2026, 1, 1), bucket='week', group_by=['status'])
+        self.assertEqual(
+            [(row['bucket'], row['status'], row['quote_count']) for row in series],
+            [('2026-01-05', 'approved', 1), ('2026-01-05', 'draft', 1), ('2026-02-02', 'draft', 1)],
+        )
+        self.assertEqual(series[0]['avg_approval_hours'], 3.0)
+
+        response = statistics.get_quote_rollup_series(
+            bucket='month', group_by=None, quote_type='tooling', status=None,
+            period='month', start_date='2026-01-01', end_date='2026-12-31',
+            current_user=SimpleNamespace(id=self.owner.id, role='user'), db=self.db,
+        )
+        self.assertEqual(
+            [(row['bucket'], row['quote_count'], row['total_amount']) for row in response['series']],
+            [('2026-01-01', 2, 200.0)],
+        )
+
+        with self.assertRaises(ValueError):
+            quote_rollups.rollup_series(self.db, date(2026, 1, 1), group_by=['customer_name'])
+
+
+    def test_statistics_endpoints_read_rollups(self):
+        other = User(userid='other', name='Other', role='user')
+        manager = User(userid='manager', name='Manager', role='manager')
+        admin = User(userid='admin', name='Admin', role='super_admin')
+        self.db.add_all([other, manager, admin])
+        self.db.commit()
+
+        self.add_quote('Q1', datetime(2026, 1, 5, 9))
+        self.add_quote('Q2', datetime(2026, 1, 5, 10), status='pending')
+        self.add_quote('Q3', datetime(2026, 1, 6, 9), status='approved')
+        self.add_quote('Q4', datetime(2026, 1, 6, 10), status='rejected').is_deleted = True
+        foreign = self.add_quote('Q5', datetime(2026, 1, 7, 9), status='pending')
+        foreign.created_by = other.id
+        foreign.current_approver_id = manager.id
+        foreign.approval_status = 'pending'
+        self.db.commit()
+
+        statements = []
+        event.listen(self.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+        detailed = asyncio.run(get_detailed_statistics(db=self.db, current_user=admin))
+        self.assertFalse([sql for sql in statements if 'FROM quotes' in sql])
+        self.assertEqual(detailed['all_data'], {'total': 5, 'normal': 4, 'deleted': 1})
+        self.assertEqual(
+            detailed['normal_data'],
+            {'total': 4, 'draft': 1, 'pending': 2, 'approved': 1, 'rejected': 0},
+        )
+        self.assertEqual(
+            detailed['deleted_data'],
+            {'total': 1, 'draft': 0, 'pending': 0, 'approved': 0, 'rejected': 1},
+        )
+
+        service = QuoteService(self.db)
+        self.assertEqual(service.get_quote_statistics(admin.id).model_dump(),
+                         {'total': 4, 'draft': 1, 'pending': 2, 'approved': 1, 'rejected': 0})
+        self.assertEqual(service.get_quote_statistics(self.owner.id).model_dump(),
+                         {'total': 3, 'draft': 1, 'pending': 1, 'approved': 1, 'rejected': 0})
+        self.assertFalse([sql for sql in statements if 'FROM quotes' in sql])
+
+        # manager 的统计范围包含按当前审批人筛选的报价单，不是汇总维度，直接聚合 quotes
+        self.assertEqual(service.get_quote_statistics(manager.id).model_dump(),
+                         {'total': 1, 'draft': 0, 'pending': 1, 'approved': 0, 'rejected': 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
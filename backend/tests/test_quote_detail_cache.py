@@ -0,0 +1,129 @@
+from datetime import datetime
+import unittest
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base, get_db
+from app.main import app
+from app.auth_routes import get_current_user_strict_multi_source
+from app.models import Quote, QuoteItem, User
+from app.services.quote_detail_cache import etag_matches, quote_detail_cache
+
+
+class QuoteDetailCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            'sqlite:///:memory:',
+            connect_args={'check_same_thread': False},
+            poolclass=StaticPool,
+        )
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = self.SessionLocal()
+
+        self.owner = User(userid='owner', name='Owner', role='user')
+        self.stranger = User(userid='stranger', name='Stranger', role='user')
+        self.db.add_all([self.owner, self.stranger])
+        self.db.commit()
+
+        self.quote = Quote(
+            quote_number='CIS-KS20260101001',
+            title='Cached Quote',
+            quote_type='mass_production',
+            customer_name='Customer',
+            status='pending',
+            approval_status='pending',
+            created_by=self.owner.id,
+            updated_at=datetime(2026, 1, 1),
+        )
+        self.db.add(self.quote)
+        self.db.flush()
+        self.db.add(QuoteItem(
+            quote_id=self.quote.id,
+            item_name='FT',
+            configuration='UPH:1200, 温度:25',
+            quantity=1,
+            unit='小时',
+            unit_price=0.5,
+            total_price=0.5,
+            uph=1200,
+            hourly_rate=600.0,
+        ))
+        self.db.commit()
+        quote_detail_cache.clear()
+
+        self.viewer = self.owner
+
+        def override_db():
+            db = self.SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_db
+        app.dependency_overrides[get_current_user_strict_multi_source] = lambda: self.viewer
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        app.dependency_overrides.clear()
+        quote_detail_cache.clear()
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+        self.engine.dispose()
+
+    def test_polling_with_etag_returns_304_until_quote_changes(self):
+        url = f'/api/v1/quotes/detail/by-id/{self.quote.id}'
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers['etag']
+        self.assertEqual(first.json()['items'][0]['uph'], 1200)
+        self.assertEqual(first.json()['items'][0]['hourly_rate'], '¥600.00/小时')
+
+        by_number = self.client.get(f'/api/v1/quotes/detail/{self.quote.quote_number}', headers={'If-None-Match': etag})
+        self.assertEqual(by_number.status_code, 304)
+        self.assertEqual(by_number.content, b'')
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': f'W/{etag}'}).status_code, 304)
+
+        # 审批等写操作提交后缓存清除，ETag 随内容变化
+        self.quote.status = 'approved'
+        self.quote.approval_status = 'approved'
+        self.db.commit()
+
+        changed = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers['etag'], etag)
+        self.assertEqual(changed.json()['status'], 'approved')
+
+    def test_item_write_invalidates_cached_detail(self):
+        url = f'/api/v1/quotes/detail/by-id/{self.quote.id}'
+        etag = self.client.get(url).headers['etag']
+
+        item = self.db.query(QuoteItem).one()
+        item.item_name = 'FT-2'
+        self.db.commit()
+
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['items'][0]['item_name'], 'FT-2')
+
+    def test_access_is_checked_before_cache(self):
+        url = f'/api/v1/quotes/detail/by-id/{self.quote.id}'
+        etag = self.client.get(url).headers['etag']
+
+        self.viewer = self.stranger
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 403)
+
+    def test_etag_matching(self):
+        self.assertTrue(etag_matches('"a", "b"', '"b"'))
+        self.assertTrue(etag_matches('*', '"b"'))
+        self.assertFalse(etag_matches('"a"', '"b"'))
+        self.assertFalse(etag_matches(None, '"b"'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+import unittest
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Quote, User
+from app.schemas import QuoteFilter
+from app.services.quote_list_projection import fetch_quote_list_page, quote_list_select
+from app.services.quote_service import QuoteService
+
+
+class QuoteListProjectionTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:', connect_args={'check_same_thread': False})
+        TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = TestingSessionLocal()
+
+        self.owner = User(userid='owner', name='Owner', role='user')
+        self.admin = User(userid='admin', name='Admin', role='super_admin')
+        self.db.add_all([self.owner, self.admin])
+        self.db.commit()
+
+        base_time = datetime(2026, 1, 1)
+        for index in range(5):
+            self.db.add(Quote(
+                quote_number=f'CIS-KS20260101{index + 1:03d}',
+                title=f'Quote {index}',
+                quote_type='tooling',
+                customer_name='Customer',
+                currency='CNY',
+                total_amount=100.0 * index,
+                status='draft',
+                approval_status='not_submitted',
+                version='V1.0',
+                created_by=self.owner.id,
+                created_at=base_time + timedelta(days=index),
+                updated_at=base_time + timedelta(days=index),
+                is_deleted=index == 0,
+                deleted_by=self.admin.id if index == 0 else None,
+            ))
+        self.db.commit()
+
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._record_statement)
+
+    def _record_statement(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def tearDown(self):
+        event.remove(self.engine, 'before_cursor_execute', self._record_statement)
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+        self.engine.dispose()
+
+    def test_page_and_total_come_from_single_query(self):
+        rows, total = fetch_quote_list_page(self.db, [Quote.is_deleted == False], page=1, size=2)
+
+        self.assertEqual(len(self.statements), 1)
+        self.assertEqual(total, 4)
+        self.assertEqual([row.title for row in rows], ['Quote 4', 'Quote 3'])
+        self.assertEqual(rows[0].creator_name, 'Owner')
+        self.assertIsNone(rows[0].deleter_name)
+
+    def test_out_of_range_page_still_reports_total(self):
+        rows, total = fetch_quote_list_page(self.db, [], page=5, size=2)
+
+        self.assertEqual(rows, [])
+        self.assertEqual(total, 5)
+
+    def test_projection_joins_deleter_name(self):
+        rows = self.db.execute(quote_list_select([Quote.is_deleted == True])).all()
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0].deleter_name, 'Admin')
+        self.assertEqual(rows[0].creator_name, 'Owner')
+
+    def test_service_get_quotes_returns_projection_rows(self):
+        service = QuoteService(self.db)
+
+        rows, total = service.get_quotes(QuoteFilter(page=1, size=10), self.owner.id)
+
+        self.assertEqual(total, 4)
+        self.assertNotIsInstance(rows[0], Quote)
+        self.assertEqual(rows[0].quote_number, 'CIS-KS20260101005')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@ from decimal import Decimal
 from datetime import datetime
 from types import SimpleNamespace
 import asyncio
+import json
 import sys
 import unittest
 from unittest.mock import patch
@@ -329,7 +330,8 @@ class QuoteLogicRegressionTests(unittest.TestCase):
         quote = build_quote(created_by=1)
         owner = SimpleNamespace(id=1, role='user')
 
-        result = asyncio.run(get_quote_detail_test("CIS-KS20250101001", StubSession(quote), owner))
+        response = asyncio.run(get_quote_detail_test("CIS-KS20250101001", StubSession(quote), owner))
+        result = json.loads(response.body)
 
         self.assertEqual(result["id"], 10)
         self.assertEqual(result["quote_number"], "CIS-KS20250101001")
@@ -0,0 +1,133 @@
+import random
+import unittest
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.auth_routes import get_current_user_strict_multi_source
+from app.database import Base, get_db
+from app.main import app
+from app.models import Quote, QuoteItem, User
+from app.schemas import QuoteScenario
+from app.services.quote_service import QuoteService
+
+
+class QuoteScenarioTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            'sqlite:///:memory:',
+            connect_args={'check_same_thread': False},
+            poolclass=StaticPool,
+        )
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = self.SessionLocal()
+
+        self.owner = User(userid='owner', name='Owner', role='user')
+        self.stranger = User(userid='stranger', name='Stranger', role='user')
+        self.db.add_all([self.owner, self.stranger])
+        self.db.commit()
+
+        rng = random.Random(46)
+        self.quote = Quote(
+            quote_number='CIS-KS20260101046',
+            title='Negotiation',
+            quote_type='mass_production',
+            customer_name='Customer',
+            currency='CNY',
+            discount=50.0,
+            tax_rate=0.13,
+            created_by=self.owner.id,
+        )
+        self.quote.items = [
+            QuoteItem(
+                item_name=f'工序{i}',
+                quantity=rng.choice([1, 2, 0.5, 1000]),
+                unit_price=round(rng.uniform(0, 300), rng.randrange(0, 4)),
+                adjusted_price=rng.choice([None, round(rng.uniform(0, 300), 2)]),
+            )
+            for i in range(30)
+        ]
+        self.db.add(self.quote)
+        self.db.commit()
+        self.service = QuoteService(self.db)
+
+    def tearDown(self):
+        app.dependency_overrides.clear()
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+        self.engine.dispose()
+
+    def _saved_totals(self, scenario):
+        """按保存报价单的路径计算同一方案的金额，作为对照"""
+        items = [
+            {
+                'quantity': item.quantity,
+                'unit_price': item.unit_price,
+                'adjusted_price': scenario.adjusted_prices.get(item.id, item.adjusted_price),
+            }
+            for item in self.quote.items
+        ]
+        subtotal = self.service._prepare_items_payload(items)['subtotal']
+        return self.service._calculate_totals(
+            subtotal,
+            scenario.discount if scenario.discount is not None else self.quote.discount,
+            scenario.tax_rate if scenario.tax_rate is not None else self.quote.tax_rate,
+        )
+
+    def test_scenarios_match_save_path_without_writing(self):
+        item_ids = [item.id for item in self.quote.items]
+        scenarios = [
+            QuoteScenario(name='现状'),
+            QuoteScenario(name='九五折', discount=1234.565, tax_rate=0.06),
+            QuoteScenario(adjusted_prices={item_ids[0]: 99.995, item_ids[3]: 0}, discount=10 ** 7),
+            QuoteScenario(adjusted_prices={item_ids[5]: 1 / 3}, exchange_rate=0.1389),
+        ]
+        statements = []
+        event.listen(self.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+
+        results = self.service.evaluate_scenarios(self.quote, scenarios)
+
+        self.assertFalse([sql for sql in statements if not sql.lstrip().upper().startswith('SELECT')])
+        self.assertFalse(self.db.dirty)
+        for scenario, result in zip(scenarios, results):
+            expected = self._saved_totals(scenario)
+            self.assertEqual({key: result[key] for key in expected}, expected)
+        self.assertEqual(results[2]['total_amount'], 0.0)
+        self.assertEqual(
+            results[3]['converted_total_amount'],
+            float(self.service._quantize_money(
+                self.service._to_decimal(results[3]['total_amount'], 't') * self.service._to_decimal(0.1389, 'r')
+            )),
+        )
+
+    def test_endpoint_checks_access_and_item_ids(self):
+        viewer = self.owner
+
+        def override_db():
+            db = self.SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_db
+        app.dependency_overrides[get_current_user_strict_multi_source] = lambda: viewer
+        client = TestClient(app)
+        url = f'/api/v1/quotes/{self.quote.id}/scenarios'
+
+        response = client.post(url, json={'scenarios': [{'name': 'A', 'discount': 0}, {'tax_rate': 0}]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['name'] for result in response.json()['results']], ['A', None])
+
+        self.assertEqual(client.post(url, json={'scenarios': [{'adjusted_prices': {'999999': 1}}]}).status_code, 400)
+        self.assertEqual(client.post(url, json={'scenarios': [{'tax_rate': 2}]}).status_code, 422)
+
+        viewer = self.stranger
+        self.assertEqual(client.post(url, json={'scenarios': [{}]}).status_code, 403)
+
+
+if __name__ == '__main__':
+    unittest.main()
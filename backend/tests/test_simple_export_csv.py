@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+import asyncio
+import csv
+import io
+import unittest
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import Quote, QuoteItem, User
+from app.services import simple_export_service
+from app.services.simple_export_service import SimpleExportService
+
+
+class SimpleExportCsvTests(unittest.TestCase):
+    def setUp(self):
+        # 流式响应在线程池中迭代，内存库需要跨线程共享同一连接
+        self.engine = create_engine(
+            'sqlite:///:memory:',
+            connect_args={'check_same_thread': False},
+            poolclass=StaticPool,
+        )
+        TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = TestingSessionLocal()
+
+        owner = User(userid='owner', name='Owner', role='user')
+        self.db.add(owner)
+        self.db.commit()
+
+        self.quotes = []
+        for index in range(2):
+            quote = Quote(
+                quote_number=f'CIS-KS20260101{index + 1:03d}',
+                title=f'Quote, "{index}"',
+                quote_type='tooling',
+                customer_name=f'客户{index}',
+                currency='CNY',
+                total_amount=100.0 * (index + 1),
+                status='draft',
+                approval_status='not_submitted',
+                created_by=owner.id,
+                created_at=datetime(2026, 1, 1) + timedelta(days=index),
+            )
+            self.db.add(quote)
+            self.db.flush()
+            for item_index in range(5):
+                self.db.add(QuoteItem(
+                    quote_id=quote.id,
+                    item_name=f'Q{index} Item {item_index}',
+                    quantity=1,
+                    unit='件',
+                    unit_price=10.0,
+                    adjusted_price=12.0 if item_index == 0 else None,
+                    total_price=10.0,
+                ))
+            self.quotes.append(quote)
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+        self.engine.dispose()
+
+    def collect(self, response):
+        async def consume():
+            return [chunk async for chunk in response.body_iterator]
+
+        with patch.object(simple_export_service, 'CSV_CHUNK_SIZE', 2):
+            chunks = asyncio.run(consume())
+        text = b''.join(chunks).decode('utf-8')
+        self.assertTrue(text.startswith('﻿'))
+        self.assertEqual(text.count('﻿'), 1)
+        return chunks, list(csv.reader(io.StringIO(text[1:])))
+
+    def test_quote_csv_streams_items_in_chunks(self):
+        service = SimpleExportService(self.db)
+        chunks, rows = self.collect(service.export_quote_csv(self.quotes[0].id))
+
+        self.assertGreaterEqual(len(chunks), 4)
+        header_index = rows.index(['报价明细'])
+        items = rows[header_index + 2:header_index + 7]
+        self.assertEqual([row[0] for row in items], ['1', '2', '3', '4', '5'])
+        self.assertEqual(items[0][7], '12.0')
+        self.assertEqual(rows[header_index + 7], [])
+        self.assertIn(['总金额', '100.0'], rows)
+
+    def test_summary_csv_escapes_and_keeps_order(self):
+        service = SimpleExportService(self.db)
+        _, rows = self.collect(service.export_quotes_summary_csv(status='draft'))
+
+        self.assertEqual(rows[0][0], '报价单号')
+        self.assertEqual([row[1] for row in rows[1:]], ['Quote, "1"', 'Quote, "0"'])
+
+        with self.assertRaises(HTTPException) as ctx:
+            service.export_quotes_summary_csv(status='approved')
+        self.assertEqual(ctx.exception.status_code, 404)
+
+    def test_items_csv_exports_line_items_of_selected_quotes(self):
+        service = SimpleExportService(self.db)
+        response = service.export_quotes_items_csv(quote_ids=[quote.id for quote in self.quotes])
+        _, rows = self.collect(response)
+
+        self.assertIn('quotes_items_', response.headers['content-disposition'])
+        self.assertEqual(len(rows), 11)
+        self.assertEqual(rows[1][0], 'CIS-KS20260101002')
+        self.assertEqual(rows[1][5], 'Q1 Item 0')
+        self.assertEqual(rows[1][12], '12.0')
+        self.assertEqual(rows[-1][5], 'Q0 Item 4')
+
+
+if __name__ == '__main__':
+    unittest.main()
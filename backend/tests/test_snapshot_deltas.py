@@ -0,0 +1,104 @@
+import copy
+import json
+import random
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import EffectiveQuote, Quote, QuoteItem, QuoteSnapshot, User
+from app.services.snapshot_delta import apply_patch, canonical_json, json_diff
+from app.services.snapshot_service import KEYFRAME_INTERVAL, SnapshotService
+
+
+def random_document(rng, depth=0):
+    kind = rng.choice(['dict', 'list', 'scalar'] if depth < 3 else ['scalar'])
+    if kind == 'dict':
+        return {rng.choice(['a', 'b', 'c/d', 'e~f', 'g']): random_document(rng, depth + 1) for _ in range(rng.randint(0, 4))}
+    if kind == 'list':
+        return [random_document(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+    return rng.choice([None, True, 1, 2.5, 'x', 'y'])
+
+
+class JsonPatchTests(unittest.TestCase):
+    def test_diff_then_patch_roundtrips_random_documents(self):
+        rng = random.Random(40)
+        for _ in range(500):
+            old, new = random_document(rng), random_document(rng)
+            patched = apply_patch(copy.deepcopy(old), json_diff(old, new))
+            self.assertEqual(canonical_json(patched), canonical_json(new))
+
+    def test_item_change_only_touches_changed_field(self):
+        old = {'items': [{'name': 'a', 'price': 1}, {'name': 'b', 'price': 2}]}
+        new = {'items': [{'name': 'a', 'price': 1}, {'name': 'b', 'price': 3}]}
+        self.assertEqual(json_diff(old, new), [{'op': 'replace', 'path': '/items/1/price', 'value': 3}])
+
+
+class SnapshotDeltaStorageTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:', connect_args={'check_same_thread': False})
+        TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = TestingSessionLocal()
+
+        self.user = User(userid='owner', name='Owner', role='user')
+        self.db.add(self.user)
+        self.db.commit()
+        self.quote = Quote(quote_number='SNAP-1', title='Snapshot', quote_type='tooling', customer_name='Snap Co', created_by=self.user.id)
+        self.quote.items = [
+            QuoteItem(item_name=f'item-{index}', quantity=1, unit_price=index, total_price=index)
+            for index in range(50)
+        ]
+        self.db.add(self.quote)
+        self.db.commit()
+        self.service = SnapshotService(self.db)
+
+    def tearDown(self):
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+        self.engine.dispose()
+
+    def _resubmit(self, index):
+        self.quote.items[index].unit_price += 1
+        self.quote.items[index].total_price += 1
+        self.db.commit()
+        return self.service.create_snapshot(self.quote, 'tpl', ['approver'], self.user.id)
+
+    def test_resubmissions_store_small_deltas_with_periodic_keyframes(self):
+        first = self.service.create_snapshot(self.quote, 'tpl', ['approver'], self.user.id)
+        self.assertTrue(first.is_keyframe)
+
+        snapshots = [first] + [self._resubmit(index) for index in range(KEYFRAME_INTERVAL)]
+        self.assertEqual([snapshot.chain_depth for snapshot in snapshots], list(range(KEYFRAME_INTERVAL)) + [0])
+        for snapshot in snapshots[1:-1]:
+            self.assertIsNone(snapshot.data)
+            self.assertLess(len(snapshot.delta), len(first.data) / 20)
+
+        expected = QuoteSnapshot.quote_data(self.quote)
+        latest_delta = snapshots[-2]
+        data = self.service.get_snapshot_data(latest_delta)
+        self.assertEqual(data['items'][KEYFRAME_INTERVAL - 2]['unit_price'], expected['items'][KEYFRAME_INTERVAL - 2]['unit_price'])
+        self.assertEqual(self.service.get_snapshot_data(snapshots[-1]), json.loads(canonical_json(expected)))
+        for snapshot in snapshots:
+            self.assertTrue(self.service.verify_snapshot_integrity(snapshot.id))
+
+    def test_identical_resubmission_reuses_snapshot(self):
+        first = self.service.create_snapshot(self.quote, 'tpl', ['approver'], self.user.id)
+        again = self.service.create_snapshot(self.quote, 'tpl', ['approver'], self.user.id)
+        self.assertEqual(again.id, first.id)
+        self.assertEqual(self.db.query(QuoteSnapshot).count(), 1)
+
+    def test_cleanup_keeps_delta_chain_of_retained_snapshots(self):
+        snapshots = [self.service.create_snapshot(self.quote, 'tpl', ['approver'], self.user.id)]
+        snapshots += [self._resubmit(index) for index in range(4)]
+        self.db.add(EffectiveQuote(quote_id=self.quote.id, snapshot_id=snapshots[2].id, version='1.0'))
+        self.db.commit()
+
+        self.assertEqual(self.service.cleanup_old_snapshots(self.quote.id, keep_count=1), 0)
+        for snapshot in snapshots:
+            self.assertTrue(self.service.verify_snapshot_integrity(snapshot.id))
+
+
+if __name__ == '__main__':
+    unittest.main()
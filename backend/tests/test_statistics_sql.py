@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import unittest
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Quotation, User
+from app.api.v1.endpoints import statistics
+
+
+class StatisticsSqlTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:', connect_args={'check_same_thread': False})
+        TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = TestingSessionLocal()
+
+        self.admin = User(userid='admin', name='Admin', role='admin', is_active=True)
+        self.user = User(userid='user', name='User', role='user', is_active=True)
+        self.idle = User(userid='idle', name='Idle', role='user', is_active=False)
+        self.db.add_all([self.admin, self.user, self.idle])
+        self.db.commit()
+
+        # 2026-01-05 为周一
+        samples = [
+            (datetime(2026, 1, 5, 9), 'approved', 100.0, self.user.id),
+            (datetime(2026, 1, 5, 18), 'pending', 50.0, self.user.id),
+            (datetime(2026, 1, 11, 23), 'rejected', 20.0, self.admin.id),
+            (datetime(2026, 1, 12, 8), 'approved', 30.0, self.user.id),
+            (datetime(2026, 2, 1, 8), 'pending', None, self.admin.id),
+        ]
+        for created_at, status, total, created_by in samples:
+            self.db.add(Quotation(created_at=created_at, status=status, total=total, created_by=created_by))
+        self.db.commit()
+        for user in (self.admin, self.user, self.idle):
+            self.db.refresh(user)
+
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._record_statement)
+
+    def _record_statement(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def tearDown(self):
+        event.remove(self.engine, 'before_cursor_execute', self._record_statement)
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+        self.engine.dispose()
+
+    def test_quotation_statistics_group_by_status_with_inclusive_end_date(self):
+        result = statistics.get_quotation_statistics(
+            period='month', start_date='2026-01-05', end_date='2026-01-11',
+            current_user=self.admin, db=self.db,
+        )
+
+        self.assertEqual(len(self.statements), 1)
+        self.assertEqual(
+            (result.total_count, result.pending_count, result.approved_count, result.rejected_count),
+            (3, 1, 1, 1),
+        )
+        self.assertEqual(result.total_amount, 170.0)
+
+        with self.assertRaises(HTTPException) as ctx:
+            statistics.get_quotation_statistics(
+                period='month', start_date='2026-01-05', end_date="x' OR '1'='1",
+                current_user=self.admin, db=self.db,
+            )
+        self.assertEqual(ctx.exception.status_code, 400)
+
+    def test_user_role_only_sees_own_quotations(self):
+        result = statistics.get_quotation_statistics(
+            period='month', start_date='2026-01-01', end_date='2026-12-31',
+            current_user=self.user, db=self.db,
+        )
+        self.assertEqual(result.total_count, 3)
+        self.assertEqual(result.total_amount, 180.0)
+
+    def test_timeseries_buckets_by_day_week_and_month(self):
+        def series(bucket):
+            return statistics.get_quotation_timeseries(
+                bucket=bucket, period='month', start_date='2026-01-01', end_date='2026-02-28',
+                current_user=self.admin, db=self.db,
+            )['series']
+
+        self.assertEqual(
+            [(row['bucket'], row['count']) for row in series('day')],
+            [('2026-01-05', 2), ('2026-01-11', 1), ('2026-01-12', 1), ('2026-02-01', 1)],
+        )
+        weekly = series('week')
+        self.assertEqual(
+            [(row['bucket'], row['count'], row['approved_count']) for row in weekly],
+            [('2026-01-05', 3, 1), ('2026-01-12', 1, 1), ('2026-01-26', 1, 0)],
+        )
+        self.assertEqual(weekly[0]['total_amount'], 170.0)
+        self.assertEqual(
+            [(row['bucket'], row['total_amount']) for row in series('month')],
+            [('2026-01-01', 200.0), ('2026-02-01', 0.0)],
+        )
+
+        with self.assertRaises(HTTPException):
+            statistics.get_quotation_timeseries(
+                bucket='hour', period='month', start_date=None, end_date=None,
+                current_user=self.admin, db=self.db,
+            )
+
+    def test_user_statistics_group_by_creator(self):
+        rows = statistics.get_user_statistics(
+            period='month', start_date='2026-01-01', end_date='2026-01-31',
+            current_user=self.admin, db=self.db,
+        )
+        by_name = {row.user_name: row for row in rows}
+        self.assertEqual(by_name['User'].quotation_count, 3)
+        self.assertEqual(by_name['User'].approved_count, 2)
+        self.assertAlmostEqual(by_name['User'].success_rate, 200 / 3)
+        self.assertEqual(by_name['Admin'].quotation_count, 1)
+        self.assertEqual(by_name['Idle'].quotation_count, 0)
+
+    def test_dashboard_uses_aggregate_queries(self):
+        admin_view = statistics.get_dashboard_data(current_user=self.admin, db=self.db)
+        system = admin_view['system_stats']
+        self.assertEqual((system['total_users'], system['active_users']), (3, 2))
+        self.assertEqual((system['total_quotations'], system['pending_quotations']), (5, 2))
+        self.assertEqual(system['total_amount'], 200.0)
+        self.assertEqual(len(self.statements), 3)
+
+        personal = statistics.get_dashboard_data(current_user=self.user, db=self.db)['personal_stats']
+        self.assertEqual(personal, {
+            'total_quotations': 3,
+            'pending_quotations': 1,
+            'approved_quotations': 2,
+            'total_amount': 180.0,
+        })
+
+
+if __name__ == '__main__':
+    unittest.main()
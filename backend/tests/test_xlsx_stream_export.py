@@ -0,0 +1,118 @@
+from datetime import datetime
+import asyncio
+import io
+import unittest
+
+from fastapi import HTTPException
+from openpyxl import load_workbook
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Quote, QuoteItem, User
+from app.services.export_service import ExportService
+from app.services.xlsx_stream_export import StreamingXlsxWriter
+
+
+def read_workbook(response):
+    async def collect():
+        return b''.join([chunk async for chunk in response.body_iterator])
+
+    return load_workbook(io.BytesIO(asyncio.run(collect())))
+
+
+class StreamingXlsxExportTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite:///:memory:', connect_args={'check_same_thread': False})
+        TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = TestingSessionLocal()
+
+        owner = User(userid='owner', name='Owner', role='user')
+        self.db.add(owner)
+        self.db.commit()
+
+        self.quote = Quote(
+            quote_number='CIS-KS20260101001',
+            title='Streaming Quote',
+            quote_type='tooling',
+            customer_name='Customer',
+            currency='CNY',
+            subtotal=300.0,
+            discount=0.0,
+            tax_rate=0.13,
+            tax_amount=39.0,
+            total_amount=339.0,
+            status='draft',
+            approval_status='not_submitted',
+            created_by=owner.id,
+            created_at=datetime(2026, 1, 1, 8, 30),
+        )
+        self.db.add(self.quote)
+        self.db.flush()
+        for index in range(3):
+            self.db.add(QuoteItem(
+                quote_id=self.quote.id,
+                item_name=f'Item {index}',
+                machine_type='测试机',
+                quantity=1,
+                unit='小时',
+                unit_price=100.0,
+                adjusted_price=120.0 if index == 0 else None,
+                total_price=100.0,
+            ))
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+        self.engine.dispose()
+
+    def test_quote_workbook_has_all_sheets_and_widths(self):
+        response = ExportService(self.db).export_quote_excel(self.quote.id)
+        workbook = read_workbook(response)
+
+        self.assertEqual(workbook.sheetnames, ['基本信息', '报价明细', '金额汇总'])
+        basic = workbook['基本信息']
+        self.assertEqual(basic.column_dimensions['B'].width, 30)
+        self.assertEqual(basic['A2'].value, '报价单号')
+        self.assertTrue(basic['A1'].font.bold)
+
+        items = list(workbook['报价明细'].iter_rows(min_row=2, values_only=True))
+        self.assertEqual(len(items), 3)
+        self.assertEqual(items[0][9], 120.0)
+        self.assertEqual(items[1][9], 100.0)
+        self.assertEqual(workbook['金额汇总']['B6'].value, 339.0)
+
+    def test_items_sheet_is_skipped_without_items(self):
+        self.db.query(QuoteItem).delete()
+        self.db.commit()
+
+        workbook = read_workbook(ExportService(self.db).export_quote_excel(self.quote.id))
+        self.assertEqual(workbook.sheetnames, ['基本信息', '金额汇总'])
+
+    def test_summary_export_filters_and_raises_when_empty(self):
+        workbook = read_workbook(ExportService(self.db).export_quotes_summary_excel(status='draft'))
+        rows = list(workbook['报价单汇总'].iter_rows(values_only=True))
+        self.assertEqual(rows[0][0], '报价单号')
+        self.assertEqual(rows[1][0], 'CIS-KS20260101001')
+        self.assertEqual(rows[1][7], '2026-01-01')
+
+        with self.assertRaises(HTTPException) as ctx:
+            ExportService(self.db).export_quotes_summary_excel(status='approved')
+        self.assertEqual(ctx.exception.status_code, 404)
+
+    def test_widths_are_estimated_from_sample_rows(self):
+        writer = StreamingXlsxWriter(sample_size=2)
+        count = writer.add_sheet('Sheet', ['A', 'B'], iter([['x' * 5, None], ['y', 'z' * 40], ['w' * 90, 'v']]))
+
+        workbook = read_workbook(writer.to_response('sheet.xlsx'))
+        sheet = workbook['Sheet']
+        self.assertEqual(count, 3)
+        self.assertEqual(sheet.column_dimensions['A'].width, 7)
+        self.assertEqual(sheet.column_dimensions['B'].width, 20)
+        self.assertEqual(sheet.max_row, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()